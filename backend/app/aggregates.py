@@ -0,0 +1,229 @@
+"""
+全域彙總指標
+儀表板總覽與數據故事共用的累計值（總和、計數、最大值持有者），
+建立時計算一次，之後在資料新增或異動時增量更新，讀取為常數時間
+"""
+
+import bisect
+import heapq
+from collections import Counter
+from typing import Callable, Iterable
+
+import numpy as np
+
+
+class TopK:
+    """依某欄位保留前 k 名的記錄，同分時先加入者在前（與穩定排序一致）"""
+
+    def __init__(self, key: str, k: int, source: Callable[[], Iterable[dict]], id_key: str = "id"):
+        self.key = key
+        self.k = k
+        self.id_key = id_key
+        self._source = source
+        self._items: list[dict] = []
+        self._dirty = False
+
+    @classmethod
+    def ranked(
+        cls, key: str, k: int, source: Callable[[], Iterable[dict]], items: list[dict], id_key: str = "id"
+    ) -> "TopK":
+        """以已依名次排列的記錄建立（如欄式資料表的排序索引），不需逐筆插入"""
+        top = cls(key, k, source, id_key)
+        top._items = list(items[:k])
+        return top
+
+    def _neg_values(self) -> list[float]:
+        return [-r[self.key] for r in self._items]
+
+    def offer(self, record: dict) -> None:
+        """新增一筆記錄，若進入前 k 名則插入"""
+        if self._dirty:
+            return
+        if len(self._items) >= self.k and record[self.key] <= self._items[-1][self.key]:
+            return
+        pos = bisect.bisect_right(self._neg_values(), -record[self.key])
+        self._items.insert(pos, record)
+        del self._items[self.k:]
+
+    def update(self, old: dict, new: dict) -> None:
+        """記錄數值異動；名次中的記錄數值下降時，下次讀取再重建"""
+        pos = next((i for i, r in enumerate(self._items) if r[self.id_key] == old[self.id_key]), None)
+        if pos is None:
+            self.offer(new)
+            return
+        del self._items[pos]
+        if new[self.key] < old[self.key]:
+            self._dirty = True
+        else:
+            self.offer(new)
+
+    @property
+    def items(self) -> list[dict]:
+        if self._dirty:
+            self._items = heapq.nlargest(self.k, self._source(), key=lambda r: r[self.key])
+            self._dirty = False
+        return self._items
+
+    @property
+    def best(self) -> dict | None:
+        items = self.items
+        return items[0] if items else None
+
+
+class Aggregates:
+    """KOL、Campaign、成效與輿情的全域彙總"""
+
+    def __init__(
+        self,
+        kols: Callable[[], Iterable[dict]],
+        performances: Callable[[], Iterable[dict]],
+    ):
+        # KOL
+        self.kol_count = 0
+        self.followers_sum = 0
+        self.engagement_rate_sum = 0.0
+        self.audience_quality_sum = 0.0
+        self.platform_counts: Counter[str] = Counter()
+        self.top_influence = TopK("influence_score", 5, kols)
+        self.top_sentiment = TopK("sentiment_score", 1, kols)
+        self.top_engagement = TopK("engagement_rate", 1, kols)
+
+        # Campaign 與成效
+        self.campaign_status_counts: Counter[str] = Counter()
+        self.campaign_engagement_sum = 0
+        self.completed_roi_sum = 0.0
+        self.completed_count = 0
+        self.top_roi = TopK("roi_estimate", 1, performances, id_key="campaign_id")
+
+        # 輿情
+        self.buzz_count = 0
+        self.buzz_volume_sum = 0
+        self.buzz_sentiment_sum = 0.0
+        self.keyword_volumes: dict[str, int] = {}
+        self._top_keyword: str | None = None
+
+    @classmethod
+    def from_store(
+        cls,
+        store,
+        kols: Iterable[dict],
+        campaigns: list[dict],
+        performances: list[dict],
+        buzz_trends: list[dict],
+    ) -> "Aggregates":
+        """KOL 部分由欄式資料表向量化計算，不需逐筆還原 dict；kols 僅供名次重建時走訪"""
+        agg = cls(lambda: kols, lambda: performances)
+        columns = store.columns
+        agg.kol_count = store.size
+        agg.followers_sum = int(columns["followers"].sum())
+        agg.engagement_rate_sum = float(columns["engagement_rate"].sum())
+        agg.audience_quality_sum = float(columns["audience_quality_score"].sum())
+        # 依首次出現順序計數，與逐筆累加的結果一致
+        codes = columns["platform"]
+        counts = np.bincount(codes, minlength=len(store.dictionaries["platform"]))
+        present = np.flatnonzero(counts)
+        first = [int(np.argmax(codes == code)) for code in present]
+        for code in present[np.argsort(first)]:
+            agg.platform_counts[store.dictionaries["platform"][code]] = int(counts[code])
+        # 穩定排序的降冪索引，同分者維持先加入者在前
+        for name in ("top_influence", "top_sentiment", "top_engagement"):
+            top = getattr(agg, name)
+            rows = store.rows(store.sorted_index(top.key, "desc")[:top.k])
+            setattr(agg, name, TopK.ranked(top.key, top.k, lambda: kols, rows))
+
+        for c in campaigns:
+            agg.add_campaign(c)
+        for p in performances:
+            agg.add_performance(p)
+        for t in buzz_trends:
+            agg.add_buzz_trend(t)
+        return agg
+
+    # ---------- KOL ----------
+
+    def _apply_kol(self, kol: dict, sign: int) -> None:
+        self.kol_count += sign
+        self.followers_sum += sign * kol["followers"]
+        self.engagement_rate_sum += sign * kol["engagement_rate"]
+        self.audience_quality_sum += sign * kol["audience_quality_score"]
+        self.platform_counts[kol["platform"]] += sign
+
+    def add_kol(self, kol: dict) -> None:
+        self._apply_kol(kol, 1)
+        for top in (self.top_influence, self.top_sentiment, self.top_engagement):
+            top.offer(kol)
+
+    def update_kol(self, old: dict, new: dict) -> None:
+        self._apply_kol(old, -1)
+        self._apply_kol(new, 1)
+        for top in (self.top_influence, self.top_sentiment, self.top_engagement):
+            top.update(old, new)
+
+    # ---------- Campaign 與成效 ----------
+
+    def add_campaign(self, campaign: dict) -> None:
+        self.campaign_status_counts[campaign["status"]] += 1
+
+    def _apply_performance(self, perf: dict, sign: int) -> None:
+        self.campaign_engagement_sum += sign * perf["total_engagement"]
+        if perf["status"] == "completed":
+            self.completed_roi_sum += sign * perf["roi_estimate"]
+            self.completed_count += sign
+
+    def add_performance(self, perf: dict) -> None:
+        self._apply_performance(perf, 1)
+        self.top_roi.offer(perf)
+
+    def update_performance(self, old: dict, new: dict) -> None:
+        self._apply_performance(old, -1)
+        self._apply_performance(new, 1)
+        self.top_roi.update(old, new)
+
+    # ---------- 輿情 ----------
+
+    def _apply_buzz(self, trend: dict, sign: int) -> None:
+        self.buzz_count += sign
+        self.buzz_volume_sum += sign * trend["volume"]
+        self.buzz_sentiment_sum += sign * trend["sentiment"]
+        keyword = trend["keyword"]
+        self.keyword_volumes[keyword] = self.keyword_volumes.get(keyword, 0) + sign * trend["volume"]
+
+    def add_buzz_trend(self, trend: dict) -> None:
+        self._apply_buzz(trend, 1)
+        keyword = trend["keyword"]
+        if self._top_keyword is None or self.keyword_volumes[keyword] > self.keyword_volumes[self._top_keyword]:
+            self._top_keyword = keyword
+
+    def update_buzz_trend(self, old: dict, new: dict) -> None:
+        self._apply_buzz(old, -1)
+        self._apply_buzz(new, 1)
+        keyword = new["keyword"]
+        if self._top_keyword is None or new["volume"] < old["volume"]:
+            # 聲量減少時才需要重算最大值；匯入只會增加聲量
+            self._top_keyword = max(self.keyword_volumes.items(), key=lambda x: x[1])[0]
+        elif self.keyword_volumes[keyword] > self.keyword_volumes[self._top_keyword]:
+            self._top_keyword = keyword
+
+    # ---------- 讀取 ----------
+
+    @property
+    def avg_engagement_rate(self) -> float:
+        return self.engagement_rate_sum / self.kol_count if self.kol_count else 0
+
+    @property
+    def avg_audience_quality(self) -> float:
+        return self.audience_quality_sum / self.kol_count if self.kol_count else 0
+
+    @property
+    def avg_roi(self) -> float:
+        return self.completed_roi_sum / self.completed_count if self.completed_count else 0
+
+    @property
+    def buzz_avg_sentiment(self) -> float:
+        return self.buzz_sentiment_sum / self.buzz_count if self.buzz_count else 0
+
+    @property
+    def top_keyword(self) -> tuple[str, int]:
+        if self._top_keyword is None:
+            return ("", 0)
+        return (self._top_keyword, self.keyword_volumes[self._top_keyword])
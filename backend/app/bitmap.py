@@ -0,0 +1,150 @@
+"""
+KOL 篩選欄位的點陣圖索引
+- platform、category、每個標籤與品牌契合標籤各一個點陣圖（uint64 陣列，第 r 列為第 r >> 6 個字的第 r & 63 位元）
+- 篩選條件以位元 AND / OR 合併；符合筆數與各篩選值的分面計數以 popcount 計算
+- KOL 異動時只清除與設定該列的位元，不需重建
+"""
+
+import numpy as np
+
+# 提供點陣圖與分面計數的欄位；標籤類欄位的值為列表，每個標籤各一個點陣圖
+DIMENSIONS = ("platform", "category", "tags", "brand_fit_tags")
+LIST_DIMENSIONS = ("tags", "brand_fit_tags")
+
+
+def words(n: int) -> int:
+    return (n + 63) >> 6
+
+
+def pack(mask: np.ndarray) -> np.ndarray:
+    """布林遮罩 → 點陣圖"""
+    packed = np.packbits(mask, bitorder="little")
+    padded = np.zeros(words(len(mask)) * 8, dtype=np.uint8)
+    padded[:len(packed)] = packed
+    return padded.view("<u8")
+
+
+def unpack(bits: np.ndarray, n: int) -> np.ndarray:
+    """點陣圖 → 長度 n 的布林遮罩"""
+    return np.unpackbits(bits.view(np.uint8), count=n, bitorder="little").view(bool)
+
+
+def count(bits: np.ndarray) -> np.ndarray:
+    """各點陣圖（最後一軸）設定的位元數"""
+    return np.bitwise_count(bits).sum(axis=-1, dtype=np.int64)
+
+
+class _Dimension:
+    """單一欄位的點陣圖：每個值一列；members[code] 為字典代碼對應的值位置"""
+
+    def __init__(self, codes: np.ndarray, table: list, listed: bool, n: int):
+        self.listed = listed
+        self.values: list = []
+        self.slots: dict = {}
+        self.members: list[list[int]] = [self._slots(entry) for entry in table]
+
+        contains = np.zeros((len(table), len(self.values)), dtype=bool)
+        for code, slots in enumerate(self.members):
+            contains[code, slots] = True
+        self.bits = np.zeros((len(self.values), words(n)), dtype=np.uint64)
+        for slot in range(len(self.values)):
+            self.bits[slot] = pack(contains[:, slot][codes])
+
+    def _slots(self, entry) -> list[int]:
+        slots = []
+        for value in (entry if self.listed else [entry]):
+            slot = self.slots.get(value)
+            if slot is None:
+                slot = self.slots[value] = len(self.values)
+                self.values.append(value)
+            slots.append(slot)
+        return slots
+
+    def set(self, row: int, old: int, new: int, table: list) -> None:
+        """列的字典代碼由 old 改為 new（新增的列 old 為 -1）"""
+        while len(self.members) < len(table):
+            self.members.append(self._slots(table[len(self.members)]))
+        if len(self.values) > len(self.bits):
+            grown = np.zeros((len(self.values), self.bits.shape[1]), dtype=np.uint64)
+            grown[:len(self.bits)] = self.bits
+            self.bits = grown
+        word, bit = row >> 6, np.uint64(1 << (row & 63))
+        if old >= 0:
+            self.bits[self.members[old], word] &= ~bit
+        self.bits[self.members[new], word] |= bit
+
+    def any(self, values: list) -> np.ndarray:
+        """含任一值的列（不存在的值略過）"""
+        slots = [self.slots[v] for v in values if v in self.slots]
+        if not slots:
+            return np.zeros(self.bits.shape[1], dtype=np.uint64)
+        return np.bitwise_or.reduce(self.bits[slots], axis=0)
+
+    def all(self, values: list) -> np.ndarray:
+        """含所有值的列；任一值不存在時為空"""
+        if any(v not in self.slots for v in values):
+            return np.zeros(self.bits.shape[1], dtype=np.uint64)
+        return np.bitwise_and.reduce(self.bits[[self.slots[v] for v in values]], axis=0)
+
+
+class BitmapIndex:
+    """platform、category、標籤與品牌契合標籤的點陣圖索引"""
+
+    def __init__(self, columns: dict[str, np.ndarray], dictionaries: dict[str, list], n: int):
+        self.size = n
+        self.dimensions = {
+            name: _Dimension(columns[name][:n], dictionaries[name], name in LIST_DIMENSIONS, n)
+            for name in DIMENSIONS
+        }
+
+    def update(self, row: int, old: dict[str, int], new: dict[str, int], dictionaries: dict[str, list]) -> None:
+        """一列的欄位代碼異動；row 等於 size 時為新增的列"""
+        if row >= self.size:
+            self.size = row + 1
+            for dim in self.dimensions.values():
+                if words(self.size) > dim.bits.shape[1]:
+                    dim.bits = np.pad(dim.bits, ((0, 0), (0, words(self.size) - dim.bits.shape[1])))
+        for name, dim in self.dimensions.items():
+            if old.get(name) != new[name]:
+                dim.set(row, old.get(name, -1), new[name], dictionaries[name])
+
+    def filters(
+        self,
+        platform: str | None = None,
+        category: str | None = None,
+        tags_any: list[str] | None = None,
+        tags_all: list[str] | None = None,
+        brand_fit: list[str] | None = None,
+    ) -> dict[str, np.ndarray]:
+        """各欄位篩選條件的點陣圖；沒有條件的欄位不列出"""
+        found = {}
+        if platform:
+            found["platform"] = self.dimensions["platform"].any([platform])
+        if category:
+            found["category"] = self.dimensions["category"].any([category])
+        tags = self.dimensions["tags"]
+        if tags_any and tags_all:
+            found["tags"] = tags.any(tags_any) & tags.all(tags_all)
+        elif tags_any:
+            found["tags"] = tags.any(tags_any)
+        elif tags_all:
+            found["tags"] = tags.all(tags_all)
+        if brand_fit:
+            found["brand_fit_tags"] = self.dimensions["brand_fit_tags"].any(brand_fit)
+        return found
+
+    def facets(self, filters: dict[str, np.ndarray], base: np.ndarray | None = None) -> dict[str, dict]:
+        """各欄位每個值的符合筆數，依筆數遞減
+
+        計算某欄位時套用其他欄位的條件（不含自身），已選取的欄位仍可看到切換成其他值的筆數；
+        base 為其他條件（如粉絲數範圍）的點陣圖
+        """
+        result = {}
+        for name, dim in self.dimensions.items():
+            others = [bits for other, bits in filters.items() if other != name]
+            if base is not None:
+                others.append(base)
+            counts = count(dim.bits & np.bitwise_and.reduce(others)) if others else count(dim.bits)
+            order = np.argsort(-counts, kind="stable")
+            result[name] = {dim.values[i]: int(counts[i]) for i in order.tolist()}
+        return result
@@ -0,0 +1,174 @@
+"""
+回應快取中介層
+- 快取鍵為路徑 + 正規化後的查詢參數（依名稱排序），只快取 GET 的 200 JSON 回應
+- 資料版本（Storage.version）改變時整份失效；LRU 淘汰，總位元組數不超過上限
+- ETag 為回應本文的雜湊（強驗證器），If-None-Match 相符時回 304 不送本文
+- 回應加上 Cache-Control: no-cache，瀏覽器輪詢時每次帶 If-None-Match 重新驗證
+- 端點回應帶 Cache-Control: no-store 時不快取；剖析中的請求（scope["profiling"]）略過查詢，實際執行端點
+"""
+
+import hashlib
+from collections import OrderedDict
+from typing import Callable, NamedTuple
+from urllib.parse import parse_qsl, urlencode
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# 每筆快取額外計入的位元組（鍵、標頭與物件開銷的概估）
+ENTRY_OVERHEAD = 512
+
+# 覆寫的標頭（小寫）
+_REPLACED = {b"etag", b"cache-control", b"x-cache"}
+
+
+class _Entry(NamedTuple):
+    etag: bytes
+    headers: list[tuple[bytes, bytes]]
+    body: bytes
+
+
+def cache_key(scope: Scope) -> str:
+    """路徑 + 依名稱排序的查詢參數；同名參數保留原本順序"""
+    pairs = parse_qsl(scope.get("query_string", b"").decode("latin-1"), keep_blank_values=True)
+    query = urlencode(sorted(pairs, key=lambda p: p[0]))
+    return f"{scope['path']}?{query}" if query else scope["path"]
+
+
+def make_etag(body: bytes) -> bytes:
+    return b'"' + hashlib.blake2b(body, digest_size=16).hexdigest().encode() + b'"'
+
+
+def etag_matches(if_none_match: str | None, etag: bytes) -> bool:
+    """If-None-Match 採弱比較：忽略 W/ 前綴，* 符合任何值"""
+    if not if_none_match:
+        return False
+    tag = etag.decode()
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == tag:
+            return True
+    return False
+
+
+class ResponseCache:
+    """LRU 快取本體；資料版本改變時清空"""
+
+    def __init__(self, version: Callable[[], int], max_bytes: int = 64 << 20):
+        self.version = version
+        self.max_bytes = max_bytes
+        # 單筆超過上限的 1/4 不快取，避免一個大回應清空整份快取
+        self.max_entry_bytes = max_bytes // 4
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._version: int | None = None
+        self.size = 0
+        self.hits = self.misses = self.not_modified = 0
+
+    def current_version(self) -> int:
+        """目前的資料版本；與快取內容的版本不同時先清空"""
+        version = self.version()
+        if self._version != version:
+            self._entries.clear()
+            self.size = 0
+            self._version = version
+        return version
+
+    def get(self, key: str) -> _Entry | None:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: str, entry: _Entry, version: int) -> None:
+        """寫入 version 時計算的回應；計算期間資料已異動則捨棄"""
+        size = _size(entry)
+        if size > self.max_entry_bytes or version != self.current_version():
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.size -= _size(old)
+        self._entries[key] = entry
+        self.size += size
+        while self.size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= _size(evicted)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+        }
+
+
+class ResponseCacheMiddleware:
+    """ASGI 中介層；須加在 CORS 之內，避免快取到依 Origin 而異的標頭"""
+
+    def __init__(self, app: ASGIApp, cache: ResponseCache):
+        self.app = app
+        self.cache = cache
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+
+        cache = self.cache
+        version = cache.current_version()
+        key = cache_key(scope)
+        if_none_match = Headers(scope=scope).get("if-none-match")
+        entry = None if scope.get("profiling") else cache.get(key)
+        if entry is not None:
+            cache.hits += 1
+            await self._respond(send, entry, if_none_match, b"HIT")
+            return
+
+        cache.misses += 1
+        start: Message | None = None
+        chunks: list[bytes] = []
+
+        async def capture(message: Message) -> None:
+            nonlocal start
+            if message["type"] == "http.response.start":
+                if message["status"] == 200 and _is_json(message["headers"]) and not _no_store(message["headers"]):
+                    start = message
+                    return
+            if start is None:
+                # 非 JSON（如串流匯出）或錯誤回應直接轉送，不緩衝
+                await send(message)
+                return
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+            body = b"".join(chunks)
+            headers = [(k, v) for k, v in start["headers"] if k.lower() not in _REPLACED]
+            entry = _Entry(make_etag(body), headers, body)
+            cache.put(key, entry, version)
+            await self._respond(send, entry, if_none_match, b"MISS")
+
+        await self.app(scope, receive, capture)
+
+    async def _respond(self, send: Send, entry: _Entry, if_none_match: str | None, status: bytes) -> None:
+        validators = [(b"etag", entry.etag), (b"cache-control", b"no-cache"), (b"x-cache", status)]
+        if etag_matches(if_none_match, entry.etag):
+            self.cache.not_modified += 1
+            await send({"type": "http.response.start", "status": 304, "headers": validators})
+            await send({"type": "http.response.body", "body": b""})
+            return
+        await send({"type": "http.response.start", "status": 200, "headers": entry.headers + validators})
+        await send({"type": "http.response.body", "body": entry.body})
+
+
+def _is_json(headers: list[tuple[bytes, bytes]]) -> bool:
+    return any(k.lower() == b"content-type" and v.startswith(b"application/json") for k, v in headers)
+
+
+def _no_store(headers: list[tuple[bytes, bytes]]) -> bool:
+    return any(k.lower() == b"cache-control" and b"no-store" in v.lower() for k, v in headers)
+
+
+def _size(entry: _Entry) -> int:
+    return len(entry.body) + sum(len(k) + len(v) for k, v in entry.headers) + ENTRY_OVERHEAD
@@ -0,0 +1,170 @@
+"""
+KOL 多維度彙總（OLAP cube）
+- 維度：平台、類別、粉絲級距、報價區間，可任意組合
+- 指標：筆數、總粉絲、平均互動率、平均影響力、影響力最高的 KOL
+- 以所有維度的組合代碼 bincount 一次算出最細的基礎立方體，任一維度組合皆由其彙總而來，不需重新掃描 KOL
+- 最近查詢的維度組合保留在 LRU 快取，KOL 異動後整份重建
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from .storage import Storage
+from .store import KOLColumnStore, aggregate
+
+DIMENSIONS = ("platform", "category", "follower_tier", "price_range")
+
+MEASURES = ("count", "total_followers", "avg_engagement", "avg_influence", "top_kol")
+
+# 粉絲級距：(下限, 名稱)
+FOLLOWER_TIERS = [
+    (0, "nano"),
+    (10_000, "micro"),
+    (100_000, "mid"),
+    (500_000, "macro"),
+    (1_000_000, "mega"),
+]
+
+
+def follower_tiers(followers: np.ndarray) -> np.ndarray:
+    thresholds = np.array([low for low, _ in FOLLOWER_TIERS[1:]])
+    return np.searchsorted(thresholds, followers, side="right").astype(np.int32)
+
+
+class Cuboid:
+    """一個維度組合的彙總結果：每個有資料的格子一列，codes[d] 為各格子在維度 d 的代碼"""
+
+    def __init__(self, dimensions: tuple[str, ...], codes: dict[str, np.ndarray], stats: dict[str, np.ndarray]):
+        self.dimensions = dimensions
+        self.codes = codes
+        self.stats = stats
+
+    def roll_up(self, dimensions: tuple[str, ...]) -> "Cuboid":
+        """彙總到 dimensions（須為目前維度的子集）；只處理格子，不需回到 KOL"""
+        keys = np.zeros(len(self.stats["count"]), dtype=np.int64)
+        for name in dimensions:
+            keys = keys * (int(self.codes[name].max(initial=0)) + 1) + self.codes[name]
+        cells, inverse = np.unique(keys, return_inverse=True)
+        size = len(cells)
+        stats = {
+            name: np.bincount(inverse, weights=self.stats[name], minlength=size)
+            for name in ("followers", "engagement_rate", "influence_score")
+        }
+        stats["count"] = np.bincount(inverse, weights=self.stats["count"], minlength=size).astype(np.int64)
+        # 每個新格子取影響力最高的子格子代表，同分取列號最小者
+        order = np.lexsort((self.stats["top"], -self.stats["top_influence"], inverse))
+        first = order[np.flatnonzero(np.diff(inverse[order], prepend=-1))]
+        stats["top"] = self.stats["top"][first]
+        stats["top_influence"] = self.stats["top_influence"][first]
+        codes = {name: self.codes[name][first] for name in dimensions}
+        return Cuboid(dimensions, codes, stats)
+
+
+class InsightCube:
+    """KOL 多維度彙總；基礎立方體隨 KOL 資料版本重建，各維度組合快取最近 cache_size 個
+
+    可在執行緒池中呼叫：查詢時持有鎖
+    """
+
+    def __init__(self, storage: Storage, cache_size: int = 32):
+        self.storage = storage
+        self.cache_size = cache_size
+        self._version: tuple[int, int] | None = None
+        self._base: Cuboid | None = None
+        self._labels: dict[str, list] = {}
+        self._cache: OrderedDict[tuple[str, ...], Cuboid] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _sync(self) -> KOLColumnStore:
+        store = self.storage.column_store()
+        version = (id(store), store.version)
+        if self._version != version:
+            self._base = self._build(store)
+            self._cache.clear()
+            self._version = version
+        return store
+
+    def _build(self, store: KOLColumnStore) -> Cuboid:
+        """所有維度的基礎立方體：組合代碼 = 各維度代碼的混合進位，一次 bincount"""
+        columns = store.columns
+        codes = {name: columns[name][:store.size] for name in ("platform", "category", "price_range")}
+        codes["follower_tier"] = follower_tiers(columns["followers"][:store.size])
+        self._labels = {name: store.dictionaries[name] for name in ("platform", "category", "price_range")}
+        self._labels["follower_tier"] = [name for _, name in FOLLOWER_TIERS]
+
+        sizes = [len(self._labels[name]) for name in DIMENSIONS]
+        keys = np.zeros(store.size, dtype=np.int64)
+        for name, size in zip(DIMENSIONS, sizes):
+            keys = keys * size + codes[name]
+        stats = aggregate(columns, keys, int(np.prod(sizes)))
+        cells = np.flatnonzero(stats["count"])
+        stats = {name: values[cells] for name, values in stats.items()}
+        cell_codes = {}
+        for name, size in reversed(list(zip(DIMENSIONS, sizes))):
+            cells, cell_codes[name] = np.divmod(cells, size)
+        return Cuboid(DIMENSIONS, cell_codes, stats)
+
+    def cuboid(self, dimensions: tuple[str, ...]) -> Cuboid:
+        self._sync()
+        cuboid = self._cache.get(dimensions)
+        if cuboid is not None:
+            self._cache.move_to_end(dimensions)
+            return cuboid
+        # 由快取中包含所有維度、格子最少的立方體彙總，沒有時由基礎立方體彙總
+        parents = [c for c in self._cache.values() if set(dimensions) <= set(c.dimensions)]
+        parent = min(parents, key=lambda c: len(c.stats["count"]), default=self._base)
+        cuboid = self._cache[dimensions] = parent.roll_up(dimensions)
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return cuboid
+
+    def query(self, dimensions: list[str], measures: list[str] | None = None) -> dict:
+        """依 dimensions 分組的各項指標，格子依筆數遞減；另附全部 KOL 的總計"""
+        with self._lock:
+            return self._query(dimensions, measures)
+
+    def _query(self, dimensions: list[str], measures: list[str] | None) -> dict:
+        store = self._sync()
+        measures = list(measures or MEASURES)
+        cuboid = self.cuboid(tuple(dimensions))
+        order = np.lexsort([cuboid.codes[name] for name in reversed(dimensions)] + [-cuboid.stats["count"]])
+        columns = [[self._labels[name][code] for code in cuboid.codes[name][order].tolist()] for name in dimensions]
+        columns += self._measures(store, cuboid.stats, order, measures)
+        cells = [dict(zip(dimensions + measures, values)) for values in zip(*columns)]
+        total = {}
+        if store.size:
+            apex = self._measures(store, self.cuboid(()).stats, np.arange(1), measures)
+            total = {name: values[0] for name, values in zip(measures, apex)}
+        return {
+            "dimensions": dimensions,
+            "measures": measures,
+            "cells": cells,
+            "total": total,
+        }
+
+    @staticmethod
+    def _measures(store: KOLColumnStore, stats: dict[str, np.ndarray], cells: np.ndarray, measures: list[str]) -> list[list]:
+        """指定格子的各項指標，每項一個列表"""
+        count = stats["count"][cells]
+        columns = []
+        for name in measures:
+            if name == "count":
+                columns.append(count.tolist())
+            elif name == "total_followers":
+                columns.append(stats["followers"][cells].astype(np.int64).tolist())
+            elif name == "avg_engagement":
+                columns.append([round(v, 2) for v in (stats["engagement_rate"][cells] / count).tolist()])
+            elif name == "avg_influence":
+                columns.append([round(v, 1) for v in (stats["influence_score"][cells] / count).tolist()])
+            elif name == "top_kol":
+                top = stats["top"][cells]
+                columns.append([
+                    {"id": str(kol_id), "name": str(kol_name), "influence_score": score}
+                    for kol_id, kol_name, score in zip(
+                        store.columns["id"][top].tolist(), store.columns["name"][top].tolist(),
+                        stats["top_influence"][cells].tolist(),
+                    )
+                ])
+        return columns
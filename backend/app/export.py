@@ -0,0 +1,89 @@
+"""
+串流匯出
+將 KOL、Campaign 成效與輿情數據逐批轉為 NDJSON 或 CSV 文字區塊，
+交給 StreamingResponse 輸出；伺服器一次只持有一批資料，記憶體用量與匯出筆數無關
+"""
+
+import csv
+import io
+from typing import Iterable, Iterator
+
+from .responses import dumps
+from .store import FIELDS
+
+FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+# 每次輸出的列數
+CHUNK_ROWS = 1000
+
+# CSV 欄位；列表值以 | 連接，巢狀的逐日數據與熱門內容只出現在 NDJSON
+KOL_COLUMNS = FIELDS
+CAMPAIGN_COLUMNS = (
+    "id", "name", "brand", "industry", "start_date", "end_date", "status",
+    "budget", "kol_ids", "kol_count", "objectives", "target_audience",
+    "total_reach", "total_impressions", "total_engagement", "engagement_rate",
+    "sentiment_positive", "sentiment_neutral", "sentiment_negative",
+    "roi_estimate", "brand_mention_increase", "cost_per_engagement", "cost_per_reach",
+)
+
+
+def buzz_columns(sources: list[str]) -> tuple[str, ...]:
+    """輿情 CSV 欄位，來源分佈展開為 source_<來源>"""
+    return ("keyword", "date", "volume", "sentiment", *(f"source_{s}" for s in sources))
+
+
+def campaign_batches(campaigns: Iterable[dict], performance_of) -> Iterator[list[dict]]:
+    """Campaign 附上成效數據，逐批產出"""
+    batch = []
+    for c in campaigns:
+        batch.append({**c, "performance": performance_of(c["id"])})
+        if len(batch) >= CHUNK_ROWS:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def ndjson_chunks(batches: Iterable[list[dict]]) -> Iterator[bytes]:
+    """每批輸出為一段 NDJSON（一行一筆），與 API 回應同樣以 orjson 編碼"""
+    for batch in batches:
+        yield b"".join(dumps(r) + b"\n" for r in batch)
+
+
+def _cell(value):
+    return "|".join(map(str, value)) if isinstance(value, list) else value
+
+
+def flatten_campaign(record: dict) -> dict:
+    """Campaign 與成效合併為單層欄位"""
+    return {**(record.get("performance") or {}), **record}
+
+
+def flatten_buzz(record: dict) -> dict:
+    """來源分佈展開為 source_<來源> 欄位"""
+    return {**record, **{f"source_{k}": v for k, v in record["source_breakdown"].items()}}
+
+
+def csv_chunks(batches: Iterable[list[dict]], columns: tuple[str, ...], flatten=None) -> Iterator[str]:
+    """先輸出標題列，之後每批輸出為一段 CSV；columns 以外的欄位略過"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for batch in batches:
+        for row in map(flatten, batch) if flatten else batch:
+            writer.writerow([_cell(row.get(name, "")) for name in columns])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def encode(fmt: str, batches: Iterable[list[dict]], columns: tuple[str, ...], flatten=None) -> Iterator[str | bytes]:
+    """依格式產生輸出區塊"""
+    if fmt == "ndjson":
+        return ndjson_chunks(batches)
+    return csv_chunks(batches, columns, flatten)
@@ -0,0 +1,270 @@
+"""
+Q-Search 輿情事件匯入
+- 原始提及事件（關鍵字、時間、來源平台、情緒）驗證後放入 asyncio 佇列，請求不等待彙總與寫入
+- 背景工作逐次取出事件累加為 (關鍵字, 日期) 的彙總，每 batch_size 筆或 flush_interval 秒寫回儲存層一次（寫入在執行緒中進行）
+- 佇列中的事件數達 max_pending 時：HTTP 匯入直接拒絕（429），檔案追蹤暫停讀取，直到消化完再繼續
+- 合併規則（timeseries.add_mentions）：聲量為提及數累加；情緒與來源佔比（百分比）依聲量加權平均，由儲存層以增量寫入
+"""
+
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime
+
+import orjson
+
+from .storage import Storage
+
+logger = logging.getLogger(__name__)
+
+# 單一請求回報的錯誤筆數上限
+MAX_ERRORS = 10
+
+
+def load_events(body: bytes, ndjson: bool = False) -> list:
+    """解析請求本文：JSON 陣列，或每行一個事件的 NDJSON"""
+    if ndjson:
+        # 組成一個 JSON 陣列一次解析，比逐行呼叫 orjson.loads 快
+        body = b"[" + b",".join(line for line in body.splitlines() if line.strip()) + b"]"
+    items = orjson.loads(body)
+    if not isinstance(items, list):
+        raise ValueError("body must be a JSON array of events")
+    return items
+
+
+# epoch 秒數每 15 分鐘為一格（所有時區的偏移皆為 15 分鐘的倍數），同一格必為同一個本地日期
+_QUARTER = 900
+_dates: dict[int, str] = {}
+
+
+def event_date(timestamp) -> str:
+    """ISO 8601 字串或 epoch 秒數 → 本地日期 YYYY-MM-DD（與既有輿情的日期一致）"""
+    if isinstance(timestamp, str):
+        moment = datetime.fromisoformat(timestamp)
+        if moment.tzinfo is None:
+            return moment.date().isoformat()
+        timestamp = moment.timestamp()
+    elif isinstance(timestamp, bool) or not isinstance(timestamp, (int, float)):
+        raise ValueError("timestamp must be an ISO 8601 string or epoch seconds")
+    quarter = int(timestamp // _QUARTER)
+    date = _dates.get(quarter)
+    if date is None:
+        if len(_dates) > 100_000:
+            _dates.clear()
+        date = _dates[quarter] = time.strftime("%Y-%m-%d", time.localtime(quarter * _QUARTER))
+    return date
+
+
+class BuzzIngestor:
+    def __init__(self, storage: Storage, max_pending: int = 200_000, batch_size: int = 20_000,
+                 flush_interval: float = 0.2):
+        self.storage = storage
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        # 每個元素為一次匯入的事件列表：(關鍵字, 日期, 來源序號, 情緒)
+        self.queue: asyncio.Queue[list[tuple]] = asyncio.Queue()
+        self.pending = 0
+        self._space = asyncio.Event()
+        self._space.set()
+        self._task: asyncio.Task | None = None
+        # 寫入中的批次（背景工作取消時仍會完成）
+        self._writing: asyncio.Future | None = None
+        # 彙總中的批次與其事件數
+        self._groups: dict[tuple[str, str], list] = {}
+        self._collected = 0
+        self._sources: dict[str, int] | None = None
+        self.stats = {
+            "accepted": 0, "rejected": 0, "throttled": 0, "flushed": 0,
+            "batches": 0, "failed_batches": 0, "last_flush_ms": 0.0, "last_flush_at": None,
+        }
+
+    @property
+    def sources(self) -> dict[str, int]:
+        if self._sources is None:
+            self._sources = {s: i for i, s in enumerate(self.storage.buzz_series().sources)}
+        return self._sources
+
+    def parse(self, items: list) -> tuple[list[tuple], list[dict]]:
+        """驗證原始事件，回傳 (有效事件, 錯誤)；錯誤只保留前 MAX_ERRORS 筆"""
+        sources = self.sources
+        events, errors, rejected = [], [], 0
+        for i, item in enumerate(items):
+            try:
+                keyword = item["keyword"]
+                if not isinstance(keyword, str) or not keyword:
+                    raise ValueError("keyword must be a non-empty string")
+                source = sources.get(item["source"])
+                if source is None:
+                    raise ValueError(f"source must be one of {list(sources)}")
+                sentiment = item["sentiment"]
+                if isinstance(sentiment, bool) or not isinstance(sentiment, (int, float)) or not 0 <= sentiment <= 1:
+                    raise ValueError("sentiment must be a number within [0, 1]")
+                events.append((keyword, event_date(item["timestamp"]), source, float(sentiment)))
+            except (KeyError, TypeError, ValueError, OverflowError, OSError) as e:
+                rejected += 1
+                if len(errors) < MAX_ERRORS:
+                    message = f"missing field {e}" if isinstance(e, KeyError) else str(e)
+                    errors.append({"index": i, "error": message})
+        self.stats["rejected"] += rejected
+        return events, errors
+
+    def offer(self, events: list[tuple]) -> bool:
+        """放入佇列；超過容量時全部拒絕並回傳 False（HTTP 匯入用，不等待）"""
+        if self.pending + len(events) > self.max_pending:
+            self.stats["throttled"] += len(events)
+            return False
+        self._enqueue(events)
+        return True
+
+    async def put(self, events: list[tuple]) -> None:
+        """放入佇列；超過容量時等待消化（檔案追蹤用）"""
+        while self.pending and self.pending + len(events) > self.max_pending:
+            self._space.clear()
+            await self._space.wait()
+        self._enqueue(events)
+
+    def _enqueue(self, events: list[tuple]) -> None:
+        if not events:
+            return
+        self.start()
+        self.pending += len(events)
+        self.stats["accepted"] += len(events)
+        self.queue.put_nowait(events)
+
+    def start(self) -> None:
+        """首次匯入時才啟動背景彙總工作"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def close(self) -> None:
+        """停止背景工作，並寫入彙總中與佇列中剩餘的事件"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._writing is not None:
+            await asyncio.wait([self._writing])
+        while not self.queue.empty():
+            self._aggregate(self.queue.get_nowait())
+        if self._collected:
+            await self.flush()
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            self._aggregate(await self.queue.get())
+            deadline = loop.time() + self.flush_interval
+            while self._collected < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    events = await asyncio.wait_for(self.queue.get(), timeout)
+                except TimeoutError:
+                    break
+                self._aggregate(events)
+                # 每彙總一次匯入的事件就讓出事件迴圈，整批的彙總不會阻塞其他請求
+                await asyncio.sleep(0)
+            await self.flush()
+
+    def _aggregate(self, events: list[tuple]) -> None:
+        """將事件累加到彙總中的批次：(關鍵字, 日期) → [提及數, 情緒總和, 各來源提及數]"""
+        groups = self._groups
+        width = len(self.sources)
+        for keyword, date, source, sentiment in events:
+            group = groups.get((keyword, date))
+            if group is None:
+                group = groups[(keyword, date)] = [0, 0.0, [0] * width]
+            group[0] += 1
+            group[1] += sentiment
+            group[2][source] += 1
+        self._collected += len(events)
+
+    async def flush(self) -> None:
+        """將彙總中的批次寫回儲存層；寫入失敗時記錄錯誤，事件不重試"""
+        started = time.perf_counter()
+        groups, count = self._groups, self._collected
+        self._groups, self._collected = {}, 0
+        try:
+            # SQLite 寫入會阻塞，移到執行緒中；取消時等寫入完成，避免與下一批同時寫入
+            self._writing = asyncio.ensure_future(asyncio.to_thread(self._write, groups))
+            await asyncio.shield(self._writing)
+        except Exception:
+            self.stats["failed_batches"] += 1
+            logger.exception("buzz ingestion flush failed (%d events)", count)
+        else:
+            self.stats["flushed"] += count
+            self.stats["batches"] += 1
+        finally:
+            self.pending -= count
+            self.stats["last_flush_ms"] = round((time.perf_counter() - started) * 1000, 3)
+            self.stats["last_flush_at"] = time.time()
+            if self.pending < self.max_pending:
+                self._space.set()
+
+    def _write(self, groups: dict[tuple[str, str], list]) -> None:
+        """將批次的提及數累加到儲存層；由儲存層合併既有的當日輿情，不在行程中保留累計值
+
+        多個 worker 行程同時匯入同一天時，各自的增量都會計入
+        """
+        sources = list(self.sources)
+        self.storage.add_buzz_mentions([
+            (keyword, date, n, sentiment_sum, dict(zip(sources, source_counts)))
+            for (keyword, date), (n, sentiment_sum, source_counts) in groups.items()
+        ])
+
+    def status(self) -> dict:
+        return {
+            **self.stats,
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "batch_size": self.batch_size,
+            "flush_interval": self.flush_interval,
+        }
+
+
+async def tail_file(ingestor: BuzzIngestor, path: str, poll_interval: float = 0.5) -> None:
+    """追蹤 NDJSON 檔案（每行一個事件），從啟動時的檔尾開始讀取新增的行；檔案被截斷時從頭讀取
+
+    作為訊息佇列的替代：外部程序持續附加事件到檔案即可匯入。
+    """
+    offset = os.path.getsize(path) if os.path.exists(path) else 0
+    remainder = b""
+    while True:
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            size = 0
+        if size < offset:
+            offset, remainder = 0, b""
+        if size > offset:
+            chunk = await asyncio.to_thread(_read_from, path, offset, size - offset)
+            offset += len(chunk)
+            lines = (remainder + chunk).split(b"\n")
+            remainder = lines.pop()
+            items, invalid = [], 0
+            for line in lines:
+                if line.strip():
+                    try:
+                        items.append(orjson.loads(line))
+                    except orjson.JSONDecodeError:
+                        invalid += 1
+            events, errors = ingestor.parse(items)
+            ingestor.stats["rejected"] += invalid
+            if errors or invalid:
+                logger.warning("buzz ingestion: %d invalid lines in %s", len(items) - len(events) + invalid, path)
+            for start in range(0, len(events), ingestor.batch_size):
+                await ingestor.put(events[start:start + ingestor.batch_size])
+        else:
+            await asyncio.sleep(poll_interval)
+
+
+def _read_from(path: str, offset: int, size: int) -> bytes:
+    with open(path, "rb") as f:
+        f.seek(offset)
+        return f.read(size)
@@ -0,0 +1,216 @@
+"""
+進行中 Campaign 的成效即時推送（Server-Sent Events）
+- 每個 Campaign 一個共用的 CampaignFeed：成效更新時只計算一次差異、編碼一次，再放入所有訂閱者的佇列
+- 差異只包含變動的總計欄位、新增或變動的每日數據（與移出 30 天視窗的日期），最佳表現內容有變動時才附上
+- 事件 id 遞增；重新連線時依 Last-Event-ID 補送緩衝區中的差異，太舊時改送完整快照
+- 訂閱者讀取太慢、佇列已滿時丟棄積壓的差異，改送一次完整快照
+- 廣播器與訂閱者只存在於各自的 worker 行程；資料版本改變時重新讀取有訂閱者的 Campaign，
+  其他 worker 寫入的成效（須為共用的 sqlite 儲存層）也會推送
+"""
+
+import asyncio
+import random
+import time
+from collections import deque
+from datetime import datetime
+from typing import AsyncIterator
+
+import orjson
+
+from .storage import Storage
+
+# 以差異推送的列表欄位，其餘欄位為總計
+_DAILY = "daily_metrics"
+_CONTENT = "top_performing_content"
+
+# 佇列已滿時放入的標記，取出時改送完整快照
+_RESYNC = object()
+
+# 閒置時送出的註解行，讓代理伺服器保持連線並偵測斷線
+PING = b": ping\n\n"
+
+
+def diff(old: dict, new: dict) -> dict:
+    """兩份成效數據的差異；沒有變動時回傳空 dict"""
+    changes = {}
+    totals = {k: v for k, v in new.items() if k not in (_DAILY, _CONTENT) and old.get(k) != v}
+    if totals:
+        changes["totals"] = totals
+    old_days = {m["date"]: m for m in old.get(_DAILY, ())}
+    days = [m for m in new[_DAILY] if old_days.get(m["date"]) != m]
+    if days:
+        changes[_DAILY] = days
+    new_dates = {m["date"] for m in new[_DAILY]}
+    removed = [d for d in old_days if d not in new_dates]
+    if removed:
+        changes["removed_dates"] = removed
+    if new[_CONTENT] != old.get(_CONTENT):
+        changes[_CONTENT] = new[_CONTENT]
+    return changes
+
+
+def sse(event: str, id: int, data: dict) -> bytes:
+    """編碼一則 SSE 訊息（orjson 輸出不含換行，可直接放在單一 data 行）"""
+    return b"id: %d\nevent: %s\ndata: %s\n\n" % (id, event.encode(), orjson.dumps(data))
+
+
+class CampaignFeed:
+    """單一 Campaign 的廣播器"""
+
+    def __init__(self, performance: dict, id: int, backlog: int):
+        self.campaign_id = performance["campaign_id"]
+        # 保存副本：記憶體儲存層會就地更新原本的 dict，差異須與已送出的版本比較
+        self.performance = dict(performance)
+        self.id = id
+        # 最近的差異；history_start 為緩衝區中第一則差異的前一個 id，自該 id 之後可補送
+        self.history: deque[tuple[int, bytes]] = deque(maxlen=backlog)
+        self.history_start = id
+        self.subscribers: set[asyncio.Queue] = set()
+        self.published_at = time.monotonic()
+        self._snapshot: bytes | None = None
+
+    def snapshot(self) -> bytes:
+        """目前的完整成效；每次更新後最多編碼一次"""
+        if self._snapshot is None:
+            self._snapshot = sse("snapshot", self.id, self.performance)
+        return self._snapshot
+
+    def publish(self, performance: dict, id: int) -> bytes | None:
+        """計算差異並分送給所有訂閱者；沒有變動時回傳 None"""
+        changes = diff(self.performance, performance)
+        self.performance = dict(performance)
+        self._snapshot = None
+        if not changes:
+            return None
+        self.id = id
+        message = sse("delta", id, {"campaign_id": self.campaign_id, **changes})
+        if len(self.history) == self.history.maxlen:
+            self.history_start = self.history[0][0]
+        self.history.append((id, message))
+        self.published_at = time.monotonic()
+        self.broadcast(message)
+        return message
+
+    def broadcast(self, message: bytes) -> None:
+        for queue in self.subscribers:
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                if message is PING:
+                    continue
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(_RESYNC)
+
+    def replay(self, last_id: int | None) -> list[bytes]:
+        """新連線的第一批訊息：已是最新則不送，緩衝區涵蓋時補送差異，否則送完整快照"""
+        if last_id == self.id:
+            return []
+        if last_id == self.history_start or any(id == last_id for id, _ in self.history):
+            return [message for id, message in self.history if id > last_id]
+        return [self.snapshot()]
+
+
+class LiveHub:
+    def __init__(self, storage: Storage, queue_size: int = 64, backlog: int = 256, heartbeat: float = 15.0,
+                 sync_interval: float = 1.0):
+        self.storage = storage
+        self.queue_size = queue_size
+        self.backlog = backlog
+        self.heartbeat = heartbeat
+        self.sync_interval = sync_interval
+        self.feeds: dict[str, CampaignFeed] = {}
+        self._heartbeat_task: asyncio.Task | None = None
+        self._sync_task: asyncio.Task | None = None
+        # 事件 id 以啟動時間（微秒）為起點遞增，重新啟動後不會與舊連線的 id 重複
+        self._next_id = time.time_ns() // 1000
+
+    def _id(self) -> int:
+        self._next_id += 1
+        return self._next_id
+
+    def feed(self, performance: dict) -> CampaignFeed:
+        feed = self.feeds.get(performance["campaign_id"])
+        if feed is None:
+            feed = self.feeds[performance["campaign_id"]] = CampaignFeed(performance, self._id(), self.backlog)
+        return feed
+
+    def publish(self, performance: dict) -> int:
+        """成效更新後呼叫；有訂閱者時計算一次差異並分送，回傳收到的訂閱者數"""
+        feed = self.feeds.get(performance["campaign_id"])
+        if feed is None:
+            return 0
+        feed.publish(performance, self._id())
+        return len(feed.subscribers)
+
+    async def _beat(self) -> None:
+        """所有 Campaign 共用一個心跳工作，不需為每個連線各設逾時；沒有訂閱者時結束"""
+        while self.feeds:
+            await asyncio.sleep(self.heartbeat)
+            now = time.monotonic()
+            for feed in list(self.feeds.values()):
+                if now - feed.published_at >= self.heartbeat:
+                    feed.broadcast(PING)
+
+    async def _sync(self) -> None:
+        """資料版本改變時重新讀取有訂閱者的 Campaign 並推送差異，涵蓋其他 worker 的寫入；沒有訂閱者時結束
+
+        第一次一律重新讀取，補上端點讀取成效到開始訂閱之間的寫入
+        """
+        version = None
+        while self.feeds:
+            await asyncio.sleep(self.sync_interval)
+            if self.storage.version == version:
+                continue
+            version = self.storage.version
+            for campaign_id in list(self.feeds):
+                performance = await asyncio.to_thread(self.storage.get_performance, campaign_id)
+                if performance is not None:
+                    self.publish(performance)
+
+    async def stream(self, performance: dict, last_id: int | None) -> AsyncIterator[bytes]:
+        """單一連線的事件串流；開始讀取時才訂閱，用戶端在此之前斷線不會留下廣播器"""
+        feed = self.feed(performance)
+        queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        first = feed.replay(last_id)
+        feed.subscribers.add(queue)
+        loop = asyncio.get_running_loop()
+        if self._heartbeat_task is None or self._heartbeat_task.done():
+            self._heartbeat_task = loop.create_task(self._beat())
+        if self._sync_task is None or self._sync_task.done():
+            self._sync_task = loop.create_task(self._sync())
+        try:
+            yield b"retry: 3000\n\n" + b"".join(first)
+            while True:
+                message = await queue.get()
+                yield feed.snapshot() if message is _RESYNC else message
+        finally:
+            feed.subscribers.discard(queue)
+            if not feed.subscribers and self.feeds.get(feed.campaign_id) is feed:
+                del self.feeds[feed.campaign_id]
+
+    def status(self) -> dict:
+        return {
+            "campaigns": len(self.feeds),
+            "subscribers": sum(len(f.subscribers) for f in self.feeds.values()),
+        }
+
+
+async def simulate(hub: LiveHub, storage: Storage, interval: float) -> None:
+    """展示用的數據來源：定期為有訂閱者的進行中 Campaign 累加今天的觸及、互動與曝光"""
+    while True:
+        await asyncio.sleep(interval)
+        today = datetime.now().strftime("%Y-%m-%d")
+        for campaign_id in list(hub.feeds):
+            performance = await asyncio.to_thread(storage.get_performance, campaign_id)
+            if performance is None or performance["status"] != "active":
+                continue
+            reach = random.randint(100, 2000)
+            updated = await asyncio.to_thread(
+                storage.add_daily_metrics, campaign_id, today, reach,
+                int(reach * performance["engagement_rate"] / 100),
+                int(reach * random.uniform(2, 4)),
+                random.uniform(0.5, 0.9),
+            )
+            if updated is not None:
+                hub.publish(updated)
@@ -3,27 +3,97 @@ KOL 影響力儀表板 API
 提供 KOL 數據、Campaign 成效、輿情趨勢等 API 端點
 """
 
+import asyncio
 import os
-from fastapi import FastAPI, Query
+from contextlib import asynccontextmanager
+from datetime import datetime
+
+import numpy as np
+from fastapi import FastAPI, Header, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
 from typing import Optional
 
-from .mock_data import (
-    ALL_KOLS,
-    ALL_CAMPAIGNS,
-    ALL_CAMPAIGN_PERFORMANCES,
-    ALL_AUDIENCE_DATA,
-    ALL_BUZZ_TRENDS,
-    PLATFORM_DISTRIBUTION,
-    CATEGORY_INSIGHTS,
-    generate_kol_comparison,
+from .cache import ResponseCache, ResponseCacheMiddleware
+from .cube import DIMENSIONS as CUBE_DIMENSIONS, MEASURES as CUBE_MEASURES, InsightCube
+from .export import (
+    CAMPAIGN_COLUMNS, CHUNK_ROWS, FORMATS, KOL_COLUMNS,
+    buzz_columns, campaign_batches, encode, flatten_buzz, flatten_campaign,
 )
+from .ingest import BuzzIngestor, load_events, tail_file
+from .live import LiveHub, simulate
+from .metrics import PROMETHEUS_CONTENT_TYPE, Metrics, MetricsMiddleware
+from .mock_data import generate_kol_comparison
+from .models import KOLProfile
+from .pagination import InvalidCursor, decode_cursor, encode_cursor, is_date, is_number, is_string
+from .profiler import DEFAULT_DURATION, MAX_DURATION, MODES as PROFILER_MODES, Profiler, ProfilerMiddleware
+from .portfolio import COST_BASES, DEFAULT_TIME_BUDGET_MS, OBJECTIVES, PortfolioOptimizer, parse_mix
+from .recommend import Recommender
+from .responses import EncodedCache, ORJSONResponse, ORJSONRoute
+from .network import NetworkIndex
+from .search import FIELD_BOOSTS, SearchIndex
+from .similarity import SimilarityIndex
+from .sketch import MAX_KOLS, AudienceSketches
+from .storage import create_storage
+from .store import SORT_KEYS
+from .timeseries import AGGREGATIONS, INTERVALS, from_days, to_day
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 數據預設於首次取用時載入；PRELOAD_DATA=1 改在啟動階段載入（啟動較慢，第一個請求不需等待）
+    if os.getenv("PRELOAD_DATA") == "1":
+        STORAGE.preload()
+    # BUZZ_INGEST_FILE：追蹤 NDJSON 檔案匯入輿情事件（訊息佇列的替代）
+    tasks = []
+    if os.getenv("BUZZ_INGEST_FILE"):
+        tasks.append(asyncio.create_task(tail_file(INGESTOR, os.environ["BUZZ_INGEST_FILE"])))
+    # LIVE_SIMULATION_INTERVAL：展示用，每隔幾秒為有訂閱者的進行中 Campaign 產生新的成效數據
+    if float(os.getenv("LIVE_SIMULATION_INTERVAL", "0")) > 0:
+        tasks.append(asyncio.create_task(simulate(LIVE, STORAGE, float(os.environ["LIVE_SIMULATION_INTERVAL"]))))
+    yield
+    for task in tasks:
+        task.cancel()
+    await INGESTOR.close()
+
 
 app = FastAPI(
     title="KOL Influence Dashboard API",
     description="影響力數據專案 - 協助品牌精準媒合 KOL 並驗證行銷成效",
-    version="0.1.0"
+    version="0.1.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
+)
+# 端點回傳值直接以 orjson 編碼（須在註冊路由前設定）
+app.router.route_class = ORJSONRoute
+
+# 資料存取層（STORAGE_BACKEND=memory|sqlite）
+STORAGE = create_storage()
+RECOMMENDER = Recommender(STORAGE)
+SIMILARITY = SimilarityIndex(STORAGE)
+SEARCH = SearchIndex(STORAGE)
+NETWORK = NetworkIndex(STORAGE)
+SKETCHES = AudienceSketches(STORAGE)
+CUBE = InsightCube(STORAGE)
+PORTFOLIO = PortfolioOptimizer(STORAGE, SKETCHES)
+# 只隨資料異動的回應，編碼一次後重複使用
+ENCODED = EncodedCache(STORAGE)
+# 進行中 Campaign 的成效推送：每個 Campaign 共用一個廣播器
+LIVE = LiveHub(STORAGE)
+# 輿情事件匯入：佇列緩衝、背景分批彙總
+INGESTOR = BuzzIngestor(
+    STORAGE,
+    max_pending=int(os.getenv("BUZZ_INGEST_MAX_PENDING", "200000")),
+    batch_size=int(os.getenv("BUZZ_INGEST_BATCH", "20000")),
+    flush_interval=float(os.getenv("BUZZ_INGEST_INTERVAL_MS", "200")) / 1000,
+)
+
+# GET 回應快取（ETag / 304），資料寫入時整份失效；加在 CORS 之前使其位於 CORS 內層
+RESPONSE_CACHE = ResponseCache(
+    lambda: STORAGE.version, max_bytes=int(os.getenv("RESPONSE_CACHE_MB", "64")) << 20
 )
+app.add_middleware(ResponseCacheMiddleware, cache=RESPONSE_CACHE)
 
 # CORS 設定 - 支援 Zeabur 部署
 # 從環境變數取得允許的 origins，或使用預設值
@@ -44,44 +114,60 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 請求指標（路由樣板的解析與剖析共用）
+METRICS = Metrics(app.routes)
+
+# 隨選效能剖析（需設定 PROFILER_TOKEN）；位於回應快取外層，剖析中的請求不讀快取
+PROFILER = Profiler(
+    METRICS.route_template, token=os.getenv("PROFILER_TOKEN"), capacity=int(os.getenv("PROFILER_BUFFER", "100"))
+)
+app.add_middleware(ProfilerMiddleware, profiler=PROFILER)
+
+# 各路由樣板的請求數、延遲與回應大小；加在最外層，快取命中與 CORS 預檢也一併計入
+app.add_middleware(MetricsMiddleware, metrics=METRICS)
+
+
+@app.exception_handler(TimeoutError)
+async def storage_timeout(request: Request, exc: TimeoutError):
+    """SQLite 連線池在時限內沒有可用連線：請用戶端稍後重試"""
+    return ORJSONResponse({"error": str(exc)}, status_code=503, headers={"Retry-After": "1"})
+
+
+@app.exception_handler(InvalidCursor)
+async def invalid_cursor(request: Request, exc: InvalidCursor):
+    """游標指向的資料已不存在（如 KOL 已刪除）：與解碼失敗相同，以 200 回傳錯誤"""
+    return ORJSONResponse({"error": "Invalid cursor"}, headers={"Cache-Control": "no-store"})
+
 
 # ==================== Dashboard Overview ====================
 
 @app.get("/api/dashboard/overview")
-async def get_dashboard_overview():
+def get_dashboard_overview():
     """儀表板總覽數據"""
-    total_reach = sum(k["followers"] for k in ALL_KOLS)
-    active_campaigns = len([c for c in ALL_CAMPAIGNS if c["status"] == "active"])
-    completed_campaigns = len([c for c in ALL_CAMPAIGNS if c["status"] == "completed"])
-
-    # 計算總互動
-    total_engagement = sum(p["total_engagement"] for p in ALL_CAMPAIGN_PERFORMANCES)
+    return ENCODED.response("dashboard/overview", _dashboard_overview)
 
-    # 平均互動率
-    avg_engagement_rate = sum(k["engagement_rate"] for k in ALL_KOLS) / len(ALL_KOLS)
 
-    # 平均 ROI
-    completed_perfs = [p for p in ALL_CAMPAIGN_PERFORMANCES if p["status"] == "completed"]
-    avg_roi = sum(p["roi_estimate"] for p in completed_perfs) / len(completed_perfs) if completed_perfs else 0
+def _dashboard_overview() -> dict:
+    summary = STORAGE.summary()
 
     return {
-        "total_kols": len(ALL_KOLS),
-        "total_reach": total_reach,
-        "active_campaigns": active_campaigns,
-        "completed_campaigns": completed_campaigns,
-        "total_engagement": total_engagement,
-        "avg_engagement_rate": round(avg_engagement_rate, 2),
-        "avg_roi": round(avg_roi, 2),
-        "platform_distribution": PLATFORM_DISTRIBUTION,
-        "category_insights": CATEGORY_INSIGHTS,
-        "top_kols": sorted(ALL_KOLS, key=lambda x: x["influence_score"], reverse=True)[:5]
+        "total_kols": summary["total_kols"],
+        "total_reach": summary["total_reach"],
+        "active_campaigns": summary["campaign_status_counts"].get("active", 0),
+        "completed_campaigns": summary["campaign_status_counts"].get("completed", 0),
+        "total_engagement": summary["total_campaign_engagement"],
+        "avg_engagement_rate": round(summary["avg_engagement_rate"], 2),
+        "avg_roi": round(summary["avg_roi"], 2),
+        "platform_distribution": STORAGE.platform_distribution(),
+        "category_insights": STORAGE.category_insights(),
+        "top_kols": summary["top_kols"]
     }
 
 
 # ==================== KOL 相關 API ====================
 
 @app.get("/api/kols")
-async def get_kols(
+def get_kols(
     platform: Optional[str] = None,
     category: Optional[str] = None,
     min_followers: Optional[int] = None,
@@ -89,48 +175,87 @@ async def get_kols(
     min_engagement: Optional[float] = None,
     sort_by: str = "influence_score",
     order: str = "desc",
-    limit: int = 50
+    limit: int = 50,
+    cursor: Optional[str] = Query(None, description="上一頁回傳的 next_cursor"),
+    tags_any: Optional[str] = Query(None, description="逗號分隔，含任一標籤"),
+    tags_all: Optional[str] = Query(None, description="逗號分隔，含所有標籤"),
+    brand_fit: Optional[str] = Query(None, description="逗號分隔，含任一品牌契合標籤"),
+    facets: bool = Query(False, description="是否回傳各篩選欄位每個值的符合筆數")
 ):
-    """取得 KOL 列表，支援篩選與排序"""
-    kols = ALL_KOLS.copy()
-
-    # 篩選
-    if platform:
-        kols = [k for k in kols if k["platform"] == platform]
-    if category:
-        kols = [k for k in kols if k["category"] == category]
-    if min_followers:
-        kols = [k for k in kols if k["followers"] >= min_followers]
-    if max_followers:
-        kols = [k for k in kols if k["followers"] <= max_followers]
-    if min_engagement:
-        kols = [k for k in kols if k["engagement_rate"] >= min_engagement]
-
-    # 排序
-    reverse = order == "desc"
-    if sort_by in ["influence_score", "followers", "engagement_rate", "sentiment_score"]:
-        kols.sort(key=lambda x: x[sort_by], reverse=reverse)
+    """取得 KOL 列表，支援篩選、排序與游標分頁"""
+    tag_filters = {
+        "tags_any": tags_any.split(",") if tags_any else None,
+        "tags_all": tags_all.split(",") if tags_all else None,
+        "brand_fit": brand_fit.split(",") if brand_fit else None,
+    }
+    after = None
+    if cursor:
+        # 排序鍵為數值欄位時游標的 value 須為數值，其他排序方式只依 ID 定位
+        types = {"value": is_number, "id": is_string} if sort_by in SORT_KEYS else {"id": is_string}
+        try:
+            fields = decode_cursor(cursor, types, sort_by=sort_by, order=order)
+        except InvalidCursor:
+            return {"error": "Invalid cursor"}
+        after = (fields.get("value"), fields["id"])
+
+    # 多取一筆判斷是否還有下一頁
+    total, kols = STORAGE.query_kols(
+        platform=platform,
+        category=category,
+        min_followers=min_followers,
+        max_followers=max_followers,
+        min_engagement=min_engagement,
+        sort_by=sort_by,
+        order=order,
+        limit=limit + 1,
+        after=after,
+        **tag_filters,
+    )
 
-    return {
-        "total": len(kols),
-        "kols": kols[:limit]
+    next_cursor = None
+    if limit > 0 and len(kols) > limit:
+        last = kols[limit - 1]
+        next_cursor = encode_cursor(
+            sort_by=sort_by, order=order,
+            value=last[sort_by] if sort_by in SORT_KEYS else None, id=last["id"]
+        )
+
+    result = {
+        "total": total,
+        "kols": kols[:max(limit, 0)],
+        "next_cursor": next_cursor
     }
+    if facets:
+        result["facets"] = STORAGE.kol_facets(
+            platform=platform,
+            category=category,
+            min_followers=min_followers,
+            max_followers=max_followers,
+            min_engagement=min_engagement,
+            **tag_filters,
+        )
+    return result
+
+
+@app.get("/api/kols/compare")
+def compare_kols(kol_ids: str = Query(..., description="逗號分隔的 KOL ID")):
+    """比較多個 KOL"""
+    ids = list(dict.fromkeys(kol_ids.split(",")))
+    return generate_kol_comparison(STORAGE.get_kols(ids), ids)
 
 
 @app.get("/api/kols/{kol_id}")
-async def get_kol_detail(kol_id: str):
+def get_kol_detail(kol_id: str):
     """取得單一 KOL 詳細資料"""
-    kol = next((k for k in ALL_KOLS if k["id"] == kol_id), None)
+    kol = STORAGE.get_kol(kol_id)
     if not kol:
         return {"error": "KOL not found"}
 
     # 取得受眾數據
-    audience = ALL_AUDIENCE_DATA.get(kol_id, {})
+    audience = STORAGE.get_audience(kol_id) or {}
 
     # 取得參與的 Campaign
-    participated_campaigns = [
-        c for c in ALL_CAMPAIGNS if kol_id in c["kol_ids"]
-    ]
+    participated_campaigns = STORAGE.kol_campaigns(kol_id)
 
     return {
         **kol,
@@ -150,57 +275,118 @@ async def get_kol_detail(kol_id: str):
     }
 
 
-@app.get("/api/kols/compare")
-async def compare_kols(kol_ids: str = Query(..., description="逗號分隔的 KOL ID")):
-    """比較多個 KOL"""
-    ids = kol_ids.split(",")
-    return generate_kol_comparison(ALL_KOLS, ids)
+@app.put("/api/kols/{kol_id}")
+def upsert_kol(kol_id: str, kol: KOLProfile):
+    """新增或更新 KOL；總覽彙總與搜尋、推薦、相似度索引隨之增量更新"""
+    if kol.id != kol_id:
+        return {"error": "KOL id does not match the path"}
+    record = kol.model_dump()
+    STORAGE.upsert_kol(record)
+    return record
 
 
 @app.get("/api/kols/{kol_id}/audience")
-async def get_kol_audience(kol_id: str):
+def get_kol_audience(kol_id: str):
     """取得 KOL 受眾分析"""
-    audience = ALL_AUDIENCE_DATA.get(kol_id)
+    audience = STORAGE.get_audience(kol_id)
     if not audience:
         return {"error": "Audience data not found"}
     return audience
 
 
+@app.get("/api/kols/{kol_id}/similar")
+def get_similar_kols(
+    kol_id: str,
+    limit: int = 10,
+    approximate: Optional[bool] = Query(None, description="是否使用近似搜尋；未指定時依名單規模決定"),
+    nprobe: int = Query(16, ge=1, description="近似搜尋掃描的群數")
+):
+    """取得受眾結構與表現指標相近的 KOL"""
+    result = SIMILARITY.similar(kol_id, limit=limit, approximate=approximate, nprobe=nprobe)
+    if result is None:
+        return {"error": "KOL not found"}
+
+    method, similar = result
+    return {
+        "kol_id": kol_id,
+        "method": method,
+        "similar": similar
+    }
+
+
+# ==================== 搜尋 API ====================
+
+@app.get("/api/search")
+def search_kols(
+    q: str = Query(..., description="關鍵字，可混合中英文，以空白分隔"),
+    limit: int = Query(20, ge=1, le=100),
+    fields: Optional[str] = Query(None, description="逗號分隔的搜尋欄位（name、tags、brand_fit_tags），預設全部"),
+    prefix: bool = Query(True, description="最後一個英文字是否以前綴比對（邊打邊搜）"),
+    fuzzy: bool = Query(True, description="英文字是否容許一個字元的拼寫錯誤")
+):
+    """以名稱、標籤與品牌契合標籤全文搜尋 KOL，依 BM25 分數排序"""
+    if not q.strip():
+        return {"error": "Empty query"}
+    selected = None
+    if fields:
+        selected = [f.strip() for f in fields.split(",") if f.strip()]
+        unknown = [f for f in selected if f not in FIELD_BOOSTS]
+        if unknown:
+            return {"error": f"Unknown fields: {', '.join(unknown)}"}
+    return SEARCH.search(q, limit=limit, fields=selected, prefix=prefix, fuzzy=fuzzy)
+
+
 # ==================== Campaign 相關 API ====================
 
 @app.get("/api/campaigns")
-async def get_campaigns(
+def get_campaigns(
     status: Optional[str] = None,
-    brand: Optional[str] = None
+    brand: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=0, description="每頁筆數，未指定時回傳全部"),
+    cursor: Optional[str] = Query(None, description="上一頁回傳的 next_cursor")
 ):
-    """取得 Campaign 列表"""
-    campaigns = ALL_CAMPAIGNS.copy()
+    """取得 Campaign 列表，指定 limit 或 cursor 時分頁"""
+    if limit is None and not cursor:
+        campaigns = STORAGE.list_campaigns(status=status, brand=brand)
+        return {
+            "total": len(campaigns),
+            "campaigns": campaigns,
+            "next_cursor": None
+        }
 
-    if status:
-        campaigns = [c for c in campaigns if c["status"] == status]
-    if brand:
-        campaigns = [c for c in campaigns if c["brand"] == brand]
+    try:
+        after = decode_cursor(cursor, {"id": is_string})["id"] if cursor else None
+    except InvalidCursor:
+        return {"error": "Invalid cursor"}
+    campaigns = STORAGE.list_campaigns(
+        status=status,
+        brand=brand,
+        after=after,
+        limit=None if limit is None else limit + 1,
+    )
+
+    next_cursor = None
+    if limit is not None and limit > 0 and len(campaigns) > limit:
+        next_cursor = encode_cursor(id=campaigns[limit - 1]["id"])
 
     return {
-        "total": len(campaigns),
-        "campaigns": campaigns
+        "total": STORAGE.count_campaigns(status=status, brand=brand),
+        "campaigns": campaigns[:max(limit, 0)] if limit is not None else campaigns,
+        "next_cursor": next_cursor
     }
 
 
 @app.get("/api/campaigns/{campaign_id}")
-async def get_campaign_detail(campaign_id: str):
+def get_campaign_detail(campaign_id: str):
     """取得單一 Campaign 詳細資料"""
-    campaign = next((c for c in ALL_CAMPAIGNS if c["id"] == campaign_id), None)
+    campaign = STORAGE.get_campaign(campaign_id)
     if not campaign:
         return {"error": "Campaign not found"}
 
-    performance = next(
-        (p for p in ALL_CAMPAIGN_PERFORMANCES if p["campaign_id"] == campaign_id),
-        None
-    )
+    performance = STORAGE.get_performance(campaign_id)
 
     # 取得參與的 KOL 詳細資料
-    kols = [k for k in ALL_KOLS if k["id"] in campaign["kol_ids"]]
+    kols = STORAGE.get_kols(campaign["kol_ids"])
 
     return {
         **campaign,
@@ -210,101 +396,442 @@ async def get_campaign_detail(campaign_id: str):
 
 
 @app.get("/api/campaigns/{campaign_id}/performance")
-async def get_campaign_performance(campaign_id: str):
+def get_campaign_performance(campaign_id: str):
     """取得 Campaign 成效數據"""
-    performance = next(
-        (p for p in ALL_CAMPAIGN_PERFORMANCES if p["campaign_id"] == campaign_id),
-        None
-    )
+    performance = STORAGE.get_performance(campaign_id)
     if not performance:
         return {"error": "Performance data not found"}
     return performance
 
 
+@app.get("/api/campaigns/{campaign_id}/live")
+async def stream_campaign_performance(campaign_id: str, last_event_id: Optional[str] = Header(None)):
+    """以 Server-Sent Events 推送進行中 Campaign 的成效：先送完整快照，之後只送差異"""
+    performance = await run_in_threadpool(STORAGE.get_performance, campaign_id)
+    if not performance:
+        return {"error": "Performance data not found"}
+    if performance["status"] != "active":
+        return {"error": "Campaign is not active"}
+    try:
+        last_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_id = None
+    return StreamingResponse(
+        LIVE.stream(performance, last_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/api/campaigns/{campaign_id}/metrics")
+async def add_campaign_metrics(
+    campaign_id: str,
+    reach: int = Query(0, description="新增的觸及"),
+    engagement: int = Query(0, description="新增的互動"),
+    impressions: int = Query(0, description="新增的曝光"),
+    sentiment: Optional[float] = Query(None, description="新增部分的情緒（0 ~ 1），依觸及加權平均"),
+    date: Optional[str] = Query(None, description="YYYY-MM-DD，預設為今天"),
+):
+    """累加進行中 Campaign 某一天的成效，並推送差異給訂閱者"""
+    performance = await run_in_threadpool(STORAGE.get_performance, campaign_id)
+    if not performance:
+        return {"error": "Performance data not found"}
+    if performance["status"] != "active":
+        return {"error": "Campaign is not active"}
+    if min(reach, engagement, impressions) < 0:
+        return {"error": "reach, engagement and impressions must be non-negative"}
+    if sentiment is not None and not 0 <= sentiment <= 1:
+        return {"error": "sentiment must be within [0, 1]"}
+    if not _valid_dates(date):
+        return {"error": "Invalid date"}
+
+    date = date or datetime.now().strftime("%Y-%m-%d")
+    updated = await run_in_threadpool(
+        STORAGE.add_daily_metrics, campaign_id, date, reach, engagement, impressions, sentiment
+    )
+    if updated is None:
+        return {"error": "Performance data not found"}
+    return {
+        "campaign_id": campaign_id,
+        # 早於 30 天視窗的日期只計入總計
+        "daily_metrics": next((m for m in updated["daily_metrics"] if m["date"] == date), None),
+        "subscribers": LIVE.publish(updated),
+    }
+
+
+@app.get("/api/campaigns/{campaign_id}/reach")
+def get_campaign_reach(campaign_id: str):
+    """以受眾草圖估算 Campaign 的不重複觸及與 KOL 之間的粉絲重疊"""
+    campaign = STORAGE.get_campaign(campaign_id)
+    if not campaign:
+        return {"error": "Campaign not found"}
+
+    performance = STORAGE.get_performance(campaign_id)
+    return {
+        "campaign_id": campaign_id,
+        "reported_reach": performance["total_reach"] if performance else None,
+        **SKETCHES.estimate(STORAGE.get_kols(campaign["kol_ids"]))
+    }
+
+
+@app.get("/api/reach/estimate")
+def estimate_reach(
+    kol_ids: str = Query(..., description="逗號分隔的 KOL ID"),
+    campaign_id: Optional[str] = Query(None, description="既有 Campaign，另回傳加入這些 KOL 後的增量觸及")
+):
+    """估算任意 KOL 組合的不重複觸及與重疊"""
+    ids = list(dict.fromkeys(i for i in kol_ids.split(",") if i))
+    if len(ids) > MAX_KOLS:
+        return {"error": f"At most {MAX_KOLS} KOLs"}
+    kols = STORAGE.get_kols(ids)
+    if len(kols) != len(ids):
+        return {"error": "KOL not found"}
+
+    base = None
+    if campaign_id:
+        campaign = STORAGE.get_campaign(campaign_id)
+        if not campaign:
+            return {"error": "Campaign not found"}
+        base = STORAGE.get_kols(campaign["kol_ids"])
+
+    return {
+        "kol_ids": ids,
+        "campaign_id": campaign_id,
+        **SKETCHES.estimate(kols, base=base)
+    }
+
+
 # ==================== 輿情與趨勢 API ====================
 
+def _valid_dates(*dates: Optional[str]) -> bool:
+    """檢查 YYYY-MM-DD 日期參數"""
+    try:
+        for date in dates:
+            if date:
+                to_day(date)
+    except ValueError:
+        return False
+    return True
+
+
 @app.get("/api/buzz/trends")
-async def get_buzz_trends(
-    keyword: Optional[str] = None,
-    days: int = 30
+def get_buzz_trends(
+    keyword: Optional[str] = Query(None, description="關鍵字，可用逗號分隔多個"),
+    days: int = 30,
+    date_from: Optional[str] = Query(None, alias="from", description="起始日 YYYY-MM-DD"),
+    date_to: Optional[str] = Query(None, alias="to", description="結束日 YYYY-MM-DD"),
+    interval: str = Query("day", description="分桶：day / week / month"),
+    agg: str = Query("sum", description="聲量彙總：sum / avg"),
+    limit: Optional[int] = Query(None, description="每頁列數，未指定時回傳全部"),
+    cursor: Optional[str] = Query(None, description="上一頁回傳的 next_cursor")
 ):
-    """取得輿情趨勢"""
-    trends = ALL_BUZZ_TRENDS.copy()
+    """取得輿情趨勢，支援日期區間、依日 / 週 / 月降採樣與游標分頁"""
+    if interval not in INTERVALS or agg not in AGGREGATIONS:
+        return {"error": "Invalid interval or agg"}
+    if not _valid_dates(date_from, date_to):
+        return {"error": "Invalid date"}
+
+    series = STORAGE.buzz_series()
+
+    # 未指定區間時取各關鍵字最近 days 天
+    if not date_from and not date_to and series.latest_day is not None:
+        date_to = from_days(np.array([series.latest_day]))[0]
+        date_from = from_days(np.array([series.latest_day - days + 1]))[0]
+
+    after = None
+    if cursor:
+        try:
+            fields = decode_cursor(cursor, {"keyword": is_string, "date": is_date}, interval=interval)
+        except InvalidCursor:
+            return {"error": "Invalid cursor"}
+        after = (fields["keyword"], fields["date"])
+    trends = series.query(
+        keywords=keyword.split(",") if keyword else None,
+        start=date_from,
+        end=date_to,
+        interval=interval,
+        agg=agg,
+        after=after,
+        limit=None if limit is None else max(limit, 0) + 1,
+    )
 
-    if keyword:
-        trends = [t for t in trends if t["keyword"] == keyword]
+    next_cursor = None
+    if limit is not None and limit > 0 and len(trends) > limit:
+        last = trends[limit - 1]
+        next_cursor = encode_cursor(interval=interval, keyword=last["keyword"], date=last["date"])
 
     return {
-        "trends": trends[-days * 5:] if len(trends) > days * 5 else trends,
-        "keywords": list(set(t["keyword"] for t in ALL_BUZZ_TRENDS))
+        "trends": trends[:max(limit, 0)] if limit is not None else trends,
+        "keywords": series.keywords,
+        "interval": interval,
+        "next_cursor": next_cursor
     }
 
 
+@app.post("/api/ingest/buzz")
+async def ingest_buzz(request: Request):
+    """批次匯入 Q-Search 輿情提及事件（JSON 陣列或 NDJSON），放入佇列後立即回應
+
+    事件欄位：keyword、timestamp（ISO 8601 或 epoch 秒）、source（來源平台）、sentiment（0 ~ 1）
+    """
+    ndjson = "ndjson" in request.headers.get("content-type", "")
+    try:
+        items = load_events(await request.body(), ndjson)
+    except ValueError as e:
+        return ORJSONResponse({"error": f"Invalid body: {e}"}, status_code=400)
+    if len(items) > INGESTOR.max_pending:
+        return ORJSONResponse({"error": f"Too many events, at most {INGESTOR.max_pending} per request"}, status_code=413)
+
+    events, errors = INGESTOR.parse(items)
+    if not INGESTOR.offer(events):
+        # 背壓：佇列已滿，請用戶端稍後重送
+        return ORJSONResponse(
+            {"error": "Ingestion queue full", "pending": INGESTOR.pending},
+            status_code=429,
+            headers={"Retry-After": "1"},
+        )
+    return ORJSONResponse(
+        {"accepted": len(events), "rejected": len(items) - len(events), "errors": errors},
+        status_code=202,
+    )
+
+
+@app.get("/api/ingest/status", include_in_schema=False)
+async def get_ingest_status():
+    """匯入佇列與彙總狀態"""
+    return ORJSONResponse(INGESTOR.status(), headers=NO_STORE)
+
+
 @app.get("/api/insights/platform")
-async def get_platform_insights():
+def get_platform_insights():
     """取得平台洞察"""
-    return PLATFORM_DISTRIBUTION
+    return ENCODED.response("insights/platform", STORAGE.platform_distribution)
 
 
 @app.get("/api/insights/category")
-async def get_category_insights():
+def get_category_insights():
     """取得類別洞察"""
-    return CATEGORY_INSIGHTS
+    return ENCODED.response("insights/category", STORAGE.category_insights)
+
+
+@app.get("/api/insights/cube")
+def get_insights_cube(
+    group_by: str = Query("platform", description="逗號分隔的分組維度：platform、category、follower_tier、price_range"),
+    measures: Optional[str] = Query(
+        None, description="逗號分隔的指標：count、total_followers、avg_engagement、avg_influence、top_kol，預設全部"
+    )
+):
+    """依任意維度組合分組的 KOL 指標"""
+    dimensions = [d for d in group_by.split(",") if d]
+    unknown = [d for d in dimensions if d not in CUBE_DIMENSIONS]
+    if unknown:
+        return {"error": f"Unknown dimensions: {', '.join(unknown)}"}
+    if len(set(dimensions)) != len(dimensions):
+        return {"error": "Duplicate dimensions"}
+    selected = [m for m in measures.split(",") if m] if measures else None
+    unknown = [m for m in selected or () if m not in CUBE_MEASURES]
+    if unknown:
+        return {"error": f"Unknown measures: {', '.join(unknown)}"}
+    return CUBE.query(dimensions, selected)
+
+
+# ==================== 資料匯出 API ====================
+
+def _export_response(name: str, fmt: str, chunks) -> StreamingResponse:
+    return StreamingResponse(
+        chunks,
+        media_type=FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{fmt}"'}
+    )
+
+
+@app.get("/api/export/kols.{fmt}")
+async def export_kols(
+    fmt: str,
+    platform: Optional[str] = None,
+    category: Optional[str] = None,
+    min_followers: Optional[int] = None,
+    max_followers: Optional[int] = None,
+    min_engagement: Optional[float] = None,
+    sort_by: str = "influence_score",
+    order: str = "desc",
+    tags_any: Optional[str] = Query(None, description="逗號分隔，含任一標籤"),
+    tags_all: Optional[str] = Query(None, description="逗號分隔，含所有標籤"),
+    brand_fit: Optional[str] = Query(None, description="逗號分隔，含任一品牌契合標籤")
+):
+    """串流匯出 KOL（篩選與排序同 /api/kols，不限筆數）"""
+    if fmt not in FORMATS:
+        return {"error": "Unsupported format"}
+
+    batches = STORAGE.scan_kols(
+        platform=platform,
+        category=category,
+        min_followers=min_followers,
+        max_followers=max_followers,
+        min_engagement=min_engagement,
+        sort_by=sort_by,
+        order=order,
+        batch=CHUNK_ROWS,
+        tags_any=tags_any.split(",") if tags_any else None,
+        tags_all=tags_all.split(",") if tags_all else None,
+        brand_fit=brand_fit.split(",") if brand_fit else None,
+    )
+    return _export_response("kols", fmt, encode(fmt, batches, KOL_COLUMNS))
+
+
+@app.get("/api/export/campaigns.{fmt}")
+async def export_campaigns(
+    fmt: str,
+    status: Optional[str] = None,
+    brand: Optional[str] = None
+):
+    """串流匯出 Campaign 與成效數據"""
+    if fmt not in FORMATS:
+        return {"error": "Unsupported format"}
+
+    batches = campaign_batches(STORAGE.iter_campaigns(status=status, brand=brand), STORAGE.get_performance)
+    return _export_response("campaigns", fmt, encode(fmt, batches, CAMPAIGN_COLUMNS, flatten_campaign))
+
+
+@app.get("/api/export/buzz.{fmt}")
+def export_buzz(
+    fmt: str,
+    keyword: Optional[str] = Query(None, description="關鍵字，可用逗號分隔多個"),
+    date_from: Optional[str] = Query(None, alias="from", description="起始日 YYYY-MM-DD"),
+    date_to: Optional[str] = Query(None, alias="to", description="結束日 YYYY-MM-DD"),
+    interval: str = Query("day", description="分桶：day / week / month"),
+    agg: str = Query("sum", description="聲量彙總：sum / avg")
+):
+    """串流匯出輿情趨勢（未指定區間時為完整歷史）"""
+    if fmt not in FORMATS:
+        return {"error": "Unsupported format"}
+    if interval not in INTERVALS or agg not in AGGREGATIONS:
+        return {"error": "Invalid interval or agg"}
+
+    # 先驗證日期，避免串流開始後才出錯
+    if not _valid_dates(date_from, date_to):
+        return {"error": "Invalid date"}
+
+    series = STORAGE.buzz_series()
+
+    batches = series.scan(
+        keywords=keyword.split(",") if keyword else None,
+        start=date_from,
+        end=date_to,
+        interval=interval,
+        agg=agg,
+    )
+    columns = buzz_columns(series.sources)
+    return _export_response("buzz", fmt, encode(fmt, batches, columns, flatten_buzz))
+
+
+# ==================== 影響力網絡 API ====================
+
+@app.get("/api/network/summary")
+def get_network_summary():
+    """影響力網絡總覽：節點、邊類型、社群數與 PageRank 前 10 名"""
+    return NETWORK.summary()
+
+
+@app.get("/api/network/pagerank")
+def get_network_pagerank(
+    limit: int = 20,
+    type: Optional[str] = Query(None, description="kol / member，未指定時不分類型")
+):
+    """依加權 PageRank 排序的影響力節點"""
+    if type not in (None, "kol", "member"):
+        return {"error": "Invalid type"}
+    return {"nodes": NETWORK.pagerank(limit=limit, node_type=type)}
+
+
+@app.get("/api/network/communities")
+def get_network_communities(limit: int = 10, top: int = 5):
+    """標籤傳播偵測的社群，依規模由大到小"""
+    return {"communities": NETWORK.communities(limit=limit, top=top)}
+
+
+@app.get("/api/network/reach")
+def get_network_reach(
+    node_ids: str = Query(..., description="逗號分隔的節點 ID（KOL ID 或會員 ID）"),
+    hops: int = Query(2, ge=1, le=6)
+):
+    """自指定節點沿合作 / 推薦關係展開 k 跳的觸及人數"""
+    result = NETWORK.reach([i for i in node_ids.split(",") if i], hops=hops)
+    if result is None:
+        return {"error": "Node not found"}
+    return result
+
+
+@app.get("/api/network/{node_id}")
+def get_network_node(node_id: str, limit: int = 20):
+    """單一節點的影響力網絡：連線、社群與 PageRank"""
+    result = NETWORK.node(node_id, limit=limit)
+    if result is None:
+        return {"error": "Node not found"}
+    return result
 
 
 # ==================== 推薦系統 API ====================
 
 @app.get("/api/recommend")
-async def recommend_kols(
+def recommend_kols(
     category: Optional[str] = None,
     budget: Optional[int] = None,
     target_audience: Optional[str] = None,
     objective: Optional[str] = None,
     limit: int = 5
 ):
-    """KOL 推薦"""
-    kols = ALL_KOLS.copy()
-
-    # 簡單的推薦邏輯
-    if category:
-        # 優先同類別，但也包含相關類別
-        kols.sort(key=lambda x: (x["category"] == category, x["influence_score"]), reverse=True)
-
-    # 根據預算篩選
-    if budget:
-        if budget < 50000:
-            kols = [k for k in kols if k["followers"] < 100000]
-        elif budget < 150000:
-            kols = [k for k in kols if 50000 < k["followers"] < 500000]
-
-    # 取得最佳推薦
-    recommendations = []
-    for kol in kols[:limit]:
-        match_reasons = []
-        if category and kol["category"] == category:
-            match_reasons.append(f"類別匹配：{category}")
-        if kol["engagement_rate"] > 5:
-            match_reasons.append("高互動率")
-        if kol["sentiment_score"] > 0.7:
-            match_reasons.append("正面形象")
-        if kol["authenticity_score"] > 80:
-            match_reasons.append("高真實性")
-
-        recommendations.append({
-            **kol,
-            "match_score": round(70 + len(match_reasons) * 7.5, 1),
-            "match_reasons": match_reasons,
-            "predicted_reach": int(kol["followers"] * 0.6),
-            "predicted_engagement": int(kol["followers"] * kol["engagement_rate"] / 100)
-        })
+    """KOL 推薦：依類別、預算、目標受眾與行銷目標計算所有 KOL 的媒合分數"""
+    recommendations = RECOMMENDER.recommend(
+        category=category,
+        budget=budget,
+        target_audience=target_audience,
+        objective=objective,
+        limit=limit,
+    )
 
     return {"recommendations": recommendations}
 
 
+@app.get("/api/recommend/portfolio")
+async def optimize_portfolio(
+    budget: float = Query(..., gt=0, description="總預算（NT$）"),
+    objective: str = Query("reach", description="最大化目標：reach / engagement"),
+    cost: str = Query("high", description="以報價區間的 low / mid / high 計算成本"),
+    overlap_penalty: float = Query(0.5, ge=0, le=1, description="受眾重疊的懲罰比重，1 為只計不重複觸及"),
+    platform_mix: Optional[str] = Query(None, description="平台人數限制，如 instagram:1-3,youtube:-2"),
+    category_mix: Optional[str] = Query(None, description="類別人數限制，如 美妝:2-,美食:1"),
+    method: str = Query("auto", description="auto / greedy / exact"),
+    time_budget_ms: int = Query(DEFAULT_TIME_BUDGET_MS, ge=10, le=5000, description="搜尋時間上限")
+):
+    """在預算內挑選預估觸及或互動最大的 KOL 組合"""
+    if objective not in OBJECTIVES:
+        return {"error": "Invalid objective"}
+    if cost not in COST_BASES:
+        return {"error": "Invalid cost"}
+    if method not in ("auto", "greedy", "exact"):
+        return {"error": "Invalid method"}
+    try:
+        # 候選 KOL 的草圖建立與組合搜尋皆為 CPU 密集，移出事件迴圈
+        return await run_in_threadpool(
+            PORTFOLIO.optimize,
+            budget,
+            objective=objective,
+            cost_basis=cost,
+            overlap_penalty=overlap_penalty,
+            platform_mix=parse_mix(platform_mix) if platform_mix else None,
+            category_mix=parse_mix(category_mix) if category_mix else None,
+            method=method,
+            time_budget_ms=time_budget_ms,
+        )
+    except ValueError as e:
+        return {"error": str(e)}
+
+
 # ==================== 數據故事 API ====================
 
 @app.get("/api/stories/overview")
-async def get_data_stories():
+def get_data_stories():
     """
     取得數據故事與洞察
 
@@ -313,27 +840,30 @@ async def get_data_stories():
     2. Campaign 成效驗證 - 不涉及購買轉換，專注表層指標
     3. 內外部影響力評估 - MGM 互相導流分析
     """
+    return ENCODED.response("stories/overview", _data_stories)
+
+
+def _data_stories() -> dict:
+    summary = STORAGE.summary()
 
     # 計算關鍵洞察
-    top_kol = max(ALL_KOLS, key=lambda x: x["influence_score"])
-    best_sentiment_kol = max(ALL_KOLS, key=lambda x: x["sentiment_score"])
-    best_engagement_kol = max(ALL_KOLS, key=lambda x: x["engagement_rate"])
-    best_campaign = max(ALL_CAMPAIGN_PERFORMANCES, key=lambda x: x["roi_estimate"])
+    top_kol = summary["top_kols"][0]
+    best_sentiment_kol = summary["top_sentiment_kol"]
+    best_engagement_kol = summary["top_engagement_kol"]
+    best_campaign = summary["best_campaign"]
 
     # 平台趨勢
-    ig_kols = [k for k in ALL_KOLS if k["platform"] == "instagram"]
-    yt_kols = [k for k in ALL_KOLS if k["platform"] == "youtube"]
-    tiktok_kols = [k for k in ALL_KOLS if k["platform"] == "tiktok"]
+    platform_counts = summary["platform_counts"]
 
     # 輿情數據統計
-    total_buzz_volume = sum(t["volume"] for t in ALL_BUZZ_TRENDS)
-    avg_sentiment = sum(t["sentiment"] for t in ALL_BUZZ_TRENDS) / len(ALL_BUZZ_TRENDS) if ALL_BUZZ_TRENDS else 0
+    total_buzz_volume = summary["total_buzz_volume"]
+    avg_sentiment = summary["avg_buzz_sentiment"]
 
     # 關鍵字熱度排行
-    keyword_volumes = {}
-    for trend in ALL_BUZZ_TRENDS:
-        keyword_volumes[trend["keyword"]] = keyword_volumes.get(trend["keyword"], 0) + trend["volume"]
-    top_keyword = max(keyword_volumes.items(), key=lambda x: x[1]) if keyword_volumes else ("", 0)
+    top_keyword = summary["top_keyword"]
+
+    # 平均受眾品質
+    avg_audience_quality = round(summary["avg_audience_quality"], 1)
 
     stories = [
         {
@@ -402,13 +932,13 @@ async def get_data_stories():
             "type": "platform",
             "icon": "bar-chart",
             "category": "市場洞察",
-            "content": f"Instagram {len(ig_kols)} 位、YouTube {len(yt_kols)} 位、TikTok {len(tiktok_kols)} 位 KOL 建檔",
+            "content": f"Instagram {platform_counts.get('instagram', 0)} 位、YouTube {platform_counts.get('youtube', 0)} 位、TikTok {platform_counts.get('tiktok', 0)} 位 KOL 建檔",
             "insight": "多平台佈局能觸及不同受眾群體，建議根據品牌目標選擇平台組合",
             "data": {
-                "instagram": len(ig_kols),
-                "youtube": len(yt_kols),
-                "tiktok": len(tiktok_kols),
-                "facebook": len([k for k in ALL_KOLS if k["platform"] == "facebook"])
+                "instagram": platform_counts.get("instagram", 0),
+                "youtube": platform_counts.get("youtube", 0),
+                "tiktok": platform_counts.get("tiktok", 0),
+                "facebook": platform_counts.get("facebook", 0)
             },
             "data_source": "KOL 資料庫"
         },
@@ -418,9 +948,9 @@ async def get_data_stories():
             "type": "audience",
             "icon": "users",
             "category": "深度分析",
-            "content": f"平均受眾品質分數達 {round(sum(k['audience_quality_score'] for k in ALL_KOLS) / len(ALL_KOLS), 1)} 分（滿分 100）",
+            "content": f"平均受眾品質分數達 {avg_audience_quality} 分（滿分 100）",
             "insight": "高品質受眾能提升 Campaign 轉換潛力，適合品牌長期經營",
-            "metric": round(sum(k['audience_quality_score'] for k in ALL_KOLS) / len(ALL_KOLS), 1),
+            "metric": avg_audience_quality,
             "metric_label": "平均受眾品質",
             "data_source": "受眾分析模型"
         },
@@ -432,7 +962,7 @@ async def get_data_stories():
             "category": "智慧推薦",
             "content": "根據品牌標籤與 KOL 屬性分析，系統可自動推薦最適配的創作者組合",
             "insight": "AI 驅動的媒合系統，為品牌省時省力找到對的 KOL",
-            "metric": len(ALL_KOLS),
+            "metric": summary["total_kols"],
             "metric_label": "可推薦 KOL 數",
             "data_source": "智慧推薦引擎"
         }
@@ -452,13 +982,13 @@ async def get_data_stories():
         "stories": stories,
         "categories": categories,
         "key_metrics": {
-            "total_kols": len(ALL_KOLS),
-            "total_reach": sum(k["followers"] for k in ALL_KOLS),
-            "avg_engagement": round(sum(k["engagement_rate"] for k in ALL_KOLS) / len(ALL_KOLS), 2),
+            "total_kols": summary["total_kols"],
+            "total_reach": summary["total_reach"],
+            "avg_engagement": round(summary["avg_engagement_rate"], 2),
             "avg_sentiment": round(avg_sentiment * 100, 1),
-            "active_campaigns": len([c for c in ALL_CAMPAIGNS if c["status"] == "active"]),
+            "active_campaigns": summary["campaign_status_counts"].get("active", 0),
             "total_buzz_volume": total_buzz_volume,
-            "total_campaign_engagement": sum(p["total_engagement"] for p in ALL_CAMPAIGN_PERFORMANCES)
+            "total_campaign_engagement": summary["total_campaign_engagement"]
         },
         "data_sources": [
             {"name": "Q-Search 輿情系統", "type": "輿情數據", "description": "社群留言、貼文、關鍵字聲量"},
@@ -469,6 +999,99 @@ async def get_data_stories():
     }
 
 
+# ==================== 監控指標 ====================
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Prometheus 文字格式的請求指標"""
+    return Response(METRICS.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+# ==================== 效能剖析 API ====================
+# 需設定 PROFILER_TOKEN，並以 X-Profiler-Token 標頭帶入；回應一律不快取
+
+NO_STORE = {"Cache-Control": "no-store"}
+
+
+def _profiler_error(token: Optional[str]) -> Optional[dict]:
+    if not PROFILER.enabled:
+        return {"error": "Profiler disabled"}
+    if not PROFILER.authorized(token):
+        return {"error": "Invalid profiler token"}
+    return None
+
+
+@app.get("/api/admin/profiler", include_in_schema=False)
+async def get_profiler_status(x_profiler_token: Optional[str] = Header(None)):
+    """目前的剖析規則與緩衝區中的剖析紀錄"""
+    content = _profiler_error(x_profiler_token) or {
+        "rules": PROFILER.active_rules(),
+        "capacity": PROFILER.records.maxlen,
+        "records": [r.summary() for r in PROFILER.records],
+    }
+    return ORJSONResponse(content, headers=NO_STORE)
+
+
+@app.post("/api/admin/profiler", include_in_schema=False)
+async def set_profiler_rule(
+    route: str = Query(..., description="路由樣板，如 /api/stories/overview"),
+    mode: str = Query("sampler", description="cprofile 或 sampler"),
+    rate: float = Query(0.1, description="剖析的請求比例（0 ~ 1）"),
+    duration: int = Query(DEFAULT_DURATION, description="規則有效秒數"),
+    x_profiler_token: Optional[str] = Header(None),
+):
+    """對指定路由的一定比例請求進行剖析"""
+    error = _profiler_error(x_profiler_token)
+    if error:
+        return error
+    if METRICS.route_template(route) != route:
+        return {"error": f"Unknown route template: {route}"}
+    if mode not in PROFILER_MODES:
+        return {"error": f"Invalid mode, expected one of {list(PROFILER_MODES)}"}
+    if not 0 < rate <= 1:
+        return {"error": "rate must be within (0, 1]"}
+    PROFILER.set_rule(route, mode, rate, min(max(duration, 1), MAX_DURATION))
+    return {"rules": PROFILER.active_rules()}
+
+
+@app.delete("/api/admin/profiler", include_in_schema=False)
+async def clear_profiler_rules(
+    route: Optional[str] = Query(None, description="未指定時清除全部規則"),
+    x_profiler_token: Optional[str] = Header(None),
+):
+    """停止剖析"""
+    error = _profiler_error(x_profiler_token)
+    if error:
+        return error
+    PROFILER.clear_rules(route)
+    return {"rules": PROFILER.active_rules()}
+
+
+@app.get("/api/admin/profiler/download", include_in_schema=False)
+async def download_profile(
+    route: Optional[str] = Query(None, description="未指定時合併所有路由"),
+    mode: str = Query("cprofile", description="cprofile 輸出 pstats 檔，sampler 輸出 collapsed stack 檔"),
+    x_profiler_token: Optional[str] = Header(None),
+):
+    """合併緩衝區中符合條件的剖析紀錄後下載"""
+    error = _profiler_error(x_profiler_token)
+    if error is None and mode not in PROFILER_MODES:
+        error = {"error": f"Invalid mode, expected one of {list(PROFILER_MODES)}"}
+    records = PROFILER.matching(route, mode) if error is None else []
+    if error is None and not records:
+        error = {"error": "No profiles recorded"}
+    if error:
+        return ORJSONResponse(error, headers=NO_STORE)
+
+    name = "".join(c if c.isalnum() else "_" for c in (route or "all").strip("/")) or "root"
+    if mode == "cprofile":
+        body, media_type, suffix = PROFILER.pstats_bytes(records), "application/octet-stream", "pstats"
+    else:
+        body, media_type, suffix = PROFILER.collapsed_text(records), "text/plain", "collapsed"
+    headers = {**NO_STORE, "Content-Disposition": f'attachment; filename="{name}.{suffix}"'}
+    return Response(body, media_type=media_type, headers=headers)
+
+
 @app.get("/")
 async def root():
     """API 首頁"""
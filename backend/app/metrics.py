@@ -0,0 +1,198 @@
+"""
+請求指標
+- MetricsMiddleware：依路由樣板（如 /api/kols/{kol_id}，而非每個 ID 各一組）記錄請求數、延遲、回應大小與進行中的請求數
+- 直方圖預先分桶，每個請求只做一次二分搜尋與計數遞增；指標只在事件迴圈執行緒更新，不需加鎖
+- render() 輸出 Prometheus 文字格式，並由分桶內插估計 p50 / p95 / p99
+"""
+
+import re
+import time
+from bisect import bisect_left
+from typing import Sequence
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# 分桶上界（含）；超過最後一個上界的計入 +Inf
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1 << 20, 4 << 20, 16 << 20)
+QUANTILES = (0.5, 0.95, 0.99)
+
+# 沒有對應路由的請求（404 掃描等）共用一個樣板，避免序列數無限增加
+UNMATCHED = "<unmatched>"
+
+
+class Histogram:
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def quantile(self, q: float) -> float:
+        """於所在分桶內線性內插；落在 +Inf 分桶時回傳最後一個上界"""
+        total = self.count
+        if not total:
+            return 0.0
+        rank, seen = q * total, 0
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                if i == len(self.bounds):
+                    break
+                lower = self.bounds[i - 1] if i else 0.0
+                return lower + (self.bounds[i] - lower) * (rank - seen) / count
+            seen += count
+        return float(self.bounds[-1])
+
+    def lines(self, name: str, labels: str) -> list[str]:
+        out, cumulative = [], 0
+        for bound, count in zip((*self.bounds, "+Inf"), self.counts):
+            cumulative += count
+            out.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        out.append(f"{name}_sum{{{labels}}} {self.sum:.6f}")
+        out.append(f"{name}_count{{{labels}}} {cumulative}")
+        return out
+
+
+class RouteStats:
+    """單一 (method, 路由樣板) 的指標"""
+
+    __slots__ = ("in_flight", "statuses", "latency", "size")
+
+    def __init__(self):
+        self.in_flight = 0
+        self.statuses: dict[int, int] = {}
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.size = Histogram(SIZE_BUCKETS)
+
+    def observe(self, status: int, seconds: float, size: int) -> None:
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        self.latency.observe(seconds)
+        self.size.observe(size)
+
+
+class Metrics:
+    def __init__(self, routes: Sequence):
+        # 與 app.routes 為同一個 list，首次請求時路由已全部註冊
+        self.routes = routes
+        self.series: dict[tuple[str, str], RouteStats] = {}
+        self._static: dict[str, str] | None = None
+        self._dynamic: list[tuple[re.Pattern, str]] = []
+
+    def _compile(self) -> None:
+        """無參數的路徑直接查表；其餘依註冊順序比對，與路由器的比對順序一致"""
+        static, dynamic = {}, []
+        for route in self.routes:
+            regex = getattr(route, "path_regex", None)
+            if regex is None:
+                continue
+            if "{" in route.path:
+                dynamic.append((regex, route.path))
+            elif not any(earlier.match(route.path) for earlier, _ in dynamic):
+                static.setdefault(route.path, route.path)
+        self._static, self._dynamic = static, dynamic
+
+    def route_template(self, path: str) -> str:
+        if self._static is None:
+            self._compile()
+        template = self._static.get(path)
+        if template is not None:
+            return template
+        for regex, template in self._dynamic:
+            if regex.match(path):
+                return template
+        return UNMATCHED
+
+    def stats(self, method: str, path: str) -> RouteStats:
+        key = (method, self.route_template(path))
+        stats = self.series.get(key)
+        if stats is None:
+            stats = self.series[key] = RouteStats()
+        return stats
+
+    def render(self) -> str:
+        """Prometheus 文字格式（exposition format 0.0.4）"""
+        series = sorted(self.series.items())
+        labelled = [(f'method="{_escape(m)}",route="{_escape(r)}"', s) for (m, r), s in series]
+        lines = [
+            "# HELP http_requests_total Requests completed, by route template and status.",
+            "# TYPE http_requests_total counter",
+        ]
+        for labels, s in labelled:
+            for status, count in sorted(s.statuses.items()):
+                lines.append(f'http_requests_total{{{labels},status="{status}"}} {count}')
+
+        lines += [
+            "# HELP http_requests_in_flight Requests currently being processed.",
+            "# TYPE http_requests_in_flight gauge",
+        ]
+        lines += [f"http_requests_in_flight{{{labels}}} {s.in_flight}" for labels, s in labelled]
+
+        lines += [
+            "# HELP http_request_duration_seconds Request latency until the last body chunk is sent.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for labels, s in labelled:
+            lines += s.latency.lines("http_request_duration_seconds", labels)
+
+        lines += [
+            "# HELP http_request_duration_quantile_seconds Latency quantiles interpolated from the histogram buckets.",
+            "# TYPE http_request_duration_quantile_seconds gauge",
+        ]
+        for labels, s in labelled:
+            for q in QUANTILES:
+                lines.append(f'http_request_duration_quantile_seconds{{{labels},quantile="{q}"}} {s.latency.quantile(q):.6f}')
+
+        lines += [
+            "# HELP http_response_size_bytes Response body size.",
+            "# TYPE http_response_size_bytes histogram",
+        ]
+        for labels, s in labelled:
+            lines += s.size.lines("http_response_size_bytes", labels)
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """ASGI 中介層；加在最外層，回應快取命中與 CORS 預檢也一併計入"""
+
+    def __init__(self, app: ASGIApp, metrics: Metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = self.metrics.stats(scope["method"], scope["path"])
+        status, size = 500, 0
+
+        async def measure(message: Message) -> None:
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        stats.in_flight += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, measure)
+        finally:
+            stats.in_flight -= 1
+            stats.observe(status, time.perf_counter() - started, size)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -3,9 +3,19 @@
 創建逼真的 KOL 與 Campaign 數據，用於 Prototype 展示
 """
 
+import json
+import os
 import random
+import threading
+import zlib
+from collections.abc import Callable, Mapping
 from datetime import datetime, timedelta
 
+import numpy as np
+
+from .snapshot import open_or_create
+from .store import KOLRecords
+
 # KOL 名稱池（台灣常見的 KOL 風格命名）
 KOL_NAMES = [
     "小安 AnnieLife", "阿滴英文", "千千進食中", "古娃娃WawaKu",
@@ -43,6 +53,40 @@ CAMPAIGN_OBJECTIVES = [
     "新品上市", "節慶活動", "會員招募", "App下載"
 ]
 
+KOL_TAGS = CATEGORIES + ["幽默", "專業", "親民", "高質感", "創意"]
+
+INTEREST_POOL = [
+    "購物", "美食", "旅遊", "運動", "電影", "音樂",
+    "攝影", "閱讀", "遊戲", "投資理財", "寵物", "烹飪"
+]
+
+CAMPAIGN_SEASONS = ["春季", "夏季", "秋季", "冬季", "年度", "週年慶"]
+
+TARGET_AUDIENCES = ["18-35歲都會女性", "25-45歲科技愛好者", "全年齡家庭客群", "18-30歲年輕族群"]
+
+CONTENT_TYPES = ["Reels", "貼文", "限動", "影片"]
+
+BUZZ_KEYWORDS = ["品牌名稱", "產品關鍵字", "活動Hashtag", "代言人", "競品"]
+
+BUZZ_SOURCES = ["instagram", "facebook", "youtube", "ptt", "news"]
+
+# 粉絲數門檻 → 報價區間（由高到低）
+PRICE_BANDS = [
+    (1000000, "NT$ 150,000 - 500,000"),
+    (500000, "NT$ 80,000 - 150,000"),
+    (100000, "NT$ 30,000 - 80,000"),
+    (50000, "NT$ 10,000 - 30,000"),
+    (0, "NT$ 3,000 - 10,000"),
+]
+
+
+def price_range_for(followers: int) -> str:
+    """依粉絲數取得報價區間"""
+    for threshold, price_range in PRICE_BANDS:
+        if followers > threshold:
+            return price_range
+    return PRICE_BANDS[-1][1]
+
 
 def generate_kol_profiles(count: int = 28) -> list[dict]:
     """生成 KOL Profile 數據"""
@@ -71,16 +115,7 @@ def generate_kol_profiles(count: int = 28) -> list[dict]:
         audience_quality = round(random.uniform(55, 95), 1)
 
         # 價格區間
-        if followers > 1000000:
-            price_range = "NT$ 150,000 - 500,000"
-        elif followers > 500000:
-            price_range = "NT$ 80,000 - 150,000"
-        elif followers > 100000:
-            price_range = "NT$ 30,000 - 80,000"
-        elif followers > 50000:
-            price_range = "NT$ 10,000 - 30,000"
-        else:
-            price_range = "NT$ 3,000 - 10,000"
+        price_range = price_range_for(followers)
 
         kol = {
             "id": f"kol_{i+1:03d}",
@@ -97,7 +132,7 @@ def generate_kol_profiles(count: int = 28) -> list[dict]:
             "sentiment_score": sentiment_score,
             "authenticity_score": authenticity_score,
             "audience_quality_score": audience_quality,
-            "tags": random.sample(CATEGORIES + ["幽默", "專業", "親民", "高質感", "創意"], 4),
+            "tags": random.sample(KOL_TAGS, 4),
             "price_range": price_range,
             "collaboration_count": random.randint(5, 80),
             "brand_fit_tags": random.sample(BRAND_FIT_TAGS, random.randint(3, 6))
@@ -160,13 +195,9 @@ def generate_audience_demographics(kol_id: str, category: str) -> dict:
     locations["其他"] = round(100 - sum(list(locations.values())[:-1]), 1)
 
     # 興趣標籤
-    interest_pool = [
-        "購物", "美食", "旅遊", "運動", "電影", "音樂",
-        "攝影", "閱讀", "遊戲", "投資理財", "寵物", "烹飪"
-    ]
     interests = [
         {"name": interest, "percentage": round(random.uniform(15, 65), 1)}
-        for interest in random.sample(interest_pool, 6)
+        for interest in random.sample(INTEREST_POOL, 6)
     ]
     interests.sort(key=lambda x: x["percentage"], reverse=True)
 
@@ -205,7 +236,7 @@ def generate_campaigns(kols: list[dict], count: int = 6) -> list[dict]:
 
         campaign = {
             "id": f"camp_{i+1:03d}",
-            "name": f"{brand['name']} {random.choice(['春季', '夏季', '秋季', '冬季', '年度', '週年慶'])}活動",
+            "name": f"{brand['name']} {random.choice(CAMPAIGN_SEASONS)}活動",
             "brand": brand["name"],
             "brand_logo": brand["logo"],
             "industry": brand["industry"],
@@ -216,7 +247,7 @@ def generate_campaigns(kols: list[dict], count: int = 6) -> list[dict]:
             "kol_ids": [k["id"] for k in selected_kols],
             "kol_count": len(selected_kols),
             "objectives": random.sample(CAMPAIGN_OBJECTIVES, random.randint(2, 4)),
-            "target_audience": random.choice(["18-35歲都會女性", "25-45歲科技愛好者", "全年齡家庭客群", "18-30歲年輕族群"])
+            "target_audience": random.choice(TARGET_AUDIENCES)
         }
         campaigns.append(campaign)
 
@@ -269,7 +300,7 @@ def generate_campaign_performance(campaign: dict, kols: list[dict]) -> dict:
     top_content = [
         {
             "kol_name": random.choice(campaign_kols)["name"],
-            "type": random.choice(["Reels", "貼文", "限動", "影片"]),
+            "type": random.choice(CONTENT_TYPES),
             "engagement": random.randint(5000, 50000),
             "reach": random.randint(50000, 500000)
         }
@@ -301,10 +332,9 @@ def generate_campaign_performance(campaign: dict, kols: list[dict]) -> dict:
 
 def generate_buzz_trends(days: int = 30) -> list[dict]:
     """生成輿情趨勢數據"""
-    keywords = ["品牌名稱", "產品關鍵字", "活動Hashtag", "代言人", "競品"]
     trends = []
 
-    for keyword in keywords:
+    for keyword in BUZZ_KEYWORDS:
         base_volume = random.randint(500, 5000)
         for day in range(days):
             date = datetime.now() - timedelta(days=days-1-day)
@@ -360,47 +390,659 @@ def generate_kol_comparison(kols: list[dict], kol_ids: list[str]) -> list[dict]:
     ]
 
 
-def generate_platform_distribution(kols: list[dict]) -> dict:
-    """生成平台分佈數據"""
-    platform_stats = {}
+# ==================== 大規模合成數據 ====================
+# 以 NumPy 批次抽樣產生 N 筆 KOL / Campaign / 受眾 / 輿情，分佈與上方逐筆產生器一致，
+# 可指定亂數種子重現，並存成 .npz 檔重複使用
 
-    for platform in PLATFORMS:
-        platform_kols = [k for k in kols if k["platform"] == platform]
-        if platform_kols:
-            platform_stats[platform] = {
-                "count": len(platform_kols),
-                "total_followers": sum(k["followers"] for k in platform_kols),
-                "avg_engagement": round(sum(k["engagement_rate"] for k in platform_kols) / len(platform_kols), 2),
-                "avg_influence": round(sum(k["influence_score"] for k in platform_kols) / len(platform_kols), 1)
-            }
+AGE_GROUPS = ["13-17", "18-24", "25-34", "35-44", "45-54", "55+"]
 
-    return platform_stats
+LOCATIONS = ["台北市", "新北市", "台中市", "高雄市", "桃園市", "其他"]
 
+CAMPAIGN_STATUSES = ["completed", "completed", "completed", "active", "active", "planning"]
 
-def generate_category_insights(kols: list[dict]) -> list[dict]:
-    """生成類別洞察"""
-    category_stats = {}
+BUZZ_SOURCE_RANGES = [(20, 40), (15, 30), (10, 25), (5, 15), (5, 15)]
+
+# 影響力網絡的邊類型：KOL 共同參與 Campaign、KOL 導流會員、會員推薦會員（MGM）
+EDGE_TYPES = ["collaboration", "kol_referral", "member_referral"]
+
+MEMBER_PREFIX = "mem_"
+
+# 推薦邊中由 KOL 導流的比例
+KOL_REFERRAL_SHARE = 0.15
+
+# 模擬粉絲名單：使用者編號 0..FOLLOWER_UNIVERSE-1 每 FOLLOWER_BLOCK 人一個區塊，
+# KOL 的粉絲為若干完整區塊，同類別 KOL 偏好同一段區塊，因此粉絲會重疊
+FOLLOWER_UNIVERSE = 24_000_000
+FOLLOWER_BLOCK = 2048
+# 各類別偏好的區塊範圍佔全體的比例，與範圍內的抽樣權重倍數
+CATEGORY_BLOCK_SPAN = 0.3
+CATEGORY_BLOCK_BOOST = 4.0
+
+
+def _sample_rows(rng: np.random.Generator, n: int, pool_size: int, k: int) -> np.ndarray:
+    """每一列各自從 pool 中不重複抽出 k 個（順序隨機），回傳 (n, k) 索引"""
+    return np.argsort(rng.random((n, pool_size), dtype=np.float32), axis=1)[:, :k]
+
+
+def _sample_subsets(rng: np.random.Generator, n: int, pool_size: int, low: int, high: int) -> np.ndarray:
+    """每一列抽出 low..high 個不重複元素，空位填 -1"""
+    picks = _sample_rows(rng, n, pool_size, high)
+    sizes = rng.integers(low, high, n, endpoint=True)
+    picks[np.arange(high)[None, :] >= sizes[:, None]] = -1
+    return picks
+
+
+def _encode_combos(picks: np.ndarray, pool: list[str]) -> tuple[list[list[str]], np.ndarray]:
+    """將每列的抽樣組合整組字典編碼，回傳 (組合表, 代碼陣列)；組合內依 pool 順序排列以限制組合數"""
+    picks = np.sort(picks, axis=1)
+    keys = np.zeros(len(picks), dtype=np.int64)
+    for j in range(picks.shape[1]):
+        keys = keys * 32 + (picks[:, j] + 1)
+    _, first, codes = np.unique(keys, return_index=True, return_inverse=True)
+    table = [[pool[j] for j in picks[i] if j >= 0] for i in first]
+    return table, codes.astype(np.int32)
+
+
+def synthesize_kols(n: int, rng: np.random.Generator) -> tuple[dict[str, np.ndarray], dict[str, list]]:
+    """批次產生 n 筆 KOL 欄式資料，回傳 (欄位, 字典表)"""
+    platform = rng.integers(0, len(PLATFORMS), n).astype(np.int32)
+    category = rng.integers(0, len(CATEGORIES), n).astype(np.int32)
+    followers = rng.integers(10000, 5000000, n, endpoint=True)
+
+    # 大 KOL 互動率較低、小 KOL 較高
+    base_engagement = 0.02 + rng.random(n) * 0.08
+    base_engagement[followers > 1000000] *= 0.6
+    base_engagement[followers < 100000] *= 1.3
+
+    avg_likes = (followers * base_engagement * (0.7 + rng.random(n) * 0.3)).astype(np.int64)
+    avg_comments = (avg_likes * (0.02 + rng.random(n) * 0.05)).astype(np.int64)
+    avg_shares = (avg_likes * (0.01 + rng.random(n) * 0.03)).astype(np.int64)
+
+    thresholds = np.array([t for t, _ in reversed(PRICE_BANDS)])
+    price_range = (len(PRICE_BANDS) - np.searchsorted(thresholds, followers, side="left")).astype(np.int32)
+
+    tag_table, tags = _encode_combos(_sample_rows(rng, n, len(KOL_TAGS), 4), KOL_TAGS)
+    fit_table, brand_fit = _encode_combos(_sample_subsets(rng, n, len(BRAND_FIT_TAGS), 3, 6), BRAND_FIT_TAGS)
+
+    numbers = np.arange(1, n + 1).astype(str)
+    names = np.strings.add(
+        np.array(KOL_NAMES)[rng.integers(0, len(KOL_NAMES), n)],
+        np.strings.add(" #", numbers),
+    )
+
+    columns = {
+        "id": np.strings.add("kol_", np.strings.zfill(numbers, max(3, len(str(n))))),
+        "name": names,
+        "avatar": np.strings.add("https://api.dicebear.com/7.x/avataaars/svg?seed=", names),
+        "platform": platform,
+        "category": category,
+        "followers": followers,
+        "engagement_rate": np.round(base_engagement * 100, 2),
+        "avg_likes": avg_likes,
+        "avg_comments": avg_comments,
+        "avg_shares": avg_shares,
+        "influence_score": np.round(np.minimum(100, 30 + followers / 50000 + rng.random(n) * 20), 1),
+        "sentiment_score": np.round(rng.uniform(0.3, 0.95, n), 2),
+        "authenticity_score": np.round(rng.uniform(60, 98, n), 1),
+        "audience_quality_score": np.round(rng.uniform(55, 95, n), 1),
+        "tags": tags,
+        "price_range": price_range,
+        "collaboration_count": rng.integers(5, 80, n, endpoint=True),
+        "brand_fit_tags": brand_fit,
+    }
+    dictionaries = {
+        "platform": list(PLATFORMS),
+        "category": list(CATEGORIES),
+        "price_range": [p for _, p in PRICE_BANDS],
+        "tags": tag_table,
+        "brand_fit_tags": fit_table,
+    }
+    return columns, dictionaries
+
+
+def synthesize_audience(category: np.ndarray, rng: np.random.Generator) -> dict[str, np.ndarray]:
+    """依 KOL 類別批次產生受眾結構（年齡、性別、地區、興趣）"""
+    n = len(category)
+    code = {c: i for i, c in enumerate(CATEGORIES)}
+
+    # 年齡分佈，依類別調整後正規化
+    age = rng.uniform([5, 20, 25, 10, 5, 2], [15, 35, 40, 25, 15, 10], (n, 6))
+    parenting = category == code["親子"]
+    age[parenting] += [0, -10, 15, 10, 0, 0]
+    gaming = category == code["遊戲"]
+    age[gaming] += [10, 15, 0, -10, 0, 0]
+    beauty = np.isin(category, [code["美妝"], code["時尚"]])
+    age[beauty] += [0, 10, 5, 0, 0, 0]
+    age_groups = np.round(age / age.sum(axis=1, keepdims=True) * 100, 1)
+
+    # 性別分佈
+    female = np.round(rng.uniform(45, 55, n), 1)
+    female_skew = np.isin(category, [code["美妝"], code["時尚"], code["親子"]])
+    female[female_skew] = np.round(rng.uniform(65, 85, int(female_skew.sum())), 1)
+    male_skew = np.isin(category, [code["遊戲"], code["科技"], code["健身"]])
+    female[male_skew] = np.round(100 - np.round(rng.uniform(60, 80, int(male_skew.sum())), 1), 1)
+
+    # 地區分佈，「其他」補足 100%
+    locations = np.empty((n, 6))
+    locations[:, :5] = np.round(rng.uniform([20, 15, 10, 8, 6], [35, 25, 18, 15, 12], (n, 5)), 1)
+    locations[:, 5] = np.round(100 - locations[:, :5].sum(axis=1), 1)
+
+    # 興趣標籤，依比例由高到低
+    interests = _sample_rows(rng, n, len(INTEREST_POOL), 6).astype(np.int8)
+    interest_pct = np.round(rng.uniform(15, 65, (n, 6)), 1)
+    order = np.argsort(-interest_pct, axis=1, kind="stable")
+
+    return {
+        "age_groups": age_groups,
+        "female": female,
+        "locations": locations,
+        "interests": np.take_along_axis(interests, order, axis=1),
+        "interest_pct": np.take_along_axis(interest_pct, order, axis=1),
+    }
+
+
+def audience_record(audience: dict[str, np.ndarray], row: int, kol_id: str) -> dict:
+    """將受眾欄式資料的一列組回 generate_audience_demographics 的格式"""
+    female = float(audience["female"][row])
+    return {
+        "kol_id": kol_id,
+        "age_groups": dict(zip(AGE_GROUPS, audience["age_groups"][row].tolist())),
+        "gender": {"female": female, "male": round(100 - female, 1)},
+        "locations": dict(zip(LOCATIONS, audience["locations"][row].tolist())),
+        "interests": [
+            {"name": INTEREST_POOL[i], "percentage": p}
+            for i, p in zip(audience["interests"][row].tolist(), audience["interest_pct"][row].tolist())
+        ],
+    }
+
+
+def audience_columns(records: list[dict | None]) -> dict[str, np.ndarray]:
+    """受眾 dict 列表轉為欄式陣列（audience_record 的反向）；缺資料的列補 0"""
+    n = len(records)
+    columns = {
+        "age_groups": np.zeros((n, len(AGE_GROUPS))),
+        "female": np.zeros(n),
+        "locations": np.zeros((n, len(LOCATIONS))),
+        "interests": np.full((n, 6), -1, dtype=np.int8),
+        "interest_pct": np.zeros((n, 6)),
+    }
+    interest_code = {name: i for i, name in enumerate(INTEREST_POOL)}
+    for row, record in enumerate(records):
+        if not record:
+            continue
+        columns["age_groups"][row] = [record["age_groups"].get(g, 0) for g in AGE_GROUPS]
+        columns["female"][row] = record["gender"].get("female", 0)
+        columns["locations"][row] = [record["locations"].get(loc, 0) for loc in LOCATIONS]
+        for j, interest in enumerate(record["interests"][:6]):
+            columns["interests"][row, j] = interest_code.get(interest["name"], -1)
+            columns["interest_pct"][row, j] = interest["percentage"]
+    return columns
+
+
+def synthesize_campaigns(
+    kols: dict[str, np.ndarray],
+    count: int,
+    rng: np.random.Generator,
+    today: datetime,
+) -> tuple[list[dict], list[dict]]:
+    """批次抽樣產生 Campaign 與其成效數據"""
+    n_kols = len(kols["id"])
+    # 前幾筆依固定狀態序列，其餘隨機
+    status_idx = rng.integers(0, len(CAMPAIGN_STATUSES), count)
+    fixed = min(count, len(CAMPAIGN_STATUSES))
+    status_idx[:fixed] = np.arange(fixed)
+    status = np.array(CAMPAIGN_STATUSES)[status_idx]
+
+    # 起訖日（相對 today 的天數）
+    completed_start = -rng.integers(30, 120, count, endpoint=True)
+    active_start = -rng.integers(1, 14, count, endpoint=True)
+    planning_start = rng.integers(7, 30, count, endpoint=True)
+    duration = rng.integers(14, 45, count, endpoint=True)
+    active_end = rng.integers(7, 30, count, endpoint=True)
+    start = np.select([status == "completed", status == "active"], [completed_start, active_start], planning_start)
+    end = np.where(status == "active", active_end, start + duration)
+
+    brands = rng.integers(0, len(BRANDS), count)
+    seasons = rng.integers(0, len(CAMPAIGN_SEASONS), count)
+    targets = rng.integers(0, len(TARGET_AUDIENCES), count)
+    budgets = rng.integers(300000, 3000000, count, endpoint=True)
+    objectives = _sample_subsets(rng, count, len(CAMPAIGN_OBJECTIVES), 2, 4)
+    kol_counts = rng.integers(3, 8, count, endpoint=True)
+    members = [rng.choice(n_kols, size=min(k, n_kols), replace=False) for k in kol_counts]
+
+    # 成效：觸及來自參與 KOL 的粉絲數
+    flat = np.concatenate(members)
+    offsets = np.concatenate([[0], np.cumsum([len(m) for m in members])[:-1]])
+    total_followers = np.add.reduceat(kols["followers"][flat], offsets)
+    avg_engagement = np.add.reduceat(kols["engagement_rate"][flat], offsets) / [len(m) for m in members]
+    total_reach = (total_followers * rng.uniform(0.3, 0.8, count)).astype(np.int64)
+    total_impressions = (total_reach * rng.uniform(2, 5, count)).astype(np.int64)
+    total_engagement = (total_reach * avg_engagement / 100).astype(np.int64)
+    sentiment_positive = np.round(rng.uniform(55, 85, count), 1)
+    sentiment_neutral = np.round(rng.uniform(10, 30, count), 1)
+    roi = np.round(rng.uniform(1.5, 5.5, count), 2)
+    mention_increase = np.round(rng.uniform(15, 150, count), 1)
+
+    # 每日數據（過去 30 天，第 10-20 天為活動高峰）
+    base_daily = total_reach // 30
+    multiplier = 1 + rng.uniform(-0.4, 0.6, (count, 30))
+    multiplier[:, 10:21] *= 1.5
+    daily_value = base_daily[:, None] * multiplier
+    daily_reach = daily_value.astype(np.int64)
+    daily_engagement = (daily_value * avg_engagement[:, None] / 100).astype(np.int64)
+    daily_impressions = (daily_value * rng.uniform(2, 4, (count, 30))).astype(np.int64)
+    daily_sentiment = np.round(rng.uniform(0.5, 0.9, (count, 30)), 2)
+    dates = [(today - timedelta(days=29 - day)).strftime("%Y-%m-%d") for day in range(30)]
+
+    # 最佳表現內容
+    content_kol = rng.integers(0, 1 << 30, (count, 5))
+    content_type = rng.integers(0, len(CONTENT_TYPES), (count, 5))
+    content_engagement = rng.integers(5000, 50000, (count, 5), endpoint=True)
+    content_reach = rng.integers(50000, 500000, (count, 5), endpoint=True)
+
+    campaigns, performances = [], []
+    width = max(3, len(str(count)))
+    for i in range(count):
+        brand = BRANDS[brands[i]]
+        start_date = today + timedelta(days=int(start[i]))
+        end_date = today + timedelta(days=int(end[i]))
+        kol_rows = members[i]
+        campaign = {
+            "id": f"camp_{i+1:0{width}d}",
+            "name": f"{brand['name']} {CAMPAIGN_SEASONS[seasons[i]]}活動",
+            "brand": brand["name"],
+            "brand_logo": brand["logo"],
+            "industry": brand["industry"],
+            "start_date": start_date.isoformat(),
+            "end_date": end_date.isoformat(),
+            "status": str(status[i]),
+            "budget": int(budgets[i]),
+            "kol_ids": kols["id"][kol_rows].tolist(),
+            "kol_count": len(kol_rows),
+            "objectives": [CAMPAIGN_OBJECTIVES[j] for j in objectives[i] if j >= 0],
+            "target_audience": TARGET_AUDIENCES[targets[i]],
+        }
+        campaigns.append(campaign)
+
+        reach = int(total_reach[i])
+        engagement = int(total_engagement[i])
+        kol_names = kols["name"][kol_rows].tolist()
+        top_content = sorted(
+            (
+                {
+                    "kol_name": kol_names[content_kol[i, j] % len(kol_names)],
+                    "type": CONTENT_TYPES[content_type[i, j]],
+                    "engagement": int(content_engagement[i, j]),
+                    "reach": int(content_reach[i, j]),
+                }
+                for j in range(5)
+            ),
+            key=lambda x: x["engagement"],
+            reverse=True,
+        )
+        performances.append({
+            "campaign_id": campaign["id"],
+            "campaign_name": campaign["name"],
+            "brand": campaign["brand"],
+            "status": campaign["status"],
+            "total_reach": reach,
+            "total_impressions": int(total_impressions[i]),
+            "total_engagement": engagement,
+            "engagement_rate": round(engagement / reach * 100, 2) if reach > 0 else 0,
+            "sentiment_positive": float(sentiment_positive[i]),
+            "sentiment_neutral": float(sentiment_neutral[i]),
+            "sentiment_negative": round(100 - sentiment_positive[i] - sentiment_neutral[i], 1),
+            "top_performing_content": top_content,
+            "roi_estimate": float(roi[i]),
+            "brand_mention_increase": float(mention_increase[i]),
+            "daily_metrics": [
+                {"date": d, "reach": r, "engagement": e, "impressions": m, "sentiment": s}
+                for d, r, e, m, s in zip(
+                    dates,
+                    daily_reach[i].tolist(),
+                    daily_engagement[i].tolist(),
+                    daily_impressions[i].tolist(),
+                    daily_sentiment[i].tolist(),
+                )
+            ],
+            "budget": campaign["budget"],
+            "cost_per_engagement": round(campaign["budget"] / engagement, 2) if engagement > 0 else 0,
+            "cost_per_reach": round(campaign["budget"] / reach * 1000, 2) if reach > 0 else 0,
+        })
+
+    return campaigns, performances
+
+
+def synthesize_buzz(keywords: int, days: int, rng: np.random.Generator, today: datetime) -> tuple[dict[str, np.ndarray], list[str], list[str]]:
+    """批次產生輿情趨勢，回傳 (欄位, 關鍵字表, 日期表)；列依關鍵字、日期排序"""
+    keyword_table = BUZZ_KEYWORDS[:keywords] + [f"關鍵字{i:04d}" for i in range(len(BUZZ_KEYWORDS), keywords)]
+    date_table = [(today - timedelta(days=days - 1 - day)).strftime("%Y-%m-%d") for day in range(days)]
+
+    base_volume = rng.integers(500, 5000, keywords, endpoint=True)
+    multiplier = 1 + rng.uniform(-0.3, 0.5, (keywords, days))
+    multiplier[:, 15:23] *= 2  # 活動高峰期
+    lows, highs = zip(*BUZZ_SOURCE_RANGES)
+
+    columns = {
+        "keyword": np.repeat(np.arange(keywords, dtype=np.int32), days),
+        "date": np.tile(np.arange(days, dtype=np.int32), keywords),
+        "volume": (base_volume[:, None] * multiplier).astype(np.int64).ravel(),
+        "sentiment": np.round(rng.uniform(0.4, 0.9, keywords * days), 2),
+        "sources": rng.integers(lows, highs, (keywords * days, len(BUZZ_SOURCES)), endpoint=True).astype(np.int32),
+    }
+    return columns, keyword_table, date_table
+
+
+def synthesize_referrals(followers: np.ndarray, members: int, edges: int, rng: np.random.Generator) -> dict[str, np.ndarray]:
+    """批次產生 MGM 推薦邊；節點編號 0..K-1 為 KOL，K 之後為會員
+
+    KOL 依粉絲數加權抽樣導流會員；會員推薦者呈長尾分佈（少數會員帶進大量新會員），
+    權重為成功推薦次數
+    """
+    n_kols = len(followers)
+    if not members:
+        edges = 0
+    kol_edges = int(edges * KOL_REFERRAL_SHARE) if n_kols else 0
+    member_edges = edges - kol_edges
+
+    kol_src = rng.choice(n_kols, size=kol_edges, p=followers / followers.sum()) if kol_edges else np.zeros(0, dtype=np.int64)
+    member_src = (members * rng.random(member_edges) ** 3).astype(np.int64)
+    dst = rng.integers(0, max(members, 1), edges)
+    # 會員不推薦自己
+    self_loop = dst[kol_edges:] == member_src
+    dst[kol_edges:][self_loop] = (member_src[self_loop] + 1) % members
+
+    return {
+        "src": np.concatenate([kol_src, member_src + n_kols]).astype(np.int32),
+        "dst": (dst + n_kols).astype(np.int32),
+        "weight": (1 + rng.poisson(0.5, edges)).astype(np.float32),
+        "type": np.repeat(np.array([1, 2], dtype=np.int8), [kol_edges, member_edges]),
+    }
+
+
+def follower_blocks(kol_id: str, followers: int, category: str) -> np.ndarray:
+    """KOL 粉絲所在的區塊編號（依 KOL ID 固定亂數，重複呼叫結果相同）"""
+    blocks = FOLLOWER_UNIVERSE // FOLLOWER_BLOCK
+    count = int(np.clip(round(followers / FOLLOWER_BLOCK), 1, blocks))
+    rng = np.random.default_rng([MOCK_SEED, zlib.crc32(kol_id.encode())])
+
+    weights = np.ones(blocks)
+    home = CATEGORIES.index(category) * blocks // len(CATEGORIES) if category in CATEGORIES else 0
+    weights[(np.arange(blocks) - home) % blocks < int(blocks * CATEGORY_BLOCK_SPAN)] = CATEGORY_BLOCK_BOOST
+    return np.sort(rng.choice(blocks, size=count, replace=False, p=weights / weights.sum()))
+
+
+def generate_synthetic_dataset(
+    kols: int,
+    seed: int = 42,
+    campaigns: int | None = None,
+    buzz_keywords: int = len(BUZZ_KEYWORDS),
+    buzz_days: int = 30,
+    today: datetime | None = None,
+) -> dict:
+    """產生完整的大規模合成數據集（相同 seed 與 today 產生相同資料）"""
+    rng = np.random.default_rng(seed)
+    today = today or datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    campaigns = campaigns if campaigns is not None else max(6, kols // 1000)
+
+    kol_columns, dictionaries = synthesize_kols(kols, rng)
+    audience = synthesize_audience(kol_columns["category"], rng)
+    campaign_list, performance_list = synthesize_campaigns(kol_columns, campaigns, rng, today)
+    buzz, dictionaries["keyword"], dictionaries["date"] = synthesize_buzz(buzz_keywords, buzz_days, rng, today)
+
+    return {
+        "meta": {
+            "seed": seed,
+            "kols": kols,
+            "campaigns": campaigns,
+            "buzz_keywords": buzz_keywords,
+            "buzz_days": buzz_days,
+            "today": today.isoformat(),
+        },
+        "kols": kol_columns,
+        "dictionaries": dictionaries,
+        "audience": audience,
+        "campaigns": campaign_list,
+        "performances": performance_list,
+        "buzz": buzz,
+    }
+
+
+def save_dataset(dataset: dict, path: str) -> None:
+    """將合成數據集寫入 .npz（陣列原樣保存，其餘以 JSON 保存）"""
+    arrays = {
+        f"{table}/{name}": array
+        for table in ("kols", "audience", "buzz")
+        for name, array in dataset[table].items()
+    }
+    header = {key: dataset[key] for key in ("meta", "dictionaries", "campaigns", "performances")}
+    np.savez(path, __header__=np.array(json.dumps(header, ensure_ascii=False)), **arrays)
+
+
+def load_dataset(path: str) -> dict:
+    """讀取 save_dataset 寫出的數據集"""
+    with np.load(path) as data:
+        dataset = json.loads(str(data["__header__"]))
+        for key in data.files:
+            if key != "__header__":
+                table, name = key.split("/", 1)
+                dataset.setdefault(table, {})[name] = data[key]
+    return dataset
+
+
+def buzz_records(dataset: dict) -> list[dict]:
+    """將合成數據集的輿情欄位轉為 generate_buzz_trends 的格式"""
+    buzz = dataset["buzz"]
+    keywords = dataset["dictionaries"]["keyword"]
+    dates = dataset["dictionaries"]["date"]
+    return [
+        {
+            "keyword": keywords[k],
+            "date": dates[d],
+            "volume": v,
+            "sentiment": s,
+            "source_breakdown": dict(zip(BUZZ_SOURCES, sources)),
+        }
+        for k, d, v, s, sources in zip(
+            buzz["keyword"].tolist(),
+            buzz["date"].tolist(),
+            buzz["volume"].tolist(),
+            buzz["sentiment"].tolist(),
+            buzz["sources"].tolist(),
+        )
+    ]
+
+
+class AudienceTable(Mapping):
+    """以欄式陣列保存的受眾資料，依 KOL ID 取用時才組成 dict"""
+
+    def __init__(self, kol_ids: np.ndarray, audience: dict[str, np.ndarray]):
+        self._ids = kol_ids
+        self._row_index: dict[str, int] | None = None
+        self._audience = audience
+
+    @property
+    def _rows(self) -> dict[str, int]:
+        # ID → 列號索引於第一次查詢時才建立
+        if self._row_index is None:
+            self._row_index = {kol_id: i for i, kol_id in enumerate(np.asarray(self._ids).tolist())}
+        return self._row_index
+
+    def __getitem__(self, kol_id: str) -> dict:
+        return audience_record(self._audience, self._rows[kol_id], kol_id)
+
+    def __iter__(self):
+        return iter(self._rows)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def columns(self, kol_ids: list[str]) -> dict[str, np.ndarray]:
+        """依 kol_ids 順序取出欄式受眾資料；不存在的 ID 補 0"""
+        rows = np.fromiter((self._rows.get(i, -1) for i in kol_ids), dtype=np.int64, count=len(kol_ids))
+        missing = rows < 0
+        columns = {}
+        for name, values in self._audience.items():
+            col = values[np.where(missing, 0, rows)]
+            col[missing] = -1 if name == "interests" else 0
+            columns[name] = col
+        return columns
+
+
+def load_or_generate_dataset(kols: int, seed: int, path: str | None = None) -> dict:
+    """有快取檔且 KOL 數與種子相符時直接讀取，否則產生後寫入（覆寫）快取檔"""
+    if path and os.path.exists(path):
+        dataset = load_dataset(path)
+        if dataset["meta"]["kols"] == kols and dataset["meta"]["seed"] == seed:
+            return dataset
+    dataset = generate_synthetic_dataset(kols, seed=seed)
+    if path:
+        save_dataset(dataset, path)
+    return dataset
+
+
+def build_kol_campaign_index(campaigns: list[dict]) -> dict[str, list[dict]]:
+    """建立 KOL → 參與 Campaign 的反向索引"""
+    index: dict[str, list[dict]] = {}
+    for campaign in campaigns:
+        for kol_id in campaign["kol_ids"]:
+            index.setdefault(kol_id, []).append(campaign)
+    return index
+
+
+# 各數據集於首次取用時才產生（模組層級 __getattr__），匯入模組不需等待生成，取用一個數據集只產生它與其相依者
+# 設定 MOCK_KOL_COUNT 時改用大規模合成模式；MOCK_SEED 固定亂數種子，
+# MOCK_DATASET_PATH 指定 .npz 快取檔（存在則直接讀取）；
+# MOCK_SNAPSHOT_PATH 指定 mmap 快照（多個 worker 共用，不存在時由第一個 worker 產生，預設 28 筆 KOL）
+MOCK_KOL_COUNT = int(os.getenv("MOCK_KOL_COUNT", "0"))
+MOCK_SEED = int(os.getenv("MOCK_SEED", "42"))
+MOCK_SNAPSHOT_PATH = os.getenv("MOCK_SNAPSHOT_PATH")
+
+_load_lock = threading.RLock()
+
+
+def _seed(name: str) -> None:
+    """設定 MOCK_SEED 時每個數據集各自以固定的亂數序列產生，結果不受取用順序影響
+
+    須在取得相依的數據集之後呼叫，相依者產生時會重設亂數序列
+    """
+    if os.getenv("MOCK_SEED"):
+        random.seed(f"{MOCK_SEED}:{name}")
+
+
+def _synthetic_dataset() -> dict | None:
+    """大規模合成數據集（快照或 .npz）；預設模式為 None"""
+    if MOCK_SNAPSHOT_PATH:
+        kols = MOCK_KOL_COUNT or len(KOL_NAMES)
+        return open_or_create(
+            MOCK_SNAPSHOT_PATH,
+            lambda: generate_synthetic_dataset(kols, seed=MOCK_SEED),
+            expected={"kols": kols, "seed": MOCK_SEED},
+        )
+    if MOCK_KOL_COUNT:
+        return load_or_generate_dataset(MOCK_KOL_COUNT, MOCK_SEED, os.getenv("MOCK_DATASET_PATH"))
+    return None
+
+
+def _kols():
+    dataset = _dataset("SYNTHETIC_DATASET")
+    if dataset is not None:
+        # KOL 以欄式陣列保存，dict 於取用時才還原
+        return KOLRecords(dataset["kols"], dataset["dictionaries"])
+    _seed("kols")
+    return generate_kol_profiles(28)
+
+
+def _audience():
+    dataset = _dataset("SYNTHETIC_DATASET")
+    if dataset is not None:
+        return AudienceTable(dataset["kols"]["id"], dataset["audience"])
+    kols = _dataset("ALL_KOLS")
+    _seed("audience")
+    return {k["id"]: generate_audience_demographics(k["id"], k["category"]) for k in kols}
+
+
+def _campaigns() -> list[dict]:
+    dataset = _dataset("SYNTHETIC_DATASET")
+    if dataset is not None:
+        return dataset["campaigns"]
+    kols = _dataset("ALL_KOLS")
+    _seed("campaigns")
+    return generate_campaigns(kols, 6)
+
+
+def _performances() -> list[dict]:
+    dataset = _dataset("SYNTHETIC_DATASET")
+    if dataset is not None:
+        return dataset["performances"]
+    kols, campaigns = _dataset("ALL_KOLS"), _dataset("ALL_CAMPAIGNS")
+    _seed("performances")
+    return [generate_campaign_performance(c, kols) for c in campaigns]
+
+
+def _buzz_trends() -> list[dict]:
+    dataset = _dataset("SYNTHETIC_DATASET")
+    if dataset is not None:
+        return buzz_records(dataset)
+    _seed("buzz")
+    return generate_buzz_trends(30)
+
+
+def _member_count() -> int:
+    # MGM 推薦網絡規模（預設會員數為 KOL 數的兩倍、推薦邊為會員數的三倍），首次查詢網絡時才產生
+    return int(os.getenv("MOCK_MEMBER_COUNT", str(max(2000, 2 * len(_dataset("ALL_KOLS"))))))
+
+
+# 延遲產生的模組屬性 → 產生函式；相依的數據集於產生時一併取用
+_GENERATORS: dict[str, Callable[[], object]] = {
+    "SYNTHETIC_DATASET": _synthetic_dataset,
+    "ALL_KOLS": _kols,
+    "ALL_CAMPAIGNS": _campaigns,
+    "ALL_CAMPAIGN_PERFORMANCES": _performances,
+    "ALL_AUDIENCE_DATA": _audience,
+    "ALL_BUZZ_TRENDS": _buzz_trends,
+    "MOCK_MEMBER_COUNT": _member_count,
+    "MOCK_REFERRAL_EDGES": lambda: int(os.getenv("MOCK_REFERRAL_EDGES", str(3 * _dataset("MOCK_MEMBER_COUNT")))),
+    # 主鍵 / 外鍵索引（KOL 依欄式資料表的列號查詢）
+    "CAMPAIGN_INDEX": lambda: {c["id"]: c for c in _dataset("ALL_CAMPAIGNS")},
+    "PERFORMANCE_INDEX": lambda: {p["campaign_id"]: p for p in _dataset("ALL_CAMPAIGN_PERFORMANCES")},
+    "KOL_CAMPAIGN_INDEX": lambda: build_kol_campaign_index(_dataset("ALL_CAMPAIGNS")),
+}
+DATASETS = tuple(_GENERATORS)
+
+
+def _dataset(name: str):
+    """取得數據集，尚未產生時產生並寫入模組全域（呼叫端須持有 _load_lock）"""
+    if name not in globals():
+        globals()[name] = _GENERATORS[name]()
+    return globals()[name]
+
+
+def datasets_loaded() -> bool:
+    """數據集是否皆已產生"""
+    return all(name in globals() for name in DATASETS)
+
+
+def __getattr__(name: str):
+    # 只在屬性尚未存在時呼叫；只產生該數據集與其相依者，之後的取用不再經過這裡
+    if name not in _GENERATORS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    with _load_lock:
+        return _dataset(name)
 
-    for category in CATEGORIES:
-        cat_kols = [k for k in kols if k["category"] == category]
-        if cat_kols:
-            category_stats[category] = {
-                "category": category,
-                "kol_count": len(cat_kols),
-                "total_reach": sum(k["followers"] for k in cat_kols),
-                "avg_engagement": round(sum(k["engagement_rate"] for k in cat_kols) / len(cat_kols), 2),
-                "avg_influence": round(sum(k["influence_score"] for k in cat_kols) / len(cat_kols), 1),
-                "top_kol": max(cat_kols, key=lambda x: x["influence_score"])["name"]
-            }
 
-    return list(category_stats.values())
+if __name__ == "__main__":
+    import argparse
+    import time
 
+    parser = argparse.ArgumentParser(description="產生大規模合成數據集並寫入 .npz")
+    parser.add_argument("--kols", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", required=True)
+    args = parser.parse_args()
 
-# 初始化所有數據
-ALL_KOLS = generate_kol_profiles(28)
-ALL_CAMPAIGNS = generate_campaigns(ALL_KOLS, 6)
-ALL_CAMPAIGN_PERFORMANCES = [generate_campaign_performance(c, ALL_KOLS) for c in ALL_CAMPAIGNS]
-ALL_AUDIENCE_DATA = {k["id"]: generate_audience_demographics(k["id"], k["category"]) for k in ALL_KOLS}
-ALL_BUZZ_TRENDS = generate_buzz_trends(30)
-PLATFORM_DISTRIBUTION = generate_platform_distribution(ALL_KOLS)
-CATEGORY_INSIGHTS = generate_category_insights(ALL_KOLS)
+    started = time.perf_counter()
+    dataset = generate_synthetic_dataset(args.kols, seed=args.seed)
+    generated = time.perf_counter()
+    save_dataset(dataset, args.out)
+    print(f"{args.kols:,} KOLs：產生 {generated - started:.2f}s，寫入 {time.perf_counter() - generated:.2f}s → {args.out}")
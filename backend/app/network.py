@@ -0,0 +1,366 @@
+"""
+影響力網絡
+KOL 與會員為節點，合作（KOL 共同參與 Campaign）與 MGM 推薦為有向加權邊，
+以 CSR（壓縮稀疏列）陣列保存：indptr 為各節點出邊的起點，indices / weights / types 依來源節點連續排列。
+- PageRank：加權冪迭代，每次迭代為一次 gather + bincount
+- 社群：半同步標籤傳播，每次迭代以排序 + reduceat 計算各節點鄰居標籤的權重和
+- k 跳觸及：以 CSR 切片批次展開整個 frontier
+"""
+
+import threading
+
+import numpy as np
+
+from .mock_data import EDGE_TYPES, MEMBER_PREFIX
+
+# 以 uint16 基數排序的位元寬度（NumPy 對 16 位元整數的穩定排序為基數排序）
+_RADIX_BITS = 16
+
+
+def _argsort_nodes(nodes: np.ndarray, n: int) -> np.ndarray:
+    """節點編號的穩定排序；以兩輪 16 位元基數排序取代比較排序"""
+    if n <= 1 << _RADIX_BITS:
+        return np.argsort(nodes.astype(np.uint16), kind="stable")
+    low = np.argsort((nodes & 0xFFFF).astype(np.uint16), kind="stable")
+    high = np.argsort((nodes[low] >> _RADIX_BITS).astype(np.uint16), kind="stable")
+    return low[high]
+
+
+class CSRGraph:
+    """有向加權圖的 CSR 表示"""
+
+    def __init__(self, n: int, src: np.ndarray, dst: np.ndarray, weights: np.ndarray, types: np.ndarray | None = None):
+        order = _argsort_nodes(src, n)
+        self.n = n
+        self.indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=n), out=self.indptr[1:])
+        self.indices = dst[order].astype(np.int32)
+        self.weights = weights[order].astype(np.float32)
+        self.types = None if types is None else types[order].astype(np.int8)
+        self._rows: np.ndarray | None = None
+
+    @property
+    def edges(self) -> int:
+        return len(self.indices)
+
+    @property
+    def rows(self) -> np.ndarray:
+        """每條邊的來源節點（CSR 展開，延遲建立）"""
+        if self._rows is None:
+            self._rows = np.repeat(np.arange(self.n, dtype=np.int32), np.diff(self.indptr))
+        return self._rows
+
+    def out_degree(self) -> np.ndarray:
+        return np.diff(self.indptr)
+
+    def in_degree(self) -> np.ndarray:
+        return np.bincount(self.indices, minlength=self.n)
+
+    def out_strength(self) -> np.ndarray:
+        """各節點出邊權重和"""
+        return np.bincount(self.rows, weights=self.weights, minlength=self.n)
+
+    def neighbors(self, node: int) -> slice:
+        """節點出邊在 indices / weights / types 中的區段"""
+        return slice(int(self.indptr[node]), int(self.indptr[node + 1]))
+
+    def slots(self, nodes: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """nodes 所有出邊在邊陣列中的位置，與每條邊的來源節點"""
+        starts = self.indptr[nodes]
+        counts = self.indptr[nodes + 1] - starts
+        total = int(counts.sum())
+        offsets = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(total)
+        return offsets, np.repeat(nodes, counts)
+
+    def expand(self, frontier: np.ndarray) -> np.ndarray:
+        """一次取出 frontier 所有節點的出邊鄰居（可能重複）"""
+        return self.indices[self.slots(frontier)[0]]
+
+    def undirected(self) -> "CSRGraph":
+        """雙向化的無向圖，供社群偵測使用"""
+        return CSRGraph(
+            self.n,
+            np.concatenate([self.rows, self.indices]),
+            np.concatenate([self.indices, self.rows]),
+            np.concatenate([self.weights, self.weights]),
+        )
+
+
+def pagerank(graph: CSRGraph, damping: float = 0.85, tol: float = 1e-6, max_iter: int = 100) -> np.ndarray:
+    """加權 PageRank；無出邊節點的分數平均分配給所有節點"""
+    n = graph.n
+    if n == 0:
+        return np.zeros(0)
+    strength = graph.out_strength()
+    dangling = strength == 0
+    # 每條邊轉移機率固定，迴圈外先算好
+    transition = graph.weights / strength[graph.rows]
+    rows, indices = graph.rows, graph.indices
+
+    rank = np.full(n, 1.0 / n)
+    for _ in range(max_iter):
+        flow = np.bincount(indices, weights=transition * rank[rows], minlength=n)
+        new = damping * (flow + rank[dangling].sum() / n) + (1 - damping) / n
+        delta = np.abs(new - rank).sum()
+        rank = new
+        if delta < tol:
+            break
+    return rank
+
+
+def label_propagation(graph: CSRGraph, max_iter: int = 30, seed: int = 0) -> np.ndarray:
+    """加權標籤傳播（輸入需為無向圖），回傳每個節點的社群編號（依社群大小由大到小編號）
+
+    每輪隨機套用一半的標籤變更（半同步），避免二分結構中標籤來回振盪；同分時保留原標籤，否則取最小標籤。
+    只有鄰居標籤變動過或尚有待變更標籤的節點需要重算，後續各輪只處理這些節點的邊
+    """
+    n = graph.n
+    rng = np.random.default_rng(seed)
+    labels = np.arange(n, dtype=np.int32)
+    active = np.arange(n, dtype=np.int32)
+    for _ in range(max_iter):
+        if len(active) == n:
+            slots, nodes = slice(None), graph.rows
+        else:
+            slots, nodes = graph.slots(active)
+        # (節點, 鄰居標籤) 鍵；邊已依節點排序，穩定排序只需整理各節點內部
+        keys = (nodes.astype(np.int64) << 32) | labels[graph.indices[slots]]
+        order = np.argsort(keys, kind="stable")
+        keys = keys[order]
+        if not len(keys):
+            break
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        # 以前綴和相減取得各 (節點, 標籤) 的權重和
+        cumulative = np.zeros(len(keys) + 1)
+        np.cumsum(graph.weights[slots][order], out=cumulative[1:])
+        group_weight = np.diff(cumulative[np.r_[starts, len(keys)]])
+        group_node = (keys[starts] >> 32).astype(np.int32)
+        group_label = (keys[starts] & 0xFFFFFFFF).astype(np.int32)
+        # 原標籤加上極小權重，同分時優先保留
+        group_weight += (group_label == labels[group_node]) * 1e-9
+
+        node_starts = np.flatnonzero(np.r_[True, group_node[1:] != group_node[:-1]])
+        best = np.maximum.reduceat(group_weight, node_starts)
+        hits = np.flatnonzero(group_weight == np.repeat(best, np.diff(np.r_[node_starts, len(group_node)])))
+        first = hits[np.r_[True, group_node[hits][1:] != group_node[hits][:-1]]]
+
+        candidates, proposed = group_node[first], group_label[first]
+        pending = np.flatnonzero(proposed != labels[candidates])
+        # 待變更的節點不超過 0.1% 即視為收斂
+        if len(pending) <= n // 1000:
+            break
+        apply = rng.random(len(pending)) < 0.5
+        changed = candidates[pending[apply]]
+        labels[changed] = proposed[pending[apply]]
+        # 以遮罩去重（比排序去重快）
+        mask = np.zeros(n, dtype=bool)
+        mask[graph.expand(changed)] = True
+        mask[candidates[pending[~apply]]] = True
+        active = np.flatnonzero(mask).astype(np.int32)
+
+    # 依社群大小重新編號
+    rank = np.empty(n, dtype=np.int32)
+    rank[np.argsort(-np.bincount(labels, minlength=n), kind="stable")] = np.arange(n, dtype=np.int32)
+    return rank[labels]
+
+
+def k_hop(graph: CSRGraph, seeds: np.ndarray, hops: int) -> tuple[np.ndarray, list[np.ndarray]]:
+    """自 seeds 沿出邊展開 hops 跳，回傳 (已觸及遮罩, 每一跳新觸及的節點)"""
+    visited = np.zeros(graph.n, dtype=bool)
+    visited[seeds] = True
+    frontier = np.flatnonzero(visited)
+    layers: list[np.ndarray] = []
+    for _ in range(hops):
+        if not len(frontier):
+            break
+        # 以遮罩去重，只保留尚未觸及的節點
+        fresh = np.zeros(graph.n, dtype=bool)
+        fresh[graph.expand(frontier)] = True
+        fresh &= ~visited
+        visited |= fresh
+        frontier = np.flatnonzero(fresh)
+        layers.append(frontier)
+    return visited, layers
+
+
+class NetworkIndex:
+    """影響力網絡；圖與 PageRank / 社群依 KOL 欄式資料表的版本延遲重建
+
+    節點編號：0..K-1 為 KOL（欄式資料表列號），K 之後為會員
+    可在執行緒池中呼叫：建立圖、PageRank 與社群時持有鎖，同時第一次查詢的請求只建立一次
+    """
+
+    def __init__(self, storage):
+        self.storage = storage
+        self._version: tuple[int, int] | None = None
+        self._lock = threading.RLock()
+
+    def _graph(self) -> CSRGraph:
+        with self._lock:
+            store = self.storage.column_store()
+            version = (id(store), store.version)
+            if self._version != version:
+                members, edges = self.storage.network_edges(store)
+                self.store = store
+                self.kols = store.size
+                self.members = members
+                self.graph = CSRGraph(self.kols + members, edges["src"], edges["dst"], edges["weight"], edges["type"])
+                self.in_degree = self.graph.in_degree()
+                self._pagerank: np.ndarray | None = None
+                self._communities: np.ndarray | None = None
+                self._version = version
+            return self.graph
+
+    def _ranks(self) -> np.ndarray:
+        with self._lock:
+            graph = self._graph()
+            if self._pagerank is None:
+                self._pagerank = pagerank(graph)
+            return self._pagerank
+
+    def _labels(self) -> np.ndarray:
+        with self._lock:
+            graph = self._graph()
+            if self._communities is None:
+                self._communities = label_propagation(graph.undirected())
+            return self._communities
+
+    def node_of(self, node_id: str) -> int | None:
+        """節點 ID（KOL ID 或 mem_ 開頭的會員 ID）→ 節點編號"""
+        self._graph()
+        if node_id.startswith(MEMBER_PREFIX):
+            suffix = node_id[len(MEMBER_PREFIX):]
+            if not suffix.isdigit() or int(suffix) >= self.members:
+                return None
+            return self.kols + int(suffix)
+        return self.store.row_of(node_id)
+
+    def node_ids(self, nodes: np.ndarray) -> list[str]:
+        ids = self.store.columns["id"]
+        return [
+            ids[i] if i < self.kols else f"{MEMBER_PREFIX}{i - self.kols:07d}"
+            for i in nodes.tolist()
+        ]
+
+    def _nodes(self, nodes: np.ndarray) -> list[dict]:
+        """節點摘要：ID、類型、PageRank（乘以節點數，平均為 1）、社群、出入度；KOL 另附名稱與平台"""
+        ranks, labels, graph = self._ranks(), self._labels(), self.graph
+        out_degree = graph.indptr[nodes + 1] - graph.indptr[nodes]
+        in_degree = self.in_degree[nodes]
+        kol_rows = nodes[nodes < self.kols]
+        kols = iter(self.store.rows(kol_rows))
+        result = []
+        for node_id, node, rank, label, out_d, in_d in zip(
+            self.node_ids(nodes), nodes.tolist(), ranks[nodes].tolist(), labels[nodes].tolist(),
+            out_degree.tolist(), in_degree.tolist(),
+        ):
+            item = {
+                "node_id": node_id,
+                "type": "kol" if node < self.kols else "member",
+                "pagerank": round(rank * graph.n, 4),
+                "community": label,
+                "out_degree": out_d,
+                "in_degree": in_d,
+            }
+            if node < self.kols:
+                kol = next(kols)
+                item.update(name=kol["name"], platform=kol["platform"], followers=kol["followers"])
+            result.append(item)
+        return result
+
+    def summary(self) -> dict:
+        graph = self._graph()
+        labels = self._labels()
+        type_counts = np.bincount(graph.types, minlength=len(EDGE_TYPES)) if graph.edges else np.zeros(len(EDGE_TYPES), dtype=np.int64)
+        return {
+            "nodes": graph.n,
+            "kols": self.kols,
+            "members": self.members,
+            "edges": graph.edges,
+            "edge_types": dict(zip(EDGE_TYPES, type_counts.tolist())),
+            "communities": int(labels.max()) + 1 if graph.n else 0,
+            "top_nodes": self.pagerank(limit=10),
+        }
+
+    def pagerank(self, limit: int = 20, node_type: str | None = None) -> list[dict]:
+        """依 PageRank 由高到低；node_type 為 kol / member 時只取該類節點"""
+        ranks = self._ranks()
+        if node_type == "kol":
+            candidates = ranks[:self.kols]
+            offset = 0
+        elif node_type == "member":
+            candidates = ranks[self.kols:]
+            offset = self.kols
+        else:
+            candidates, offset = ranks, 0
+        limit = max(0, min(limit, len(candidates)))
+        top = np.argpartition(-candidates, limit - 1)[:limit] if 0 < limit < len(candidates) else np.arange(limit)
+        top = top[np.lexsort((top, -candidates[top]))]
+        return self._nodes(top + offset)
+
+    def communities(self, limit: int = 10, top: int = 5) -> list[dict]:
+        """規模最大的 limit 個社群，附 KOL / 會員數與 PageRank 最高的 top 個節點"""
+        labels, ranks = self._labels(), self._ranks()
+        sizes = np.bincount(labels)
+        kol_sizes = np.bincount(labels[:self.kols], minlength=len(sizes))
+        limit = max(0, min(limit, len(sizes)))
+        # 依社群排序節點，同社群內 PageRank 由高到低
+        order = np.lexsort((-ranks, labels))
+        offsets = np.r_[0, np.cumsum(sizes)]
+        return [
+            {
+                "community": label,
+                "size": int(sizes[label]),
+                "kols": int(kol_sizes[label]),
+                "members": int(sizes[label] - kol_sizes[label]),
+                "top_nodes": self._nodes(order[offsets[label]:offsets[label] + top]),
+            }
+            for label in range(limit)
+        ]
+
+    def node(self, node_id: str, limit: int = 20) -> dict | None:
+        """單一節點的影響力網絡（InfluenceNetwork 格式），連線依強度由高到低取 limit 筆"""
+        node = self.node_of(node_id)
+        if node is None:
+            return None
+        graph = self.graph
+        span = graph.neighbors(node)
+        weights = graph.weights[span]
+        top = np.lexsort((graph.indices[span], -weights))[:max(limit, 0)]
+        neighbors = graph.indices[span][top]
+        peak = float(weights.max()) if len(weights) else 1.0
+        info = self._nodes(np.array([node]))[0]
+        return {
+            "kol_id": node_id,
+            **info,
+            "connections": [
+                {"kol_id": neighbor, "strength": round(w / peak, 4), "weight": w, "type": EDGE_TYPES[t]}
+                for neighbor, w, t in zip(
+                    self.node_ids(neighbors), weights[top].tolist(), graph.types[span][top].tolist(),
+                )
+            ],
+            "community_clusters": [f"community_{info['community']}"],
+            "cross_platform_presence": {info["platform"]: info["name"]} if "platform" in info else {},
+        }
+
+    def reach(self, node_ids: list[str], hops: int = 2) -> dict | None:
+        """自多個節點沿推薦 / 合作邊展開 hops 跳的觸及；任一節點不存在時回傳 None"""
+        nodes = [self.node_of(i) for i in node_ids]
+        if any(n is None for n in nodes):
+            return None
+        seeds = np.array(nodes, dtype=np.int64)
+        visited, layers = k_hop(self.graph, seeds, hops)
+        return {
+            "seeds": node_ids,
+            "hops": hops,
+            "total_reach": int(np.count_nonzero(visited)) - len(np.unique(seeds)),
+            "layers": [
+                {
+                    "hop": hop,
+                    "reached": len(layer),
+                    "kols": int(np.count_nonzero(layer < self.kols)),
+                    "members": int(np.count_nonzero(layer >= self.kols)),
+                }
+                for hop, layer in enumerate(layers, start=1)
+            ],
+        }
@@ -0,0 +1,57 @@
+"""
+Keyset 分頁游標
+游標記錄上一頁最後一筆的排序值與 ID，編碼為不透明字串；
+下一頁直接在已排序的索引中定位，不需重新排序或略過前面的資料
+"""
+
+import base64
+from datetime import date
+from typing import Any, Callable
+
+import orjson
+
+
+class InvalidCursor(ValueError):
+    """游標格式錯誤、與目前查詢條件不符，或指向的資料已不存在"""
+
+
+def encode_cursor(**fields) -> str:
+    """將欄位編碼為 URL 安全的游標字串"""
+    raw = orjson.dumps(fields)
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def is_number(value: Any) -> bool:
+    """int64 範圍內的整數或浮點數（不含 bool）"""
+    if isinstance(value, bool):
+        return False
+    return isinstance(value, float) or (isinstance(value, int) and -2**63 <= value < 2**63)
+
+
+def is_string(value: Any) -> bool:
+    return isinstance(value, str)
+
+
+def is_date(value: Any) -> bool:
+    """YYYY-MM-DD"""
+    if not isinstance(value, str) or len(value) != 10:
+        return False
+    try:
+        date.fromisoformat(value)
+    except ValueError:
+        return False
+    return True
+
+
+def decode_cursor(token: str, types: dict[str, Callable[[Any], bool]] | None = None, **expected) -> dict:
+    """解碼游標；格式錯誤、缺少欄位或型別不符（types 為 欄位 → 檢查函式）、與目前查詢條件不符時拋出 InvalidCursor"""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        fields = orjson.loads(raw)
+    except ValueError as e:
+        raise InvalidCursor("Invalid cursor") from e
+    if not isinstance(fields, dict) or any(fields.get(k) != v for k, v in expected.items()):
+        raise InvalidCursor("Invalid cursor")
+    if any(name not in fields or not check(fields[name]) for name, check in (types or {}).items()):
+        raise InvalidCursor("Invalid cursor")
+    return fields
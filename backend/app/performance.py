@@ -0,0 +1,45 @@
+"""
+Campaign 成效的累加計算
+記憶體與 SQLite 儲存層都在同一個鎖或交易中讀取、累加、寫回（Storage.add_daily_metrics），並行的更新不會遺失
+"""
+
+# 每日數據保留的天數（與 mock 數據的 daily_metrics 相同）
+WINDOW_DAYS = 30
+
+
+def add_daily_metrics(performance: dict, date: str, reach: int, engagement: int, impressions: int,
+                      sentiment: float | None = None) -> dict:
+    """將某一天新增的觸及、互動與曝光累加到成效數據，回傳新的 dict（不修改原本的）
+
+    情緒依觸及加權平均；總計與衍生比率一併更新，每日數據只保留最近 WINDOW_DAYS 天。
+    """
+    daily = list(performance["daily_metrics"])
+    pos = next((i for i, m in enumerate(daily) if m["date"] == date), None)
+    if pos is None:
+        point = {"date": date, "reach": reach, "engagement": engagement, "impressions": impressions,
+                 "sentiment": round(sentiment if sentiment is not None else 0.0, 2)}
+        daily.append(point)
+        daily.sort(key=lambda m: m["date"])
+        del daily[:-WINDOW_DAYS]
+    else:
+        old = daily[pos]
+        point = {
+            "date": date,
+            "reach": old["reach"] + reach,
+            "engagement": old["engagement"] + engagement,
+            "impressions": old["impressions"] + impressions,
+            "sentiment": old["sentiment"],
+        }
+        if sentiment is not None and point["reach"]:
+            point["sentiment"] = round((old["sentiment"] * old["reach"] + sentiment * reach) / point["reach"], 2)
+        daily[pos] = point
+
+    new = {**performance, "daily_metrics": daily}
+    new["total_reach"] += reach
+    new["total_engagement"] += engagement
+    new["total_impressions"] += impressions
+    total_reach, total_engagement = new["total_reach"], new["total_engagement"]
+    new["engagement_rate"] = round(total_engagement / total_reach * 100, 2) if total_reach > 0 else 0
+    new["cost_per_engagement"] = round(new["budget"] / total_engagement, 2) if total_engagement > 0 else 0
+    new["cost_per_reach"] = round(new["budget"] / total_reach * 1000, 2) if total_reach > 0 else 0
+    return new
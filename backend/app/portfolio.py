@@ -0,0 +1,317 @@
+"""
+KOL 組合最佳化
+在預算內挑選一組 KOL，使預估觸及或互動最大：
+- 報價區間字串解析為數值成本（下限 / 中位 / 上限）
+- 組合價值 = 各 KOL 預估值總和 ×（1 − 重疊懲罰 × 受眾重疊率），重疊率由受眾草圖的聯集估算
+- 平台、類別可指定入選人數上下限
+- 候選多時依「價值 / 成本」取出候選池後貪婪選取；候選少時以分支定界求最佳解。
+  兩者共用時間預算，逾時回傳目前找到的最佳組合
+"""
+
+import time
+
+import numpy as np
+
+from .recommend import parse_price_range, top_k
+from .sketch import estimate
+from .store import KOLColumnStore
+
+OBJECTIVES = ("reach", "engagement")
+COST_BASES = ("low", "mid", "high")
+
+# 預估觸及率（與推薦結果的 predicted_reach 相同）
+REACH_RATE = 0.6
+
+# 貪婪選取的候選池大小
+POOL_SIZE = 150
+
+# 候選數不超過此值時改用分支定界
+EXACT_MAX_CANDIDATES = 20
+
+DEFAULT_TIME_BUDGET_MS = 200
+
+# 未指定上限的群組
+_UNLIMITED = np.iinfo(np.int32).max
+
+
+def parse_mix(text: str) -> dict[str, tuple[int, int]]:
+    """「instagram:1-3,youtube:-2,tiktok:1」→ {名稱: (下限, 上限)}"""
+    mix = {}
+    for part in filter(None, (p.strip() for p in text.split(","))):
+        name, sep, bounds = part.rpartition(":")
+        if not sep or not name:
+            raise ValueError("Invalid mix")
+        lo, dash, hi = bounds.partition("-")
+        try:
+            low = int(lo) if lo else 0
+            high = (int(hi) if hi else _UNLIMITED) if dash else low
+        except ValueError:
+            raise ValueError("Invalid mix") from None
+        if low < 0 or high < low:
+            raise ValueError("Invalid mix")
+        mix[name] = (low, high)
+    return mix
+
+
+def _candidates(ratio: np.ndarray, group_codes: list[np.ndarray], group_mins: list[np.ndarray], size: int) -> np.ndarray:
+    """價值 / 成本最高的 size 個位置；有人數下限的群組另外保留下限兩倍的候選"""
+    picks = [top_k(ratio, size)]
+    for codes, lo in zip(group_codes, group_mins):
+        for code in np.flatnonzero(lo > 0):
+            members = np.flatnonzero(codes == code)
+            picks.append(members[top_k(ratio[members], int(lo[code]) * 2)])
+    return np.union1d(picks[0], np.concatenate(picks[1:])) if len(picks) > 1 else np.sort(picks[0])
+
+
+class _Search:
+    """候選池上的搜尋狀態：各候選的價值、成本、受眾草圖與所屬群組"""
+
+    def __init__(self, values, costs, sketches, groups, budget, penalty, deadline):
+        self.values = values
+        self.costs = costs
+        self.sketches = sketches
+        self.audience = estimate(sketches)
+        self.groups = groups  # [(代碼, 下限表, 上限表)]
+        self.budget = budget
+        self.penalty = penalty
+        self.deadline = deadline
+        self.timed_out = False
+
+    def score(self, value_sum, audience_sum, reach):
+        """組合價值；reach 為聯集估計，可為陣列"""
+        overlap = 1 - reach / np.maximum(audience_sum, 1)
+        return value_sum * (1 - self.penalty * np.clip(overlap, 0, 1))
+
+    def satisfied(self, counts) -> bool:
+        return all((count >= lo).all() for count, (_, lo, _) in zip(counts, self.groups))
+
+    def evaluate(self, chosen: list[int]) -> float:
+        if not chosen:
+            return 0.0
+        union = self.sketches[chosen].max(axis=0)
+        return float(self.score(self.values[chosen].sum(), self.audience[chosen].sum(), estimate(union)))
+
+    def greedy(self) -> list[int]:
+        """每一步選「邊際價值 / 成本」最高者；尚未滿足人數下限的群組優先"""
+        k = len(self.values)
+        chosen: list[int] = []
+        union = np.zeros(self.sketches.shape[1], dtype=np.uint8)
+        value_sum = audience_sum = spent = current = 0.0
+        counts = [np.zeros(len(lo), dtype=np.int64) for _, lo, _ in self.groups]
+        available = np.ones(k, dtype=bool)
+
+        while True:
+            ok = available & (self.costs <= self.budget - spent)
+            need = np.zeros(k, dtype=bool)
+            for count, (codes, lo, hi) in zip(counts, self.groups):
+                ok &= count[codes] < hi[codes]
+                need |= count[codes] < lo[codes]
+            required = (ok & need).any()
+            if required:
+                ok &= need
+            candidates = np.flatnonzero(ok)
+            if not len(candidates):
+                break
+
+            # 所有候選加入後的聯集一次估算
+            reach = estimate(np.maximum(union, self.sketches[candidates]))
+            scores = self.score(value_sum + self.values[candidates], audience_sum + self.audience[candidates], reach)
+            gain = (scores - current) / np.maximum(self.costs[candidates], 1)
+            pick = int(np.argmax(gain))
+            if gain[pick] <= 0 and not required:
+                break
+
+            best = int(candidates[pick])
+            chosen.append(best)
+            available[best] = False
+            union = np.maximum(union, self.sketches[best])
+            value_sum += self.values[best]
+            audience_sum += self.audience[best]
+            spent += self.costs[best]
+            current = float(scores[pick])
+            for count, (codes, _, _) in zip(counts, self.groups):
+                count[codes[best]] += 1
+            if time.perf_counter() > self.deadline:
+                self.timed_out = True
+                break
+
+        if not self.satisfied(counts):
+            raise ValueError("Mix constraints cannot be satisfied within budget")
+        return chosen
+
+    def branch_and_bound(self, incumbent: list[int] | None, candidates: np.ndarray) -> list[int] | None:
+        """在 candidates 中深度優先列舉（依價值 / 成本排序），以分數背包上界剪枝；
+        沒有符合人數限制的組合時回傳 None
+
+        組合價值不超過各 KOL 價值總和，因此「已選價值 + 剩餘預算的分數背包解」為有效上界
+        """
+        ratio = self.values[candidates] / np.maximum(self.costs[candidates], 1)
+        order = candidates[np.argsort(-ratio, kind="stable")]
+        values, costs = self.values[order].tolist(), self.costs[order].tolist()
+        k = len(order)
+        # 每個位置之後各群組剩餘的候選數，用於判斷人數下限是否仍可能滿足
+        remaining = [
+            np.cumsum(np.eye(len(lo), dtype=np.int64)[codes[order]][::-1], axis=0)[::-1]
+            for codes, lo, _ in self.groups
+        ]
+        best_score, best = (-np.inf, None) if incumbent is None else (self.evaluate(incumbent), list(incumbent))
+
+        def bound(i: int, budget: float) -> float:
+            total = 0.0
+            for value, cost in zip(values[i:], costs[i:]):
+                if cost <= budget:
+                    total += value
+                    budget -= cost
+                elif cost > 0:
+                    total += value * budget / cost
+                    break
+            return total
+
+        def visit(i, chosen, union, value_sum, audience_sum, spent, counts, score):
+            nonlocal best_score, best
+            if time.perf_counter() > self.deadline:
+                self.timed_out = True
+                return
+            if score > best_score and self.satisfied(counts):
+                best_score, best = score, list(chosen)
+            if i == k:
+                return
+            for count, rest, (_, lo, _) in zip(counts, remaining, self.groups):
+                if (count + rest[i] < lo).any():
+                    return
+            if value_sum + bound(i, self.budget - spent) <= best_score:
+                return
+
+            item = int(order[i])
+            if spent + costs[i] <= self.budget and all(
+                count[codes[item]] < hi[codes[item]] for count, (codes, _, hi) in zip(counts, self.groups)
+            ):
+                new_union = np.maximum(union, self.sketches[item])
+                new_counts = [count.copy() for count in counts]
+                for count, (codes, _, _) in zip(new_counts, self.groups):
+                    count[codes[item]] += 1
+                new_value, new_audience = value_sum + values[i], audience_sum + self.audience[item]
+                new_score = float(self.score(new_value, new_audience, estimate(new_union)))
+                visit(i + 1, chosen + [item], new_union, new_value, new_audience,
+                      spent + costs[i], new_counts, new_score)
+            visit(i + 1, chosen, union, value_sum, audience_sum, spent, counts, -np.inf)
+
+        visit(
+            0, [], np.zeros(self.sketches.shape[1], dtype=np.uint8), 0.0, 0.0, 0.0,
+            [np.zeros(len(lo), dtype=np.int64) for _, lo, _ in self.groups], 0.0,
+        )
+        return best
+
+
+class PortfolioOptimizer:
+    """預算內的 KOL 組合最佳化；成本與預估值依 KOL 欄式資料表的版本延遲重建"""
+
+    def __init__(self, storage, sketches):
+        self.storage = storage
+        self.audience_sketches = sketches
+        self._version: tuple[int, int] | None = None
+
+    def _features(self) -> KOLColumnStore:
+        store = self.storage.column_store()
+        version = (id(store), store.version)
+        if self._version != version:
+            bounds = np.array(
+                [parse_price_range(p) for p in store.dictionaries["price_range"]], dtype=np.float64
+            ).reshape(-1, 2)
+            # 報價區間為字典編碼，先對值表算好成本再依代碼取用
+            price_codes = store.columns["price_range"]
+            self.costs = {
+                "low": bounds[price_codes, 0],
+                "mid": bounds[price_codes].mean(axis=1),
+                "high": bounds[price_codes, 1],
+            }
+            followers = store.columns["followers"].astype(np.float64)
+            self.values = {
+                "reach": followers * REACH_RATE,
+                "engagement": followers * store.columns["engagement_rate"] / 100,
+            }
+            self._version = version
+        return store
+
+    def optimize(
+        self,
+        budget: float,
+        objective: str = "reach",
+        cost_basis: str = "high",
+        overlap_penalty: float = 0.5,
+        platform_mix: dict[str, tuple[int, int]] | None = None,
+        category_mix: dict[str, tuple[int, int]] | None = None,
+        method: str = "auto",
+        time_budget_ms: int = DEFAULT_TIME_BUDGET_MS,
+    ) -> dict:
+        """回傳最佳組合；平台 / 類別不存在或人數下限無法在預算內滿足時拋出 ValueError"""
+        started = time.perf_counter()
+        store = self._features()
+        costs, values = self.costs[cost_basis], self.values[objective]
+
+        feasible = (costs <= budget) & (values > 0)
+        limits = []
+        for column, mix in (("platform", platform_mix), ("category", category_mix)):
+            if not mix:
+                continue
+            size = len(store.dictionaries[column])
+            lo, hi = np.zeros(size, dtype=np.int64), np.full(size, _UNLIMITED, dtype=np.int64)
+            for name, (low, high) in mix.items():
+                code = store.code_of(column, name)
+                if code < 0:
+                    # 不存在的平台 / 類別只有在要求入選時才無法滿足
+                    if low > 0:
+                        raise ValueError(f"Unknown {column}: {name}")
+                    continue
+                lo[code], hi[code] = low, high
+            codes = store.columns[column]
+            feasible &= hi[codes] > 0
+            limits.append((codes, lo, hi))
+
+        rows = np.flatnonzero(feasible)
+        exact = method == "exact" or (method == "auto" and len(rows) <= EXACT_MAX_CANDIDATES)
+        pool = rows[_candidates(values[rows] / np.maximum(costs[rows], 1), [codes[rows] for codes, _, _ in limits],
+                                [lo for _, lo, _ in limits], POOL_SIZE)]
+
+        kols = store.rows(pool)
+        sketches = self.audience_sketches.sketches(kols)
+        # 時間預算只計搜尋本身，不含首次建立受眾草圖
+        search = _Search(
+            values[pool], costs[pool], sketches, [(codes[pool], lo, hi) for codes, lo, hi in limits],
+            budget, overlap_penalty, time.perf_counter() + time_budget_ms / 1000,
+        )
+        try:
+            chosen = search.greedy()
+        except ValueError:
+            # 貪婪解無法滿足人數下限時，仍由分支定界完整搜尋
+            if not exact:
+                raise
+            chosen = None
+        exhaustive = False
+        if exact:
+            # 分支定界只列舉價值 / 成本最高的少數候選，並納入貪婪解確保結果不會比較差
+            subset = _candidates(search.values / np.maximum(search.costs, 1), [g[0] for g in search.groups],
+                                 [lo for _, lo, _ in limits], EXACT_MAX_CANDIDATES)
+            subset = np.union1d(subset, np.asarray(chosen or [], dtype=np.int64))
+            exhaustive = len(subset) == len(rows)
+            chosen = search.branch_and_bound(chosen, subset)
+            if chosen is None:
+                raise ValueError("Mix constraints cannot be satisfied within budget")
+
+        union = search.sketches[chosen].max(axis=0, initial=0)
+        return {
+            "method": "branch_and_bound" if exact else "greedy",
+            "optimal": exhaustive and not search.timed_out,
+            "candidates": len(pool),
+            "objective": objective,
+            "budget": budget,
+            "total_cost": round(float(search.costs[chosen].sum())),
+            "predicted_value": round(search.evaluate(chosen)),
+            "naive_value": round(float(search.values[chosen].sum())),
+            "unique_reach": round(float(estimate(union))) if chosen else 0,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+            "kols": [
+                {**kols[i], "cost": round(float(search.costs[i])), "predicted_value": round(float(search.values[i]))}
+                for i in sorted(chosen, key=lambda i: -search.values[i])
+            ],
+        }
@@ -0,0 +1,294 @@
+"""
+隨選效能剖析
+- 設定 PROFILER_TOKEN 後才啟用；未設定或沒有剖析規則時，中介層只多一次屬性檢查
+- 規則：對某個路由樣板的一定比例請求進行剖析，逾時自動失效；或請求帶 X-Profiler-Mode 與 X-Profiler-Token 標頭剖析單一請求
+- cprofile：以 cProfile 記錄函式呼叫次數與時間，可下載 pstats 檔（同一時間只剖析一個請求）
+- sampler：背景執行緒定期讀取事件迴圈執行緒的堆疊，可下載 collapsed stack 檔繪製火焰圖
+- 一般函式的端點在執行緒池中執行：剖析中的請求記在 contextvar，ORJSONRoute 執行端點前以 profile_thread()
+  讓取樣器一併讀取該工作執行緒（cProfile 以 sys.monitoring 記錄整個直譯器，本來就涵蓋工作執行緒）
+  （取樣執行緒須取得 GIL，實際間隔約為 sys.getswitchinterval()，適合數十毫秒以上的慢請求）
+- 剖析結果保存在固定容量的環狀緩衝區，下載時依路由合併
+事件迴圈在 await 之間會執行其他請求，兩種模式都可能計入同時間其他請求的工作。
+"""
+
+import cProfile
+import hmac
+import marshal
+import pstats
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from itertools import count
+from typing import Callable, Iterator
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+MODES = ("cprofile", "sampler")
+TOKEN_HEADER = b"x-profiler-token"
+MODE_HEADER = b"x-profiler-mode"
+
+# 規則預設與最長的有效秒數
+DEFAULT_DURATION = 600
+MAX_DURATION = 3600
+
+
+class ProfileRecord:
+    """單一請求的剖析結果"""
+
+    __slots__ = ("id", "method", "route", "mode", "started_at", "duration_ms", "status", "stats", "stacks", "profile")
+
+    def __init__(self, id: int, method: str, route: str, mode: str):
+        self.id = id
+        self.method = method
+        self.route = route
+        self.mode = mode
+        self.started_at = time.time()
+        self.duration_ms = 0.0
+        self.status = 500
+        # cprofile：pstats 格式的統計；sampler：collapsed stack → 取樣次數
+        self.stats: dict | None = None
+        self.stacks: Counter | None = None
+        self.profile: cProfile.Profile | None = None
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "route": self.route,
+            "mode": self.mode,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration_ms, 2),
+            "status": self.status,
+            "samples": sum(self.stacks.values()) if self.stacks is not None else None,
+        }
+
+
+class _StatsHolder:
+    """讓 pstats.Stats 直接讀取已收集的統計"""
+
+    def __init__(self, stats: dict):
+        self.stats = stats
+
+    def create_stats(self) -> None:
+        pass
+
+
+class Sampler:
+    """背景取樣執行緒；有剖析中的請求時才醒來，每 interval 秒讀取一次目標執行緒的堆疊"""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self._targets: dict[int, list[ProfileRecord]] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self, record: ProfileRecord) -> None:
+        record.stacks = Counter()
+        self.attach(record)
+
+    def stop(self, record: ProfileRecord) -> None:
+        self.detach(record)
+
+    def attach(self, record: ProfileRecord) -> None:
+        """開始讀取目前執行緒的堆疊，計入 record"""
+        with self._lock:
+            self._targets.setdefault(threading.get_ident(), []).append(record)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="profiler-sampler", daemon=True)
+                self._thread.start()
+            self._wake.set()
+
+    def detach(self, record: ProfileRecord) -> None:
+        with self._lock:
+            records = self._targets.get(threading.get_ident(), [])
+            records.remove(record)
+            if not records:
+                self._targets.pop(threading.get_ident(), None)
+            if not self._targets:
+                self._wake.clear()
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait()
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self._lock:
+                for thread_id, records in self._targets.items():
+                    frame = frames.get(thread_id)
+                    if frame is None:
+                        continue
+                    stack = collapse(frame)
+                    for record in records:
+                        record.stacks[stack] += 1
+
+
+# 目前請求的 (剖析器, 剖析結果)；由中介層設定，隨 context 傳到執行緒池
+_ACTIVE: ContextVar[tuple["Profiler", ProfileRecord] | None] = ContextVar("profiler_active", default=None)
+
+
+@contextmanager
+def profile_thread() -> Iterator[None]:
+    """剖析中的請求在執行緒池中執行端點時，取樣器一併讀取目前的工作執行緒"""
+    active = _ACTIVE.get()
+    if active is None or active[1].mode != "sampler":
+        yield
+        return
+    profiler, record = active
+    profiler.sampler.attach(record)
+    try:
+        yield
+    finally:
+        profiler.sampler.detach(record)
+
+
+def collapse(frame) -> str:
+    """由外而內以 ; 連接的堆疊（collapsed stack 格式），每層為「模組:函式」"""
+    names = []
+    while frame is not None:
+        names.append(f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_qualname}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class Profiler:
+    def __init__(self, route_template: Callable[[str], str], token: str | None = None, capacity: int = 100):
+        self.route_template = route_template
+        self.token = token
+        self.records: deque[ProfileRecord] = deque(maxlen=capacity)
+        # 路由樣板 → (模式, 比例, 到期時間)
+        self.rules: dict[str, tuple[str, float, float]] = {}
+        self.sampler = Sampler()
+        self._ids = count(1)
+        self._cprofile_busy = False
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.token)
+
+    def authorized(self, token: str | None) -> bool:
+        return bool(self.token) and token is not None and hmac.compare_digest(token, self.token)
+
+    def set_rule(self, route: str, mode: str, rate: float, duration: float) -> None:
+        self.rules[route] = (mode, rate, time.monotonic() + duration)
+
+    def clear_rules(self, route: str | None = None) -> None:
+        if route is None:
+            self.rules.clear()
+        else:
+            self.rules.pop(route, None)
+
+    def active_rules(self) -> list[dict]:
+        now = time.monotonic()
+        return [
+            {"route": route, "mode": mode, "rate": rate, "expires_in_s": round(expires - now, 1)}
+            for route, (mode, rate, expires) in sorted(self.rules.items())
+            if expires > now
+        ]
+
+    def select(self, scope: Scope) -> tuple[str, str] | None:
+        """決定是否剖析此請求，回傳 (路由樣板, 模式)"""
+        # 直接掃描原始標頭（ASGI 標頭名稱為小寫），不建立 Headers 物件
+        mode = token = None
+        for key, value in scope["headers"]:
+            if key == MODE_HEADER:
+                mode = value.decode("latin-1")
+            elif key == TOKEN_HEADER:
+                token = value.decode("latin-1")
+        if mode in MODES and self.authorized(token):
+            return self.route_template(scope["path"]), mode
+        if not self.rules:
+            return None
+        route = self.route_template(scope["path"])
+        rule = self.rules.get(route)
+        if rule is None:
+            return None
+        mode, rate, expires = rule
+        if time.monotonic() >= expires:
+            del self.rules[route]
+            return None
+        return (route, mode) if random.random() < rate else None
+
+    def start(self, method: str, route: str, mode: str) -> ProfileRecord | None:
+        """開始剖析；cProfile 同一執行緒只能有一個啟用中的剖析器，忙碌時略過"""
+        if mode == "cprofile":
+            if self._cprofile_busy:
+                return None
+            self._cprofile_busy = True
+        record = ProfileRecord(next(self._ids), method, route, mode)
+        if mode == "cprofile":
+            record.profile = cProfile.Profile()
+            record.profile.enable()
+        else:
+            self.sampler.start(record)
+        return record
+
+    def finish(self, record: ProfileRecord, duration_ms: float) -> None:
+        if record.profile is not None:
+            record.profile.disable()
+            self._cprofile_busy = False
+            record.profile.create_stats()
+            record.stats, record.profile = record.profile.stats, None
+        else:
+            self.sampler.stop(record)
+        record.duration_ms = duration_ms
+        self.records.append(record)
+
+    def matching(self, route: str | None, mode: str) -> list[ProfileRecord]:
+        return [r for r in self.records if r.mode == mode and (route is None or r.route == route)]
+
+    def pstats_bytes(self, records: list[ProfileRecord]) -> bytes:
+        """合併為 pstats 檔（與 pstats.Stats.dump_stats 相同格式）"""
+        merged = pstats.Stats(_StatsHolder(records[0].stats))
+        for record in records[1:]:
+            merged.add(_StatsHolder(record.stats))
+        return marshal.dumps(merged.stats)
+
+    @staticmethod
+    def collapsed_text(records: list[ProfileRecord]) -> str:
+        """合併為 collapsed stack 檔，每行為「堆疊 取樣次數」"""
+        total: Counter = Counter()
+        for record in records:
+            total.update(record.stacks)
+        return "".join(f"{stack} {n}\n" for stack, n in total.most_common())
+
+
+class ProfilerMiddleware:
+    """ASGI 中介層；剖析中的請求在 scope 標記 profiling，回應快取會略過查詢"""
+
+    def __init__(self, app: ASGIApp, profiler: Profiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        profiler = self.profiler
+        if not profiler.enabled or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        selected = profiler.select(scope)
+        if selected is None:
+            await self.app(scope, receive, send)
+            return
+
+        record = profiler.start(scope["method"], *selected)
+        if record is None:
+            await self.app(scope, receive, send)
+            return
+        scope["profiling"] = True
+
+        async def capture(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                record.status = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        active = _ACTIVE.set((profiler, record))
+        try:
+            await self.app(scope, receive, capture)
+        finally:
+            _ACTIVE.reset(active)
+            profiler.finish(record, (time.perf_counter() - started) * 1000)
@@ -0,0 +1,322 @@
+"""
+KOL 推薦引擎
+對所有 KOL 一次向量化計算加權媒合分數（類別、互動率、情緒、真實性、報價與預算、
+受眾輪廓相似度），再以 argpartition 取前 k 名，不需排序整份名單
+"""
+
+import re
+import threading
+
+import numpy as np
+
+from .mock_data import AGE_GROUPS, INTEREST_POOL, LOCATIONS
+from .store import REBUILD_MIN_DIRTY, KOLColumnStore
+
+# 各項分數的預設權重；未提供對應條件的項目（類別、預算、受眾）權重為 0
+DEFAULT_WEIGHTS = {
+    "category": 0.25,
+    "engagement": 0.2,
+    "sentiment": 0.1,
+    "authenticity": 0.1,
+    "price": 0.15,
+    "audience": 0.2,
+    "reach": 0.0,
+}
+
+# 行銷目標 → 權重調整
+OBJECTIVE_WEIGHTS = {
+    "品牌曝光": {"reach": 0.25},
+    "產品推廣": {"engagement": 0.1, "reach": 0.05},
+    "導購轉換": {"engagement": 0.15, "authenticity": 0.05},
+    "品牌形象": {"sentiment": 0.15, "authenticity": 0.1},
+    "新品上市": {"reach": 0.1, "engagement": 0.1},
+    "節慶活動": {"reach": 0.1, "engagement": 0.05},
+    "會員招募": {"engagement": 0.1, "audience": 0.1},
+    "App下載": {"engagement": 0.1, "audience": 0.1},
+}
+
+# 受眾描述關鍵字 → 相關興趣
+AUDIENCE_INTEREST_HINTS = {
+    "科技": ["遊戲", "攝影", "投資理財"],
+    "家庭": ["烹飪", "寵物", "購物"],
+    "年輕": ["音樂", "電影", "遊戲"],
+    "都會": ["購物", "美食"],
+}
+
+URBAN_LOCATIONS = ("台北市", "新北市", "台中市", "高雄市", "桃園市")
+
+# 超出預算者的扣分（避免大量同分的 -inf 拖慢 argpartition）
+_EXCLUDED = -1000.0
+
+# 取前 k 名時估計門檻的抽樣間隔
+_SAMPLE_STRIDE = 256
+
+# 受眾向量區段數（年齡、性別、地區、興趣）
+_SEGMENTS = 4
+
+
+def _unit_rows(block: np.ndarray) -> np.ndarray:
+    """每列正規化為單位長度，全為 0 的列維持 0"""
+    norm = np.linalg.norm(block, axis=1, keepdims=True)
+    return np.divide(block, norm, out=np.zeros_like(block, dtype=np.float64), where=norm > 0)
+
+
+def audience_vectors(columns: dict[str, np.ndarray]) -> np.ndarray:
+    """欄式受眾資料 → float32 矩陣；年齡、性別、地區、興趣各段為單位向量，整列長度為 1"""
+    n = len(columns["female"])
+    has_data = columns["age_groups"].sum(axis=1) > 0
+    gender = np.column_stack([columns["female"], 100 - columns["female"]])
+    gender[~has_data] = 0
+
+    interests = np.zeros((n, len(INTEREST_POOL)))
+    valid = columns["interests"] >= 0
+    interests[np.nonzero(valid)[0], columns["interests"][valid]] = columns["interest_pct"][valid]
+
+    segments = (columns["age_groups"], gender, columns["locations"], interests)
+    return (np.hstack([_unit_rows(s) for s in segments]) / np.sqrt(_SEGMENTS)).astype(np.float32)
+
+
+def _age_bounds(group: str) -> tuple[int, int]:
+    if group.endswith("+"):
+        return int(group[:-1]), 120
+    lo, hi = group.split("-")
+    return int(lo), int(hi)
+
+
+def audience_profile(text: str) -> np.ndarray | None:
+    """將受眾描述（如「18-35歲都會女性」）轉為查詢向量；無法辨識任何條件時回傳 None
+
+    與 audience_vectors 內積即為「有指定的區段」餘弦相似度的平均，範圍 0 ~ 1
+    """
+    age = np.zeros(len(AGE_GROUPS))
+    match = re.search(r"(\d+)\s*[-~]\s*(\d+)\s*歲", text)
+    if match:
+        lo, hi = int(match.group(1)), int(match.group(2))
+        for i, group in enumerate(AGE_GROUPS):
+            g_lo, g_hi = _age_bounds(group)
+            age[i] = max(0, min(hi, g_hi) - max(lo, g_lo) + 1)
+    elif "全年齡" in text:
+        age[:] = 1
+
+    gender = np.zeros(2)
+    if ("女" in text) != ("男" in text):
+        gender[0 if "女" in text else 1] = 1
+
+    location = np.array([1.0 if loc in text else 0.0 for loc in LOCATIONS])
+    if "都會" in text and not location.any():
+        location = np.array([1.0 if loc in URBAN_LOCATIONS else 0.0 for loc in LOCATIONS])
+
+    wanted = {name for name in INTEREST_POOL if name in text}
+    for hint, names in AUDIENCE_INTEREST_HINTS.items():
+        if hint in text:
+            wanted.update(names)
+    interest = np.array([1.0 if name in wanted else 0.0 for name in INTEREST_POOL])
+
+    segments = [age, gender, location, interest]
+    specified = sum(1 for s in segments if s.any())
+    if not specified:
+        return None
+    vec = np.hstack([_unit_rows(s[None])[0] for s in segments])
+    return (vec * np.sqrt(_SEGMENTS) / specified).astype(np.float32)
+
+
+def parse_price_range(price_range: str) -> tuple[int, int]:
+    """「NT$ 30,000 - 80,000」→ (30000, 80000)"""
+    numbers = [int(x.replace(",", "")) for x in re.findall(r"[\d,]+\d", price_range)]
+    return (numbers[0], numbers[-1]) if numbers else (0, 0)
+
+
+def _scaled(values: np.ndarray) -> np.ndarray:
+    """以第 99 百分位數縮放到 0 ~ 1，避免極端值壓縮其他 KOL 的分數"""
+    top = np.percentile(values, 99) if len(values) else 0
+    return np.clip(values / top, 0, 1).astype(np.float32) if top > 0 else np.zeros(len(values), np.float32)
+
+
+def top_k(score: np.ndarray, k: int) -> np.ndarray:
+    """分數最高的 k 個列號（由高到低，同分依列號）
+
+    名單很大時先取等距抽樣中第 k 高的分數為門檻：抽樣是全體的子集，
+    全體至少有 k 筆不低於門檻，前 k 名必在其中，只需對門檻以上的少數列做 argpartition
+    """
+    n = len(score)
+    k = min(k, n)
+    if k <= 0:
+        return np.arange(0)
+    rows = None
+    sample = score[::_SAMPLE_STRIDE]
+    if n >= _SAMPLE_STRIDE * 16 and k <= len(sample):
+        threshold = np.partition(sample, len(sample) - k)[len(sample) - k]
+        rows = np.flatnonzero(score >= threshold)
+        score = score[rows]
+        n = len(score)
+    top = np.argpartition(score, n - k)[n - k:]
+    # 第 k 名同分者不只一筆時，argpartition 任取其一；改取列號較小者
+    kth = score[top].min()
+    above = top[score[top] > kth]
+    top = np.concatenate([above, np.flatnonzero(score == kth)[:k - len(above)]])
+    top = top[np.lexsort((top, -score[top]))]
+    return rows[top] if rows is not None else top
+
+
+class Recommender:
+    """推薦引擎；特徵依 KOL 欄式資料表的版本延遲重建
+
+    - 連續型特徵（互動率、情緒、真實性、觸及）的加權和依權重組合快取
+    - 類別與報價都是字典編碼欄位，先對值表計算分數再依代碼取用
+    - 受眾矩陣以「維度 × KOL」存放，查詢只讀取受眾描述有指定的維度；
+      KOL 異動後依欄式資料表的異動紀錄只重算異動的列
+
+    可在執行緒池中呼叫：查詢時持有鎖
+    """
+
+    _BASE_FEATURES = ("engagement", "sentiment", "authenticity", "reach")
+
+    def __init__(self, storage):
+        self.storage = storage
+        self._version: tuple[int, int] | None = None
+        self._audience_store: int | None = None
+        self._audience_version = 0
+        self._base: dict[tuple, np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    def _features(self) -> KOLColumnStore:
+        store = self.storage.column_store()
+        version = (id(store), store.version)
+        if self._version != version:
+            cols = store.columns
+            self.features = {
+                "engagement": _scaled(cols["engagement_rate"]),
+                "sentiment": np.clip(cols["sentiment_score"], 0, 1).astype(np.float32),
+                "authenticity": np.clip(cols["authenticity_score"] / 100, 0, 1).astype(np.float32),
+                "reach": _scaled(np.log1p(cols["followers"])),
+            }
+            bounds = np.array([parse_price_range(p) for p in store.dictionaries["price_range"]], dtype=np.float64)
+            self.price_bounds = bounds.reshape(-1, 2)
+            self._base.clear()
+            self._version = version
+        return store
+
+    def _base_score(self, weights: dict[str, float], size: int) -> np.ndarray:
+        """連續型特徵的加權和（回傳副本，可直接累加）"""
+        key = tuple(weights[name] for name in self._BASE_FEATURES)
+        base = self._base.get(key)
+        if base is None:
+            base = np.zeros(size, dtype=np.float32)
+            for name, weight in zip(self._BASE_FEATURES, key):
+                if weight:
+                    base += np.float32(weight) * self.features[name]
+            if len(self._base) >= 32:
+                self._base.clear()
+            self._base[key] = base
+        return base.copy()
+
+    def _audience(self, store: KOLColumnStore) -> np.ndarray:
+        if self._audience_store != id(store):
+            self._build_audience(store)
+        elif self._audience_version != store.version:
+            changed = store.changed_since(self._audience_version)
+            rows = sorted(set(changed)) if changed is not None else []
+            if changed is None or len(rows) > max(REBUILD_MIN_DIRTY, store.size // 100):
+                self._build_audience(store)
+            else:
+                self._update_audience(store, rows)
+        return self.audience
+
+    def _build_audience(self, store: KOLColumnStore) -> None:
+        columns = self.storage.audience_columns(store.columns["id"].tolist())
+        self.audience = np.ascontiguousarray(audience_vectors(columns).T)
+        self._audience_store = id(store)
+        self._audience_version = store.version
+
+    def _update_audience(self, store: KOLColumnStore, rows: list[int]) -> None:
+        """只重算異動的列；新增的列接在最後"""
+        if store.size > self.audience.shape[1]:
+            grown = np.zeros((len(self.audience), store.size), dtype=np.float32)
+            grown[:, :self.audience.shape[1]] = self.audience
+            self.audience = grown
+        if rows:
+            columns = self.storage.audience_columns(store.columns["id"][rows].tolist())
+            self.audience[:, rows] = audience_vectors(columns).T
+        self._audience_version = store.version
+
+    def _similarity(self, store: KOLColumnStore, query: np.ndarray) -> np.ndarray:
+        """受眾餘弦相似度；只讀取查詢向量第一個到最後一個非 0 維度之間的列，一次矩陣乘法"""
+        audience = self._audience(store)
+        nonzero = np.flatnonzero(query)
+        start, stop = nonzero[0], nonzero[-1] + 1
+        return query[start:stop] @ audience[start:stop]
+
+    def recommend(
+        self,
+        category: str | None = None,
+        budget: int | None = None,
+        target_audience: str | None = None,
+        objective: str | None = None,
+        limit: int = 5,
+    ) -> list[dict]:
+        """計算所有 KOL 的媒合分數（0 ~ 100）並回傳前 limit 名"""
+        with self._lock:
+            return self._recommend(category, budget, target_audience, objective, limit)
+
+    def _recommend(self, category, budget, target_audience, objective, limit) -> list[dict]:
+        store = self._features()
+        if limit <= 0 or store.size == 0:
+            return []
+
+        weights = dict(DEFAULT_WEIGHTS)
+        for key, delta in OBJECTIVE_WEIGHTS.get(objective or "", {}).items():
+            weights[key] += delta
+        query = audience_profile(target_audience) if target_audience else None
+        if not category:
+            weights["category"] = 0
+        if not budget:
+            weights["price"] = 0
+        if query is None:
+            weights["audience"] = 0
+        # 各項權重先乘上縮放係數，總分落在 0 ~ 100
+        scale = 100 / sum(weights.values())
+        weights = {key: weight * scale for key, weight in weights.items()}
+
+        score = self._base_score(weights, store.size)
+        if weights["category"]:
+            score += np.float32(weights["category"]) * (store.columns["category"] == store.code_of("category", category))
+        if budget:
+            # 報價下限在預算內才列入，預算越接近報價上限越合適；超出預算者扣分後於取前 k 名時排除
+            lo, hi = self.price_bounds[:, 0], self.price_bounds[:, 1]
+            fit = 0.5 + 0.5 * np.clip((budget - lo) / np.maximum(hi - lo, 1), 0, 1)
+            bonus = np.where(lo <= budget, weights["price"] * fit, _EXCLUDED).astype(np.float32)
+            score += np.take(bonus, store.columns["price_range"])
+        similarity = None
+        if query is not None:
+            similarity = self._similarity(store, query)
+            score += np.float32(weights["audience"]) * similarity
+
+        top = top_k(score, limit)
+        top = top[score[top] > _EXCLUDED / 2]
+        return self._results(store, top, score, similarity, category, budget)
+
+    def _results(self, store, top, score, similarity, category, budget) -> list[dict]:
+        kols = store.rows(top)
+        flags = {
+            "高互動率": store.columns["engagement_rate"][top] > 5,
+            "正面形象": store.columns["sentiment_score"][top] > 0.7,
+            "高真實性": store.columns["authenticity_score"][top] > 80,
+        }
+        if similarity is not None:
+            flags["受眾輪廓吻合"] = similarity[top] >= 0.8
+        if budget:
+            flags["報價在預算內"] = self.price_bounds[store.columns["price_range"][top], 1] <= budget
+
+        recommendations = []
+        for i, kol in enumerate(kols):
+            match_reasons = [f"類別匹配：{category}"] if category and kol["category"] == category else []
+            match_reasons += [reason for reason, hit in flags.items() if hit[i]]
+            recommendations.append({
+                **kol,
+                "match_score": round(float(score[top[i]]), 1),
+                "match_reasons": match_reasons,
+                "audience_match": round(float(similarity[top[i]]) * 100, 1) if similarity is not None else None,
+                "predicted_reach": int(kol["followers"] * 0.6),
+                "predicted_engagement": int(kol["followers"] * kol["engagement_rate"] / 100)
+            })
+        return recommendations
@@ -0,0 +1,92 @@
+"""
+JSON 回應編碼
+- ORJSONResponse：以 orjson 編碼，numpy 數值與陣列直接輸出
+- ORJSONRoute：端點回傳的 dict / list 不經 FastAPI 的 jsonable_encoder 逐欄轉換，直接交給 orjson；
+  回傳 {"error": ...} 時加上 Cache-Control: no-store，不進回應快取
+- EncodedCache：只隨資料異動的回應（總覽、洞察等）編碼一次後快取位元組，資料版本改變時清空
+"""
+
+import functools
+import inspect
+from typing import Any, Callable
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+from fastapi.routing import APIRoute
+
+from .profiler import profile_thread
+
+_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+_NO_STORE = {"Cache-Control": "no-store"}
+
+
+def dumps(content: Any) -> bytes:
+    """編碼為 JSON 位元組；orjson 不支援的型別（如 Pydantic 模型）退回 jsonable_encoder"""
+    return orjson.dumps(content, default=jsonable_encoder, option=_OPTIONS)
+
+
+class ORJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class ORJSONRoute(APIRoute):
+    """未宣告 response_model 的端點，回傳值直接包成 ORJSONResponse"""
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        if (
+            not kwargs.get("response_model")
+            and inspect.signature(endpoint).return_annotation is inspect.Signature.empty
+        ):
+            endpoint = _wrap(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+
+def _wrap(endpoint: Callable) -> Callable:
+    # functools.wraps 保留原函式簽章，FastAPI 仍依原參數解析查詢字串；
+    # 一般函式的端點包成一般函式，FastAPI 照常在執行緒池中執行；剖析中的請求一併剖析該工作執行緒
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            return _response(await endpoint(*args, **kwargs))
+    else:
+        @functools.wraps(endpoint)
+        def wrapper(*args, **kwargs):
+            with profile_thread():
+                return _response(endpoint(*args, **kwargs))
+
+    return wrapper
+
+
+def _response(content: Any) -> Response:
+    if isinstance(content, Response):
+        return content
+    # 錯誤以 200 回傳，不應被快取
+    if isinstance(content, dict) and "error" in content:
+        return ORJSONResponse(content, headers=_NO_STORE)
+    return ORJSONResponse(content)
+
+
+class EncodedCache:
+    """依 storage.version 快取編碼後的回應本文"""
+
+    def __init__(self, storage):
+        self.storage = storage
+        self._bodies: dict[str, bytes] = {}
+        self._version: int | None = None
+
+    def response(self, key: str, build: Callable[[], Any]) -> Response:
+        """回傳 key 對應的快取回應；沒有快取或資料已異動時呼叫 build() 重新編碼"""
+        version = self.storage.version
+        if self._version != version:
+            self._bodies.clear()
+            self._version = version
+        body = self._bodies.get(key)
+        if body is None:
+            body = dumps(build())
+            # 端點在執行緒池中執行，編碼期間資料可能已異動，此時不保留
+            if self._version == version == self.storage.version:
+                self._bodies[key] = body
+        return Response(body, media_type="application/json")
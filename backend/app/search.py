@@ -0,0 +1,708 @@
+"""
+KOL 全文搜尋（名稱、標籤、品牌適配標籤）
+- 斷詞：中日韓文字取單字與相鄰兩字（bigram），拉丁字母取整個單字並轉小寫，數字另建精確比對的索引
+- 以「欄位內容」為單位建立倒排索引：標籤與品牌適配標籤沿用欄式資料表的組合代碼，名稱依去除數字後的內容分組，
+  百萬筆 KOL 只需為數千個不同的內容計算詞頻，每列只存一個組別代碼
+- 排序：各欄位分別計算 BM25 後依權重加總；同分時影響力高者在前
+- 前 k 名以 Threshold Algorithm 求得：各欄位依分數由高到低、同分依影響力逐批取出候選，
+  候選的完整分數以組別代碼直接查表，前 k 名的分數不低於尚未取出者的上限即停止，不需為所有命中的列計分
+- 最後一個拉丁單字視為前綴（即打即搜）；詞彙表中找不到的單字以編輯距離 1 的近似詞代替
+- KOL 異動時只重新斷詞異動的列：新的內容加入索引，異動的列改為每次查詢直接計分；累積過多時才整份重建
+"""
+
+import bisect
+import re
+import threading
+import unicodedata
+from collections import Counter
+from typing import Iterator
+
+import numpy as np
+
+from .store import REBUILD_MIN_DIRTY, KOLColumnStore
+
+# 欄位權重
+FIELD_BOOSTS = {"name": 2.0, "tags": 1.0, "brand_fit_tags": 1.0}
+
+# BM25 參數
+K1 = 1.2
+B = 0.75
+
+# 前綴與近似詞展開的詞數上限，以及相對於完整比對的權重
+MAX_EXPANSIONS = 16
+PREFIX_WEIGHT = 0.8
+FUZZY_WEIGHT = 0.5
+
+# 候選每批取出的列數（逐批加倍，超過 _LAST_BATCH 後改用 MaxScore），
+# 以及分數層級的列數超過此值時改沿全域影響力排序掃描
+_FIRST_BATCH = 32
+_LAST_BATCH = 256
+_CHUNK = 4096
+# 組別數不超過此值的欄位，查詢時建立 組別 → 分數 的查詢表
+_DENSE_GROUPS = 1 << 16
+# 浮點加總順序不同造成的誤差
+_EPSILON = 1e-9
+
+# 平假名、片假名、CJK 統一漢字（含擴充 A）、韓文音節、相容漢字
+_CJK = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff"
+_TOKEN = re.compile(rf"([{_CJK}]+)|([0-9]+)|([a-z\u00c0-\u024f]+)")
+# 名稱中的數字（半形與全形）；超過 18 位數的數字不建索引
+_DIGIT = re.compile(r"[0-9\uff10-\uff19]")
+_NUMBER = re.compile(r"[0-9\uff10-\uff19]+")
+_MAX_DIGITS = 18
+
+# 斷開名稱中數字時每次處理的列數
+_SPLIT_ROWS = 65536
+
+
+def normalize(text: str) -> str:
+    """全形轉半形、大寫轉小寫"""
+    return unicodedata.normalize("NFKC", text).lower()
+
+
+def tokenize(text: str) -> list[str]:
+    """索引用的詞：中日韓文字的單字與 bigram、拉丁單字、數字"""
+    terms = []
+    for cjk, number, word in _TOKEN.findall(normalize(text)):
+        if cjk:
+            terms.extend(cjk)
+            terms.extend(cjk[i:i + 2] for i in range(len(cjk) - 1))
+        else:
+            terms.append(number or word)
+    return terms
+
+
+def query_tokens(text: str) -> tuple[list[str], list[str], list[str]]:
+    """查詢字串 → (中日韓詞, 拉丁單字, 數字)；兩字以上的中日韓文字只取 bigram"""
+    cjk_terms, words, numbers = [], [], []
+    for cjk, number, word in _TOKEN.findall(normalize(text)):
+        if cjk:
+            cjk_terms.extend([cjk] if len(cjk) == 1 else [cjk[i:i + 2] for i in range(len(cjk) - 1)])
+        elif number:
+            numbers.append(number)
+        else:
+            words.append(word)
+    return cjk_terms, words, numbers
+
+
+def _is_word(term: str) -> bool:
+    """拉丁單字（前綴與近似詞只適用於拉丁單字）"""
+    return term[0].isalpha() and term[0] <= "\u024f"
+
+
+def split_numbers(names: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """名稱 → (數字換成空白後的名稱, 數字所在列號, 數字值)
+
+    名稱轉為固定寬度字串後視為 UCS-4 字元碼矩陣，逐欄累加數字，不需逐筆以正規表示式處理。
+    """
+    names = np.asarray(names, dtype=str)
+    n = len(names)
+    width = max(names.dtype.itemsize // 4, 1)
+    names = names.astype(f"U{width}")
+    stripped = np.empty(n, dtype=names.dtype)
+    rows: list[np.ndarray] = []
+    values: list[np.ndarray] = []
+    for start in range(0, n, _SPLIT_ROWS):
+        codes = names[start:start + _SPLIT_ROWS].view(np.uint32).reshape(-1, width)
+        digits = np.full(codes.shape, -1, dtype=np.int8)
+        ascii_digit = (codes >= 0x30) & (codes <= 0x39)
+        wide_digit = (codes >= 0xFF10) & (codes <= 0xFF19)
+        digits[ascii_digit] = codes[ascii_digit] - 0x30
+        digits[wide_digit] = codes[wide_digit] - 0xFF10
+        stripped[start:start + len(codes)] = np.where(digits >= 0, 0x20, codes).astype(np.uint32).view(names.dtype).ravel()
+
+        value = np.zeros(len(codes), dtype=np.int64)
+        length = np.zeros(len(codes), dtype=np.int64)
+        for j in range(width + 1):
+            digit = digits[:, j] if j < width else np.full(len(codes), -1, dtype=np.int8)
+            ended = (length > 0) & (digit < 0)
+            if ended.any():
+                ok = ended & (length <= _MAX_DIGITS)
+                rows.append(np.flatnonzero(ok) + start)
+                values.append(value[ok])
+            inside = digit >= 0
+            value = np.where(inside, value * 10 + digit, 0)
+            length = np.where(inside, length + 1, 0)
+    if not rows:
+        return stripped, np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    return stripped, np.concatenate(rows), np.concatenate(values)
+
+
+def _split_name(name: str) -> tuple[str, list[int]]:
+    """單一名稱的 split_numbers"""
+    numbers = [int(m) for m in _NUMBER.findall(name) if len(m) <= _MAX_DIGITS]
+    return _DIGIT.sub(" ", name), numbers
+
+
+def _content(text: str) -> str:
+    """分組用的欄位內容：正規化並合併連續空白"""
+    return " ".join(normalize(text).split())
+
+
+def _deletions(word: str) -> set[str]:
+    return {word[:i] + word[i + 1:] for i in range(len(word))}
+
+
+class _Field:
+    """單一欄位的倒排索引；文件單位為組別（內容相同的列共用一個組別）"""
+
+    def __init__(self, name: str, groups: np.ndarray, bags: list[Counter], by_prior: np.ndarray):
+        self.name = name
+        self.boost = FIELD_BOOSTS[name]
+        # 列號 → 組別；異動的列直接改寫
+        self.groups = groups
+        self.bags = bags
+        self.lengths = np.array([sum(bag.values()) for bag in bags], dtype=np.float64)
+        self.sizes = np.bincount(groups, minlength=len(bags))
+        total = int(self.sizes.sum())
+        # 平均長度只在建立時計算，增量更新不改變已算好的詞頻權重
+        self.avg_length = float(self.lengths @ self.sizes) / total if total else 1.0
+        self.avg_length = self.avg_length or 1.0
+
+        postings: dict[str, tuple[list[int], list[int]]] = {}
+        for group, bag in enumerate(bags):
+            for term, tf in bag.items():
+                entry = postings.setdefault(term, ([], []))
+                entry[0].append(group)
+                entry[1].append(tf)
+        # 詞 → (組別, BM25 詞頻部分)
+        self.postings: dict[str, tuple[np.ndarray, np.ndarray]] = {
+            term: (np.asarray(g, dtype=np.int32), self._weights(np.asarray(tf, dtype=np.float64), np.asarray(g)))
+            for term, (g, tf) in postings.items()
+        }
+
+        # 各組別的列依影響力排列（CSR）；取自全域排序，組內維持影響力降冪、同分列號遞增
+        order = by_prior[np.argsort(groups[by_prior], kind="stable")]
+        self.members = order
+        self.offsets = np.r_[0, np.cumsum(self.sizes)]
+
+    def _weights(self, tf: np.ndarray, groups: np.ndarray) -> np.ndarray:
+        norm = K1 * (1 - B + B * self.lengths[groups] / self.avg_length)
+        return tf * (K1 + 1) / (tf + norm)
+
+    def add_group(self, bag: Counter) -> int:
+        """新的欄位內容：加入組別與倒排索引，回傳組別代碼"""
+        group = len(self.bags)
+        self.bags.append(bag)
+        self.lengths = np.append(self.lengths, sum(bag.values()))
+        self.sizes = np.append(self.sizes, 0)
+        for term, tf in bag.items():
+            weight = self._weights(np.array([tf], dtype=np.float64), np.array([group]))
+            groups, weights = self.postings.get(term, (np.zeros(0, dtype=np.int32), np.zeros(0)))
+            self.postings[term] = (np.append(groups, np.int32(group)), np.append(weights, weight))
+        return group
+
+    def move(self, row: int, group: int) -> None:
+        """列改屬另一個組別；新增的列原本的組別為 -1"""
+        old = self.groups[row]
+        if old >= 0:
+            self.sizes[old] -= 1
+        self.groups[row] = group
+        self.sizes[group] += 1
+
+    def score_groups(self, terms: dict[str, float], n: int) -> tuple[np.ndarray, np.ndarray]:
+        """查詢詞在此欄位命中的組別與分數（組別遞增）"""
+        groups, scores = [], []
+        for term, weight in terms.items():
+            entry = self.postings.get(term)
+            if entry is None:
+                continue
+            df = int(self.sizes[entry[0]].sum())
+            if df == 0:
+                continue
+            idf = np.log(1 + (n - df + 0.5) / (df + 0.5))
+            groups.append(entry[0])
+            scores.append(entry[1] * (self.boost * weight * idf))
+        if not groups:
+            return np.zeros(0, dtype=np.int32), np.zeros(0)
+        matched, inverse = np.unique(np.concatenate(groups), return_inverse=True)
+        return matched, np.bincount(inverse, weights=np.concatenate(scores))
+
+
+class _Cursor:
+    """依影響力由高到低逐批取出列號；略過已異動的列"""
+
+    def __init__(self, chunks: Iterator[np.ndarray], dirty: np.ndarray | None):
+        self._chunks = chunks
+        self._dirty = dirty
+        self._buffer = np.zeros(0, dtype=np.int64)
+        self._pos = 0
+
+    def _fill(self, n: int) -> None:
+        while len(self._buffer) - self._pos < n:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return
+            if self._dirty is not None:
+                chunk = chunk[~self._dirty[chunk]]
+            self._buffer = np.concatenate([self._buffer[self._pos:], chunk])
+            self._pos = 0
+
+    def take(self, n: int) -> np.ndarray:
+        self._fill(n)
+        rows = self._buffer[self._pos:self._pos + n]
+        self._pos += len(rows)
+        return rows
+
+    def head(self) -> int | None:
+        self._fill(1)
+        return int(self._buffer[self._pos]) if self._pos < len(self._buffer) else None
+
+
+def _slices(rows: np.ndarray) -> Iterator[np.ndarray]:
+    for start in range(0, len(rows), _CHUNK):
+        yield rows[start:start + _CHUNK]
+
+
+class _FieldList:
+    """單一欄位的排序存取（分數由高到低，同分依影響力）與隨機存取（列號 → 分數）"""
+
+    def __init__(self, index: "SearchIndex", field: _Field, groups: np.ndarray, scores: np.ndarray):
+        self.index = index
+        self.field = field
+        self.name = field.name
+        self.matched = groups
+        self.scores = scores
+        self._levels = iter(np.unique(scores)[::-1].tolist())
+        self._score = 0.0
+        self._cursor: _Cursor | None = None
+        # 組別不多時以查表取代二分搜尋
+        self._table: np.ndarray | None = None
+
+    def score(self, rows: np.ndarray) -> np.ndarray:
+        groups = self.field.groups[rows]
+        if self._table is None:
+            if len(self.field.bags) <= _DENSE_GROUPS:
+                self._table = np.zeros(len(self.field.bags))
+                self._table[self.matched] = self.scores
+            else:
+                pos = np.minimum(np.searchsorted(self.matched, groups), len(self.matched) - 1)
+                return np.where(self.matched[pos] == groups, self.scores[pos], 0.0)
+        return self._table[groups]
+
+    @property
+    def max_score(self) -> float:
+        return float(self.scores.max())
+
+    def _groups_at_least(self, score: float) -> np.ndarray:
+        return self.matched[(self.scores >= score) & (self.matched < len(self.field.offsets) - 1)]
+
+    def count_at_least(self, score: float) -> int:
+        return int(self.field.sizes[self._groups_at_least(score)].sum())
+
+    def scan_factor(self, score: float) -> float:
+        """依序取出分數不低於 score 的列時，每取出一列約需檢查的列數"""
+        field = self.field
+        groups = self._groups_at_least(score)
+        sizes = field.sizes[groups]
+        levels = self.scores[(self.scores >= score) & (self.matched < len(field.offsets) - 1)]
+        # 分數層級有多個組別且列數多時，沿全域影響力排序掃描
+        for level in np.unique(levels).tolist():
+            in_level = levels == level
+            if in_level.sum() > 1 and sizes[in_level].sum() > _CHUNK:
+                return self.index.size / max(int(sizes.sum()), 1)
+        return 1.0
+
+    def rows_at_least(self, score: float) -> np.ndarray:
+        """分數不低於 score 的組別中所有未異動的列"""
+        field, mask = self.field, self.index.dirty_mask
+        groups = self._groups_at_least(score)
+        rows = np.concatenate([field.members[field.offsets[g]:field.offsets[g + 1]] for g in groups.tolist()] or [[]])
+        rows = rows.astype(np.int64)
+        return rows if mask is None else rows[~mask[rows]]
+
+    def _level(self, score: float) -> _Cursor:
+        """同一分數的所有組別，依影響力合併取出"""
+        field, index = self.field, self.index
+        groups = self.matched[self.scores == score]
+        groups = groups[groups < len(field.offsets) - 1]
+        sizes = field.offsets[groups + 1] - field.offsets[groups]
+        if len(groups) == 1:
+            start = field.offsets[groups[0]]
+            rows = field.members[start:start + sizes[0]]
+            return _Cursor(_slices(rows), index.dirty_mask)
+        if sizes.sum() <= _CHUNK:
+            rows = np.concatenate([field.members[field.offsets[g]:field.offsets[g + 1]] for g in groups] or [[]])
+            rows = rows.astype(np.int64)
+            rows = rows[np.lexsort((rows, -index.prior[rows]))]
+            return _Cursor(_slices(rows), index.dirty_mask)
+        # 涵蓋建立後新增的組別：異動的列可能已改屬新組別（取出時會略過）
+        in_level = np.zeros(len(field.bags), dtype=bool)
+        in_level[groups] = True
+        return _Cursor(self._scan(in_level), index.dirty_mask)
+
+    def _scan(self, in_level: np.ndarray) -> Iterator[np.ndarray]:
+        by_prior, groups = self.index.by_prior, self.field.groups
+        for start in range(0, len(by_prior), _CHUNK):
+            block = by_prior[start:start + _CHUNK]
+            yield block[in_level[groups[block]]]
+
+    def frontier(self) -> tuple[float, int] | None:
+        """下一個尚未取出的 (分數, 列號)；全部取完時回傳 None"""
+        while True:
+            if self._cursor is not None:
+                row = self._cursor.head()
+                if row is not None:
+                    return self._score, row
+            score = next(self._levels, None)
+            if score is None or score <= 0:
+                self._cursor = None
+                return None
+            self._score, self._cursor = score, self._level(score)
+
+    def take(self, n: int) -> np.ndarray:
+        taken = []
+        while n > 0 and self.frontier() is not None:
+            rows = self._cursor.take(n)
+            taken.append(rows)
+            n -= len(rows)
+        return np.concatenate(taken) if taken else np.zeros(0, dtype=np.int64)
+
+
+class _NumberList:
+    """名稱中的數字（精確比對）；只有一個分數層級"""
+
+    name = "name"
+
+    def __init__(self, index: "SearchIndex", rows: np.ndarray, dirty_rows: np.ndarray, weight: float):
+        self.index = index
+        mask = index.dirty_mask
+        main = rows if mask is None else rows[~mask[rows]]
+        self.rows = np.sort(np.concatenate([main, dirty_rows]))
+        n = index.size
+        df = len(self.rows)
+        # 數字視為名稱欄位中詞頻 1、長度等於平均長度的詞
+        self.value = FIELD_BOOSTS["name"] * weight * float(np.log(1 + (n - df + 0.5) / (df + 0.5))) if df else 0.0
+        self._main = main
+        self._cursor = _Cursor(_slices(main), None)
+
+    def score(self, rows: np.ndarray) -> np.ndarray:
+        return np.where(np.isin(rows, self.rows), self.value, 0.0)
+
+    @property
+    def max_score(self) -> float:
+        return self.value
+
+    def scan_factor(self, score: float) -> float:
+        return 1.0
+
+    def count_at_least(self, score: float) -> int:
+        return len(self._main) if self.value >= score else 0
+
+    def rows_at_least(self, score: float) -> np.ndarray:
+        return self._main if self.value >= score else np.zeros(0, dtype=np.int64)
+
+    def frontier(self) -> tuple[float, int] | None:
+        row = self._cursor.head()
+        return None if row is None or self.value <= 0 else (self.value, row)
+
+    def take(self, n: int) -> np.ndarray:
+        return self._cursor.take(n)
+
+
+class SearchIndex:
+    """KOL 搜尋索引；首次查詢時建立，依欄式資料表的異動紀錄增量更新
+
+    可在執行緒池中呼叫：查詢時持有鎖（增量更新會就地修改倒排列表）
+    """
+
+    def __init__(self, storage):
+        self.storage = storage
+        self._store_id: int | None = None
+        self._version = 0
+        self._lock = threading.Lock()
+
+    def _sync(self) -> KOLColumnStore:
+        store = self.storage.column_store()
+        if self._store_id != id(store):
+            self._build(store)
+            return store
+        if self._version != store.version:
+            changed = store.changed_since(self._version)
+            rows = set(changed) if changed is not None else ()
+            if changed is None or len(self._dirty) + len(rows) > max(REBUILD_MIN_DIRTY, store.size // 100):
+                self._build(store)
+                return store
+            for row in sorted(rows):
+                self._update(store, row)
+            self._dirty_rows = None
+            self._version = store.version
+        return store
+
+    # ==================== 建立 ====================
+
+    def _build(self, store: KOLColumnStore) -> None:
+        n = store.size
+        self.size = n
+        self.prior = store.columns["influence_score"].astype(np.float64)
+        # 全域影響力排序（同分列號遞增）
+        self.by_prior = np.lexsort((np.arange(n), -self.prior))
+
+        # 名稱：數字換成空白後相同者為同一組；數字另存 (值, 列號)
+        sigs, rows, values = split_numbers(store.columns["name"])
+        raw: dict[str, int] = {}
+        raw_groups = np.fromiter((raw.setdefault(sig, len(raw)) for sig in sigs.tolist()), dtype=np.int32, count=n)
+        # 數字長度不同、大小寫不同的名稱內容相同，合併為一組（同一分數層級只有一組時可直接依影響力取出）
+        self._content_of: dict[str, int] = {}
+        canonical = np.array([self._content_of.setdefault(_content(sig), len(self._content_of)) for sig in raw],
+                             dtype=np.int32)
+        name_groups = canonical[raw_groups] if n else raw_groups
+        name_bags = [Counter(tokenize(content)) for content in self._content_of]
+
+        rank = np.empty(n, dtype=np.int64)
+        rank[self.by_prior] = np.arange(n)
+        order = np.lexsort((rank[rows], values))
+        self.number_values, self.number_rows = values[order], rows[order]
+
+        self.fields = {"name": _Field("name", name_groups, name_bags, self.by_prior)}
+        for column in ("tags", "brand_fit_tags"):
+            bags = [self._tag_bag(tags) for tags in store.dictionaries[column]]
+            self.fields[column] = _Field(column, store.columns[column].astype(np.int32), bags, self.by_prior)
+
+        self._words = sorted({t for f in self.fields.values() for t in f.postings if _is_word(t)})
+        self._deletes: dict[str, list[str]] | None = None
+        self.dirty_mask: np.ndarray | None = None
+        self._dirty: dict[int, list[int]] = {}
+        self._dirty_rows: np.ndarray | None = None
+        self._store_id = id(store)
+        self._version = store.version
+
+    @staticmethod
+    def _tag_bag(tags) -> Counter:
+        bag = Counter()
+        for tag in tags:
+            bag.update(tokenize(tag))
+        return bag
+
+    # ==================== 增量更新 ====================
+
+    def _update(self, store: KOLColumnStore, row: int) -> None:
+        """重新斷詞單一列；之後此列不再由排序存取取得，而是每次查詢直接計分"""
+        if row >= self.size:
+            grow = store.size - self.size
+            self.size = store.size
+            self.prior = np.concatenate([self.prior, np.zeros(grow)])
+            for field in self.fields.values():
+                field.groups = np.concatenate([field.groups, np.full(grow, -1, dtype=np.int32)])
+            if self.dirty_mask is not None:
+                self.dirty_mask = np.concatenate([self.dirty_mask, np.zeros(grow, dtype=bool)])
+        if self.dirty_mask is None:
+            self.dirty_mask = np.zeros(self.size, dtype=bool)
+        self.dirty_mask[row] = True
+        self.prior[row] = store.columns["influence_score"][row]
+
+        sig, numbers = _split_name(str(store.columns["name"][row]))
+        content = _content(sig)
+        group = self._content_of.get(content)
+        if group is None:
+            group = self._content_of[content] = self._add_group(self.fields["name"], Counter(tokenize(content)))
+        self.fields["name"].move(row, group)
+        self._dirty[row] = numbers
+
+        for column in ("tags", "brand_fit_tags"):
+            field = self.fields[column]
+            code = int(store.columns[column][row])
+            while code >= len(field.bags):
+                self._add_group(field, self._tag_bag(store.dictionaries[column][len(field.bags)]))
+            field.move(row, code)
+
+    def _add_group(self, field: _Field, bag: Counter) -> int:
+        """新的欄位內容；其中的新單字加入前綴與近似詞的詞彙表"""
+        for word in filter(_is_word, bag):
+            pos = bisect.bisect_left(self._words, word)
+            if pos == len(self._words) or self._words[pos] != word:
+                self._words.insert(pos, word)
+                if self._deletes is not None:
+                    for key in _deletions(word) | {word}:
+                        self._deletes.setdefault(key, []).append(word)
+        return field.add_group(bag)
+
+    def dirty_rows(self) -> np.ndarray:
+        if self._dirty_rows is None:
+            self._dirty_rows = np.fromiter(sorted(self._dirty), dtype=np.int64, count=len(self._dirty))
+        return self._dirty_rows
+
+    # ==================== 查詢 ====================
+
+    def _expand(self, word: str, prefix: bool, fuzzy: bool) -> dict[str, float]:
+        """拉丁單字 → {詞: 權重}：完整比對、前綴展開、近似詞"""
+        terms = {}
+        words = self._words
+        pos = bisect.bisect_left(words, word)
+        if pos < len(words) and words[pos] == word:
+            terms[word] = 1.0
+        if prefix:
+            end = bisect.bisect_left(words, word + "\uffff", pos)
+            for w in words[pos:end]:
+                if w != word and len(terms) < MAX_EXPANSIONS:
+                    terms[w] = PREFIX_WEIGHT
+        if not terms and fuzzy and len(word) >= 3:
+            if self._deletes is None:
+                self._deletes = {}
+                for w in words:
+                    for key in _deletions(w) | {w}:
+                        self._deletes.setdefault(key, []).append(w)
+            for key in _deletions(word) | {word}:
+                matches = self._deletes.get(key, [])
+                if prefix:
+                    # 前綴多打或打錯一個字母
+                    start = bisect.bisect_left(words, key)
+                    matches = matches + words[start:bisect.bisect_left(words, key + "\uffff", start)]
+                for w in matches:
+                    if len(terms) < MAX_EXPANSIONS:
+                        terms[w] = FUZZY_WEIGHT
+        return terms
+
+    def parse(self, q: str, prefix: bool = True, fuzzy: bool = True) -> tuple[dict[str, float], list[int]]:
+        """查詢字串 → ({詞: 權重}, 數字)；最後一個拉丁單字視為前綴"""
+        cjk_terms, words, numbers = query_tokens(q)
+        terms: dict[str, float] = {}
+        for term in cjk_terms:
+            terms[term] = terms.get(term, 0.0) + 1.0
+        for i, word in enumerate(words):
+            for term, weight in self._expand(word, prefix and i == len(words) - 1, fuzzy).items():
+                terms[term] = terms.get(term, 0.0) + weight
+        # 數字在標籤欄位中是一般的詞
+        for number in numbers:
+            terms[number] = terms.get(number, 0.0) + 1.0
+        return terms, [int(number) for number in numbers]
+
+    def _number_list(self, value: int) -> _NumberList:
+        lo = np.searchsorted(self.number_values, value, side="left")
+        hi = np.searchsorted(self.number_values, value, side="right")
+        dirty = [row for row, numbers in self._dirty.items() if value in numbers]
+        return _NumberList(self, self.number_rows[lo:hi], np.asarray(dirty, dtype=np.int64), 1.0)
+
+    def search(self, q: str, limit: int = 20, fields: list[str] | None = None,
+               prefix: bool = True, fuzzy: bool = True) -> dict:
+        with self._lock:
+            return self._search(q, limit, fields, prefix, fuzzy)
+
+    def _search(self, q: str, limit: int, fields: list[str] | None, prefix: bool, fuzzy: bool) -> dict:
+        store = self._sync()
+        terms, numbers = self.parse(q, prefix, fuzzy)
+        fields = [f for f in (fields or FIELD_BOOSTS) if f in self.fields]
+
+        lists = []
+        for name in fields:
+            groups, scores = self.fields[name].score_groups(terms, self.size)
+            if len(groups):
+                lists.append(_FieldList(self, self.fields[name], groups, scores))
+        if "name" in fields:
+            lists.extend(self._number_list(value) for value in dict.fromkeys(numbers))
+
+        rows, scores = self._top(lists, limit) if lists and limit > 0 else (np.zeros(0, dtype=np.int64), np.zeros(0))
+        hits = [(l.name, l.score(rows) > 0) for l in lists]
+        results = [
+            {**kol, "score": round(float(score), 4), "matched_fields": sorted({name for name, hit in hits if hit[i]})}
+            for i, (kol, score) in enumerate(zip(store.rows(rows), scores))
+        ]
+        return {
+            "query": q,
+            "terms": sorted(terms),
+            "results": results,
+        }
+
+    def _total(self, lists: list, rows: np.ndarray) -> np.ndarray:
+        total = np.zeros(len(rows))
+        for l in lists:
+            total += l.score(rows)
+        return total
+
+    def _top(self, lists: list, k: int) -> tuple[np.ndarray, np.ndarray]:
+        """排名依 (分數降冪, 影響力降冪, 列號遞增) 的前 k 名
+
+        先以 Threshold Algorithm 從各欄位逐批取出候選。高分的列若集中在多個欄位的交集，排序存取遲遲無法收斂；
+        此時以目前的第 k 名為門檻（MaxScore）：其他欄位最高分合計仍不足門檻的欄位為必要欄位，
+        門檻以上的列必定出現在其中，只需沿一個必要欄位依序取出，其餘欄位隨機存取。
+        """
+        prior = self.prior
+        maxima = [l.max_score for l in lists]
+        total = sum(maxima)
+        by_max = np.argsort(maxima, kind="stable")[::-1].tolist()
+        # 異動過的列不在排序存取中，先全部計分
+        rows = self.dirty_rows() if self._dirty else np.zeros(0, dtype=np.int64)
+        best_rows, best_scores = self._best(rows, self._total(lists, rows), k)
+        batch = max(k, _FIRST_BATCH)
+        while True:
+            rows = np.unique(np.concatenate([l.take(batch) for l in lists]))
+            best_rows, best_scores = self._merge(lists, maxima, best_rows, best_scores, rows, k, by_max)
+            frontiers = [f for f in (l.frontier() for l in lists) if f is not None]
+            if not frontiers:
+                return best_rows, best_scores
+            if len(best_rows) == k:
+                threshold = sum(score for score, _ in frontiers)
+                kth_score, kth_row = best_scores[-1], best_rows[-1]
+                if kth_score > threshold:
+                    return best_rows, best_scores
+                # 與門檻同分的未取出列在每個欄位都位於前緣之後，排名不會高於各前緣列
+                if kth_score == threshold and (-prior[kth_row], kth_row) < max((-prior[r], r) for _, r in frontiers):
+                    return best_rows, best_scores
+                if batch >= _LAST_BATCH:
+                    bounds = [kth_score - (total - m) - _EPSILON for m in maxima]
+                    required = [i for i, bound in enumerate(bounds) if bound > 0]
+                    if required:
+                        break
+            batch = min(batch * 2, 1 << 16)
+
+        chunk, d = _CHUNK, None
+        while True:
+            if d is None:
+                # 選預估掃描列數最少的必要欄位依序取出；第 k 名提高後重新選擇（先前取出的列皆已計分，換欄位不影響結果）
+                counts = [max(l.count_at_least(bound), 1) for l, bound in zip(lists, bounds)]
+
+                def cost(i: int) -> float:
+                    passing = np.prod([counts[j] / self.size for j in required if j != i])
+                    return min(counts[i], k / passing) * lists[i].scan_factor(bounds[i])
+
+                d = min(required, key=cost)
+                driver = lists[d]
+                # 其他欄位依命中列數由少到多篩選；主欄位的分數在最後計算總分時才需要
+                order = sorted((i for i in range(len(lists)) if i != d), key=counts.__getitem__)
+            previous = best_scores[-1]
+            best_rows, best_scores = self._merge(lists, maxima, best_rows, best_scores, driver.take(chunk), k, order)
+            frontier = driver.frontier()
+            if frontier is None:
+                break
+            # 未取出的列分數上限：主欄位的前緣分數加上其他欄位的最高分（與 _total 相同的加總順序）
+            bound = 0.0
+            for i, m in enumerate(maxima):
+                bound += frontier[0] if i == d else m
+            kth_score, kth_row, row = best_scores[-1], best_rows[-1], frontier[1]
+            if kth_score > bound or (kth_score == bound and (-prior[kth_row], kth_row) < (-prior[row], row)):
+                break
+            if kth_score != previous:
+                bounds = [kth_score - (total - m) - _EPSILON for m in maxima]
+                required = [i for i, bound in enumerate(bounds) if bound > 0]
+                d = None
+            chunk = min(chunk * 2, 1 << 16)
+        return best_rows, best_scores
+
+    def _merge(self, lists: list, maxima: list[float], best_rows: np.ndarray, best_scores: np.ndarray,
+               rows: np.ndarray, k: int, order: list[int]) -> tuple[np.ndarray, np.ndarray]:
+        """新的候選併入前 k 名
+
+        依 order 逐欄位累加分數，剩餘欄位的最高分也補不到第 k 名的列提早排除；不在 order 中的欄位以最高分估計。
+        """
+        if len(best_rows) == k and len(rows):
+            threshold = best_scores[-1] - _EPSILON
+            partial = np.zeros(len(rows))
+            remaining = sum(maxima)
+            for i in order:
+                partial += lists[i].score(rows)
+                remaining -= maxima[i]
+                keep = partial + remaining >= threshold
+                rows, partial = rows[keep], partial[keep]
+        rows = rows[~np.isin(rows, best_rows)]
+        # 留下的列依固定順序計算總分，同分判斷才會一致
+        return self._best(np.concatenate([best_rows, rows]), np.concatenate([best_scores, self._total(lists, rows)]), k)
+
+    def _best(self, rows: np.ndarray, scores: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+        keep = scores > 0
+        if len(rows) > 4 * k and k > 0:
+            # 先以第 k 高的分數篩選（保留同分者），再完整排序
+            kth = np.partition(scores, len(scores) - k)[len(scores) - k]
+            keep &= scores >= kth
+        rows, scores = rows[keep], scores[keep]
+        order = np.lexsort((rows, -self.prior[rows], -scores))[:k]
+        return rows[order], scores[order]
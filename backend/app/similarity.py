@@ -0,0 +1,223 @@
+"""
+相似 KOL 搜尋
+以受眾結構（年齡、性別、地區、興趣）加上標準化後的表現指標組成 float32 向量，
+列向量正規化後內積即為餘弦相似度：
+- 精確搜尋：分區塊計算內積並保留前 k 名，記憶體用量與名單大小無關
+- 近似搜尋（IVF）：以球面 k-means 將 KOL 分群，查詢只掃描最接近的 nprobe 個群
+- KOL 異動後依欄式資料表的異動紀錄只重算異動的列並重新指派所屬群，
+  標準化參數與群中心沿用建立時的值；異動過多時整份重建
+"""
+
+import threading
+
+import numpy as np
+
+from .recommend import audience_vectors, top_k
+from .store import REBUILD_MIN_DIRTY, KOLColumnStore
+
+# 表現指標（followers 取對數後標準化）
+METRICS = ("followers", "engagement_rate", "sentiment_score", "authenticity_score", "audience_quality_score")
+
+# 表現指標區段相對於受眾區段（長度 1）的權重
+METRIC_WEIGHT = 0.5
+
+# 精確搜尋每次計算的列數
+BLOCK_ROWS = 65536
+
+# 名單達此規模時預設使用近似搜尋
+APPROXIMATE_MIN_ROWS = 100_000
+
+
+def _metrics(store: KOLColumnStore, rows: np.ndarray | slice = slice(None)) -> np.ndarray:
+    """表現指標矩陣（followers 取對數），尚未標準化"""
+    return np.column_stack([
+        np.log1p(store.columns[name][rows]) if name == "followers" else store.columns[name][rows]
+        for name in METRICS
+    ]).astype(np.float64)
+
+
+def metric_scale(store: KOLColumnStore) -> tuple[np.ndarray, np.ndarray]:
+    """表現指標的標準化參數 (平均, 標準差)"""
+    metrics = _metrics(store)
+    std = metrics.std(axis=0)
+    return metrics.mean(axis=0), np.where(std > 0, std, 1)
+
+
+def embed(
+    store: KOLColumnStore,
+    audience: dict[str, np.ndarray],
+    rows: np.ndarray | slice = slice(None),
+    scale: tuple[np.ndarray, np.ndarray] | None = None,
+) -> np.ndarray:
+    """KOL 欄式資料 + 受眾欄式資料 → 列正規化的 float32 矩陣
+
+    rows 為只計算部分列時的列號（audience 須依相同順序）；scale 未指定時以全部 KOL 計算
+    """
+    mean, std = scale or metric_scale(store)
+    metrics = (_metrics(store, rows) - mean) / std
+    metrics *= METRIC_WEIGHT / np.sqrt(len(METRICS))
+
+    vectors = np.hstack([audience_vectors(audience), metrics.astype(np.float32)])
+    norm = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return np.divide(vectors, norm, out=np.zeros_like(vectors), where=norm > 0)
+
+
+def exact_search(vectors: np.ndarray, query: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+    """分區塊精確搜尋，回傳 (列號, 相似度)，由高到低"""
+    rows: list[np.ndarray] = []
+    scores: list[np.ndarray] = []
+    for start in range(0, len(vectors), BLOCK_ROWS):
+        sims = vectors[start:start + BLOCK_ROWS] @ query
+        best = top_k(sims, k)
+        rows.append(best + start)
+        scores.append(sims[best])
+    if not rows:
+        return np.arange(0), np.zeros(0, dtype=np.float32)
+    rows_all, scores_all = np.concatenate(rows), np.concatenate(scores)
+    best = top_k(scores_all, k)
+    # 各區塊依列號遞增排列，合併後同分仍依列號
+    return rows_all[best], scores_all[best]
+
+
+class IVFIndex:
+    """倒排檔索引：群中心 + 依群排列的列號（CSR 形式）"""
+
+    def __init__(self, vectors: np.ndarray, nlist: int | None = None, iterations: int = 8, seed: int = 0):
+        n = len(vectors)
+        rng = np.random.default_rng(seed)
+        nlist = nlist or max(1, int(np.sqrt(n) / 4))
+        nlist = min(nlist, n)
+
+        # 以抽樣訓練群中心（球面 k-means：內積最大者為所屬群）
+        train = vectors[rng.choice(n, size=min(n, nlist * 64), replace=False)]
+        centroids = train[rng.choice(len(train), size=nlist, replace=False)].copy()
+        for _ in range(iterations):
+            labels = np.argmax(train @ centroids.T, axis=1)
+            order = np.argsort(labels, kind="stable")
+            counts = np.bincount(labels, minlength=nlist)
+            present = counts > 0
+            starts = np.r_[0, np.cumsum(counts)[:-1]][present]
+            sums = np.add.reduceat(train[order], starts, axis=0)
+            norm = np.linalg.norm(sums, axis=1, keepdims=True)
+            centroids[present] = np.divide(sums, norm, out=np.zeros_like(sums), where=norm > 0)
+
+        self.centroids = centroids
+        self.labels = self._assign(vectors)
+        self._lists()
+        self.vectors = vectors
+
+    def _assign(self, vectors: np.ndarray) -> np.ndarray:
+        """每列內積最大的群中心"""
+        return np.concatenate([
+            np.argmax(vectors[start:start + BLOCK_ROWS] @ self.centroids.T, axis=1)
+            for start in range(0, len(vectors), BLOCK_ROWS)
+        ])
+
+    def _lists(self) -> None:
+        self.order = np.argsort(self.labels, kind="stable")
+        self.offsets = np.r_[0, np.cumsum(np.bincount(self.labels, minlength=self.nlist))]
+
+    def update(self, vectors: np.ndarray, rows: list[int]) -> None:
+        """列向量異動後重新指派這些列的所屬群（群中心不變）；新增的列接在最後"""
+        labels = np.resize(self.labels, len(vectors))
+        labels[rows] = self._assign(vectors[rows])
+        self.labels = labels
+        self._lists()
+        self.vectors = vectors
+
+    @property
+    def nlist(self) -> int:
+        return len(self.centroids)
+
+    def search(self, query: np.ndarray, k: int, nprobe: int = 16) -> tuple[np.ndarray, np.ndarray]:
+        """只掃描與查詢最接近的 nprobe 個群，回傳 (列號, 相似度)，由高到低"""
+        probe = top_k(self.centroids @ query, min(max(1, nprobe), self.nlist))
+        candidates = np.sort(np.concatenate([self.order[self.offsets[c]:self.offsets[c + 1]] for c in probe]))
+        sims = self.vectors[candidates] @ query
+        best = top_k(sims, k)
+        return candidates[best], sims[best]
+
+
+class SimilarityIndex:
+    """相似 KOL 搜尋；向量與 IVF 索引首次查詢時建立，依 KOL 欄式資料表的異動紀錄增量更新
+
+    可在執行緒池中呼叫：同步向量與索引時持有鎖
+    """
+
+    def __init__(self, storage):
+        self.storage = storage
+        self._store_id: int | None = None
+        self._version = 0
+        self.ivf: IVFIndex | None = None
+        self._lock = threading.Lock()
+
+    def _sync(self, approximate: bool | None) -> tuple[KOLColumnStore, np.ndarray, IVFIndex | None]:
+        """回傳 (欄式資料表, 向量, IVF 索引)；approximate 為 None 時依名單規模決定是否需要 IVF 索引"""
+        with self._lock:
+            store = self.storage.column_store()
+            if self._store_id != id(store):
+                self._build(store)
+            elif self._version != store.version:
+                changed = store.changed_since(self._version)
+                rows = sorted(set(changed)) if changed is not None else []
+                if changed is None or len(rows) > max(REBUILD_MIN_DIRTY, store.size // 100):
+                    self._build(store)
+                else:
+                    self._update(store, rows)
+            if approximate is None:
+                approximate = store.size >= APPROXIMATE_MIN_ROWS
+            if approximate and self.ivf is None:
+                self.ivf = IVFIndex(self.vectors)
+            return store, self.vectors, self.ivf if approximate else None
+
+    def _build(self, store: KOLColumnStore) -> None:
+        self.scale = metric_scale(store)
+        audience = self.storage.audience_columns(store.columns["id"].tolist())
+        self.vectors = embed(store, audience, scale=self.scale)
+        self.ivf = None
+        self._store_id = id(store)
+        self._version = store.version
+
+    def _update(self, store: KOLColumnStore, rows: list[int]) -> None:
+        """只重算異動的列；新增的列接在最後"""
+        vectors = self.vectors
+        if store.size > len(vectors):
+            vectors = np.zeros((store.size, vectors.shape[1]), dtype=np.float32)
+            vectors[:len(self.vectors)] = self.vectors
+        if rows:
+            audience = self.storage.audience_columns(store.columns["id"][rows].tolist())
+            vectors[rows] = embed(store, audience, rows, self.scale)
+        self.vectors = vectors
+        if self.ivf is not None:
+            self.ivf.update(vectors, rows)
+        self._version = store.version
+
+    def similar(
+        self,
+        kol_id: str,
+        limit: int = 10,
+        approximate: bool | None = None,
+        nprobe: int = 16,
+    ) -> tuple[str, list[dict]] | None:
+        """回傳 (搜尋方式, 相似 KOL 列表)；KOL 不存在時回傳 None"""
+        store, vectors, ivf = self._sync(approximate)
+        row = store.row_of(kol_id)
+        if row is None:
+            return None
+        if limit <= 0:
+            return "exact", []
+
+        # 多取一筆以排除自己
+        if ivf is not None:
+            method = "ivf"
+            rows, sims = ivf.search(vectors[row], limit + 1, nprobe)
+        else:
+            method = "exact"
+            rows, sims = exact_search(vectors, vectors[row], limit + 1)
+        keep = rows != row
+        rows, sims = rows[keep][:limit], sims[keep][:limit]
+
+        return method, [
+            {**kol, "similarity": round(float(s), 4)}
+            for kol, s in zip(store.rows(rows), sims)
+        ]
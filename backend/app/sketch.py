@@ -0,0 +1,209 @@
+"""
+受眾 HyperLogLog 草圖
+每個 KOL 的粉絲集合壓成 2^PRECISION 個 uint8 暫存器（預設 4 KB）：
+- 合併草圖為逐元素取最大值，估計值即為聯集（不重複）人數
+- 交集由排容原理推得：|A ∩ B| = |A| + |B| - |A ∪ B|
+- 模擬粉絲以區塊為單位，KOL 草圖為所屬區塊草圖的最大值；區塊草圖只在有 KOL 用到時建立並保留
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from . import mock_data
+
+PRECISION = 12
+REGISTERS = 1 << PRECISION
+
+# 標準誤差
+RELATIVE_ERROR = 1.04 / np.sqrt(REGISTERS)
+
+# 快取的 KOL 草圖數量上限（每個 4 KB）
+CACHE_SIZE = 16384
+
+# 單次估算最多的 KOL 數
+MAX_KOLS = 100
+
+# 建立區塊草圖時每次展開的區塊數（每塊 FOLLOWER_BLOCK 個使用者編號），限制暫存記憶體
+BUILD_CHUNK_BLOCKS = 256
+
+_ALPHA = 0.7213 / (1 + 1.079 / REGISTERS)
+# 2^-r 查表，估算時以查表取代次方運算
+_INVERSE_POWERS = np.ldexp(1.0, -np.arange(65))
+
+
+def hash64(values: np.ndarray) -> np.ndarray:
+    """splitmix64：將整數 ID 打散為均勻的 64 位元雜湊"""
+    z = values.astype(np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def register_updates(hashes: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """雜湊 → (暫存器位置, 值)；值為剩餘位元第一個 1 的位置"""
+    index = (hashes >> np.uint64(64 - PRECISION)).astype(np.int64)
+    rest = hashes & np.uint64((1 << (64 - PRECISION)) - 1)
+    # 將最高位的 1 往右填滿後計算位元數，即為有效位元長度
+    for shift in (1, 2, 4, 8, 16, 32):
+        rest |= rest >> np.uint64(shift)
+    rank = (64 - PRECISION + 1 - np.bitwise_count(rest)).astype(np.uint8)
+    return index, rank
+
+
+def sketch_of(ids: np.ndarray) -> np.ndarray:
+    """由 ID 陣列建立草圖"""
+    registers = np.zeros(REGISTERS, dtype=np.uint8)
+    index, rank = register_updates(hash64(ids))
+    np.maximum.at(registers, index, rank)
+    return registers
+
+
+def _histogram(registers: np.ndarray) -> np.ndarray:
+    """各草圖暫存器值的次數分佈，形狀 (..., 65)"""
+    if registers.ndim == 1:
+        return np.bincount(registers, minlength=len(_INVERSE_POWERS))
+    flat = registers.reshape(-1, REGISTERS)
+    bins = len(_INVERSE_POWERS)
+    offsets = (np.arange(len(flat)) * bins)[:, None]
+    hist = np.bincount((flat + offsets).ravel(), minlength=len(flat) * bins)
+    return hist.reshape(*registers.shape[:-1], bins)
+
+
+def estimate(registers: np.ndarray) -> np.ndarray:
+    """估計不重複數量；registers 的最後一軸為暫存器，可一次估算多個草圖"""
+    # 暫存器值只有 65 種，先計次再加權，比逐一查表快
+    hist = _histogram(registers)
+    harmonic = hist @ _INVERSE_POWERS
+    raw = _ALPHA * REGISTERS * REGISTERS / harmonic
+    zeros = hist[..., 0]
+    # 小範圍改用線性計數（64 位元雜湊不需大範圍修正）
+    linear = REGISTERS * np.log(REGISTERS / np.maximum(zeros, 1))
+    return np.where((raw <= 2.5 * REGISTERS) & (zeros > 0), linear, raw)
+
+
+def block_sketches(blocks: np.ndarray, block_size: int) -> np.ndarray:
+    """指定粉絲區塊（第 b 塊為使用者編號 b * block_size 起的 block_size 個）的草圖，形狀 (len(blocks), REGISTERS)
+
+    每次只展開 BUILD_CHUNK_BLOCKS 個區塊的使用者編號
+    """
+    blocks = np.asarray(blocks, dtype=np.uint64)
+    registers = np.zeros((len(blocks), REGISTERS), dtype=np.uint8)
+    for start in range(0, len(blocks), BUILD_CHUNK_BLOCKS):
+        chunk = blocks[start:start + BUILD_CHUNK_BLOCKS]
+        ids = (chunk[:, None] * np.uint64(block_size) + np.arange(block_size, dtype=np.uint64)).ravel()
+        index, rank = register_updates(hash64(ids))
+        flat = np.zeros(len(chunk) * REGISTERS, dtype=np.uint8)
+        np.maximum.at(flat, np.repeat(np.arange(len(chunk)) * REGISTERS, block_size) + index, rank)
+        registers[start:start + len(chunk)] = flat.reshape(len(chunk), REGISTERS)
+    return registers
+
+
+class AudienceSketches:
+    """KOL 受眾草圖與觸及 / 重疊估算；KOL 草圖依需要建立並以 LRU 快取
+
+    可在執行緒池中呼叫：建立與快取草圖時持有鎖
+    """
+
+    def __init__(self, storage):
+        self.storage = storage
+        blocks = mock_data.FOLLOWER_UNIVERSE // mock_data.FOLLOWER_BLOCK
+        # 區塊草圖依需要填入；未用到的區塊不佔實體記憶體
+        self._blocks = np.zeros((blocks, REGISTERS), dtype=np.uint8)
+        self._built = np.zeros(blocks, dtype=bool)
+        self._cache: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._version: tuple[int, int] | None = None
+        self._lock = threading.Lock()
+
+    def _build_blocks(self, blocks: np.ndarray) -> None:
+        """建立尚未建立的區塊草圖"""
+        missing = np.unique(blocks[~self._built[blocks]])
+        if len(missing):
+            self._blocks[missing] = block_sketches(missing, mock_data.FOLLOWER_BLOCK)
+            self._built[missing] = True
+
+    def sketches(self, kols: list[dict]) -> np.ndarray:
+        """KOL 列表 → 草圖矩陣 (len(kols), REGISTERS)"""
+        with self._lock:
+            store = self.storage.column_store()
+            version = (id(store), store.version)
+            if self._version != version:
+                self._cache.clear()
+                self._version = version
+
+            members = {
+                kol["id"]: mock_data.follower_blocks(kol["id"], kol["followers"], kol["category"])
+                for kol in kols if kol["id"] not in self._cache
+            }
+            if members:
+                self._build_blocks(np.concatenate(list(members.values())))
+
+            result = np.empty((len(kols), REGISTERS), dtype=np.uint8)
+            for i, kol in enumerate(kols):
+                registers = self._cache.get(kol["id"])
+                if registers is None:
+                    registers = self._blocks[members[kol["id"]]].max(axis=0)
+                    self._cache[kol["id"]] = registers
+                    if len(self._cache) > CACHE_SIZE:
+                        self._cache.popitem(last=False)
+                else:
+                    self._cache.move_to_end(kol["id"])
+                result[i] = registers
+            return result
+
+    def estimate(self, kols: list[dict], base: list[dict] | None = None) -> dict:
+        """不重複觸及、重複觸及、各 KOL 的邊際觸及與兩兩重疊
+
+        base 為既有名單（例如 Campaign 目前的 KOL），另回傳加入 kols 後的增量觸及
+        """
+        sketches = self.sketches(kols)
+        audience = estimate(sketches)
+        union = sketches.max(axis=0, initial=0)
+        reach = float(estimate(union))
+
+        # 邊際觸及：少了該 KOL 時聯集減少的人數（前綴 / 後綴最大值，一次算出所有「除自己以外」的聯集）
+        prefix = np.maximum.accumulate(np.vstack([np.zeros(REGISTERS, dtype=np.uint8), sketches]), axis=0)
+        suffix = np.maximum.accumulate(np.vstack([np.zeros(REGISTERS, dtype=np.uint8), sketches[::-1]]), axis=0)[::-1]
+        without = estimate(np.maximum(prefix[:-1], suffix[1:]))
+
+        pairs = np.triu_indices(len(kols), k=1)
+        pair_union = estimate(np.maximum(sketches[pairs[0]], sketches[pairs[1]]))
+        pair_overlap = np.maximum(audience[pairs[0]] + audience[pairs[1]] - pair_union, 0)
+
+        result = {
+            "unique_reach": round(reach),
+            "naive_reach": sum(k["followers"] for k in kols),
+            "duplicate_reach": max(round(float(audience.sum()) - reach), 0),
+            "overlap_rate": round(1 - reach / float(audience.sum()), 4) if len(kols) else 0.0,
+            "relative_error": round(float(RELATIVE_ERROR), 4),
+            "kols": [
+                {
+                    "kol_id": kol["id"],
+                    "name": kol["name"],
+                    "followers": kol["followers"],
+                    "estimated_audience": round(float(a)),
+                    "marginal_reach": max(round(reach - float(w)), 0),
+                }
+                for kol, a, w in zip(kols, audience, without)
+            ],
+            "pairwise_overlap": [
+                {
+                    "kol_ids": [kols[a]["id"], kols[b]["id"]],
+                    "overlap": round(float(o)),
+                    "jaccard": round(float(o / u), 4) if u else 0.0,
+                }
+                for a, b, o, u in zip(pairs[0].tolist(), pairs[1].tolist(), pair_overlap, pair_union)
+            ],
+        }
+
+        if base is not None:
+            base_union = self.sketches(base).max(axis=0, initial=0)
+            base_reach = float(estimate(base_union))
+            combined = float(estimate(np.maximum(base_union, union)))
+            result.update(
+                base_reach=round(base_reach),
+                combined_reach=round(combined),
+                incremental_reach=max(round(combined - base_reach), 0),
+            )
+        return result
@@ -0,0 +1,135 @@
+"""
+資料快照
+將合成數據集寫成單一檔案，多個 uvicorn worker 以 mmap 唯讀共用同一份實體記憶體：
+- 檔頭：MAGIC + 檔頭長度 + JSON（meta、字典表、Campaign、成效，以及每個陣列的 dtype / shape / 位移）
+- 之後為各陣列的原始位元組，以 64 bytes 對齊；KOL 排序索引一併保存，載入時不需重新排序
+- 以 copy-on-write 映射：讀取共用 page cache，寫入（KOL 更新）只複製被修改的頁面
+- 第一個 worker 持檔案鎖產生快照，其餘 worker 等待後直接映射，所有 worker 看到相同資料
+- 既有快照的 meta（KOL 數、種子）與目前設定不符時重新產生
+"""
+
+import fcntl
+import json
+import mmap
+import os
+import struct
+from typing import Callable
+
+import numpy as np
+
+from .store import KOLColumnStore
+
+MAGIC = b"KOLSNAP1"
+ALIGNMENT = 64
+
+# 以陣列保存的資料表；其餘欄位存於 JSON 檔頭
+TABLES = ("kols", "audience", "buzz", "indexes")
+HEADER_KEYS = ("meta", "dictionaries", "campaigns", "performances")
+
+_LENGTH = struct.Struct("<Q")
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def write_snapshot(dataset: dict, path: str) -> None:
+    """寫出快照；先寫暫存檔再改名，讀取端不會看到寫到一半的檔案"""
+    if "indexes" not in dataset:
+        store = KOLColumnStore(dataset["kols"], dataset["dictionaries"])
+        dataset = {**dataset, "indexes": store.index_arrays()}
+
+    arrays = {
+        f"{table}/{name}": np.ascontiguousarray(array)
+        for table in TABLES
+        for name, array in dataset[table].items()
+    }
+    layout, offset = {}, 0
+    for key, array in arrays.items():
+        if array.dtype.hasobject:
+            raise ValueError(f"Cannot snapshot object array: {key}")
+        layout[key] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+        offset = _aligned(offset + array.nbytes)
+
+    header = json.dumps(
+        {**{key: dataset[key] for key in HEADER_KEYS}, "arrays": layout}, ensure_ascii=False
+    ).encode()
+    data_start = _aligned(len(MAGIC) + _LENGTH.size + len(header))
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC + _LENGTH.pack(len(header)) + header)
+        for key, array in arrays.items():
+            f.seek(data_start + layout[key]["offset"])
+            f.write(array.data)
+        f.truncate(data_start + offset)
+    os.replace(tmp, path)
+
+
+def open_snapshot(path: str) -> dict:
+    """以 mmap 開啟快照，回傳與 generate_synthetic_dataset 相同結構的數據集（另含 indexes）"""
+    with open(path, "rb") as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    if buffer[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"Not a snapshot file: {path}")
+    (length,) = _LENGTH.unpack_from(buffer, len(MAGIC))
+    start = len(MAGIC) + _LENGTH.size
+    header = json.loads(buffer[start:start + length])
+    data_start = _aligned(start + length)
+
+    dataset = {key: header[key] for key in HEADER_KEYS}
+    for table in TABLES:
+        dataset[table] = {}
+    for key, spec in header["arrays"].items():
+        table, name = key.split("/", 1)
+        dtype = np.dtype(spec["dtype"])
+        count = int(np.prod(spec["shape"], dtype=np.int64))
+        array = np.frombuffer(buffer, dtype=dtype, count=count, offset=data_start + spec["offset"])
+        dataset[table][name] = array.reshape(spec["shape"])
+    return dataset
+
+
+def _matches(dataset: dict, expected: dict) -> bool:
+    return all(dataset["meta"].get(key) == value for key, value in expected.items())
+
+
+def open_or_create(path: str, build: Callable[[], dict], expected: dict | None = None) -> dict:
+    """快照存在且 meta 符合 expected（如 KOL 數與種子）時直接映射
+
+    否則持檔案鎖由一個行程 build() 並寫出（取代不符的舊快照），其餘行程等待後映射
+    """
+    expected = expected or {}
+    if os.path.exists(path):
+        dataset = open_snapshot(path)
+        if _matches(dataset, expected):
+            return dataset
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(f"{path}.lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        # 等待期間其他行程可能已寫出符合的快照
+        if os.path.exists(path):
+            dataset = open_snapshot(path)
+            if _matches(dataset, expected):
+                return dataset
+        write_snapshot(build(), path)
+    return open_snapshot(path)
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    from .mock_data import generate_synthetic_dataset
+
+    parser = argparse.ArgumentParser(description="產生合成數據集並寫成 mmap 快照")
+    parser.add_argument("--kols", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", required=True)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    dataset = generate_synthetic_dataset(args.kols, seed=args.seed)
+    generated = time.perf_counter()
+    write_snapshot(dataset, args.out)
+    print(f"{args.kols:,} KOLs：產生 {generated - started:.2f}s，寫入 {time.perf_counter() - generated:.2f}s → {args.out}")
@@ -0,0 +1,1248 @@
+"""
+資料存取層
+定義 API 端點使用的儲存介面，提供兩種實作：
+- MemoryStorage：沿用 mock_data 的記憶體資料與欄式資料表、索引、彙總
+- SQLiteStorage：嵌入式 SQLite（WAL 模式），篩選、排序與彙總交給 SQL 執行
+以環境變數 STORAGE_BACKEND=memory|sqlite 切換
+"""
+
+import fcntl
+import json
+import os
+import queue
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from functools import cached_property
+from itertools import islice
+from typing import Iterator
+
+import numpy as np
+
+from . import mock_data
+from .aggregates import Aggregates
+from .pagination import InvalidCursor
+from .performance import add_daily_metrics
+from .store import FIELDS, SORT_KEYS, KOLColumnStore, KOLIndex, KOLRecords
+from .timeseries import BuzzTimeSeries, add_mentions, round_trend
+
+
+class Storage(ABC):
+    """資料存取介面"""
+
+    # 資料版本：每次寫入遞增，供回應快取判斷是否失效
+    version: int = 0
+
+    def preload(self) -> None:
+        """預先建立首次取用時才初始化的資料（PRELOAD_DATA=1 時於啟動階段呼叫）"""
+
+    # ---------- KOL ----------
+
+    @abstractmethod
+    def query_kols(
+        self,
+        platform: str | None = None,
+        category: str | None = None,
+        min_followers: int | None = None,
+        max_followers: int | None = None,
+        min_engagement: float | None = None,
+        sort_by: str = "influence_score",
+        order: str = "desc",
+        limit: int = 50,
+        after: tuple | None = None,
+        tags_any: list[str] | None = None,
+        tags_all: list[str] | None = None,
+        brand_fit: list[str] | None = None,
+    ) -> tuple[int, list[dict]]:
+        """篩選 + 排序 + 取前 limit 筆，回傳 (符合總數, KOL 列表)
+
+        after 為上一頁最後一筆的 (排序值, ID)；ID 不存在時拋出 ValueError
+        tags_any / tags_all 為含任一 / 所有標籤，brand_fit 為含任一品牌契合標籤
+        """
+
+    def kol_facets(
+        self,
+        platform: str | None = None,
+        category: str | None = None,
+        min_followers: int | None = None,
+        max_followers: int | None = None,
+        min_engagement: float | None = None,
+        tags_any: list[str] | None = None,
+        tags_all: list[str] | None = None,
+        brand_fit: list[str] | None = None,
+    ) -> dict[str, dict]:
+        """篩選面板的分面計數：platform、category、標籤與品牌契合標籤每個值的符合筆數
+
+        計算某欄位時不套用該欄位自身的條件
+        """
+        return self.column_store().facets(
+            platform, category, min_followers, max_followers, min_engagement, tags_any, tags_all, brand_fit
+        )
+
+    @abstractmethod
+    def get_kol(self, kol_id: str) -> dict | None:
+        """依 ID 取得 KOL"""
+
+    @abstractmethod
+    def scan_kols(
+        self,
+        platform: str | None = None,
+        category: str | None = None,
+        min_followers: int | None = None,
+        max_followers: int | None = None,
+        min_engagement: float | None = None,
+        sort_by: str = "influence_score",
+        order: str = "desc",
+        batch: int = 1024,
+        tags_any: list[str] | None = None,
+        tags_all: list[str] | None = None,
+        brand_fit: list[str] | None = None,
+    ) -> Iterator[list[dict]]:
+        """同 query_kols 的篩選與排序，但不限筆數，逐批產出"""
+
+    def get_kols(self, kol_ids: list[str]) -> list[dict]:
+        """依 ID 列表取得 KOL（依傳入順序，略過不存在者）"""
+        return [k for k in (self.get_kol(i) for i in kol_ids) if k]
+
+    @abstractmethod
+    def iter_kols(self) -> Iterator[dict]:
+        """依原始順序逐筆走訪所有 KOL"""
+
+    @abstractmethod
+    def upsert_kol(self, kol: dict) -> None:
+        """新增或更新一筆 KOL"""
+
+    def column_store(self) -> KOLColumnStore:
+        """供向量化運算使用的 KOL 欄式資料表"""
+        return KOLColumnStore.from_records(list(self.iter_kols()))
+
+    @abstractmethod
+    def get_audience(self, kol_id: str) -> dict | None:
+        """取得 KOL 受眾數據"""
+
+    def audience_columns(self, kol_ids: list[str]) -> dict[str, np.ndarray]:
+        """依 kol_ids 順序取出欄式受眾資料，供向量化運算使用"""
+        return mock_data.audience_columns([self.get_audience(i) for i in kol_ids])
+
+    # ---------- Campaign ----------
+
+    @abstractmethod
+    def list_campaigns(
+        self,
+        status: str | None = None,
+        brand: str | None = None,
+        after: str | None = None,
+        limit: int | None = None,
+    ) -> list[dict]:
+        """依狀態、品牌篩選 Campaign；after 為上一頁最後一筆的 ID，limit 為 None 時不限筆數"""
+
+    @abstractmethod
+    def count_campaigns(self, status: str | None = None, brand: str | None = None) -> int:
+        """符合篩選條件的 Campaign 數"""
+
+    def iter_campaigns(self, status: str | None = None, brand: str | None = None) -> Iterator[dict]:
+        """逐筆走訪 Campaign"""
+        return iter(self.list_campaigns(status=status, brand=brand))
+
+    @abstractmethod
+    def get_campaign(self, campaign_id: str) -> dict | None:
+        """依 ID 取得 Campaign"""
+
+    @abstractmethod
+    def kol_campaigns(self, kol_id: str) -> list[dict]:
+        """取得 KOL 參與的 Campaign"""
+
+    @abstractmethod
+    def get_performance(self, campaign_id: str) -> dict | None:
+        """取得 Campaign 成效"""
+
+    @abstractmethod
+    def upsert_performance(self, performance: dict) -> None:
+        """寫入 Campaign 成效；已存在則覆寫"""
+
+    @abstractmethod
+    def add_daily_metrics(
+        self,
+        campaign_id: str,
+        date: str,
+        reach: int,
+        engagement: int,
+        impressions: int,
+        sentiment: float | None = None,
+    ) -> dict | None:
+        """在同一個鎖或交易中讀取、累加某一天的成效並寫回，回傳更新後的成效；Campaign 不存在時回傳 None"""
+
+    # ---------- 輿情 ----------
+
+    @abstractmethod
+    def iter_buzz_trends(self) -> Iterator[dict]:
+        """依原始順序逐筆走訪輿情趨勢"""
+
+    @abstractmethod
+    def buzz_series(self) -> BuzzTimeSeries:
+        """輿情時間序列（日期區間查詢與分桶）"""
+
+    @abstractmethod
+    def get_buzz_trend(self, keyword: str, date: str) -> dict | None:
+        """取得某關鍵字某一天的輿情"""
+
+    @abstractmethod
+    def upsert_buzz_trends(self, trends: list[dict]) -> None:
+        """批次寫入關鍵字單日輿情；已存在則覆寫，否則新增"""
+
+    @abstractmethod
+    def add_buzz_mentions(self, mentions: list[tuple[str, str, int, float, dict[str, int]]]) -> None:
+        """批次累加 (關鍵字, 日期, 提及數, 情緒總和, 各來源提及數)；已存在的當日輿情依 add_mentions 合併"""
+
+    # ---------- 影響力網絡 ----------
+
+    def network_edges(self, store: KOLColumnStore) -> tuple[int, dict[str, np.ndarray]]:
+        """影響力網絡的有向邊，回傳 (會員數, 欄式邊資料 src / dst / weight / type)
+
+        KOL 節點編號為 store 列號，會員接在 KOL 之後；共同參與 Campaign 的 KOL 互連，
+        權重為共同參與次數；MGM 推薦邊由 mock_data 依固定種子產生
+        """
+        pairs = []
+        for campaign in self.iter_campaigns():
+            rows = [r for r in map(store.row_of, campaign["kol_ids"]) if r is not None]
+            pairs.extend(a * store.size + b for a in rows for b in rows if a != b)
+        keys, counts = np.unique(np.array(pairs, dtype=np.int64), return_counts=True)
+        src, dst = np.divmod(keys, max(store.size, 1))
+        collaboration = {
+            "src": src.astype(np.int32),
+            "dst": dst.astype(np.int32),
+            "weight": counts.astype(np.float32),
+            "type": np.zeros(len(keys), dtype=np.int8),
+        }
+
+        members = mock_data.MOCK_MEMBER_COUNT
+        referrals = mock_data.synthesize_referrals(
+            store.columns["followers"], members, mock_data.MOCK_REFERRAL_EDGES,
+            np.random.default_rng(mock_data.MOCK_SEED),
+        )
+        return members, {name: np.concatenate([collaboration[name], referrals[name]]) for name in collaboration}
+
+    # ---------- 彙總 ----------
+
+    @abstractmethod
+    def summary(self) -> dict:
+        """儀表板總覽與數據故事共用的全域彙總"""
+
+    @abstractmethod
+    def platform_distribution(self) -> dict:
+        """各平台 KOL 數、總粉絲、平均互動率與影響力"""
+
+    @abstractmethod
+    def category_insights(self) -> list[dict]:
+        """各類別 KOL 數、總觸及、平均互動率與影響力、最高影響力 KOL"""
+
+
+# ==================== 記憶體實作 ====================
+
+class MemoryStorage(Storage):
+    """以 mock_data 記憶體資料為來源的實作"""
+
+    def __init__(self):
+        self._distributions: tuple[int, dict, list[dict]] | None = None
+        self._lock = threading.Lock()
+        # 匯入累加過的當日輿情未經四捨五入的值，下次累加由此接續
+        self._buzz_exact: dict[tuple[str, str], dict] = {}
+
+    # 以下資料結構皆於首次取用時才建立：啟動時不產生數據、不排序、不彙總，
+    # 每個端點只負擔自己用到的部分（如 KOL 列表不需建立 Campaign 索引與彙總）
+
+    @cached_property
+    def campaigns(self) -> list[dict]:
+        return mock_data.ALL_CAMPAIGNS
+
+    @cached_property
+    def performances(self) -> list[dict]:
+        return mock_data.ALL_CAMPAIGN_PERFORMANCES
+
+    @cached_property
+    def audience(self):
+        return mock_data.ALL_AUDIENCE_DATA
+
+    @cached_property
+    def trends(self) -> list[dict]:
+        return mock_data.ALL_BUZZ_TRENDS
+
+    @cached_property
+    def campaign_index(self) -> dict[str, dict]:
+        return mock_data.CAMPAIGN_INDEX
+
+    @cached_property
+    def performance_index(self) -> dict[str, dict]:
+        return mock_data.PERFORMANCE_INDEX
+
+    @cached_property
+    def kol_campaign_index(self) -> dict[str, list[dict]]:
+        return mock_data.KOL_CAMPAIGN_INDEX
+
+    @cached_property
+    def campaign_rows(self) -> dict[str, int]:
+        return {c["id"]: i for i, c in enumerate(self.campaigns)}
+
+    @cached_property
+    def store(self) -> KOLColumnStore:
+        dataset = mock_data.SYNTHETIC_DATASET
+        if dataset:
+            return KOLColumnStore(dataset["kols"], dataset["dictionaries"], dataset.get("indexes"))
+        return KOLColumnStore.from_records(mock_data.ALL_KOLS)
+
+    # KOL 只保存於欄式資料表，列表與 ID 索引皆為其視圖
+    @cached_property
+    def kols(self) -> KOLRecords:
+        return KOLRecords(self.store.columns, self.store.dictionaries)
+
+    @cached_property
+    def kol_index(self) -> KOLIndex:
+        return KOLIndex(self.store)
+
+    @cached_property
+    def aggregates(self) -> Aggregates:
+        return Aggregates.from_store(self.store, self.kols, self.campaigns, self.performances, self.trends)
+
+    @cached_property
+    def buzz(self) -> BuzzTimeSeries:
+        return BuzzTimeSeries.from_records(self.trends)
+
+    @cached_property
+    def buzz_index(self) -> dict[tuple[str, str], dict]:
+        return {(t["keyword"], t["date"]): t for t in self.trends}
+
+    def preload(self):
+        # 依相依順序觸發；aggregates 會一併載入 Campaign、成效與輿情
+        for name in ("store", "kols", "kol_index", "campaign_rows", "audience", "aggregates", "buzz",
+                     "campaign_index", "performance_index", "kol_campaign_index"):
+            getattr(self, name)
+
+    def query_kols(self, platform=None, category=None, min_followers=None, max_followers=None,
+                   min_engagement=None, sort_by="influence_score", order="desc", limit=50, after=None,
+                   tags_any=None, tags_all=None, brand_fit=None):
+        return self.store.query(
+            platform=platform,
+            category=category,
+            min_followers=min_followers,
+            max_followers=max_followers,
+            min_engagement=min_engagement,
+            sort_by=sort_by,
+            order=order,
+            limit=limit,
+            after=after,
+            tags_any=tags_any,
+            tags_all=tags_all,
+            brand_fit=brand_fit,
+        )
+
+    def scan_kols(self, platform=None, category=None, min_followers=None, max_followers=None,
+                  min_engagement=None, sort_by="influence_score", order="desc", batch=1024,
+                  tags_any=None, tags_all=None, brand_fit=None):
+        return self.store.scan(
+            platform=platform,
+            category=category,
+            min_followers=min_followers,
+            max_followers=max_followers,
+            min_engagement=min_engagement,
+            sort_by=sort_by,
+            order=order,
+            batch=batch,
+            tags_any=tags_any,
+            tags_all=tags_all,
+            brand_fit=brand_fit,
+        )
+
+    def get_kol(self, kol_id):
+        return self.kol_index.get(kol_id)
+
+    def iter_kols(self):
+        return iter(self.kols)
+
+    def upsert_kol(self, kol):
+        # 尚未建立的彙總不需更新，首次取用時由欄式資料表計算
+        aggregates = self.__dict__.get("aggregates")
+        with self._lock:
+            old = self.kol_index.get(kol["id"])
+            if aggregates is not None:
+                if old is None:
+                    aggregates.add_kol(kol)
+                else:
+                    aggregates.update_kol(old, kol)
+            self.store.upsert(kol)
+            self.version += 1
+
+    def column_store(self):
+        return self.store
+
+    def get_audience(self, kol_id):
+        return self.audience.get(kol_id)
+
+    def audience_columns(self, kol_ids):
+        if isinstance(self.audience, mock_data.AudienceTable):
+            return self.audience.columns(kol_ids)
+        return mock_data.audience_columns([self.audience.get(i) for i in kol_ids])
+
+    def list_campaigns(self, status=None, brand=None, after=None, limit=None):
+        if after is None and limit is None:
+            campaigns = self.campaigns.copy()
+            if status:
+                campaigns = [c for c in campaigns if c["status"] == status]
+            if brand:
+                campaigns = [c for c in campaigns if c["brand"] == brand]
+            return campaigns
+
+        start = 0
+        if after is not None:
+            if after not in self.campaign_rows:
+                raise InvalidCursor("Invalid cursor")
+            start = self.campaign_rows[after] + 1
+        return list(islice(self._scan_campaigns(status, brand, start), limit))
+
+    def count_campaigns(self, status=None, brand=None):
+        if not brand:
+            return self.aggregates.campaign_status_counts.get(status, 0) if status else len(self.campaigns)
+        return sum(1 for _ in self.iter_campaigns(status, brand))
+
+    def _scan_campaigns(self, status, brand, start: int) -> Iterator[dict]:
+        """自第 start 筆起依序產出符合條件的 Campaign"""
+        campaigns = self.campaigns
+        for i in range(start, len(campaigns)):
+            c = campaigns[i]
+            if (not status or c["status"] == status) and (not brand or c["brand"] == brand):
+                yield c
+
+    def iter_campaigns(self, status=None, brand=None):
+        return self._scan_campaigns(status, brand, 0)
+
+    def get_campaign(self, campaign_id):
+        return self.campaign_index.get(campaign_id)
+
+    def kol_campaigns(self, kol_id):
+        return self.kol_campaign_index.get(kol_id, [])
+
+    def get_performance(self, campaign_id):
+        return self.performance_index.get(campaign_id)
+
+    def upsert_performance(self, performance):
+        with self._lock:
+            self._put_performance(performance)
+
+    def add_daily_metrics(self, campaign_id, date, reach, engagement, impressions, sentiment=None):
+        with self._lock:
+            performance = self.performance_index.get(campaign_id)
+            if performance is None:
+                return None
+            updated = add_daily_metrics(performance, date, reach, engagement, impressions, sentiment)
+            self._put_performance(updated)
+            return updated
+
+    def _put_performance(self, performance: dict) -> None:
+        """寫入成效並更新彙總（呼叫端須持有 _lock）"""
+        aggregates = self.__dict__.get("aggregates")
+        old = self.performance_index.get(performance["campaign_id"])
+        if old is None:
+            performance = dict(performance)
+            self.performances.append(performance)
+            self.performance_index[performance["campaign_id"]] = performance
+            if aggregates is not None:
+                aggregates.add_performance(performance)
+        else:
+            if aggregates is not None:
+                aggregates.update_performance(old, performance)
+            old.update(performance)
+        self.version += 1
+
+    def iter_buzz_trends(self):
+        return iter(self.trends)
+
+    def buzz_series(self):
+        return self.buzz
+
+    def get_buzz_trend(self, keyword, date):
+        return self.buzz_index.get((keyword, date))
+
+    def upsert_buzz_trends(self, trends):
+        with self._lock:
+            for trend in trends:
+                self._buzz_exact.pop((trend["keyword"], trend["date"]), None)
+            self._put_buzz_trends(trends)
+
+    def add_buzz_mentions(self, mentions):
+        with self._lock:
+            trends = []
+            for keyword, date, count, sentiment_sum, source_counts in mentions:
+                key = (keyword, date)
+                exact = self._buzz_exact.get(key) or self.buzz_index.get(key)
+                exact = self._buzz_exact[key] = add_mentions(exact, keyword, date, count, sentiment_sum, source_counts)
+                trends.append(round_trend(exact))
+            self._put_buzz_trends(trends)
+
+    def _put_buzz_trends(self, trends: list[dict]) -> None:
+        """寫入輿情並更新彙總與時間序列（呼叫端須持有 _lock）"""
+        # 尚未建立的彙總與時間序列不需更新，首次取用時由 trends 建立
+        aggregates = self.__dict__.get("aggregates")
+        series = self.__dict__.get("buzz")
+        for trend in trends:
+            key = (trend["keyword"], trend["date"])
+            old = self.buzz_index.get(key)
+            if old is None:
+                trend = dict(trend)
+                self.trends.append(trend)
+                self.buzz_index[key] = trend
+                if aggregates is not None:
+                    aggregates.add_buzz_trend(trend)
+            else:
+                if aggregates is not None:
+                    aggregates.update_buzz_trend(old, trend)
+                old.update(trend)
+            if series is not None:
+                series.upsert(**trend)
+        self.version += 1
+
+    def summary(self):
+        agg = self.aggregates
+        return {
+            "total_kols": agg.kol_count,
+            "total_reach": agg.followers_sum,
+            "avg_engagement_rate": agg.avg_engagement_rate,
+            "avg_audience_quality": agg.avg_audience_quality,
+            "platform_counts": dict(agg.platform_counts),
+            "campaign_status_counts": dict(agg.campaign_status_counts),
+            "total_campaign_engagement": agg.campaign_engagement_sum,
+            "avg_roi": agg.avg_roi,
+            "top_kols": agg.top_influence.items,
+            "top_sentiment_kol": agg.top_sentiment.best,
+            "top_engagement_kol": agg.top_engagement.best,
+            "best_campaign": agg.top_roi.best,
+            "total_buzz_volume": agg.buzz_volume_sum,
+            "avg_buzz_sentiment": agg.buzz_avg_sentiment,
+            "top_keyword": agg.top_keyword,
+        }
+
+    def _group_distributions(self) -> tuple[dict, list[dict]]:
+        """平台分佈與類別洞察由欄式資料表分組計算，KOL 異動後下次讀取時重算"""
+        if self._distributions is None or self._distributions[0] != self.store.version:
+            platforms = self._group("platform", mock_data.PLATFORMS)
+            categories = self._group("category", mock_data.CATEGORIES)
+            self._distributions = (
+                self.store.version,
+                {
+                    name: {
+                        "count": count,
+                        "total_followers": followers,
+                        "avg_engagement": round(engagement / count, 2),
+                        "avg_influence": round(influence / count, 1),
+                    }
+                    for name, count, followers, engagement, influence, _ in platforms
+                },
+                [
+                    {
+                        "category": name,
+                        "kol_count": count,
+                        "total_reach": followers,
+                        "avg_engagement": round(engagement / count, 2),
+                        "avg_influence": round(influence / count, 1),
+                        "top_kol": top,
+                    }
+                    for name, count, followers, engagement, influence, top in categories
+                ],
+            )
+        return self._distributions[1], self._distributions[2]
+
+    def _group(self, column: str, names: list[str]) -> list[tuple]:
+        """依 names 順序列出有 KOL 的群組：(名稱, 筆數, 粉絲, 互動率總和, 影響力總和, 最高影響力 KOL 名稱)"""
+        stats = self.store.group_stats(column)
+        groups = []
+        for name in names:
+            code = self.store.code_of(column, name)
+            if code < 0 or not stats["count"][code]:
+                continue
+            groups.append((
+                name,
+                int(stats["count"][code]),
+                int(stats["followers"][code]),
+                float(stats["engagement_rate"][code]),
+                float(stats["influence_score"][code]),
+                str(self.store.columns["name"][stats["top"][code]]),
+            ))
+        return groups
+
+    def platform_distribution(self):
+        return self._group_distributions()[0]
+
+    def category_insights(self):
+        return self._group_distributions()[1]
+
+
+# ==================== SQLite 實作 ====================
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS kols (
+    seq INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    avatar TEXT NOT NULL,
+    platform TEXT NOT NULL,
+    category TEXT NOT NULL,
+    followers INTEGER NOT NULL,
+    engagement_rate REAL NOT NULL,
+    avg_likes INTEGER NOT NULL,
+    avg_comments INTEGER NOT NULL,
+    avg_shares INTEGER NOT NULL,
+    influence_score REAL NOT NULL,
+    sentiment_score REAL NOT NULL,
+    authenticity_score REAL NOT NULL,
+    audience_quality_score REAL NOT NULL,
+    tags TEXT NOT NULL,
+    price_range TEXT NOT NULL,
+    collaboration_count INTEGER NOT NULL,
+    brand_fit_tags TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_kols_platform ON kols (platform);
+CREATE INDEX IF NOT EXISTS idx_kols_category ON kols (category);
+""" + "".join(
+    # 排序鍵各建升冪與降冪索引，同分依 seq 排列，ORDER BY ... LIMIT 不需額外排序
+    f"CREATE INDEX IF NOT EXISTS idx_kols_{key}_asc ON kols ({key}, seq);\n"
+    f"CREATE INDEX IF NOT EXISTS idx_kols_{key}_desc ON kols ({key} DESC, seq);\n"
+    for key in SORT_KEYS
+) + """
+
+CREATE TABLE IF NOT EXISTS audiences (
+    kol_id TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS campaigns (
+    seq INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    status TEXT NOT NULL,
+    brand TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_campaigns_status ON campaigns (status);
+CREATE INDEX IF NOT EXISTS idx_campaigns_brand ON campaigns (brand);
+
+CREATE TABLE IF NOT EXISTS campaign_kols (
+    kol_id TEXT NOT NULL,
+    campaign_seq INTEGER NOT NULL,
+    PRIMARY KEY (kol_id, campaign_seq)
+);
+
+CREATE TABLE IF NOT EXISTS performances (
+    campaign_id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    total_engagement INTEGER NOT NULL,
+    roi_estimate REAL NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_performances_status ON performances (status);
+
+CREATE TABLE IF NOT EXISTS buzz_trends (
+    seq INTEGER PRIMARY KEY,
+    keyword TEXT NOT NULL,
+    date TEXT NOT NULL,
+    volume INTEGER NOT NULL,
+    sentiment REAL NOT NULL,
+    source_breakdown TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_buzz_keyword ON buzz_trends (keyword, seq);
+-- 每個 (關鍵字, 日期) 只有一列，匯入以 ON CONFLICT 累加；舊版資料庫中重複的日期保留最早寫入者（與先前的單日查詢一致）
+DELETE FROM buzz_trends WHERE seq NOT IN (SELECT MIN(seq) FROM buzz_trends GROUP BY keyword, date);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_buzz_day ON buzz_trends (keyword, date);
+
+-- 資料版本計數：寫入時在同一交易中遞增，多個 worker 行程共用
+CREATE TABLE IF NOT EXISTS data_versions (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO data_versions (name, value) VALUES ('data', 0), ('buzz', 0), ('kols', 0);
+"""
+
+_KOL_COLUMNS = ", ".join(FIELDS)
+_JSON_FIELDS = ("tags", "brand_fit_tags")
+# 逐筆走訪時每次查詢的列數
+_SCAN_BATCH = 1024
+
+
+def _kol_row(row: tuple) -> dict:
+    kol = dict(zip(FIELDS, row))
+    for name in _JSON_FIELDS:
+        kol[name] = json.loads(kol[name])
+    return kol
+
+
+def _kol_params(kol: dict) -> tuple:
+    return tuple(
+        json.dumps(kol[name], ensure_ascii=False) if name in _JSON_FIELDS else kol[name]
+        for name in FIELDS
+    )
+
+
+class ConnectionPool:
+    """固定大小的 SQLite 連線池；等待可用連線超過 timeout 秒時拋出 TimeoutError"""
+
+    def __init__(self, path: str, size: int = 4, timeout: float = 10.0):
+        self.size = size
+        self.timeout = timeout
+        self._pool: queue.Queue[sqlite3.Connection] = queue.Queue()
+        for _ in range(size):
+            conn = sqlite3.connect(path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._pool.put(conn)
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        try:
+            conn = self._pool.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError(
+                f"No SQLite connection available within {self.timeout}s (pool size {self.size})"
+            ) from None
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+
+class SQLiteStorage(Storage):
+    """嵌入式 SQLite 實作；資料庫為空時以 mock_data 初始化
+
+    查詢會阻塞，呼叫端需在執行緒池中執行（main.py 的對應端點宣告為一般函式）
+    version 取自資料庫中的計數，其他 worker 行程寫入後也會改變，回應快取隨之失效
+    """
+
+    def __init__(self, path: str, pool_size: int = 4, pool_timeout: float = 10.0):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.pool = ConnectionPool(path, pool_size, pool_timeout)
+        with self.pool.connection() as conn, open(f"{path}.lock", "w") as lock:
+            # 多個 worker 同時啟動時持檔案鎖依序進行（同 snapshot.open_or_create）：
+            # 只有第一個行程在空資料庫寫入初始資料，其餘等待後重新檢查筆數；
+            # 初始化可能超過 SQLite 等待寫入鎖的逾時，因此不以交易互斥
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            conn.executescript(SCHEMA)
+            if conn.execute("SELECT COUNT(*) FROM kols").fetchone()[0] == 0:
+                self._seed(conn)
+        self._column_store: KOLColumnStore | None = None
+        self._buzz_series: BuzzTimeSeries | None = None
+        # 欄式資料表與時間序列只建立一次（多個執行緒可能同時第一次取用）
+        self._lock = threading.Lock()
+        # 偵測寫入的專用連線：任何其他連線（含其他行程）提交後 PRAGMA data_version 即改變，才重新讀取計數
+        self._watch = sqlite3.connect(path, check_same_thread=False)
+        self._watch_lock = threading.Lock()
+        self._data_version: int | None = None
+        self._version = 0
+        # 欄式資料表所含的 KOL 寫入計數、時間序列所含的輿情寫入計數
+        self._kols_version = 0
+        self._buzz_version = 0
+
+    @property
+    def version(self) -> int:
+        with self._watch_lock:
+            data_version = self._watch.execute("PRAGMA data_version").fetchone()[0]
+            if data_version != self._data_version:
+                self._data_version = data_version
+                counters = dict(self._watch.execute("SELECT name, value FROM data_versions"))
+                self._version = counters["data"]
+                if counters["kols"] != self._kols_version:
+                    # 其他行程寫入的 KOL：欄式資料表於下次取用時重建
+                    self._column_store = None
+                if counters["buzz"] != self._buzz_version:
+                    # 其他行程寫入的輿情：時間序列於下次取用時重建
+                    self._buzz_series = None
+            return self._version
+
+    @staticmethod
+    def _bump(conn: sqlite3.Connection, *names: str) -> dict[str, int]:
+        """在寫入的交易中遞增資料版本計數，回傳遞增後的值"""
+        rows = conn.execute(
+            f"UPDATE data_versions SET value = value + 1 WHERE name IN ({', '.join('?' * len(names))}) "
+            "RETURNING name, value",
+            names,
+        ).fetchall()
+        return dict(rows)
+
+    def _seed(self, conn: sqlite3.Connection) -> None:
+        """將 mock_data 寫入資料庫"""
+        with conn:
+            conn.executemany(
+                f"INSERT INTO kols ({_KOL_COLUMNS}) VALUES ({', '.join('?' * len(FIELDS))})",
+                (_kol_params(k) for k in mock_data.ALL_KOLS),
+            )
+            conn.executemany(
+                "INSERT INTO audiences (kol_id, data) VALUES (?, ?)",
+                ((kol_id, json.dumps(a, ensure_ascii=False)) for kol_id, a in mock_data.ALL_AUDIENCE_DATA.items()),
+            )
+            for c in mock_data.ALL_CAMPAIGNS:
+                seq = conn.execute(
+                    "INSERT INTO campaigns (id, status, brand, data) VALUES (?, ?, ?, ?)",
+                    (c["id"], c["status"], c["brand"], json.dumps(c, ensure_ascii=False)),
+                ).lastrowid
+                conn.executemany(
+                    "INSERT OR IGNORE INTO campaign_kols (kol_id, campaign_seq) VALUES (?, ?)",
+                    ((kol_id, seq) for kol_id in c["kol_ids"]),
+                )
+            conn.executemany(
+                "INSERT INTO performances (campaign_id, status, total_engagement, roi_estimate, data) VALUES (?, ?, ?, ?, ?)",
+                (
+                    (p["campaign_id"], p["status"], p["total_engagement"], p["roi_estimate"], json.dumps(p, ensure_ascii=False))
+                    for p in mock_data.ALL_CAMPAIGN_PERFORMANCES
+                ),
+            )
+            conn.executemany(
+                "INSERT INTO buzz_trends (keyword, date, volume, sentiment, source_breakdown) VALUES (?, ?, ?, ?, ?)",
+                (
+                    (t["keyword"], t["date"], t["volume"], t["sentiment"], json.dumps(t["source_breakdown"]))
+                    for t in mock_data.ALL_BUZZ_TRENDS
+                ),
+            )
+
+    def _fetchall(self, sql: str, params: tuple = ()) -> list[tuple]:
+        with self.pool.connection() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    # ---------- KOL ----------
+
+    @staticmethod
+    def _kol_filters(platform, category, min_followers, max_followers, min_engagement,
+                     tags_any=None, tags_all=None, brand_fit=None) -> tuple[str, list]:
+        """篩選條件 → (WHERE 子句, 參數)；標籤以 JSON 陣列存放，以 json_each 比對"""
+        where, params = [], []
+        if platform:
+            where.append("platform = ?")
+            params.append(platform)
+        if category:
+            where.append("category = ?")
+            params.append(category)
+        if min_followers:
+            where.append("followers >= ?")
+            params.append(min_followers)
+        if max_followers:
+            where.append("followers <= ?")
+            params.append(max_followers)
+        if min_engagement:
+            where.append("engagement_rate >= ?")
+            params.append(min_engagement)
+        for column, values in (("tags", tags_any), ("brand_fit_tags", brand_fit)):
+            if values:
+                where.append(f"EXISTS (SELECT 1 FROM json_each({column}) WHERE value IN ({', '.join('?' * len(values))}))")
+                params.extend(values)
+        for tag in tags_all or ():
+            where.append("EXISTS (SELECT 1 FROM json_each(tags) WHERE value = ?)")
+            params.append(tag)
+        return (f"WHERE {' AND '.join(where)}" if where else ""), params
+
+    @staticmethod
+    def _kol_order(sort_by: str, order: str) -> str:
+        """排序子句；同分者維持原始順序（與穩定排序一致）"""
+        if sort_by in SORT_KEYS:
+            return f"{sort_by} {'DESC' if order == 'desc' else 'ASC'}, seq"
+        return "seq"
+
+    @staticmethod
+    def _kol_seek(sort_by: str, order: str, value, seq: int, clause: str) -> tuple[str, list]:
+        """排在 (value, seq) 之後的列；前半段為排序索引上的範圍條件，後半段只需略過同分且在前的列"""
+        if sort_by not in SORT_KEYS:
+            seek, params = "seq > ?", [seq]
+        elif order == "desc":
+            seek, params = f"{sort_by} <= ? AND ({sort_by} < ? OR seq > ?)", [value, value, seq]
+        else:
+            seek, params = f"{sort_by} >= ? AND ({sort_by} > ? OR seq > ?)", [value, value, seq]
+        return f"{'AND' if clause else 'WHERE'} {seek}", params
+
+    def query_kols(self, platform=None, category=None, min_followers=None, max_followers=None,
+                   min_engagement=None, sort_by="influence_score", order="desc", limit=50, after=None,
+                   tags_any=None, tags_all=None, brand_fit=None):
+        clause, params = self._kol_filters(platform, category, min_followers, max_followers, min_engagement,
+                                           tags_any, tags_all, brand_fit)
+        order_by = self._kol_order(sort_by, order)
+
+        with self.pool.connection() as conn:
+            total = conn.execute(f"SELECT COUNT(*) FROM kols {clause}", params).fetchone()[0]
+            seek, seek_params = "", []
+            if after is not None:
+                value, kol_id = after
+                row = conn.execute("SELECT seq FROM kols WHERE id = ?", (kol_id,)).fetchone()
+                if row is None:
+                    raise InvalidCursor("Invalid cursor")
+                seek, seek_params = self._kol_seek(sort_by, order, value, row[0], clause)
+            rows = conn.execute(
+                f"SELECT {_KOL_COLUMNS} FROM kols {clause} {seek} ORDER BY {order_by} LIMIT ?",
+                (*params, *seek_params, max(limit, 0)),
+            ).fetchall()
+        return total, [_kol_row(r) for r in rows]
+
+    def scan_kols(self, platform=None, category=None, min_followers=None, max_followers=None,
+                  min_engagement=None, sort_by="influence_score", order="desc", batch=1024,
+                  tags_any=None, tags_all=None, brand_fit=None):
+        clause, params = self._kol_filters(platform, category, min_followers, max_followers, min_engagement,
+                                           tags_any, tags_all, brand_fit)
+        order_by = self._kol_order(sort_by, order)
+        key = sort_by if sort_by in SORT_KEYS else "NULL"
+        seek, seek_params = "", []
+        # 依排序鍵分批（keyset）查詢，每批取完即歸還連線，長時間的匯出不佔用連線池
+        while True:
+            with self.pool.connection() as conn:
+                rows = conn.execute(
+                    f"SELECT seq, {key}, {_KOL_COLUMNS} FROM kols {clause} {seek} ORDER BY {order_by} LIMIT ?",
+                    (*params, *seek_params, batch),
+                ).fetchall()
+            if rows:
+                yield [_kol_row(r[2:]) for r in rows]
+            if len(rows) < batch:
+                return
+            seq, value = rows[-1][:2]
+            seek, seek_params = self._kol_seek(sort_by, order, value, seq, clause)
+
+    def get_kol(self, kol_id):
+        rows = self._fetchall(f"SELECT {_KOL_COLUMNS} FROM kols WHERE id = ?", (kol_id,))
+        return _kol_row(rows[0]) if rows else None
+
+    def get_kols(self, kol_ids):
+        rows = self._fetchall(
+            f"SELECT {_KOL_COLUMNS} FROM kols WHERE id IN ({', '.join('?' * len(kol_ids))})",
+            tuple(kol_ids),
+        )
+        by_id = {k["id"]: k for k in map(_kol_row, rows)}
+        return [by_id[i] for i in kol_ids if i in by_id]
+
+    def iter_kols(self):
+        with self.pool.connection() as conn:
+            for row in conn.execute(f"SELECT {_KOL_COLUMNS} FROM kols ORDER BY seq"):
+                yield _kol_row(row)
+
+    def upsert_kol(self, kol):
+        assignments = ", ".join(f"{name} = excluded.{name}" for name in FIELDS if name != "id")
+        with self.pool.connection() as conn, conn:
+            conn.execute(
+                f"INSERT INTO kols ({_KOL_COLUMNS}) VALUES ({', '.join('?' * len(FIELDS))}) "
+                f"ON CONFLICT (id) DO UPDATE SET {assignments}",
+                _kol_params(kol),
+            )
+            kols = self._bump(conn, "data", "kols")["kols"]
+        with self._watch_lock:
+            if self._column_store is not None:
+                if self._kols_version == kols - 1:
+                    # 增量更新並記入異動紀錄，衍生索引只需處理這一列
+                    self._column_store.upsert(kol)
+                    self._kols_version = kols
+                else:
+                    # 欄式資料表缺少其他行程的寫入，改為重建
+                    self._column_store = None
+
+    def column_store(self):
+        with self._lock:
+            store = self._column_store
+            if store is None:
+                # 先讀計數再讀資料：期間若有寫入，計數較舊，下次檢查版本時重建
+                version, = self._fetchall("SELECT value FROM data_versions WHERE name = 'kols'")[0]
+                store = super().column_store()
+                with self._watch_lock:
+                    self._column_store, self._kols_version = store, version
+        return store
+
+    def get_audience(self, kol_id):
+        rows = self._fetchall("SELECT data FROM audiences WHERE kol_id = ?", (kol_id,))
+        return json.loads(rows[0][0]) if rows else None
+
+    def audience_columns(self, kol_ids):
+        # 少量 ID（如增量更新異動的列）只讀取這些列，否則整表讀取
+        if len(kol_ids) <= _SCAN_BATCH:
+            records = dict(self._fetchall(
+                f"SELECT kol_id, data FROM audiences WHERE kol_id IN ({', '.join('?' * len(kol_ids))})",
+                tuple(kol_ids),
+            ))
+        else:
+            records = dict(self._fetchall("SELECT kol_id, data FROM audiences"))
+        return mock_data.audience_columns([json.loads(records[i]) if i in records else None for i in kol_ids])
+
+    # ---------- Campaign ----------
+
+    @staticmethod
+    def _campaign_filters(status, brand) -> tuple[str, list]:
+        where, params = [], []
+        if status:
+            where.append("status = ?")
+            params.append(status)
+        if brand:
+            where.append("brand = ?")
+            params.append(brand)
+        return (f"WHERE {' AND '.join(where)}" if where else ""), params
+
+    def list_campaigns(self, status=None, brand=None, after=None, limit=None):
+        clause, params = self._campaign_filters(status, brand)
+        with self.pool.connection() as conn:
+            if after is not None:
+                row = conn.execute("SELECT seq FROM campaigns WHERE id = ?", (after,)).fetchone()
+                if row is None:
+                    raise InvalidCursor("Invalid cursor")
+                clause = f"{clause} {'AND' if clause else 'WHERE'} seq > ?"
+                params.append(row[0])
+            sql = f"SELECT data FROM campaigns {clause} ORDER BY seq"
+            if limit is not None:
+                sql += " LIMIT ?"
+                params.append(max(limit, 0))
+            rows = conn.execute(sql, params).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def count_campaigns(self, status=None, brand=None):
+        clause, params = self._campaign_filters(status, brand)
+        return self._fetchall(f"SELECT COUNT(*) FROM campaigns {clause}", tuple(params))[0][0]
+
+    def iter_campaigns(self, status=None, brand=None):
+        clause, params = self._campaign_filters(status, brand)
+        seek = f"{clause} {'AND' if clause else 'WHERE'} seq > ?"
+        last = 0
+        # 依 seq 分批查詢，每批取完即歸還連線（匯出時逐批串流）
+        while True:
+            with self.pool.connection() as conn:
+                rows = conn.execute(
+                    f"SELECT seq, data FROM campaigns {seek} ORDER BY seq LIMIT ?", (*params, last, _SCAN_BATCH)
+                ).fetchall()
+            for _, data in rows:
+                yield json.loads(data)
+            if len(rows) < _SCAN_BATCH:
+                return
+            last = rows[-1][0]
+
+    def get_campaign(self, campaign_id):
+        rows = self._fetchall("SELECT data FROM campaigns WHERE id = ?", (campaign_id,))
+        return json.loads(rows[0][0]) if rows else None
+
+    def kol_campaigns(self, kol_id):
+        rows = self._fetchall(
+            "SELECT c.data FROM campaign_kols ck JOIN campaigns c ON c.seq = ck.campaign_seq "
+            "WHERE ck.kol_id = ? ORDER BY c.seq",
+            (kol_id,),
+        )
+        return [json.loads(r[0]) for r in rows]
+
+    def get_performance(self, campaign_id):
+        rows = self._fetchall("SELECT data FROM performances WHERE campaign_id = ?", (campaign_id,))
+        return json.loads(rows[0][0]) if rows else None
+
+    @staticmethod
+    def _performance_params(p: dict) -> tuple:
+        return p["status"], p["total_engagement"], p["roi_estimate"], json.dumps(p, ensure_ascii=False), p["campaign_id"]
+
+    def upsert_performance(self, performance):
+        params = self._performance_params(performance)
+        with self.pool.connection() as conn, conn:
+            updated = conn.execute(
+                "UPDATE performances SET status = ?, total_engagement = ?, roi_estimate = ?, data = ? WHERE campaign_id = ?",
+                params,
+            ).rowcount
+            if not updated:
+                conn.execute(
+                    "INSERT INTO performances (status, total_engagement, roi_estimate, data, campaign_id) VALUES (?, ?, ?, ?, ?)",
+                    params,
+                )
+            self._bump(conn, "data")
+
+    def add_daily_metrics(self, campaign_id, date, reach, engagement, impressions, sentiment=None):
+        with self.pool.connection() as conn, conn:
+            # 讀取前即取得寫入鎖：其他連線（含其他行程）的累加須等本交易提交後才讀取
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT data FROM performances WHERE campaign_id = ?", (campaign_id,)).fetchone()
+            if row is None:
+                return None
+            updated = add_daily_metrics(json.loads(row[0]), date, reach, engagement, impressions, sentiment)
+            conn.execute(
+                "UPDATE performances SET status = ?, total_engagement = ?, roi_estimate = ?, data = ? WHERE campaign_id = ?",
+                self._performance_params(updated),
+            )
+            self._bump(conn, "data")
+        return updated
+
+    # ---------- 輿情 ----------
+
+    @staticmethod
+    def _buzz_trend(keyword: str, date: str, volume: int, sentiment: float, breakdown: str) -> dict:
+        """資料庫中存放匯入累加後未經四捨五入的值，讀取時才進位（同 round_trend）"""
+        return {
+            "keyword": keyword,
+            "date": date,
+            "volume": volume,
+            "sentiment": round(sentiment, 2),
+            "source_breakdown": {s: round(w) for s, w in json.loads(breakdown).items()},
+        }
+
+    def iter_buzz_trends(self):
+        with self.pool.connection() as conn:
+            rows = conn.execute("SELECT keyword, date, volume, sentiment, source_breakdown FROM buzz_trends ORDER BY seq")
+            for row in rows:
+                yield self._buzz_trend(*row)
+
+    def buzz_series(self):
+        with self._lock:
+            series = self._buzz_series
+            if series is None:
+                # 先讀計數再讀資料：期間若有寫入，計數較舊，下次檢查版本時重建
+                version, = self._fetchall("SELECT value FROM data_versions WHERE name = 'buzz'")[0]
+                series = BuzzTimeSeries.from_records(list(self.iter_buzz_trends()))
+                with self._watch_lock:
+                    self._buzz_series, self._buzz_version = series, version
+        return series
+
+    def get_buzz_trend(self, keyword, date):
+        rows = self._fetchall(
+            "SELECT keyword, date, volume, sentiment, source_breakdown FROM buzz_trends WHERE keyword = ? AND date = ?",
+            (keyword, date),
+        )
+        return self._buzz_trend(*rows[0]) if rows else None
+
+    def upsert_buzz_trends(self, trends):
+        with self.pool.connection() as conn, conn:
+            conn.executemany(
+                "INSERT INTO buzz_trends (keyword, date, volume, sentiment, source_breakdown) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (keyword, date) DO UPDATE SET volume = excluded.volume, sentiment = excluded.sentiment, "
+                "source_breakdown = excluded.source_breakdown",
+                [(t["keyword"], t["date"], t["volume"], t["sentiment"], json.dumps(t["source_breakdown"])) for t in trends],
+            )
+            buzz = self._bump(conn, "data", "buzz")["buzz"]
+        self._apply_buzz_series(buzz, trends)
+
+    def add_buzz_mentions(self, mentions):
+        sources = list(dict.fromkeys(s for *_, source_counts in mentions for s in source_counts))
+        # 在資料庫中累加：多個 worker 行程同時匯入同一天時不會互相覆寫
+        # excluded 為本批單獨的聲量、情緒與來源佔比，與既有值依聲量加權平均
+        total = "CAST(volume + excluded.volume AS REAL)"
+        breakdown = "json_set(source_breakdown" + "".join(
+            f", ?, (COALESCE(json_extract(source_breakdown, ?), 0) * volume"
+            f" + json_extract(excluded.source_breakdown, ?) * excluded.volume) / {total}"
+            for _ in sources
+        ) + ")"
+        paths = [p for s in sources for p in (f'$."{s}"',) * 3]
+        sql = (
+            "INSERT INTO buzz_trends (keyword, date, volume, sentiment, source_breakdown) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (keyword, date) DO UPDATE SET volume = volume + excluded.volume, "
+            f"sentiment = (sentiment * volume + excluded.sentiment * excluded.volume) / {total}, "
+            f"source_breakdown = {breakdown} "
+            "RETURNING keyword, date, volume, sentiment, source_breakdown"
+        )
+        with self.pool.connection() as conn, conn:
+            trends = []
+            for keyword, date, count, sentiment_sum, source_counts in mentions:
+                batch = {s: source_counts.get(s, 0) * 100 / count for s in sources}
+                row = conn.execute(
+                    sql, (keyword, date, count, sentiment_sum / count, json.dumps(batch), *paths)
+                ).fetchone()
+                trends.append(self._buzz_trend(*row))
+            buzz = self._bump(conn, "data", "buzz")["buzz"]
+        self._apply_buzz_series(buzz, trends)
+
+    def _apply_buzz_series(self, buzz: int, trends: list[dict]) -> None:
+        """本行程寫入後更新時間序列；buzz 為寫入後的輿情計數"""
+        with self._watch_lock:
+            if self._buzz_series is not None:
+                if self._buzz_version == buzz - 1:
+                    for t in trends:
+                        self._buzz_series.upsert(**t)
+                    self._buzz_version = buzz
+                else:
+                    # 時間序列缺少其他行程的寫入，改為重建
+                    self._buzz_series = None
+
+    # ---------- 彙總 ----------
+
+    def summary(self):
+        with self.pool.connection() as conn:
+            total_kols, total_reach, avg_engagement, avg_quality = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(followers), 0), COALESCE(AVG(engagement_rate), 0), "
+                "COALESCE(AVG(audience_quality_score), 0) FROM kols"
+            ).fetchone()
+            platform_counts = dict(conn.execute("SELECT platform, COUNT(*) FROM kols GROUP BY platform"))
+            status_counts = dict(conn.execute("SELECT status, COUNT(*) FROM campaigns GROUP BY status"))
+            campaign_engagement, = conn.execute(
+                "SELECT COALESCE(SUM(total_engagement), 0) FROM performances"
+            ).fetchone()
+            avg_roi, = conn.execute(
+                "SELECT COALESCE(AVG(roi_estimate), 0) FROM performances WHERE status = 'completed'"
+            ).fetchone()
+
+            def top_kols(key: str, n: int) -> list[dict]:
+                rows = conn.execute(f"SELECT {_KOL_COLUMNS} FROM kols ORDER BY {key} DESC, seq LIMIT ?", (n,))
+                return [_kol_row(r) for r in rows]
+
+            top_influence = top_kols("influence_score", 5)
+            top_sentiment = top_kols("sentiment_score", 1)
+            top_engagement = top_kols("engagement_rate", 1)
+            best_campaign = conn.execute(
+                "SELECT data FROM performances ORDER BY roi_estimate DESC, rowid LIMIT 1"
+            ).fetchone()
+
+            buzz_volume, buzz_sentiment = conn.execute(
+                "SELECT COALESCE(SUM(volume), 0), COALESCE(AVG(sentiment), 0) FROM buzz_trends"
+            ).fetchone()
+            top_keyword = conn.execute(
+                "SELECT keyword, SUM(volume) AS total FROM buzz_trends GROUP BY keyword "
+                "ORDER BY total DESC, MIN(seq) LIMIT 1"
+            ).fetchone()
+
+        return {
+            "total_kols": total_kols,
+            "total_reach": total_reach,
+            "avg_engagement_rate": avg_engagement,
+            "avg_audience_quality": avg_quality,
+            "platform_counts": platform_counts,
+            "campaign_status_counts": status_counts,
+            "total_campaign_engagement": campaign_engagement,
+            "avg_roi": avg_roi,
+            "top_kols": top_influence,
+            "top_sentiment_kol": top_sentiment[0] if top_sentiment else None,
+            "top_engagement_kol": top_engagement[0] if top_engagement else None,
+            "best_campaign": json.loads(best_campaign[0]) if best_campaign else None,
+            "total_buzz_volume": buzz_volume,
+            "avg_buzz_sentiment": buzz_sentiment,
+            "top_keyword": tuple(top_keyword) if top_keyword else ("", 0),
+        }
+
+    def platform_distribution(self):
+        rows = self._fetchall(
+            "SELECT platform, COUNT(*), SUM(followers), AVG(engagement_rate), AVG(influence_score) "
+            "FROM kols GROUP BY platform"
+        )
+        stats = {r[0]: r for r in rows}
+        return {
+            platform: {
+                "count": stats[platform][1],
+                "total_followers": stats[platform][2],
+                "avg_engagement": round(stats[platform][3], 2),
+                "avg_influence": round(stats[platform][4], 1),
+            }
+            for platform in mock_data.PLATFORMS + sorted(set(stats) - set(mock_data.PLATFORMS))
+            if platform in stats
+        }
+
+    def category_insights(self):
+        rows = self._fetchall(
+            "SELECT category, COUNT(*), SUM(followers), AVG(engagement_rate), AVG(influence_score), "
+            "(SELECT name FROM kols t WHERE t.category = k.category ORDER BY influence_score DESC, seq LIMIT 1) "
+            "FROM kols k GROUP BY category"
+        )
+        stats = {r[0]: r for r in rows}
+        return [
+            {
+                "category": category,
+                "kol_count": stats[category][1],
+                "total_reach": stats[category][2],
+                "avg_engagement": round(stats[category][3], 2),
+                "avg_influence": round(stats[category][4], 1),
+                "top_kol": stats[category][5],
+            }
+            for category in mock_data.CATEGORIES + sorted(set(stats) - set(mock_data.CATEGORIES))
+            if category in stats
+        ]
+
+
+def create_storage() -> Storage:
+    """依環境變數建立儲存實作"""
+    backend = os.getenv("STORAGE_BACKEND", "memory")
+    if backend == "sqlite":
+        return SQLiteStorage(
+            os.getenv("SQLITE_PATH", "data/influence.db"),
+            pool_size=int(os.getenv("SQLITE_POOL_SIZE", "4")),
+            pool_timeout=float(os.getenv("SQLITE_POOL_TIMEOUT", "10")),
+        )
+    return MemoryStorage()
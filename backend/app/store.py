@@ -0,0 +1,461 @@
+"""
+KOL 欄式資料表
+將 KOL 各欄位存為 NumPy 陣列，並預先建立每個排序鍵的排列索引：
+- 篩選條件合併為單一向量化布林遮罩；類別與標籤條件以點陣圖索引（app/bitmap.py）的位元運算求得
+- 排序沿預先排好的索引掃描，取前 limit 筆即停止，不需排序整份名單
+"""
+
+from collections.abc import Mapping, Sequence
+from typing import Iterator
+
+import numpy as np
+
+from .bitmap import DIMENSIONS, BitmapIndex, pack, unpack
+from .pagination import InvalidCursor
+
+# KOL 欄位（順序與 mock_data.generate_kol_profiles 輸出一致）
+FIELDS = (
+    "id", "name", "avatar", "platform", "category", "followers",
+    "engagement_rate", "avg_likes", "avg_comments", "avg_shares",
+    "influence_score", "sentiment_score", "authenticity_score",
+    "audience_quality_score", "tags", "price_range",
+    "collaboration_count", "brand_fit_tags",
+)
+
+NUMERIC_COLUMNS = {
+    "followers": np.int64,
+    "engagement_rate": np.float64,
+    "avg_likes": np.int64,
+    "avg_comments": np.int64,
+    "avg_shares": np.int64,
+    "influence_score": np.float64,
+    "sentiment_score": np.float64,
+    "authenticity_score": np.float64,
+    "audience_quality_score": np.float64,
+    "collaboration_count": np.int64,
+}
+
+# 以字典編碼存放的低基數欄位（標籤列表的組合數量有限，整組編碼）
+CATEGORICAL_COLUMNS = ("platform", "category", "price_range", "tags", "brand_fit_tags")
+
+SORT_KEYS = ("influence_score", "followers", "engagement_rate", "sentiment_score")
+
+# 沿排序索引掃描時每次檢查的筆數
+_SCAN_BLOCK = 4096
+
+# 保留的異動列號筆數，供衍生索引增量更新；更早的異動只能整份重建
+CHANGE_LOG_SIZE = 65536
+# 衍生索引（搜尋、推薦、相似度）異動的列超過此數（或名單的 1%）時整份重建
+REBUILD_MIN_DIRTY = 4096
+
+
+def _key(value):
+    """字典編碼用的鍵；列表值以 tuple 判斷是否相同"""
+    return tuple(value) if isinstance(value, list) else value
+
+
+def _encode(values: list) -> tuple[list, np.ndarray]:
+    """字典編碼：回傳 (值表, 代碼陣列)"""
+    lookup: dict = {}
+    table: list = []
+    codes = np.empty(len(values), dtype=np.int32)
+    for i, value in enumerate(values):
+        key = _key(value)
+        code = lookup.get(key)
+        if code is None:
+            code = lookup[key] = len(table)
+            table.append(value)
+        codes[i] = code
+    return table, codes
+
+
+def decode_rows(columns: dict[str, np.ndarray], dictionaries: dict[str, list], indices: np.ndarray) -> list[dict]:
+    """將欄式資料的指定列還原為 KOL dict（欄位順序與原始資料一致）"""
+    values = []
+    for name in FIELDS:
+        col = columns[name][indices].tolist()
+        if name in dictionaries:
+            table = dictionaries[name]
+            col = [table[c] for c in col]
+        values.append(col)
+    return [dict(zip(FIELDS, row)) for row in zip(*values)]
+
+
+def aggregate(columns: dict[str, np.ndarray], keys: np.ndarray, size: int) -> dict[str, np.ndarray]:
+    """依群組代碼（0 ~ size-1）彙總：筆數，粉絲、互動率、影響力的總和，
+    以及影響力最高的列號（同分取先出現者，沒有資料的群組為 -1）與其影響力
+    """
+    influence = columns["influence_score"][:len(keys)]
+    best = np.full(size, -np.inf)
+    np.maximum.at(best, keys, influence)
+    # 同分的列可能很多（影響力有上限），以 minimum.at 取最小列號，不需排序
+    hits = np.flatnonzero(influence == best[keys])
+    top = np.full(size, len(keys))
+    np.minimum.at(top, keys[hits], hits)
+    top[top == len(keys)] = -1
+    return {
+        "count": np.bincount(keys, minlength=size),
+        "followers": np.bincount(keys, weights=columns["followers"][:len(keys)], minlength=size),
+        "engagement_rate": np.bincount(keys, weights=columns["engagement_rate"][:len(keys)], minlength=size),
+        "influence_score": np.bincount(keys, weights=influence, minlength=size),
+        "top": top,
+        "top_influence": best,
+    }
+
+
+class KOLRecords(Sequence):
+    """欄式資料的 KOL dict 唯讀視圖；取用時才還原，欄位異動後立即反映"""
+
+    def __init__(self, columns: dict[str, np.ndarray], dictionaries: dict[str, list]):
+        self.columns = columns
+        self.dictionaries = dictionaries
+
+    def __len__(self) -> int:
+        return len(self.columns["id"])
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return decode_rows(self.columns, self.dictionaries, np.arange(len(self))[index])
+        if not -len(self) <= index < len(self):
+            raise IndexError("KOL index out of range")
+        return decode_rows(self.columns, self.dictionaries, [index % len(self)])[0]
+
+    def __iter__(self) -> Iterator[dict]:
+        for start in range(0, len(self), _SCAN_BLOCK):
+            yield from decode_rows(self.columns, self.dictionaries, np.arange(start, min(start + _SCAN_BLOCK, len(self))))
+
+
+class KOLIndex(Mapping):
+    """KOL ID → dict 的唯讀視圖，依欄式資料表的列號還原"""
+
+    def __init__(self, store: "KOLColumnStore"):
+        self.store = store
+
+    def __getitem__(self, kol_id: str) -> dict:
+        row = self.store.row_of(kol_id)
+        if row is None:
+            raise KeyError(kol_id)
+        return self.store.rows([row])[0]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.store.columns["id"].tolist())
+
+    def __len__(self) -> int:
+        return self.store.size
+
+
+class KOLColumnStore:
+    """KOL 欄式資料表與排序索引"""
+
+    def __init__(
+        self,
+        columns: dict[str, np.ndarray],
+        dictionaries: dict[str, list],
+        indexes: dict[str, np.ndarray] | None = None,
+    ):
+        self.columns = columns
+        self.dictionaries = dictionaries
+        self.size = len(columns["id"])
+        self._codes = {
+            name: {_key(value): code for code, value in enumerate(dictionaries[name])}
+            for name in CATEGORICAL_COLUMNS
+        }
+        self._rows: dict[str, int] | None = None
+        # 每次異動遞增，供衍生資料判斷是否需要重建
+        self.version = 0
+        # 最近異動的列號；_changes[i] 為第 _changes_base + i + 1 版的異動
+        self._changes: list[int] = []
+        self._changes_base = 0
+        # 類別與標籤的點陣圖索引，首次篩選時建立，之後隨 upsert 更新
+        self._bitmaps: BitmapIndex | None = None
+        if indexes:
+            self._load_sort_indexes(indexes)
+        else:
+            self._build_sort_indexes()
+
+    def _build_sort_indexes(self) -> None:
+        """每個排序鍵各存一份升冪與降冪排列；穩定排序讓同分者維持原始順序
+
+        另存排列後的鍵值（降冪取負值，兩者皆為遞增），供分頁游標以二分搜尋定位
+        """
+        self.sort_indexes: dict[tuple[str, str], np.ndarray] = {}
+        self._sorted_keys: dict[tuple[str, str], np.ndarray] = {}
+        for key in SORT_KEYS:
+            col = self.columns[key]
+            for direction, values in (("asc", col), ("desc", -col)):
+                perm = np.argsort(values, kind="stable")
+                self.sort_indexes[(key, direction)] = perm
+                self._sorted_keys[(key, direction)] = values[perm]
+        self._natural = np.arange(self.size)
+        self._sort_dirty = False
+
+    def index_arrays(self) -> dict[str, np.ndarray]:
+        """排序索引（與排列後的鍵值）攤平為陣列，供資料快照保存"""
+        if self._sort_dirty:
+            self._build_sort_indexes()
+        arrays = {}
+        for (key, direction), perm in self.sort_indexes.items():
+            arrays[f"{key}.{direction}"] = perm
+            arrays[f"{key}.{direction}.keys"] = self._sorted_keys[(key, direction)]
+        return arrays
+
+    def _load_sort_indexes(self, indexes: dict[str, np.ndarray]) -> None:
+        """使用快照中預先算好的排序索引，不需重新排序"""
+        self.sort_indexes = {}
+        self._sorted_keys = {}
+        for key in SORT_KEYS:
+            for direction in ("asc", "desc"):
+                self.sort_indexes[(key, direction)] = indexes[f"{key}.{direction}"]
+                self._sorted_keys[(key, direction)] = indexes[f"{key}.{direction}.keys"]
+        self._natural = np.arange(self.size)
+        self._sort_dirty = False
+
+    @classmethod
+    def from_records(cls, kols: list[dict]) -> "KOLColumnStore":
+        """由 KOL dict 列表建立欄式資料表"""
+        n = len(kols)
+        columns: dict[str, np.ndarray] = {}
+        dictionaries: dict[str, list] = {}
+
+        for name, dtype in NUMERIC_COLUMNS.items():
+            columns[name] = np.fromiter((k[name] for k in kols), dtype=dtype, count=n)
+        for name in CATEGORICAL_COLUMNS:
+            dictionaries[name], columns[name] = _encode([k[name] for k in kols])
+        for name in ("id", "name", "avatar"):
+            col = np.empty(n, dtype=object)
+            col[:] = [k[name] for k in kols]
+            columns[name] = col
+
+        return cls(columns, dictionaries)
+
+    def code_of(self, column: str, value) -> int:
+        """取得類別值的代碼，不存在時回傳 -1"""
+        return self._codes[column].get(_key(value), -1)
+
+    def row_of(self, kol_id: str) -> int | None:
+        """取得 KOL ID 所在列號"""
+        if self._rows is None:
+            self._rows = {kol_id: i for i, kol_id in enumerate(self.columns["id"].tolist())}
+        return self._rows.get(kol_id)
+
+    def bitmaps(self) -> BitmapIndex:
+        if self._bitmaps is None:
+            self._bitmaps = BitmapIndex(self.columns, self.dictionaries, self.size)
+        return self._bitmaps
+
+    def upsert(self, kol: dict) -> None:
+        """新增或更新一筆 KOL；排序索引於下次查詢時重建，點陣圖索引直接更新該列"""
+        row = self.row_of(kol["id"])
+        old = {}
+        if row is not None:
+            old = {name: int(self.columns[name][row]) for name in DIMENSIONS}
+        else:
+            row = self.size
+            for name, col in self.columns.items():
+                self.columns[name] = np.resize(col, self.size + 1)
+            self.size += 1
+            self._rows[kol["id"]] = row
+
+        for name in FIELDS:
+            value = kol[name]
+            if name in self.dictionaries:
+                code = self.code_of(name, value)
+                if code < 0:
+                    code = len(self.dictionaries[name])
+                    self.dictionaries[name].append(value)
+                    self._codes[name][_key(value)] = code
+                value = code
+            col = self.columns[name]
+            # 固定寬度字串欄位放不下時加寬
+            if col.dtype.kind == "U" and len(value) > col.dtype.itemsize // 4:
+                col = self.columns[name] = col.astype(f"U{len(value)}")
+            col[row] = value
+
+        if self._bitmaps is not None:
+            new = {name: int(self.columns[name][row]) for name in DIMENSIONS}
+            self._bitmaps.update(row, old, new, self.dictionaries)
+        self._sort_dirty = True
+        self.version += 1
+        self._changes.append(row)
+        if len(self._changes) > CHANGE_LOG_SIZE:
+            drop = len(self._changes) - CHANGE_LOG_SIZE // 2
+            del self._changes[:drop]
+            self._changes_base += drop
+
+    def changed_since(self, version: int) -> list[int] | None:
+        """自某一版之後異動過的列號（可能重複）；異動紀錄已不完整時回傳 None"""
+        if version < self._changes_base or version > self.version:
+            return None
+        return self._changes[version - self._changes_base:]
+
+    def filter_mask(
+        self,
+        platform: str | None = None,
+        category: str | None = None,
+        min_followers: int | None = None,
+        max_followers: int | None = None,
+        min_engagement: float | None = None,
+        tags_any: list[str] | None = None,
+        tags_all: list[str] | None = None,
+        brand_fit: list[str] | None = None,
+    ) -> np.ndarray | None:
+        """將所有篩選條件合併為一個布林遮罩；沒有條件時回傳 None"""
+        filters = self.bitmaps().filters(platform, category, tags_any, tags_all, brand_fit) \
+            if platform or category or tags_any or tags_all or brand_fit else {}
+        mask = unpack(np.bitwise_and.reduce(list(filters.values())), self.size) if filters else None
+        numeric = self._range_mask(min_followers, max_followers, min_engagement)
+        if numeric is not None:
+            mask = numeric if mask is None else np.logical_and(mask, numeric, out=mask)
+        return mask
+
+    def _range_mask(
+        self,
+        min_followers: int | None = None,
+        max_followers: int | None = None,
+        min_engagement: float | None = None,
+    ) -> np.ndarray | None:
+        """數值範圍條件的布林遮罩；沒有條件時回傳 None"""
+        mask = None
+
+        def _and(cond: np.ndarray) -> None:
+            nonlocal mask
+            mask = cond if mask is None else np.logical_and(mask, cond, out=mask)
+
+        if min_followers:
+            _and(self.columns["followers"] >= min_followers)
+        if max_followers:
+            _and(self.columns["followers"] <= max_followers)
+        if min_engagement:
+            _and(self.columns["engagement_rate"] >= min_engagement)
+
+        return mask
+
+    def sorted_index(self, sort_by: str, order: str = "desc") -> np.ndarray:
+        """取得排序鍵對應的排列索引；不支援的鍵維持原始順序"""
+        if self._sort_dirty:
+            self._build_sort_indexes()
+        if sort_by not in SORT_KEYS:
+            return self._natural
+        return self.sort_indexes[(sort_by, "desc" if order == "desc" else "asc")]
+
+    def seek(self, sort_by: str, order: str, value, kol_id: str) -> int | None:
+        """Keyset 分頁：回傳排列索引中緊接在 (value, kol_id) 之後的位置；ID 不存在時回傳 None"""
+        row = self.row_of(kol_id)
+        if row is None:
+            return None
+        if self._sort_dirty:
+            self._build_sort_indexes()
+        if sort_by not in SORT_KEYS:
+            return row + 1
+
+        direction = "desc" if order == "desc" else "asc"
+        keys = self._sorted_keys[(sort_by, direction)]
+        target = -value if direction == "desc" else value
+        lo = int(np.searchsorted(keys, target, side="left"))
+        hi = int(np.searchsorted(keys, target, side="right"))
+        # 同分區段內依列號遞增（穩定排序）
+        ties = self.sort_indexes[(sort_by, direction)][lo:hi]
+        return lo + int(np.searchsorted(ties, row, side="right"))
+
+    def top(self, perm: np.ndarray, mask: np.ndarray | None, limit: int) -> np.ndarray:
+        """沿排列索引依序掃描，取出前 limit 筆符合遮罩的列號"""
+        limit = max(limit, 0)
+        if mask is None:
+            return perm[:limit]
+
+        found: list[np.ndarray] = []
+        remaining = limit
+        for start in range(0, len(perm), _SCAN_BLOCK):
+            if remaining <= 0:
+                break
+            block = perm[start:start + _SCAN_BLOCK]
+            hits = block[mask[block]][:remaining]
+            found.append(hits)
+            remaining -= len(hits)
+
+        return np.concatenate(found) if found else perm[:0]
+
+    def rows(self, indices: np.ndarray) -> list[dict]:
+        """將列號還原為 KOL dict"""
+        return decode_rows(self.columns, self.dictionaries, indices)
+
+    def group_stats(self, column: str) -> dict:
+        """依類別欄位分組彙總（見 aggregate）"""
+        return aggregate(self.columns, self.columns[column], len(self.dictionaries[column]))
+
+    def scan(
+        self,
+        platform: str | None = None,
+        category: str | None = None,
+        min_followers: int | None = None,
+        max_followers: int | None = None,
+        min_engagement: float | None = None,
+        sort_by: str = "influence_score",
+        order: str = "desc",
+        batch: int = 1024,
+        tags_any: list[str] | None = None,
+        tags_all: list[str] | None = None,
+        brand_fit: list[str] | None = None,
+    ) -> Iterator[list[dict]]:
+        """依排序逐批產出所有符合條件的 KOL，每次只還原 batch 筆"""
+        mask = self.filter_mask(
+            platform, category, min_followers, max_followers, min_engagement, tags_any, tags_all, brand_fit
+        )
+        perm = self.sorted_index(sort_by, order)
+        for start in range(0, len(perm), batch):
+            block = perm[start:start + batch]
+            if mask is not None:
+                block = block[mask[block]]
+            if len(block):
+                yield self.rows(block)
+
+    def query(
+        self,
+        platform: str | None = None,
+        category: str | None = None,
+        min_followers: int | None = None,
+        max_followers: int | None = None,
+        min_engagement: float | None = None,
+        sort_by: str = "influence_score",
+        order: str = "desc",
+        limit: int = 50,
+        after: tuple | None = None,
+        tags_any: list[str] | None = None,
+        tags_all: list[str] | None = None,
+        brand_fit: list[str] | None = None,
+    ) -> tuple[int, list[dict]]:
+        """篩選 + 排序 + 取前 limit 筆，回傳 (符合總數, KOL 列表)
+
+        after 為上一頁最後一筆的 (排序值, ID)，從其後開始取
+        """
+        mask = self.filter_mask(platform, category, min_followers, max_followers, min_engagement,
+                                tags_any, tags_all, brand_fit)
+        total = self.size if mask is None else int(np.count_nonzero(mask))
+        perm = self.sorted_index(sort_by, order)
+        if after is not None:
+            start = self.seek(sort_by, order, *after)
+            if start is None:
+                raise InvalidCursor("Invalid cursor")
+            perm = perm[start:]
+        # 沒有符合的列時不需沿排序索引掃描整份名單
+        indices = self.top(perm, mask, limit) if total else perm[:0]
+        return total, self.rows(indices)
+
+    def facets(
+        self,
+        platform: str | None = None,
+        category: str | None = None,
+        min_followers: int | None = None,
+        max_followers: int | None = None,
+        min_engagement: float | None = None,
+        tags_any: list[str] | None = None,
+        tags_all: list[str] | None = None,
+        brand_fit: list[str] | None = None,
+    ) -> dict[str, dict]:
+        """platform、category、標籤與品牌契合標籤每個值的符合筆數（見 BitmapIndex.facets）"""
+        index = self.bitmaps()
+        numeric = self._range_mask(min_followers, max_followers, min_engagement)
+        return index.facets(
+            index.filters(platform, category, tags_any, tags_all, brand_fit),
+            None if numeric is None else pack(numeric),
+        )
@@ -0,0 +1,287 @@
+"""
+輿情時間序列
+每個關鍵字各存一組依日期排序的連續陣列（日期、聲量、情緒、來源分佈）：
+- 日期區間查詢以二分搜尋定位，不需掃描完整歷史
+- 依日 / 週 / 月分桶降採樣，聲量可取總和或平均
+"""
+
+from typing import Iterator
+
+import numpy as np
+
+from .pagination import InvalidCursor
+
+INTERVALS = ("day", "week", "month")
+AGGREGATIONS = ("sum", "avg")
+
+
+def to_day(date: str) -> int:
+    """YYYY-MM-DD → 自 1970-01-01 起的天數"""
+    return int(np.datetime64(date, "D").astype(np.int64))
+
+
+def from_days(days: np.ndarray) -> list[str]:
+    """天數陣列 → YYYY-MM-DD 字串列表"""
+    return np.datetime_as_string(days.astype("datetime64[D]"), unit="D").tolist()
+
+
+def add_mentions(
+    trend: dict | None, keyword: str, date: str, count: int, sentiment_sum: float, source_counts: dict[str, int]
+) -> dict:
+    """累加提及數：聲量相加，情緒與來源佔比（百分比）依聲量加權平均
+
+    結果不四捨五入（輸出時才由 round_trend 進位），多次累加不會累積進位誤差
+    """
+    volume = trend["volume"] if trend else 0
+    sentiment = trend["sentiment"] if trend else 0.0
+    breakdown = trend["source_breakdown"] if trend else {}
+    total = volume + count
+    return {
+        "keyword": keyword,
+        "date": date,
+        "volume": total,
+        "sentiment": (sentiment * volume + sentiment_sum) / total,
+        "source_breakdown": {
+            s: (breakdown.get(s, 0) * volume + source_counts.get(s, 0) * 100) / total
+            for s in dict.fromkeys([*breakdown, *source_counts])
+        },
+    }
+
+
+def round_trend(trend: dict) -> dict:
+    """輸出格式：情緒取兩位小數，來源佔比取整數"""
+    return {
+        **trend,
+        "sentiment": round(trend["sentiment"], 2),
+        "source_breakdown": {s: round(w) for s, w in trend["source_breakdown"].items()},
+    }
+
+
+def bucket_starts(days: np.ndarray, interval: str) -> np.ndarray:
+    """每一天所屬分桶的起始日（週以星期一為起點）"""
+    if interval == "week":
+        # 1970-01-01 為星期四
+        return days - (days + 3) % 7
+    if interval == "month":
+        return days.astype("datetime64[D]").astype("datetime64[M]").astype("datetime64[D]").astype(np.int64)
+    return days
+
+
+def next_bucket(day: int, interval: str) -> int:
+    """day 所屬分桶的下一個分桶起始日"""
+    if interval == "month":
+        month = np.datetime64(int(day), "D").astype("datetime64[M]") + 1
+        return int(month.astype("datetime64[D]").astype(np.int64))
+    if interval == "week":
+        return int(bucket_starts(np.int64(day), "week")) + 7
+    return day + 1
+
+
+# 每個分桶最多包含的天數，用於分頁時限制需要讀取的範圍
+_BUCKET_SPAN = {"day": 1, "week": 7, "month": 31}
+
+
+class KeywordSeries:
+    """單一關鍵字的日序列，容量不足時倍增"""
+
+    def __init__(self, sources: int, capacity: int = 32):
+        self.size = 0
+        self._days = np.empty(capacity, dtype=np.int64)
+        self._volume = np.empty(capacity, dtype=np.int64)
+        self._sentiment = np.empty(capacity, dtype=np.float64)
+        self._sources = np.empty((capacity, sources), dtype=np.int64)
+
+    @classmethod
+    def from_arrays(cls, days, volume, sentiment, sources) -> "KeywordSeries":
+        order = np.argsort(days, kind="stable")
+        series = cls(sources.shape[1], capacity=max(len(days), 1))
+        series.size = len(days)
+        series._days[:series.size] = days[order]
+        series._volume[:series.size] = volume[order]
+        series._sentiment[:series.size] = sentiment[order]
+        series._sources[:series.size] = sources[order]
+        return series
+
+    @property
+    def days(self) -> np.ndarray:
+        return self._days[:self.size]
+
+    @property
+    def volume(self) -> np.ndarray:
+        return self._volume[:self.size]
+
+    @property
+    def sentiment(self) -> np.ndarray:
+        return self._sentiment[:self.size]
+
+    @property
+    def sources(self) -> np.ndarray:
+        return self._sources[:self.size]
+
+    def _grow(self) -> None:
+        capacity = len(self._days) * 2
+        for name in ("_days", "_volume", "_sentiment", "_sources"):
+            old = getattr(self, name)
+            new = np.empty((capacity, *old.shape[1:]), dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+    def upsert(self, day: int, volume: int, sentiment: float, sources: list[int]) -> None:
+        """寫入某一天的數據；已存在則覆寫，否則依日期插入"""
+        pos = int(np.searchsorted(self.days, day))
+        if pos < self.size and self._days[pos] == day:
+            self._volume[pos] = volume
+            self._sentiment[pos] = sentiment
+            self._sources[pos] = sources
+            return
+
+        if self.size == len(self._days):
+            self._grow()
+        # 新資料通常是最新一天，直接附加；較早的日期才需要搬移
+        for arr in (self._days, self._volume, self._sentiment, self._sources):
+            arr[pos + 1:self.size + 1] = arr[pos:self.size]
+        self._days[pos] = day
+        self._volume[pos] = volume
+        self._sentiment[pos] = sentiment
+        self._sources[pos] = sources
+        self.size += 1
+
+    def range(self, start: int | None, end: int | None) -> slice:
+        """以二分搜尋取得 [start, end] 日期區間的切片"""
+        days = self.days
+        lo = 0 if start is None else int(np.searchsorted(days, start, side="left"))
+        hi = self.size if end is None else int(np.searchsorted(days, end, side="right"))
+        return slice(lo, hi)
+
+
+class BuzzTimeSeries:
+    """所有關鍵字的輿情時間序列"""
+
+    def __init__(self, sources: list[str]):
+        self.sources = sources
+        self.series: dict[str, KeywordSeries] = {}
+
+    @classmethod
+    def from_records(cls, trends: list[dict]) -> "BuzzTimeSeries":
+        """由 generate_buzz_trends 格式的列表建立"""
+        sources = list(trends[0]["source_breakdown"]) if trends else []
+        ts = cls(sources)
+        grouped: dict[str, list[dict]] = {}
+        for t in trends:
+            grouped.setdefault(t["keyword"], []).append(t)
+        for keyword, rows in grouped.items():
+            ts.series[keyword] = KeywordSeries.from_arrays(
+                np.array([to_day(r["date"]) for r in rows], dtype=np.int64),
+                np.array([r["volume"] for r in rows], dtype=np.int64),
+                np.array([r["sentiment"] for r in rows], dtype=np.float64),
+                np.array([[r["source_breakdown"].get(s, 0) for s in sources] for r in rows], dtype=np.int64).reshape(-1, len(sources)),
+            )
+        return ts
+
+    @property
+    def keywords(self) -> list[str]:
+        return list(self.series)
+
+    @property
+    def latest_day(self) -> int | None:
+        ends = [int(s.days[-1]) for s in self.series.values() if s.size]
+        return max(ends) if ends else None
+
+    def upsert(self, keyword: str, date: str, volume: int, sentiment: float, source_breakdown: dict[str, int]) -> None:
+        """寫入某關鍵字某一天的數據"""
+        series = self.series.get(keyword)
+        if series is None:
+            series = self.series[keyword] = KeywordSeries(len(self.sources))
+        series.upsert(to_day(date), volume, sentiment, [source_breakdown.get(s, 0) for s in self.sources])
+
+    def query(
+        self,
+        keywords: list[str] | None = None,
+        start: str | None = None,
+        end: str | None = None,
+        interval: str = "day",
+        agg: str = "sum",
+        after: tuple[str, str] | None = None,
+        limit: int | None = None,
+    ) -> list[dict]:
+        """查詢日期區間內的趨勢，依 interval 分桶；列依關鍵字、日期排序
+
+        after 為上一頁最後一列的 (關鍵字, 日期)，從其後開始取最多 limit 列
+        """
+        return [row for rows in self.scan(keywords, start, end, interval, agg, after, limit) for row in rows]
+
+    def scan(
+        self,
+        keywords: list[str] | None = None,
+        start: str | None = None,
+        end: str | None = None,
+        interval: str = "day",
+        agg: str = "sum",
+        after: tuple[str, str] | None = None,
+        limit: int | None = None,
+    ) -> Iterator[list[dict]]:
+        """同 query，但逐關鍵字產出，供串流匯出使用"""
+        start_day = to_day(start) if start else None
+        end_day = to_day(end) if end else None
+        keywords = list(keywords if keywords is not None else self.series)
+
+        resume_day = None
+        if after is not None:
+            if after[0] not in keywords:
+                raise InvalidCursor("Invalid cursor")
+            keywords = keywords[keywords.index(after[0]):]
+            resume_day = next_bucket(to_day(after[1]), interval)
+
+        remaining = limit
+        for keyword in keywords:
+            if remaining is not None and remaining <= 0:
+                return
+            first = start_day
+            if resume_day is not None:
+                first = resume_day if first is None else max(first, resume_day)
+                resume_day = None
+            series = self.series.get(keyword)
+            if series is None:
+                continue
+            window = series.range(first, end_day)
+            if remaining is not None:
+                # 只讀取足以湊滿剩餘列數的天數
+                window = slice(window.start, min(window.stop, window.start + remaining * _BUCKET_SPAN[interval]))
+            if window.start < window.stop:
+                rows = self._rows(keyword, series, window, interval, agg)
+                if remaining is not None:
+                    rows = rows[:remaining]
+                    remaining -= len(rows)
+                yield rows
+
+    def _rows(self, keyword: str, series: KeywordSeries, window: slice, interval: str, agg: str) -> list[dict]:
+        days = series.days[window]
+        volume = series.volume[window]
+        sentiment = series.sentiment[window]
+        sources = series.sources[window]
+
+        if interval == "day":
+            volumes = volume.tolist()
+            sentiments = sentiment.tolist()
+            breakdowns = sources.tolist()
+        else:
+            # 日期已排序，同一分桶必為連續區段
+            buckets = bucket_starts(days, interval)
+            starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+            counts = np.diff(np.r_[starts, len(days)])
+            days = buckets[starts]
+            volume_sum = np.add.reduceat(volume, starts)
+            volumes = (volume_sum if agg == "sum" else np.round(volume_sum / counts, 1)).tolist()
+            sentiments = np.round(np.add.reduceat(sentiment, starts) / counts, 2).tolist()
+            breakdowns = np.round(np.add.reduceat(sources, starts, axis=0) / counts[:, None]).astype(np.int64).tolist()
+
+        return [
+            {
+                "keyword": keyword,
+                "date": date,
+                "volume": v,
+                "sentiment": s,
+                "source_breakdown": dict(zip(self.sources, b)),
+            }
+            for date, v, s, b in zip(from_days(days), volumes, sentiments, breakdowns)
+        ]
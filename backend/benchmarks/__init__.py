@@ -0,0 +1 @@
+"""後端效能基準測試"""
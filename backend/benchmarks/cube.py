@@ -0,0 +1,119 @@
+"""
+GET /api/insights/cube 分組彙總效能：每個群組值各篩選一次 list（舊，O(群組數 × KOL 數)） vs. 基礎立方體彙總（新）
+
+- build：由欄式資料建立基礎立方體（KOL 異動後第一次查詢的成本）
+- roll-up：由基礎立方體彙總到指定維度組合
+- cached：命中快取的維度組合（只產生回應）
+
+執行方式（於 backend 目錄）：
+    uv run python -m benchmarks.cube --sizes 10000 100000 1000000
+"""
+
+import argparse
+import itertools
+import time
+
+import numpy as np
+
+from app.cube import FOLLOWER_TIERS, InsightCube
+from app.store import decode_rows
+
+from .recommend import SyntheticStorage
+
+# 代表性的維度組合
+GROUPINGS = [
+    ["platform"],
+    ["category"],
+    ["platform", "category"],
+    ["category", "follower_tier"],
+    ["platform", "category", "follower_tier", "price_range"],
+]
+
+
+def _tier(followers: int) -> str:
+    return next(name for low, name in reversed(FOLLOWER_TIERS) if followers >= low)
+
+
+def legacy_cube(kols: list[dict], dimensions: list[str], values: dict[str, list]) -> list[dict]:
+    """舊版平台分佈與類別洞察的寫法：每個群組值的組合各篩選一次"""
+    cells = []
+    for combo in itertools.product(*(values[name] for name in dimensions)):
+        members = kols
+        for name, value in zip(dimensions, combo):
+            if name == "follower_tier":
+                members = [k for k in members if _tier(k["followers"]) == value]
+            else:
+                members = [k for k in members if k[name] == value]
+        if members:
+            cells.append({
+                **dict(zip(dimensions, combo)),
+                "count": len(members),
+                "total_followers": sum(k["followers"] for k in members),
+                "avg_engagement": round(sum(k["engagement_rate"] for k in members) / len(members), 2),
+                "avg_influence": round(sum(k["influence_score"] for k in members) / len(members), 1),
+                "top_kol": max(members, key=lambda x: x["influence_score"])["id"],
+            })
+    return cells
+
+
+def _time_ms(fn, repeat: int) -> float:
+    """回傳最佳一次的毫秒數"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def run(sizes: list[int], repeat: int = 5, legacy_max: int = 100_000) -> list[dict]:
+    results = []
+    for n in sizes:
+        storage = SyntheticStorage(n)
+        store = storage.store
+        kols = decode_rows(store.columns, store.dictionaries, np.arange(n)) if n <= legacy_max else None
+        values = {name: store.dictionaries[name] for name in ("platform", "category", "price_range")}
+        values["follower_tier"] = [name for _, name in FOLLOWER_TIERS]
+
+        cube = InsightCube(storage)
+        build_ms = _time_ms(lambda: cube._build(store), repeat)
+        for dimensions in GROUPINGS:
+            after = cube.query(dimensions)
+            if kols is not None:
+                before = legacy_cube(kols, dimensions, values)
+                assert sorted((c["count"], c["top_kol"]) for c in before) == \
+                    sorted((c["count"], c["top_kol"]["id"]) for c in after["cells"])
+
+            def roll_up():
+                cube._cache.clear()
+                cube.query(dimensions)
+
+            results.append({
+                "size": n,
+                "dimensions": dimensions,
+                "cells": len(after["cells"]),
+                "before_ms": _time_ms(lambda: legacy_cube(kols, dimensions, values), 1) if kols is not None else None,
+                "build_ms": build_ms,
+                "roll_up_ms": _time_ms(roll_up, repeat),
+                "cached_ms": _time_ms(lambda: cube.query(dimensions), repeat),
+            })
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--legacy-max", type=int, default=100_000, help="超過此規模時略過舊實作")
+    args = parser.parse_args()
+
+    print(f"{'KOLs':>9}  {'cells':>5}  {'before (ms)':>11}  {'build (ms)':>10}  {'roll-up (ms)':>12}  "
+          f"{'cached (ms)':>11}  dimensions")
+    for r in run(args.sizes, args.repeat, args.legacy_max):
+        before = f"{r['before_ms']:>11.1f}" if r["before_ms"] is not None else f"{'-':>11}"
+        print(f"{r['size']:>9,}  {r['cells']:>5}  {before}  {r['build_ms']:>10.1f}  {r['roll_up_ms']:>12.2f}  "
+              f"{r['cached_ms']:>11.2f}  {','.join(r['dimensions'])}")
+
+
+if __name__ == "__main__":
+    main()
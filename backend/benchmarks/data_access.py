@@ -0,0 +1,125 @@
+"""
+資料存取函式的微基準：直接呼叫端點函式與其資料來源（不經 HTTP 與回應快取），
+在 1 千 / 10 萬 / 100 萬筆合成 KOL 上量測每次呼叫的時間，結果寫成 JSON 並可與基準線比較
+
+每個規模在獨立的子行程中執行（數據規模於匯入 app 時決定）；首次呼叫建立的索引與彙總不計入。
+
+執行方式（於 backend 目錄）：
+    uv run python -m benchmarks.data_access --sizes 1000 100000 1000000 --out results/data_access.json
+    uv run python -m benchmarks.data_access --sizes 1000 100000 1000000 --baseline results/data_access.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks import results as bench
+
+# 比較基準線時檢查的指標；毫秒以下的函式中位數易受排程干擾，以最佳值比較
+METRICS = ("best_ms",)
+
+
+def cases(api) -> list[tuple[str, object]]:
+    """(名稱, 無參數函式)；端點函式的參數全部明確傳入，不依賴 FastAPI 的預設值解析"""
+    store = api.STORAGE.column_store()
+    kol_id = str(store.columns["id"][len(store.columns["id"]) // 2])
+    campaign_id = api.STORAGE.list_campaigns(limit=1)[0]["id"]
+
+    def get_kols(**filters):
+        params = dict(platform=None, category=None, min_followers=None, max_followers=None,
+                      min_engagement=None, sort_by="influence_score", order="desc", limit=50, cursor=None,
+                      tags_any=None, tags_all=None, brand_fit=None, facets=False)
+        return lambda: api.get_kols(**{**params, **filters})
+
+    return [
+        ("get_kols", get_kols()),
+        ("get_kols filtered", get_kols(platform="instagram", category="美妝", min_followers=100_000,
+                                       sort_by="followers")),
+        ("get_kol_detail", lambda: api.get_kol_detail(kol_id)),
+        ("get_kol_audience", lambda: api.get_kol_audience(kol_id)),
+        ("get_campaigns", lambda: api.get_campaigns(status=None, brand=None, limit=20, cursor=None)),
+        ("get_campaign_performance", lambda: api.get_campaign_performance(campaign_id)),
+        ("get_buzz_trends", lambda: api.get_buzz_trends(
+            keyword=None, days=30, date_from=None, date_to=None, interval="day", agg="sum", limit=None, cursor=None)),
+        ("dashboard_overview", api._dashboard_overview),
+        ("data_stories", api._data_stories),
+        ("platform_distribution", api.STORAGE.platform_distribution),
+        ("category_insights", api.STORAGE.category_insights),
+        ("recommend_kols", lambda: api.recommend_kols(
+            category="美妝", budget=200_000, target_audience="18-35歲都會女性", objective="品牌曝光", limit=10)),
+    ]
+
+
+def measure(fn, repeat: int, min_seconds: float) -> dict:
+    """至少 repeat 次且累積 min_seconds 秒；回傳中位數與最佳值"""
+    fn()
+    samples, total = [], 0.0
+    while len(samples) < repeat or total < min_seconds:
+        started = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - started
+        samples.append(elapsed)
+        total += elapsed
+    return {
+        "calls": len(samples),
+        "median_ms": statistics.median(samples) * 1000,
+        "best_ms": min(samples) * 1000,
+    }
+
+
+def child(size: int, repeat: int, min_seconds: float) -> None:
+    os.environ["MOCK_KOL_COUNT"] = str(size)
+    from app import main as api
+
+    results = []
+    for name, fn in cases(api):
+        results.append({"name": name, "size": size, **measure(fn, repeat, min_seconds)})
+    print(json.dumps(results))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=20, help="每個函式的最少呼叫次數")
+    parser.add_argument("--min-seconds", type=float, default=0.5, help="每個函式的最少量測秒數")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default=None, help="結果 JSON 路徑")
+    parser.add_argument("--baseline", default=None, help="比較用的基準線 JSON")
+    parser.add_argument("--threshold", type=float, default=0.15, help="視為退化的變化比例")
+    parser.add_argument("--child", type=int, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child is not None:
+        child(args.child, args.repeat, args.min_seconds)
+        return
+
+    env = {**os.environ, "MOCK_SEED": str(args.seed), "RESPONSE_CACHE_MB": "0"}
+    env.pop("MOCK_SNAPSHOT_PATH", None)
+    results = []
+    print(f"{'function':<26}  {'KOLs':>9}  {'calls':>6}  {'median (ms)':>11}  {'best (ms)':>9}")
+    for size in args.sizes:
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.data_access", "--child", str(size),
+             "--repeat", str(args.repeat), "--min-seconds", str(args.min_seconds)],
+            env=env, check=True, capture_output=True, text=True,
+        )
+        for r in json.loads(out.stdout.strip().splitlines()[-1]):
+            results.append(r)
+            print(f"{r['name']:<26}  {size:>9,}  {r['calls']:>6}  {r['median_ms']:>11.3f}  {r['best_ms']:>9.3f}")
+
+    config = {k: v for k, v in vars(args).items() if k not in ("out", "baseline", "child")}
+    if args.out:
+        bench.save(args.out, "data_access", config, results)
+        print(f"\n結果已寫入 {args.out}")
+    if args.baseline:
+        baseline = bench.load(args.baseline)
+        if bench.report(bench.compare(results, baseline["results"], METRICS, args.threshold), args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+回應編碼的 CPU 時間：FastAPI 預設（jsonable_encoder + json.dumps） vs. orjson vs. 預先編碼快取
+
+執行方式（於 backend 目錄）：
+    uv run python -m benchmarks.encoding --repeat 200
+"""
+
+import argparse
+import json
+import time
+
+from fastapi.encoders import jsonable_encoder
+
+from app import main as api
+from app.responses import EncodedCache, dumps
+
+# (名稱, 產生回應內容的函式, 是否使用預先編碼快取)
+PAYLOADS = [
+    ("/api/dashboard/overview", api._dashboard_overview, True),
+    ("/api/stories/overview", api._data_stories, True),
+    ("/api/insights/platform", api.STORAGE.platform_distribution, True),
+    ("/api/insights/category", api.STORAGE.category_insights, True),
+    ("/api/kols?limit=50",
+     lambda: api.get_kols(limit=50, cursor=None, tags_any=None, tags_all=None, brand_fit=None, facets=False), False),
+    ("/api/kols/{kol_id}", lambda: api.get_kol_detail("kol_001"), False),
+    ("/api/campaigns", lambda: api.get_campaigns(limit=None, cursor=None), False),
+]
+
+
+def default_encode(content) -> bytes:
+    """FastAPI 未指定 response_class 時的路徑：jsonable_encoder 後由 JSONResponse 以 json.dumps 輸出"""
+    return json.dumps(
+        jsonable_encoder(content), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def _cpu_us(fn, repeat: int) -> float:
+    start = time.process_time()
+    for _ in range(repeat):
+        fn()
+    return (time.process_time() - start) / repeat * 1e6
+
+
+def run(repeat: int = 200) -> list[dict]:
+    cache = EncodedCache(api.STORAGE)
+    results = []
+    for name, build, cached in PAYLOADS:
+        content = build()
+        assert json.loads(default_encode(content)) == json.loads(dumps(content))
+        results.append({
+            "payload": name,
+            "kb": len(dumps(content)) / 1024,
+            "default_us": _cpu_us(lambda: default_encode(content), repeat),
+            "orjson_us": _cpu_us(lambda: dumps(content), repeat),
+            # 快取命中：查表並建立 Response
+            "cached_us": _cpu_us(lambda: cache.response(name, build), repeat) if cached else None,
+        })
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'payload':<26}  {'KB':>7}  {'default (us)':>12}  {'orjson (us)':>11}  {'cached (us)':>11}  {'speedup':>7}")
+    for r in run(args.repeat):
+        best = r["cached_us"] if r["cached_us"] is not None else r["orjson_us"]
+        cached = f"{r['cached_us']:>11.1f}" if r["cached_us"] is not None else f"{'-':>11}"
+        print(f"{r['payload']:<26}  {r['kb']:>7.1f}  {r['default_us']:>12.1f}  {r['orjson_us']:>11.1f}  "
+              f"{cached}  {r['default_us'] / max(best, 1e-3):>6.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+輿情匯入吞吐量測試：在同一行程內以 ASGI 持續 POST /api/ingest/buzz，量測每秒匯入的事件數、
+每批彙總的耗時，以及匯入期間一般請求（GET /api/kols）的延遲是否受影響
+
+- --producers 個用戶端各自送出 --batch 筆事件的請求，合計每秒 --rate 筆（0 為不限速，量測最大吞吐量）；
+  收到 429 時依背壓等待後重送
+- 先量測無匯入時的探測請求延遲作為對照，再於匯入期間量測；延遲自預定送出時間起算，包含等待事件迴圈的時間
+- 結束後等待佇列清空，確認所有事件都已寫入
+
+執行方式（於 backend 目錄）：
+    uv run python -m benchmarks.ingest --duration 10 --out results/ingest.json
+    uv run python -m benchmarks.ingest --duration 10 --rate 0
+    uv run python -m benchmarks.ingest --duration 10 --baseline results/ingest.json
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+import numpy as np
+import orjson
+
+from benchmarks import results as bench
+from benchmarks.load import request
+
+# 比較基準線時檢查的指標
+METRICS = ("events_per_s", "p50_ms", "p95_ms")
+
+SOURCES = ["instagram", "facebook", "youtube", "ptt", "news"]
+NDJSON = ((b"content-type", b"application/x-ndjson"),)
+
+
+def bodies(count: int, batch: int, keywords: int, seed: int) -> list[bytes]:
+    """預先產生 count 個請求本文（NDJSON），避免量測到事件產生的成本"""
+    rng = random.Random(seed)
+    names = [f"關鍵字{i:03d}" for i in range(keywords)]
+    now = time.time()
+    out = []
+    for _ in range(count):
+        events = [
+            {
+                "keyword": rng.choice(names),
+                "timestamp": now - rng.random() * 3 * 86400,
+                "source": rng.choice(SOURCES),
+                "sentiment": round(rng.random(), 2),
+            }
+            for _ in range(batch)
+        ]
+        out.append(b"\n".join(orjson.dumps(e) for e in events))
+    return out
+
+
+async def probe(app, stop: asyncio.Event, interval: float) -> list[float]:
+    """每 interval 秒送出一次 GET /api/kols，回傳自預定時間起算的延遲秒數"""
+    samples = []
+    due = time.perf_counter()
+    while not stop.is_set():
+        await request(app, "/api/kols", {"limit": 20})
+        finished = time.perf_counter()
+        samples.append(finished - due)
+        due = finished + interval
+        await asyncio.sleep(interval)
+    return samples
+
+
+def latency(name: str, size: int, samples: list[float]) -> dict:
+    ms = np.asarray(samples) * 1000 if samples else np.zeros(1)
+    return {
+        "name": name,
+        "size": size,
+        "requests": len(samples),
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "max_ms": float(ms.max()),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--kols", type=int, default=0, help="合成 KOL 數（0 為展示數據）")
+    parser.add_argument("--duration", type=float, default=10.0, help="匯入秒數")
+    parser.add_argument("--producers", type=int, default=4, help="同時匯入的用戶端數")
+    parser.add_argument("--batch", type=int, default=1000, help="每個請求的事件數")
+    parser.add_argument("--rate", type=int, default=50_000, help="每秒送出的事件數（0 為不限速）")
+    parser.add_argument("--keywords", type=int, default=50, help="事件涵蓋的關鍵字數")
+    parser.add_argument("--probe-interval", type=float, default=0.01, help="探測請求的間隔秒數")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default=None, help="結果 JSON 路徑")
+    parser.add_argument("--baseline", default=None, help="比較用的基準線 JSON")
+    parser.add_argument("--threshold", type=float, default=0.15, help="視為退化的變化比例")
+    args = parser.parse_args()
+
+    os.environ["MOCK_KOL_COUNT"] = str(args.kols)
+    os.environ.setdefault("MOCK_SEED", str(args.seed))
+    os.environ["RESPONSE_CACHE_MB"] = "0"
+    from app import main as api
+
+    api.STORAGE.preload()
+    payloads = bodies(64, args.batch, args.keywords, args.seed)
+    ingestor = api.INGESTOR
+    flush_times = []
+    write = ingestor._write
+
+    def timed_write(groups):
+        started = time.perf_counter()
+        write(groups)
+        flush_times.append(time.perf_counter() - started)
+
+    ingestor._write = timed_write
+
+    async def session():
+        # 對照：沒有匯入時的探測延遲
+        stop = asyncio.Event()
+        task = asyncio.create_task(probe(api.app, stop, args.probe_interval))
+        await asyncio.sleep(min(args.duration, 3.0))
+        stop.set()
+        idle = await task
+
+        deadline = time.perf_counter() + args.duration
+        sent = throttled = 0
+
+        # 每個用戶端兩次請求之間的間隔
+        period = args.producers * args.batch / args.rate if args.rate else 0.0
+
+        async def producer(index: int) -> None:
+            nonlocal sent, throttled
+            i = index
+            due = time.perf_counter() + period * index / args.producers
+            while time.perf_counter() < deadline:
+                if period:
+                    await asyncio.sleep(max(due - time.perf_counter(), 0))
+                    due += period
+                status = await request(api.app, "/api/ingest/buzz", {}, "POST", payloads[i % len(payloads)], NDJSON)
+                if status == 429:
+                    throttled += 1
+                    await asyncio.sleep(0.01)
+                    continue
+                sent += 1
+                i += args.producers
+
+        stop = asyncio.Event()
+        task = asyncio.create_task(probe(api.app, stop, args.probe_interval))
+        started = time.perf_counter()
+        await asyncio.gather(*(producer(i) for i in range(args.producers)))
+        elapsed = time.perf_counter() - started
+        while ingestor.pending:
+            await asyncio.sleep(0.005)
+        drained = time.perf_counter() - started
+        stop.set()
+        busy = await task
+        await ingestor.close()
+        return idle, busy, sent, throttled, elapsed, drained
+
+    idle, busy, sent, throttled, elapsed, drained = asyncio.run(session())
+    events = sent * args.batch
+    stats = ingestor.status()
+    if stats["flushed"] != stats["accepted"]:
+        print(f"已接受 {stats['accepted']:,} 筆，但只寫入 {stats['flushed']:,} 筆", file=sys.stderr)
+
+    flush_ms = np.asarray(flush_times) * 1000 if flush_times else np.zeros(1)
+    results = [
+        {
+            "name": "ingest",
+            "size": args.kols,
+            "events": events,
+            "requests": sent,
+            "throttled_requests": throttled,
+            "events_per_s": events / drained,
+            "batches": len(flush_times),
+            "flush_p50_ms": float(np.percentile(flush_ms, 50)),
+            "flush_max_ms": float(flush_ms.max()),
+        },
+        latency("GET /api/kols idle", args.kols, idle),
+        latency("GET /api/kols during ingest", args.kols, busy),
+    ]
+
+    label = f"{args.kols:,} KOLs" if args.kols else "展示數據"
+    r = results[0]
+    rate = f"每秒 {args.rate:,} 筆" if args.rate else "不限速"
+    print(f"{label}，{args.producers} 個用戶端 × 每請求 {args.batch} 筆，{rate}，匯入 {args.duration:.0f}s")
+    print(f"\n匯入 {events:,} 筆事件（{sent:,} 個請求，{throttled:,} 次 429），"
+          f"送出 {elapsed:.2f}s、全部寫入 {drained:.2f}s → {r['events_per_s']:,.0f} events/s")
+    print(f"寫回儲存層 {r['batches']} 次，每次中位數 {r['flush_p50_ms']:.2f} ms、最長 {r['flush_max_ms']:.2f} ms")
+    print(f"\n{'probe':<30}  {'requests':>8}  {'p50 (ms)':>9}  {'p95 (ms)':>9}  {'p99 (ms)':>9}  {'max (ms)':>9}")
+    for row in results[1:]:
+        print(f"{row['name']:<30}  {row['requests']:>8}  {row['p50_ms']:>9.2f}  {row['p95_ms']:>9.2f}  "
+              f"{row['p99_ms']:>9.2f}  {row['max_ms']:>9.2f}")
+
+    config = {k: v for k, v in vars(args).items() if k not in ("out", "baseline")}
+    if args.out:
+        bench.save(args.out, "ingest", config, results)
+        print(f"\n結果已寫入 {args.out}")
+    if args.baseline:
+        baseline = bench.load(args.baseline)
+        if bench.report(bench.compare(results, baseline["results"], METRICS, args.threshold), args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+GET /api/kols 查詢效能比較：list 逐條件篩選 + 全排序（舊） vs. 欄式資料表（新）
+另比較篩選面板的分面計數：逐筆累計（舊） vs. 點陣圖 popcount（新）
+
+執行方式（於 backend 目錄）：
+    uv run python -m benchmarks.kol_query --sizes 10000 100000 1000000
+"""
+
+import argparse
+import time
+from collections import Counter
+
+import numpy as np
+
+from app.mock_data import synthesize_kols
+from app.store import KOLColumnStore, decode_rows
+
+# 代表性的查詢組合
+QUERIES = [
+    {},
+    {"platform": "instagram"},
+    {"category": "美妝", "sort_by": "followers"},
+    {"min_followers": 100000, "max_followers": 500000, "sort_by": "engagement_rate"},
+    {"platform": "youtube", "category": "科技", "min_engagement": 5.0, "order": "asc"},
+    {"tags_any": ["美妝", "親民"], "sort_by": "followers"},
+    {"platform": "instagram", "tags_all": ["美妝", "親民"], "brand_fit": ["年輕族群", "女性市場"]},
+]
+
+
+def synthetic_kols(n: int, seed: int = 42) -> list[dict]:
+    """以 mock_data 的批次合成器產生 n 筆 KOL"""
+    columns, dictionaries = synthesize_kols(n, np.random.default_rng(seed))
+    return decode_rows(columns, dictionaries, np.arange(n))
+
+
+def _matches(kol, platform=None, category=None, min_followers=None, max_followers=None,
+             min_engagement=None, tags_any=None, tags_all=None, brand_fit=None) -> bool:
+    return (
+        (not platform or kol["platform"] == platform)
+        and (not category or kol["category"] == category)
+        and (not min_followers or kol["followers"] >= min_followers)
+        and (not max_followers or kol["followers"] <= max_followers)
+        and (not min_engagement or kol["engagement_rate"] >= min_engagement)
+        and (not tags_any or any(t in kol["tags"] for t in tags_any))
+        and (not tags_all or all(t in kol["tags"] for t in tags_all))
+        and (not brand_fit or any(t in kol["brand_fit_tags"] for t in brand_fit))
+    )
+
+
+def legacy_facets(all_kols, **filters) -> dict[str, Counter]:
+    """逐筆累計分面計數：每個欄位各掃描一次，略過該欄位自身的條件"""
+    own = {"platform": ("platform",), "category": ("category",),
+           "tags": ("tags_any", "tags_all"), "brand_fit_tags": ("brand_fit",)}
+    facets = {}
+    for name, keys in own.items():
+        others = {k: v for k, v in filters.items() if k not in keys}
+        counter = Counter()
+        for kol in all_kols:
+            if _matches(kol, **others):
+                counter.update(kol[name] if isinstance(kol[name], list) else [kol[name]])
+        facets[name] = counter
+    return facets
+
+
+def legacy_query(all_kols, platform=None, category=None, min_followers=None,
+                 max_followers=None, min_engagement=None,
+                 sort_by="influence_score", order="desc", limit=50,
+                 tags_any=None, tags_all=None, brand_fit=None):
+    """原本 get_kols 的實作（加上標籤條件）"""
+    kols = all_kols.copy()
+    if platform:
+        kols = [k for k in kols if k["platform"] == platform]
+    if category:
+        kols = [k for k in kols if k["category"] == category]
+    if min_followers:
+        kols = [k for k in kols if k["followers"] >= min_followers]
+    if max_followers:
+        kols = [k for k in kols if k["followers"] <= max_followers]
+    if min_engagement:
+        kols = [k for k in kols if k["engagement_rate"] >= min_engagement]
+    if tags_any or tags_all or brand_fit:
+        kols = [k for k in kols if _matches(k, tags_any=tags_any, tags_all=tags_all, brand_fit=brand_fit)]
+    reverse = order == "desc"
+    if sort_by in ["influence_score", "followers", "engagement_rate", "sentiment_score"]:
+        kols.sort(key=lambda x: x[sort_by], reverse=reverse)
+    return len(kols), kols[:limit]
+
+
+def _time_ms(fn, repeat: int) -> float:
+    """回傳最佳一次的毫秒數"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def run(sizes: list[int], repeat: int = 3) -> list[dict]:
+    results = []
+    for n in sizes:
+        kols = synthetic_kols(n)
+        start = time.perf_counter()
+        store = KOLColumnStore.from_records(kols)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        for params in QUERIES:
+            before_total, before = legacy_query(kols, **params)
+            after_total, after = store.query(**params)
+            assert before_total == after_total
+            assert [k["id"] for k in before] == [k["id"] for k in after]
+
+            results.append({
+                "size": n,
+                "query": params,
+                "before_ms": _time_ms(lambda: legacy_query(kols, **params), repeat),
+                "after_ms": _time_ms(lambda: store.query(**params), repeat),
+                "build_ms": build_ms,
+            })
+
+        filters = {k: v for k, v in QUERIES[-1].items() if k not in ("sort_by", "order")}
+        before = legacy_facets(kols, **filters)
+        after = store.facets(**filters)
+        assert all(before[name][value] == n for name, counts in after.items() for value, n in counts.items())
+        results.append({
+            "size": n,
+            "query": {"facets": True, **filters},
+            "before_ms": _time_ms(lambda: legacy_facets(kols, **filters), 1),
+            "after_ms": _time_ms(lambda: store.facets(**filters), repeat),
+            "build_ms": build_ms,
+        })
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'KOLs':>9}  {'before (ms)':>12}  {'after (ms)':>11}  {'speedup':>8}  query")
+    for r in run(args.sizes, args.repeat):
+        speedup = r["before_ms"] / r["after_ms"] if r["after_ms"] else float("inf")
+        print(f"{r['size']:>9,}  {r['before_ms']:>12.2f}  {r['after_ms']:>11.3f}  {speedup:>7.0f}x  {r['query']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Campaign 成效推送的分送成本：在同一行程內以 ASGI 開啟 --subscribers 個 SSE 連線訂閱同一個進行中 Campaign，
+每 --interval 秒呼叫一次 POST /api/campaigns/{id}/metrics，量測每次更新的處理時間、送達所有訂閱者的延遲，
+並與每個用戶端各自輪詢 GET /api/campaigns/{id}/performance 的成本比較
+
+執行方式（於 backend 目錄）：
+    uv run python -m benchmarks.live --subscribers 100 1000 5000 --out results/live.json
+    uv run python -m benchmarks.live --subscribers 100 1000 5000 --baseline results/live.json
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import numpy as np
+
+from benchmarks import results as bench
+from benchmarks.load import request
+
+# 比較基準線時檢查的指標
+METRICS = ("update_ms", "delivery_p95_ms")
+
+
+class Subscriber:
+    """以 ASGI 開啟一個 SSE 連線，記錄每則事件 id 的收到時間"""
+
+    def __init__(self, app, path: str):
+        self.app = app
+        self.path = path
+        self.received: dict[int, float] = {}
+        self.bytes = 0
+        self.ready = asyncio.Event()
+        self.closed = asyncio.Event()
+
+    async def run(self) -> None:
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+            "scheme": "http", "path": self.path, "raw_path": self.path.encode(), "query_string": b"",
+            "root_path": "", "headers": [(b"host", b"benchmark")], "client": ("127.0.0.1", 0),
+            "server": ("127.0.0.1", 80),
+        }
+        sent = False
+
+        async def receive():
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            await self.closed.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] != "http.response.body":
+                return
+            body = message.get("body", b"")
+            self.bytes += len(body)
+            now = time.perf_counter()
+            for line in body.split(b"\n"):
+                if line.startswith(b"id: "):
+                    self.received[int(line[4:])] = now
+            self.ready.set()
+
+        await self.app(scope, receive, send)
+
+
+async def session(api, campaign_id: str, subscribers: int, updates: int, interval: float) -> dict:
+    path = f"/api/campaigns/{campaign_id}"
+    clients = [Subscriber(api.app, f"{path}/live") for _ in range(subscribers)]
+    tasks = [asyncio.create_task(c.run()) for c in clients]
+    await asyncio.gather(*(c.ready.wait() for c in clients))
+    snapshot_bytes = clients[0].bytes
+
+    published: dict[int, float] = {}
+    update_times = []
+    for _ in range(updates):
+        started = time.perf_counter()
+        await request(api.app, f"{path}/metrics", {"reach": 500, "engagement": 20, "impressions": 1500}, "POST")
+        update_times.append(time.perf_counter() - started)
+        published[api.LIVE.feeds[campaign_id].id] = started
+        await asyncio.sleep(interval)
+    await asyncio.sleep(0.2)
+
+    delays = [
+        received - published[id]
+        for c in clients for id, received in c.received.items() if id in published
+    ]
+    delivered = sum(id in c.received for c in clients for id in published)
+    delta_bytes = (clients[0].bytes - snapshot_bytes) / updates
+
+    for c in clients:
+        c.closed.set()
+    await asyncio.gather(*tasks)
+
+    # 對照：每個用戶端各自輪詢一次完整成效
+    polls = min(subscribers, 500)
+    started = time.perf_counter()
+    for _ in range(polls):
+        await request(api.app, f"{path}/performance", {})
+    poll_ms = (time.perf_counter() - started) / polls * 1000
+    full_bytes = len(api.ORJSONResponse(api.STORAGE.get_performance(campaign_id)).body)
+
+    delay_ms = np.asarray(delays) * 1000 if delays else np.zeros(1)
+    update_ms = np.asarray(update_times) * 1000
+    return {
+        "name": "live",
+        "size": subscribers,
+        "updates": updates,
+        "delivered": delivered / (subscribers * updates),
+        "update_ms": float(np.median(update_ms)),
+        "delivery_p50_ms": float(np.percentile(delay_ms, 50)),
+        "delivery_p95_ms": float(np.percentile(delay_ms, 95)),
+        "delivery_max_ms": float(delay_ms.max()),
+        "delta_bytes": delta_bytes,
+        "full_bytes": full_bytes,
+        "poll_all_ms": poll_ms * subscribers,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--subscribers", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--updates", type=int, default=50, help="每個規模的更新次數")
+    parser.add_argument("--interval", type=float, default=0.05, help="兩次更新之間的秒數")
+    parser.add_argument("--out", default=None, help="結果 JSON 路徑")
+    parser.add_argument("--baseline", default=None, help="比較用的基準線 JSON")
+    parser.add_argument("--threshold", type=float, default=0.15, help="視為退化的變化比例")
+    args = parser.parse_args()
+
+    os.environ["RESPONSE_CACHE_MB"] = "0"
+    from app import main as api
+
+    campaign_id = api.STORAGE.list_campaigns(status="active", limit=1)[0]["id"]
+    results = []
+    print(f"{'subscribers':>11}  {'update (ms)':>11}  {'p50 (ms)':>9}  {'p95 (ms)':>9}  {'max (ms)':>9}  "
+          f"{'delivered':>9}  {'delta (B)':>9}  {'full (B)':>8}  {'poll all (ms)':>13}")
+    for subscribers in args.subscribers:
+        r = asyncio.run(session(api, campaign_id, subscribers, args.updates, args.interval))
+        results.append(r)
+        print(f"{subscribers:>11,}  {r['update_ms']:>11.2f}  {r['delivery_p50_ms']:>9.2f}  {r['delivery_p95_ms']:>9.2f}  "
+              f"{r['delivery_max_ms']:>9.2f}  {r['delivered']:>9.1%}  {r['delta_bytes']:>9.0f}  {r['full_bytes']:>8}  "
+              f"{r['poll_all_ms']:>13.1f}")
+    print("\nupdate：POST 一次更新（計算差異、編碼、放入所有訂閱者佇列）；p50 / p95 / max：自更新開始到訂閱者收到的延遲；"
+          "\npoll all：所有訂閱者各輪詢一次完整成效的總耗時")
+
+    config = {k: v for k, v in vars(args).items() if k not in ("out", "baseline")}
+    if args.out:
+        bench.save(args.out, "live", config, results)
+        print(f"\n結果已寫入 {args.out}")
+    if args.baseline:
+        baseline = bench.load(args.baseline)
+        if bench.report(bench.compare(results, baseline["results"], METRICS, args.threshold), args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
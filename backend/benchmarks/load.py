@@ -0,0 +1,304 @@
+"""
+API 負載測試：在同一行程內以 ASGI 直接呼叫 app，依實際使用比例混合所有 GET 路由，
+回報整體與各路由的吞吐量（rps）與延遲百分位數，結果寫成 JSON 並可與基準線比較
+
+- 數據規模由 --kols 指定（0 為預設的 28 筆展示數據）；開始前先預熱每個路由，首次建立的索引不計入
+- 預設關閉回應快取（RESPONSE_CACHE_MB=0），量測端點本身；--response-cache 改為量測含快取的實際情境
+- --concurrency 為同時進行的請求數；單一事件迴圈，與 uvicorn 單一 worker 相同
+
+執行方式（於 backend 目錄）：
+    uv run python -m benchmarks.load --kols 100000 --duration 20 --out results/load.json
+    uv run python -m benchmarks.load --kols 100000 --duration 20 --baseline results/load.json
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import re
+import sys
+import time
+from types import SimpleNamespace
+from urllib.parse import urlencode
+
+import numpy as np
+
+from benchmarks import results as bench
+
+# 比較基準線時檢查的指標
+METRICS = ("p50_ms", "p95_ms", "rps")
+
+KEYWORD_SAMPLE = 3
+
+# 洞察頁常用的分組維度組合
+CUBE_GROUPINGS = ["platform", "category", "platform,category", "category,follower_tier", "platform,price_range"]
+
+# 搜尋框的常見輸入：名稱、邊打邊搜的前綴、標籤組合
+SEARCH_QUERIES = ["阿滴", "ann", "joe", "美妝", "美妝 親民", "科技 年輕族群", "美食 高消費力"]
+
+
+def _kols(rng, ctx):
+    params = {"limit": rng.choice([20, 50, 50, 100])}
+    if rng.random() < 0.5:
+        params["platform"] = rng.choice(ctx.platforms)
+    if rng.random() < 0.5:
+        params["category"] = rng.choice(ctx.categories)
+    if rng.random() < 0.3:
+        params["min_followers"] = rng.choice([10_000, 100_000, 500_000])
+    if rng.random() < 0.4:
+        params["sort_by"] = rng.choice(["followers", "engagement_rate", "sentiment_score"])
+        params["order"] = rng.choice(["asc", "desc"])
+    if rng.random() < 0.3:
+        params[rng.choice(["tags_any", "tags_all"])] = ",".join(rng.sample(ctx.tags, 2))
+    if rng.random() < 0.2:
+        params["brand_fit"] = rng.choice(ctx.brand_fit_tags)
+    if rng.random() < 0.3:
+        params["facets"] = "true"
+    return "/api/kols", params
+
+
+def _kol(ctx, rng):
+    return str(ctx.kol_ids[rng.randrange(len(ctx.kol_ids))])
+
+
+def _campaign(ctx, rng):
+    return rng.choice(ctx.campaign_ids)
+
+
+def _export_filters(rng, ctx):
+    # 匯出限縮在小範圍，避免單一請求串流整份名單
+    return {
+        "platform": rng.choice(ctx.platforms),
+        "category": rng.choice(ctx.categories),
+        "min_followers": 1_000_000,
+    }
+
+
+# (路由樣板, 權重, 產生 (路徑, 查詢參數) 的函式)；權重約略反映儀表板的使用比例
+MIX = [
+    ("/", 1, lambda rng, ctx: ("/", {})),
+    ("/api/dashboard/overview", 10, lambda rng, ctx: ("/api/dashboard/overview", {})),
+    ("/api/kols", 20, _kols),
+    ("/api/search", 5, lambda rng, ctx: ("/api/search", {"q": rng.choice(SEARCH_QUERIES), "limit": 20})),
+    ("/api/kols/compare", 3, lambda rng, ctx: (
+        "/api/kols/compare", {"kol_ids": ",".join(_kol(ctx, rng) for _ in range(rng.randint(2, 4)))})),
+    ("/api/kols/{kol_id}", 15, lambda rng, ctx: (f"/api/kols/{_kol(ctx, rng)}", {})),
+    ("/api/kols/{kol_id}/audience", 5, lambda rng, ctx: (f"/api/kols/{_kol(ctx, rng)}/audience", {})),
+    ("/api/kols/{kol_id}/similar", 3, lambda rng, ctx: (f"/api/kols/{_kol(ctx, rng)}/similar", {"limit": 10})),
+    ("/api/campaigns", 5, lambda rng, ctx: (
+        "/api/campaigns", rng.choice([{}, {"limit": 20}, {"status": rng.choice(ctx.statuses), "limit": 20}]))),
+    ("/api/campaigns/{campaign_id}", 5, lambda rng, ctx: (f"/api/campaigns/{_campaign(ctx, rng)}", {})),
+    ("/api/campaigns/{campaign_id}/performance", 4, lambda rng, ctx: (
+        f"/api/campaigns/{_campaign(ctx, rng)}/performance", {})),
+    ("/api/campaigns/{campaign_id}/reach", 2, lambda rng, ctx: (f"/api/campaigns/{_campaign(ctx, rng)}/reach", {})),
+    ("/api/reach/estimate", 2, lambda rng, ctx: (
+        "/api/reach/estimate", {"kol_ids": ",".join(_kol(ctx, rng) for _ in range(rng.randint(2, 8)))})),
+    ("/api/buzz/trends", 5, lambda rng, ctx: ("/api/buzz/trends", rng.choice([
+        {},
+        {"keyword": ",".join(rng.sample(ctx.keywords, min(KEYWORD_SAMPLE, len(ctx.keywords))))},
+        {"interval": "week", "days": 90},
+    ]))),
+    ("/api/insights/platform", 3, lambda rng, ctx: ("/api/insights/platform", {})),
+    ("/api/insights/category", 3, lambda rng, ctx: ("/api/insights/category", {})),
+    ("/api/insights/cube", 3, lambda rng, ctx: ("/api/insights/cube", {"group_by": rng.choice(CUBE_GROUPINGS)})),
+    ("/api/export/kols.{fmt}", 1, lambda rng, ctx: (
+        f"/api/export/kols.{rng.choice(['ndjson', 'csv'])}", _export_filters(rng, ctx))),
+    ("/api/export/campaigns.{fmt}", 1, lambda rng, ctx: (
+        f"/api/export/campaigns.{rng.choice(['ndjson', 'csv'])}", {"status": rng.choice(ctx.statuses)})),
+    ("/api/export/buzz.{fmt}", 1, lambda rng, ctx: (
+        f"/api/export/buzz.{rng.choice(['ndjson', 'csv'])}", {"keyword": rng.choice(ctx.keywords)})),
+    ("/api/network/summary", 1, lambda rng, ctx: ("/api/network/summary", {})),
+    ("/api/network/pagerank", 1, lambda rng, ctx: (
+        "/api/network/pagerank", {"limit": 20, "type": rng.choice(["kol", "member"])})),
+    ("/api/network/communities", 1, lambda rng, ctx: ("/api/network/communities", {"limit": 10})),
+    ("/api/network/reach", 1, lambda rng, ctx: ("/api/network/reach", {"node_ids": _kol(ctx, rng), "hops": 2})),
+    ("/api/network/{node_id}", 1, lambda rng, ctx: (f"/api/network/{_kol(ctx, rng)}", {"limit": 20})),
+    ("/api/recommend", 5, lambda rng, ctx: ("/api/recommend", {
+        "category": rng.choice(ctx.categories),
+        "budget": rng.choice([50_000, 200_000, 1_000_000]),
+        "target_audience": rng.choice(["18-35歲都會女性", "25-44歲科技愛好者", "親子家庭"]),
+        "objective": rng.choice(ctx.objectives),
+        "limit": 10,
+    })),
+    ("/api/recommend/portfolio", 2, lambda rng, ctx: ("/api/recommend/portfolio", {
+        "budget": rng.choice([300_000, 1_000_000]),
+        "objective": rng.choice(["reach", "engagement"]),
+        "method": "greedy",
+    })),
+    ("/api/stories/overview", 4, lambda rng, ctx: ("/api/stories/overview", {})),
+]
+
+
+def context(api) -> SimpleNamespace:
+    """查詢參數的取值來源（實際存在的 ID、品牌、關鍵字）"""
+    from app import mock_data
+    from app.recommend import OBJECTIVE_WEIGHTS
+
+    storage = api.STORAGE
+    campaigns = storage.list_campaigns()
+    return SimpleNamespace(
+        kol_ids=storage.column_store().columns["id"],
+        campaign_ids=[c["id"] for c in campaigns],
+        statuses=sorted({c["status"] for c in campaigns}),
+        keywords=storage.buzz_series().keywords,
+        platforms=mock_data.PLATFORMS,
+        categories=mock_data.CATEGORIES,
+        tags=mock_data.KOL_TAGS,
+        brand_fit_tags=mock_data.BRAND_FIT_TAGS,
+        objectives=list(OBJECTIVE_WEIGHTS),
+    )
+
+
+# 長連線推送，不適用請求 / 回應的負載測試
+STREAMING = {"/api/campaigns/{campaign_id}/live"}
+
+
+def uncovered_routes(app, mix) -> list[str]:
+    """沒有出現在負載組合中的 GET 路由"""
+    covered = {template for template, _, _ in mix} | STREAMING
+    return [
+        route.path for route in app.routes
+        if "GET" in getattr(route, "methods", ()) and getattr(route, "include_in_schema", False)
+        and route.path not in covered
+    ]
+
+
+async def request(app, path: str, params: dict, method: str = "GET", body: bytes = b"",
+                  headers: tuple = ()) -> int:
+    """以 ASGI 呼叫一次請求（預設 GET），讀完整個回應本文，回傳狀態碼"""
+    query = urlencode(params).encode()
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method,
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": query,
+        "root_path": "", "headers": [(b"host", b"benchmark"), *headers], "client": ("127.0.0.1", 0),
+        "server": ("127.0.0.1", 80),
+    }
+    status = 0
+    received = False
+    done = asyncio.Event()
+
+    async def receive():
+        # 串流回應會再次讀取以監聽斷線；等回應送完才回傳 disconnect，與實際伺服器相同
+        nonlocal received
+        if not received:
+            received = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif not message.get("more_body", False):
+            done.set()
+
+    await app(scope, receive, send)
+    done.set()
+    return status
+
+
+async def run_load(app, mix, ctx, concurrency: int, duration: float, seed: int) -> tuple[dict, float]:
+    """concurrency 個工作者持續送出請求，直到 duration 秒；回傳各路由的 (延遲秒數, 錯誤數) 與實際經過時間"""
+    latencies: dict[str, list[float]] = {template: [] for template, _, _ in mix}
+    errors: dict[str, int] = {template: 0 for template, _, _ in mix}
+    templates = [template for template, _, _ in mix]
+    builders = {template: build for template, _, build in mix}
+    weights = [weight for _, weight, _ in mix]
+    deadline = time.perf_counter() + duration
+
+    async def worker(index: int) -> None:
+        rng = random.Random(seed + index)
+        while time.perf_counter() < deadline:
+            template = rng.choices(templates, weights)[0]
+            path, params = builders[template](rng, ctx)
+            started = time.perf_counter()
+            status = await request(app, path, params)
+            latencies[template].append(time.perf_counter() - started)
+            if status >= 400:
+                errors[template] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {t: (latencies[t], errors[t]) for t in templates}, elapsed
+
+
+def summarize(name: str, size: int, samples: list[float], errors: int, elapsed: float) -> dict:
+    ms = np.asarray(samples) * 1000 if samples else np.zeros(1)
+    return {
+        "name": name,
+        "size": size,
+        "requests": len(samples),
+        "errors": errors,
+        "rps": len(samples) / elapsed,
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "max_ms": float(ms.max()),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--kols", type=int, default=100_000, help="合成 KOL 數（0 為展示數據）")
+    parser.add_argument("--duration", type=float, default=20.0, help="量測秒數")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--routes", default=None, help="只測試符合此正規表示式的路由樣板")
+    parser.add_argument("--response-cache", action="store_true", help="啟用回應快取")
+    parser.add_argument("--out", default=None, help="結果 JSON 路徑")
+    parser.add_argument("--baseline", default=None, help="比較用的基準線 JSON")
+    parser.add_argument("--threshold", type=float, default=0.15, help="視為退化的變化比例")
+    args = parser.parse_args()
+
+    # 數據來源與快取於匯入 app 前設定
+    os.environ["MOCK_KOL_COUNT"] = str(args.kols)
+    os.environ.setdefault("MOCK_SEED", str(args.seed))
+    if not args.response_cache:
+        os.environ["RESPONSE_CACHE_MB"] = "0"
+    from app import main as api
+
+    mix = [m for m in MIX if args.routes is None or re.search(args.routes, m[0])]
+    missing = uncovered_routes(api.app, MIX)
+    if missing:
+        print(f"負載組合未涵蓋的路由：{', '.join(missing)}", file=sys.stderr)
+
+    # 預熱：建立索引、圖與草圖等首次查詢時才建立的結構
+    warm_started = time.perf_counter()
+    api.STORAGE.preload()
+    ctx = context(api)
+    rng = random.Random(args.seed)
+
+    label = f"{args.kols:,} KOLs" if args.kols else "展示數據"
+
+    async def session():
+        for template, _, build in mix:
+            await request(api.app, *build(rng, ctx))
+        print(f"{label}，預熱 {time.perf_counter() - warm_started:.1f}s；"
+              f"{args.concurrency} 個並行請求，量測 {args.duration:.0f}s")
+        return await run_load(api.app, mix, ctx, args.concurrency, args.duration, args.seed)
+
+    per_route, elapsed = asyncio.run(session())
+    rows = [summarize(t, args.kols, samples, errors, elapsed) for t, (samples, errors) in per_route.items()]
+    everything = [s for samples, _ in per_route.values() for s in samples]
+    total = summarize("total", args.kols, everything, sum(e for _, e in per_route.values()), elapsed)
+
+    print(f"\n{'route':<42}  {'requests':>8}  {'rps':>8}  {'p50 (ms)':>9}  {'p95 (ms)':>9}  {'p99 (ms)':>9}  {'errors':>6}")
+    for r in sorted(rows, key=lambda r: -r["p95_ms"]) + [total]:
+        print(f"{r['name']:<42}  {r['requests']:>8}  {r['rps']:>8.1f}  {r['p50_ms']:>9.2f}  "
+              f"{r['p95_ms']:>9.2f}  {r['p99_ms']:>9.2f}  {r['errors']:>6}")
+
+    results = rows + [total]
+    config = {k: v for k, v in vars(args).items() if k not in ("out", "baseline")}
+    if args.out:
+        bench.save(args.out, "load", config, results)
+        print(f"\n結果已寫入 {args.out}")
+    if args.baseline:
+        baseline = bench.load(args.baseline)
+        if bench.report(bench.compare(results, baseline["results"], METRICS, args.threshold), args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
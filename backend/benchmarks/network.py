@@ -0,0 +1,73 @@
+"""
+影響力網絡效能：CSR 建圖、加權 PageRank、標籤傳播社群、k 跳觸及，以及圖陣列佔用的記憶體
+
+執行方式（於 backend 目錄）：
+    uv run python -m benchmarks.network --edges 1000000 10000000
+"""
+
+import argparse
+import resource
+import time
+
+import numpy as np
+
+from app.mock_data import synthesize_referrals
+from app.network import CSRGraph, k_hop, label_propagation, pagerank
+
+
+def _timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def run(edge_counts: list[int], hops: int = 3) -> list[dict]:
+    results = []
+    for edges in edge_counts:
+        rng = np.random.default_rng(0)
+        # 會員數為邊數的 1/3、KOL 數為邊數的 1/50（與預設 MOCK_REFERRAL_EDGES 比例相同）
+        members, kols = edges // 3, max(1, edges // 50)
+        followers = rng.integers(1_000, 1_000_000, kols)
+        data = synthesize_referrals(followers, members, edges, rng)
+        n = kols + members
+
+        graph, build = _timed(CSRGraph, n, data["src"], data["dst"], data["weight"], data["type"])
+        del data
+        _, rank = _timed(pagerank, graph)
+        undirected, sym_build = _timed(graph.undirected)
+        _, lpa = _timed(label_propagation, undirected)
+        del undirected
+        # 由推薦最多的會員出發
+        seed = np.array([int(np.argmax(graph.out_degree()[kols:])) + kols])
+        (visited, _), reach = _timed(k_hop, graph, seed, hops)
+
+        results.append({
+            "edges": edges,
+            "nodes": n,
+            "build_s": build,
+            "pagerank_s": rank,
+            "communities_s": sym_build + lpa,
+            "reach_ms": reach * 1000,
+            "reached": int(visited.sum()) - 1,
+            "graph_mb": sum(a.nbytes for a in (graph.indptr, graph.indices, graph.weights, graph.types, graph.rows)) / 2**20,
+            "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        })
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--edges", type=int, nargs="+", default=[1_000_000, 10_000_000])
+    parser.add_argument("--hops", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'edges':>11}  {'nodes':>10}  {'build (s)':>9}  {'pagerank (s)':>12}  {'communities (s)':>15}  "
+          f"{f'{args.hops}-hop (ms)':>10}  {'reached':>9}  {'graph (MB)':>10}  {'peak RSS (MB)':>13}")
+    for r in run(args.edges, args.hops):
+        print(f"{r['edges']:>11,}  {r['nodes']:>10,}  {r['build_s']:>9.2f}  {r['pagerank_s']:>12.2f}  "
+              f"{r['communities_s']:>15.2f}  {r['reach_ms']:>10.1f}  {r['reached']:>9,}  "
+              f"{r['graph_mb']:>10.0f}  {r['peak_rss_mb']:>13.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+GET /api/recommend/portfolio 組合最佳化延遲與解的品質（貪婪 vs. 分支定界）
+
+執行方式（於 backend 目錄）：
+    uv run python -m benchmarks.portfolio --sizes 10000 100000 1000000
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from app.portfolio import PortfolioOptimizer
+from app.sketch import AudienceSketches
+
+from .recommend import SyntheticStorage
+
+# 代表性的預算與限制
+QUERIES = [
+    {"budget": 200_000},
+    {"budget": 1_000_000, "overlap_penalty": 1.0},
+    {"budget": 500_000, "objective": "engagement", "platform_mix": {"youtube": (1, 2), "tiktok": (0, 1)}},
+    {"budget": 2_000_000, "cost_basis": "mid", "category_mix": {"美妝": (2, 4), "美食": (1, 10**6)}},
+]
+
+
+def run(sizes: list[int], repeat: int = 5) -> list[dict]:
+    results = []
+    for n in sizes:
+        storage = SyntheticStorage(n)
+        optimizer = PortfolioOptimizer(storage, AudienceSketches(storage))
+        start = time.perf_counter()
+        optimizer.optimize(**QUERIES[0])
+        cold_ms = (time.perf_counter() - start) * 1000
+
+        for params in QUERIES:
+            for method in ("greedy", "exact"):
+                samples = []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    result = optimizer.optimize(**params, method=method, time_budget_ms=500)
+                    samples.append(time.perf_counter() - start)
+                results.append({
+                    "size": n,
+                    "method": method,
+                    "query": params,
+                    "median_ms": float(np.median(samples)) * 1000,
+                    "value": result["predicted_value"],
+                    "kols": len(result["kols"]),
+                    "optimal": result["optimal"],
+                    "cold_ms": cold_ms,
+                })
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'KOLs':>9}  {'method':>6}  {'median (ms)':>11}  {'value':>11}  {'picked':>6}  {'optimal':>7}  query")
+    cold = {}
+    for r in run(args.sizes, args.repeat):
+        cold[r["size"]] = r["cold_ms"]
+        print(f"{r['size']:>9,}  {r['method']:>6}  {r['median_ms']:>11.1f}  {r['value']:>11,}  "
+              f"{r['kols']:>6}  {str(r['optimal']):>7}  {r['query']}")
+    print("首次查詢（含受眾草圖建立）：" + "、".join(f"{n:,} 筆 {ms:.0f} ms" for n, ms in cold.items()))
+
+
+if __name__ == "__main__":
+    main()
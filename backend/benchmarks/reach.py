@@ -0,0 +1,68 @@
+"""
+不重複觸及估算：HyperLogLog 草圖合併 vs. 粉絲集合精確去重（延遲與相對誤差）
+
+執行方式（於 backend 目錄）：
+    uv run python -m benchmarks.reach --kols 2 8 32
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from app import mock_data
+from app.sketch import block_sketches, estimate
+
+
+def run(kol_counts: list[int], trials: int = 5) -> list[dict]:
+    rng = np.random.default_rng(0)
+    blocks = block_sketches(np.arange(mock_data.FOLLOWER_UNIVERSE // mock_data.FOLLOWER_BLOCK), mock_data.FOLLOWER_BLOCK)
+    results = []
+    for k in kol_counts:
+        exact_times, sketch_times, errors = [], [], []
+        for trial in range(trials):
+            followers = rng.integers(10_000, 5_000_000, k)
+            categories = rng.choice(mock_data.CATEGORIES, k)
+            members = [
+                mock_data.follower_blocks(f"kol_{trial}_{i}", int(f), str(c))
+                for i, (f, c) in enumerate(zip(followers, categories))
+            ]
+            sketches = np.stack([blocks[m].max(axis=0) for m in members])
+
+            # 精確去重：展開每位粉絲的使用者編號，排序後計算不重複值
+            start = time.perf_counter()
+            users = np.sort(np.concatenate([
+                (m[:, None] * mock_data.FOLLOWER_BLOCK + np.arange(mock_data.FOLLOWER_BLOCK)).ravel() for m in members
+            ]))
+            exact = 1 + int(np.count_nonzero(users[1:] != users[:-1]))
+            exact_times.append(time.perf_counter() - start)
+
+            # 單次合併僅數十微秒，重複多次取平均
+            start = time.perf_counter()
+            for _ in range(100):
+                reach = float(estimate(sketches.max(axis=0)))
+            sketch_times.append((time.perf_counter() - start) / 100)
+            errors.append(abs(reach - exact) / exact)
+
+        results.append({
+            "kols": k,
+            "exact_ms": float(np.median(exact_times)) * 1000,
+            "sketch_us": float(np.median(sketch_times)) * 1e6,
+            "error": float(np.mean(errors)),
+        })
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--kols", type=int, nargs="+", default=[2, 8, 32])
+    parser.add_argument("--trials", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'KOLs':>5}  {'exact (ms)':>10}  {'sketch (us)':>11}  {'mean error':>10}")
+    for r in run(args.kols, args.trials):
+        print(f"{r['kols']:>5}  {r['exact_ms']:>10.1f}  {r['sketch_us']:>11.1f}  {r['error']:>10.2%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+GET /api/recommend 推薦引擎延遲（目標：100 萬筆 KOL 低於 20 ms）
+
+執行方式（於 backend 目錄）：
+    uv run python -m benchmarks.recommend --sizes 10000 100000 1000000
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from app.mock_data import synthesize_audience, synthesize_kols
+from app.recommend import Recommender
+from app.store import KOLColumnStore
+
+# 代表性的推薦條件
+QUERIES = [
+    {},
+    {"category": "美妝", "budget": 60000},
+    {"target_audience": "18-35歲都會女性", "objective": "品牌曝光"},
+    {"category": "親子", "budget": 200000, "target_audience": "全年齡家庭客群", "objective": "品牌形象"},
+    {"budget": 20000, "target_audience": "25-45歲科技愛好者", "limit": 50},
+]
+
+
+class SyntheticStorage:
+    """只提供推薦引擎所需介面的合成數據來源"""
+
+    def __init__(self, n: int, seed: int = 42):
+        rng = np.random.default_rng(seed)
+        columns, dictionaries = synthesize_kols(n, rng)
+        self.store = KOLColumnStore(columns, dictionaries)
+        self.audience = synthesize_audience(columns["category"], rng)
+
+    def column_store(self) -> KOLColumnStore:
+        return self.store
+
+    def audience_columns(self, kol_ids: list[str]) -> dict[str, np.ndarray]:
+        if len(kol_ids) == self.store.size:
+            return self.audience
+        rows = [self.store.row_of(i) for i in kol_ids]
+        return {name: values[rows] for name, values in self.audience.items()}
+
+
+def _samples_ms(fn, repeat: int) -> np.ndarray:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return np.array(samples) * 1000
+
+
+def run(sizes: list[int], repeat: int = 20) -> list[dict]:
+    results = []
+    for n in sizes:
+        recommender = Recommender(SyntheticStorage(n))
+        start = time.perf_counter()
+        recommender.recommend(target_audience="18-35歲")
+        build_ms = (time.perf_counter() - start) * 1000
+
+        for params in QUERIES:
+            recommender.recommend(**params)
+            samples = _samples_ms(lambda: recommender.recommend(**params), repeat)
+            results.append({
+                "size": n,
+                "query": params,
+                "p50_ms": float(np.percentile(samples, 50)),
+                "p95_ms": float(np.percentile(samples, 95)),
+                "build_ms": build_ms,
+            })
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'KOLs':>9}  {'p50 (ms)':>9}  {'p95 (ms)':>9}  {'build (ms)':>10}  query")
+    for r in run(args.sizes, args.repeat):
+        print(f"{r['size']:>9,}  {r['p50_ms']:>9.2f}  {r['p95_ms']:>9.2f}  {r['build_ms']:>10.0f}  {r['query']}")
+
+
+if __name__ == "__main__":
+    main()
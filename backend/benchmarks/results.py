@@ -0,0 +1,95 @@
+"""
+基準測試結果的 JSON 格式與基準線比較
+
+    {"benchmark": 名稱, "meta": 執行環境, "config": 參數, "results": [{"name": ..., "size": ..., 指標...}]}
+
+以 _ms 結尾的指標越小越好，rps 與 _per_s 結尾的吞吐量越大越好；相同 (name, size) 的結果互相比較。
+"""
+
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+
+import numpy as np
+
+
+def environment() -> dict:
+    """執行環境；比較不同機器的結果時供參考"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def save(path: str, benchmark: str, config: dict, results: list[dict]) -> None:
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(
+            {"benchmark": benchmark, "meta": environment(), "config": config, "results": results},
+            f, ensure_ascii=False, indent=2,
+        )
+
+
+def load(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def _higher_is_better(metric: str) -> bool:
+    return metric == "rps" or metric.endswith("_per_s")
+
+
+def compare(results: list[dict], baseline: list[dict], metrics: tuple[str, ...], threshold: float) -> list[dict]:
+    """逐項比較；change 為相對基準線的變化（正值代表變慢），超過 threshold 視為退化"""
+    previous = {(r["name"], r.get("size")): r for r in baseline}
+    rows = []
+    for result in results:
+        old = previous.get((result["name"], result.get("size")))
+        if old is None:
+            continue
+        for metric in metrics:
+            if not old.get(metric) or result.get(metric) is None:
+                continue
+            change = result[metric] / old[metric] - 1
+            if _higher_is_better(metric):
+                change = -change
+            rows.append({
+                "name": result["name"],
+                "size": result.get("size"),
+                "metric": metric,
+                "baseline": old[metric],
+                "current": result[metric],
+                "change": change,
+                "regression": change > threshold,
+            })
+    return rows
+
+
+def report(rows: list[dict], threshold: float) -> int:
+    """印出比較表，回傳退化項目數"""
+    if not rows:
+        print("\n基準線中沒有可比較的項目")
+        return 0
+    print(f"\n與基準線比較（退化門檻 {threshold:.0%}，正值代表變慢）")
+    print(f"{'name':<36}  {'size':>9}  {'metric':<8}  {'baseline':>10}  {'current':>10}  {'change':>8}")
+    for row in rows:
+        size = f"{row['size']:,}" if row["size"] is not None else "-"
+        flag = "  退化" if row["regression"] else ""
+        print(f"{row['name']:<36}  {size:>9}  {row['metric']:<8}  {row['baseline']:>10.3f}  "
+              f"{row['current']:>10.3f}  {row['change']:>+8.1%}{flag}")
+    regressions = sum(row["regression"] for row in rows)
+    print(f"\n{regressions} 項退化")
+    return regressions
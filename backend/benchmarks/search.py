@@ -0,0 +1,122 @@
+"""
+GET /api/search 全文搜尋效能：各類查詢的延遲、索引建立時間，以及 KOL 異動後第一次查詢的增量更新成本
+
+- 名稱：完整名稱、名稱加編號、只有編號
+- 邊打邊搜：英文前綴與拼錯一個字元的名稱
+- 標籤：單一標籤與多個標籤（跨名稱、標籤、品牌契合標籤加總分數）
+
+執行方式（於 backend 目錄）：
+    uv run python -m benchmarks.search --sizes 10000 100000 1000000 --out results/search.json
+    uv run python -m benchmarks.search --sizes 10000 100000 1000000 --baseline results/search.json
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from app.search import SearchIndex
+from benchmarks import results as bench
+
+from .recommend import SyntheticStorage
+
+# 比較基準線時檢查的指標
+METRICS = ("build_ms", "p50_ms", "p95_ms")
+
+QUERIES = [
+    ("name", "阿滴"),
+    ("name + number", "阿滴 #123"),
+    ("number", "#4567"),
+    ("typeahead", "ann"),
+    ("typo", "jeoman"),
+    ("tag", "美妝"),
+    ("tags", "美妝 親民"),
+    ("tags x3", "美食 高消費力 幽默"),
+]
+
+
+def _samples_ms(fn, repeat: int) -> np.ndarray:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return np.array(samples) * 1000
+
+
+def run(sizes: list[int], repeat: int = 50, updates: int = 100) -> list[dict]:
+    results = []
+    for n in sizes:
+        storage = SyntheticStorage(n)
+        index = SearchIndex(storage)
+        start = time.perf_counter()
+        index.search("阿滴")
+        results.append({"name": "build", "size": n, "build_ms": (time.perf_counter() - start) * 1000})
+
+        for name, q in QUERIES:
+            index.search(q)
+            samples = _samples_ms(lambda: index.search(q), repeat)
+            results.append({
+                "name": name,
+                "size": n,
+                "query": q,
+                "hits": len(index.search(q)["results"]),
+                "p50_ms": float(np.percentile(samples, 50)),
+                "p95_ms": float(np.percentile(samples, 95)),
+            })
+
+        # 每次異動一筆 KOL 的名稱與標籤，再搜尋新名稱（含同步索引的時間）
+        store = storage.store
+        rng = np.random.default_rng(0)
+        samples = []
+        for i, row in enumerate(rng.choice(n, size=min(updates, n), replace=False).tolist()):
+            kol = store.rows(np.array([row]))[0]
+            store.upsert({**kol, "name": f"Updated Creator {i}", "tags": ["更新標籤"]})
+            start = time.perf_counter()
+            found = index.search(f"updated creator {i}", limit=1)["results"]
+            samples.append(time.perf_counter() - start)
+            if not found or found[0]["id"] != kol["id"]:
+                print(f"異動後搜尋不到 {kol['id']}", file=sys.stderr)
+        samples = np.array(samples) * 1000
+        results.append({
+            "name": "update + search",
+            "size": n,
+            "query": f"{len(samples)} updates",
+            "p50_ms": float(np.percentile(samples, 50)),
+            "p95_ms": float(np.percentile(samples, 95)),
+        })
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--updates", type=int, default=100, help="增量更新的次數")
+    parser.add_argument("--out", default=None, help="結果 JSON 路徑")
+    parser.add_argument("--baseline", default=None, help="比較用的基準線 JSON")
+    parser.add_argument("--threshold", type=float, default=0.15, help="視為退化的變化比例")
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.repeat, args.updates)
+    print(f"{'KOLs':>9}  {'query':<16}  {'q':<20}  {'hits':>4}  {'p50 (ms)':>9}  {'p95 (ms)':>9}")
+    for r in results:
+        if r["name"] == "build":
+            print(f"{r['size']:>9,}  {'build':<16}  {'':<20}  {'':>4}  {r['build_ms']:>9.0f}")
+            continue
+        print(f"{r['size']:>9,}  {r['name']:<16}  {r['query']:<20}  {r.get('hits', ''):>4}  "
+              f"{r['p50_ms']:>9.3f}  {r['p95_ms']:>9.3f}")
+
+    config = {k: v for k, v in vars(args).items() if k not in ("out", "baseline")}
+    if args.out:
+        bench.save(args.out, "search", config, results)
+        print(f"\n結果已寫入 {args.out}")
+    if args.baseline:
+        baseline = bench.load(args.baseline)
+        if bench.report(bench.compare(results, baseline["results"], METRICS, args.threshold), args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
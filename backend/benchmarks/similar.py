@@ -0,0 +1,68 @@
+"""
+GET /api/kols/{kol_id}/similar 搜尋效能：分區塊精確搜尋 vs. IVF 近似搜尋（含 recall@k）
+
+執行方式（於 backend 目錄）：
+    uv run python -m benchmarks.similar --sizes 10000 100000 1000000
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from app.similarity import IVFIndex, embed, exact_search
+
+from .recommend import SyntheticStorage
+
+
+def _median_ms(samples: list[float]) -> float:
+    return float(np.median(samples)) * 1000
+
+
+def run(sizes: list[int], queries: int = 20, k: int = 10, nprobes: tuple[int, ...] = (4, 8, 16, 32)) -> list[dict]:
+    results = []
+    for n in sizes:
+        storage = SyntheticStorage(n)
+        vectors = embed(storage.store, storage.audience)
+        start = time.perf_counter()
+        ivf = IVFIndex(vectors)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        rows = np.random.default_rng(0).choice(n, size=min(queries, n), replace=False)
+        exact, exact_times = {}, []
+        for row in rows:
+            start = time.perf_counter()
+            found, _ = exact_search(vectors, vectors[row], k)
+            exact_times.append(time.perf_counter() - start)
+            exact[row] = set(found.tolist())
+        results.append({"size": n, "method": "exact", "median_ms": _median_ms(exact_times), "recall": 1.0})
+
+        for nprobe in nprobes:
+            times, recall = [], []
+            for row in rows:
+                start = time.perf_counter()
+                found, _ = ivf.search(vectors[row], k, nprobe)
+                times.append(time.perf_counter() - start)
+                recall.append(len(exact[row] & set(found.tolist())) / k)
+            results.append({
+                "size": n,
+                "method": f"ivf nlist={ivf.nlist} nprobe={nprobe} (build {build_ms:.0f} ms)",
+                "median_ms": _median_ms(times),
+                "recall": float(np.mean(recall)),
+            })
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--queries", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'KOLs':>9}  {'median (ms)':>11}  {'recall@10':>9}  method")
+    for r in run(args.sizes, args.queries):
+        print(f"{r['size']:>9,}  {r['median_ms']:>11.2f}  {r['recall']:>9.2f}  {r['method']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+冷啟動時間：匯入 app.main、第一個請求與完整載入數據所需的時間，以及匯入時間剖析
+
+每次量測在獨立的子行程中執行，不受目前行程已載入的模組影響：
+- demo：預設 28 筆 KOL
+- synthetic N：MOCK_KOL_COUNT=N，首次取用時產生合成數據集
+- snapshot N：MOCK_SNAPSHOT_PATH 指向預先產生的 mmap 快照
+匯入時間剖析以 python -X importtime 取得各模組自身的匯入時間；
+app 模組合計超過 --budget-ms 時以非零狀態結束，供 CI 偵測啟動退化。
+
+執行方式（於 backend 目錄）：
+    uv run python -m benchmarks.startup --sizes 100000 1000000 --budget-ms 300
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+
+# 影響數據來源的環境變數，量測時一律由各模式重新指定
+DATA_ENV = ("MOCK_KOL_COUNT", "MOCK_SNAPSHOT_PATH", "MOCK_DATASET_PATH", "PRELOAD_DATA", "STORAGE_BACKEND")
+
+# 子行程：匯入後以 ASGI 直接呼叫第一個請求，再載入其餘數據
+PROBE = """
+import asyncio, json, resource, time
+
+async def get(app, target):
+    path, _, query = target.partition("?")
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": query.encode(),
+        "root_path": "", "headers": [], "client": ("127.0.0.1", 0), "server": ("127.0.0.1", 80),
+    }
+    status = None
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    assert status == 200, (target, status)
+
+started = time.perf_counter()
+import app.main as api
+imported = time.perf_counter()
+asyncio.run(get(api.app, "/api/kols?limit=20"))
+first = time.perf_counter()
+api.STORAGE.preload()
+loaded = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "first_request_ms": (first - imported) * 1000,
+    "full_load_ms": (loaded - started) * 1000,
+    "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+}))
+"""
+
+
+def _env(**overrides) -> dict:
+    env = {k: v for k, v in os.environ.items() if k not in DATA_ENV}
+    env.setdefault("MOCK_SEED", "42")
+    env["PYTHONPATH"] = os.getcwd()
+    env.update({k: str(v) for k, v in overrides.items()})
+    return env
+
+
+def measure(env: dict, repeat: int) -> dict:
+    """執行 repeat 次，各指標取中位數"""
+    runs = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", PROBE], env=env, check=True, capture_output=True, text=True)
+        runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+
+
+def import_profile(repeat: int) -> dict[str, float]:
+    """各模組自身的匯入時間（毫秒，取 repeat 次的最小值）"""
+    best: dict[str, float] = {}
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import app.main"],
+            env=_env(), check=True, capture_output=True, text=True,
+        )
+        for line in out.stderr.splitlines():
+            if not line.startswith("import time:") or "self [us]" in line:
+                continue
+            self_us, _, name = line.removeprefix("import time:").split("|")
+            name = name.strip()
+            best[name] = min(best.get(name, float("inf")), int(self_us) / 1000)
+    return best
+
+
+def report_imports(profile: dict[str, float], top: int) -> float:
+    """印出各套件與 app 模組的匯入時間，回傳 app 模組合計"""
+    packages: dict[str, float] = defaultdict(float)
+    for name, ms in profile.items():
+        packages[name.split(".")[0]] += ms
+    total = sum(profile.values())
+    print(f"\n匯入時間剖析（-X importtime，各模組自身時間，合計 {total:.0f} ms）")
+    print(f"{'package':<24}  {'ms':>7}  {'share':>6}")
+    for name, ms in sorted(packages.items(), key=lambda p: -p[1])[:top]:
+        print(f"{name:<24}  {ms:>7.1f}  {ms / total:>6.1%}")
+
+    app_modules = sorted(((n, ms) for n, ms in profile.items() if n == "app" or n.startswith("app.")), key=lambda p: -p[1])
+    print(f"\n{'app module':<24}  {'ms':>7}")
+    for name, ms in app_modules:
+        print(f"{name:<24}  {ms:>7.1f}")
+    return sum(ms for _, ms in app_modules)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=12, help="匯入時間剖析列出的套件數")
+    parser.add_argument("--budget-ms", type=float, default=None, help="app 模組匯入時間合計上限")
+    args = parser.parse_args()
+
+    print(f"{'mode':<20}  {'import (ms)':>11}  {'first request (ms)':>18}  {'full load (ms)':>14}  {'RSS (MB)':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        modes = [("demo", _env())]
+        for n in args.sizes:
+            modes.append((f"synthetic {n:,}", _env(MOCK_KOL_COUNT=n)))
+            path = os.path.join(tmp, f"snapshot-{n}.bin")
+            subprocess.run(
+                [sys.executable, "-m", "app.snapshot", "--kols", str(n), "--out", path],
+                env=_env(), check=True, capture_output=True,
+            )
+            modes.append((f"snapshot {n:,}", _env(MOCK_KOL_COUNT=n, MOCK_SNAPSHOT_PATH=path)))
+        for name, env in modes:
+            r = measure(env, args.repeat)
+            print(f"{name:<20}  {r['import_ms']:>11.0f}  {r['first_request_ms']:>18.0f}  "
+                  f"{r['full_load_ms']:>14.0f}  {r['rss_mb']:>8.0f}")
+
+    app_ms = report_imports(import_profile(args.repeat), args.top)
+    print(f"\napp 模組合計 {app_ms:.1f} ms")
+    if args.budget_ms is not None and app_ms > args.budget_ms:
+        print(f"超過匯入時間預算 {args.budget_ms:.0f} ms", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,4 +3,8 @@ import uvicorn
 
 if __name__ == "__main__":
     port = int(os.getenv("PORT", 8000))
-    uvicorn.run("app.main:app", host="0.0.0.0", port=port)
+    workers = int(os.getenv("WEB_CONCURRENCY", 1))
+    if workers > 1:
+        # 多個 worker 映射同一份資料快照，共用實體記憶體且資料一致
+        os.environ.setdefault("MOCK_SNAPSHOT_PATH", "data/snapshot.bin")
+    uvicorn.run("app.main:app", host="0.0.0.0", port=port, workers=workers)
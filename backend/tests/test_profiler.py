@@ -0,0 +1,62 @@
+"""
+隨選效能剖析：一般函式的端點在執行緒池中執行，取樣結果仍須包含端點的堆疊
+
+執行方式（於 backend 目錄）：
+    uv run python -m unittest discover -s tests
+"""
+
+import asyncio
+import time
+import unittest
+
+import httpx
+from fastapi import FastAPI
+
+from app.profiler import Profiler, ProfilerMiddleware
+from app.responses import ORJSONRoute
+
+
+def busy_work(seconds: float) -> int:
+    """佔用 CPU 的迴圈，讓取樣器讀到這一層"""
+    deadline = time.perf_counter() + seconds
+    n = 0
+    while time.perf_counter() < deadline:
+        n += 1
+    return n
+
+
+def build_app() -> tuple[FastAPI, Profiler]:
+    app = FastAPI()
+    app.router.route_class = ORJSONRoute
+    profiler = Profiler(lambda path: path, token="secret")
+    app.add_middleware(ProfilerMiddleware, profiler=profiler)
+
+    @app.get("/sync")
+    def sync_endpoint():
+        return {"n": busy_work(0.2)}
+
+    return app, profiler
+
+
+class SamplerThreadPoolTest(unittest.TestCase):
+    def test_sync_endpoint_frames_are_sampled(self):
+        app, profiler = build_app()
+
+        async def request() -> httpx.Response:
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await client.get("/sync", headers={"X-Profiler-Mode": "sampler", "X-Profiler-Token": "secret"})
+
+        response = asyncio.run(request())
+        self.assertEqual(response.status_code, 200)
+
+        [record] = profiler.matching("/sync", "sampler")
+        stacks = profiler.collapsed_text([record])
+        self.assertIn("sync_endpoint", stacks)
+        self.assertIn(":busy_work", stacks)
+        # 請求結束後不再讀取工作執行緒
+        self.assertEqual(profiler.sampler._targets, {})
+
+
+if __name__ == "__main__":
+    unittest.main()